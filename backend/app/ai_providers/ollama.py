@@ -6,6 +6,9 @@ import json
 import asyncio
 from typing import Dict, List, Any, AsyncGenerator, Optional
 from .base import AIProvider
+from app.core.hot_path_logging import get_hot_path_logger
+
+HOT_PATH_LOG = get_hot_path_logger("providers")
 
 class OllamaProvider(AIProvider):
     @property
@@ -54,11 +57,13 @@ class OllamaProvider(AIProvider):
             yield chunk
 
     async def chat_completion(self, messages: List[Dict[str, Any]], model: str, params: Dict[str, Any]) -> Dict[str, Any]:
-        print(f"[OLLAMA] CHAT_COMPLETION CALLED")
-        print(f"[OLLAMA] Server URL: {self.server_url}")
-        print(f"[OLLAMA] Server Name: {self.server_name}")
-        print(f"[OLLAMA] Model: {model}")
-        print(f"[OLLAMA] Messages: {len(messages)} messages")
+        HOT_PATH_LOG.debug(
+            "[OLLAMA] chat_completion",
+            server_url=self.server_url,
+            server_name=self.server_name,
+            model=model,
+            message_count=len(messages),
+        )
         if isinstance(params.get("tools"), list) and params.get("tools"):
             return await self._call_ollama_chat_api(messages, model, params)
 
@@ -434,7 +439,7 @@ class OllamaProvider(AIProvider):
                                 except json.JSONDecodeError:
                                     continue
                     except asyncio.CancelledError:
-                        print("Streaming was cancelled at the response level")
+                        HOT_PATH_LOG.info("[OLLAMA] Streaming was cancelled at the response level", model=model)
                         # Try to close the response gracefully
                         try:
                             response.aclose()
@@ -442,7 +447,7 @@ class OllamaProvider(AIProvider):
                             pass
                         raise
         except asyncio.CancelledError:
-            print("Streaming was cancelled at the client level")
+            HOT_PATH_LOG.info("[OLLAMA] Streaming was cancelled at the client level", model=model)
             raise
         except Exception as e:
             yield self._format_error(e, model, done=True)
@@ -500,22 +505,23 @@ class OllamaProvider(AIProvider):
 
     def _format_chat_messages(self, messages: List[Dict[str, Any]]) -> str:
         try:
-            print(f"Formatting {len(messages)} messages")
             formatted = []
             for i, msg in enumerate(messages):
                 role = msg.get("role", "user")
                 content = msg.get("content", "")
                 tag = "system" if role == "system" else ("assistant" if role == "assistant" else "user")
                 formatted_msg = f"<{tag}>\n{content}\n</{tag}>"
-                print(f"  Formatting message {i+1}: role={role}, tag={tag}")
-                print(f"  Formatted message: {formatted_msg}")
                 formatted.append(formatted_msg)
             result = "\n".join(formatted)
-            print(f"Final formatted result length: {len(result)} characters")
-            print(f"FINAL FORMATTED PROMPT:\n{result}")
+            HOT_PATH_LOG.debug(
+                "[OLLAMA] Formatted %s messages into a %s character prompt",
+                len(messages),
+                len(result),
+                prompt=lambda: result,
+            )
             return result
         except Exception as e:
-            print(f"Chat formatting error: {e}")
+            HOT_PATH_LOG.error("[OLLAMA] Chat formatting error: %s", e)
             return "Hello, can you help me?"
 
     def _normalize_chat_messages_for_ollama(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, settings, ollama, ai_providers, ai_provider_settings, navigation_routes, components, conversations, tags, personas, plugin_state, demo, searxng, documents, jobs, diagnostics, mcp_registry
+from app.api.v1.endpoints import auth, settings, ollama, ai_providers, ai_provider_settings, navigation_routes, components, conversations, tags, personas, plugin_state, demo, searxng, documents, jobs, diagnostics, mcp_registry, audit_logs
 from app.api.v1.internal import internal_router
 from app.routers import plugins
 from app.routes.pages import router as pages_router
@@ -23,6 +23,7 @@ api_router.include_router(documents.router, prefix="/documents", tags=["document
 api_router.include_router(jobs.router, tags=["jobs"])
 # Diagnostics
 api_router.include_router(diagnostics.router, tags=["diagnostics"])
+api_router.include_router(audit_logs.router, tags=["audit"])
 # Include the plugins router (which already includes the lifecycle router)
 api_router.include_router(plugins.router, tags=["plugins"])
 api_router.include_router(pages_router)
@@ -9,18 +9,20 @@ import asyncio
 import logging
 import re
 import traceback
+import uuid
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 from typing import List, Dict, Any, Optional
-from urllib import error as urllib_error
-from urllib import request as urllib_request
 from urllib.parse import urlsplit, urlunsplit
-from fastapi import APIRouter, HTTPException, Depends, Body, Query
+from fastapi import APIRouter, HTTPException, Depends, Body, Query, Header
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text, select
 from sqlalchemy.orm.attributes import flag_modified
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.hot_path_logging import get_hot_path_logger
+from app.core.request_timing import begin_request_timings, timed_stage
+from app.core.database import get_db, db_factory
 from app.core.auth_deps import require_user, optional_user
 from app.core.auth_context import AuthContext
 from app.core.rate_limit_deps import rate_limit_user
@@ -37,13 +39,31 @@ from app.schemas.ai_providers import (
     ValidationRequest,
 )
 from app.utils.persona_utils import apply_persona_prompt_and_params
+from app.services.chat_persistence import ChatTurnWriter
+from app.services.chat_intent import (
+    NEW_PAGE_LABEL_SPLIT_PATTERN,
+    NEXT_WEEKDAY_PATTERN,
+    RELATIVE_DATE_PHRASE_PATTERNS,
+    analyze_message,
+)
+from app.services.conversation_context import ConversationContextBuilder, collect_history_event_ids
+from app.services.digest_delivery import (
+    enqueue_digest_delivery_dispatch,
+    queue_digest_delivery,
+    resolve_delivery_target,
+)
 from app.services.mcp_registry_service import MCPRegistryService, infer_safety_class
+from app.services.model_catalog import get_model_catalog_service
+from app.services.request_coalescer import request_coalescer, request_key
+from app.services.scope_context_cache import scope_context_cache
+from app.services.tool_call_scheduler import ToolPassScheduler
 
 # Flag to enable/disable test routes (set to False in production)
 TEST_ROUTES_ENABLED = os.getenv("ENABLE_TEST_ROUTES", "True").lower() == "true"
 
 router = APIRouter()
 MODULE_LOGGER = logging.getLogger(__name__)
+CHAT_LOG = get_hot_path_logger("chat")
 
 DEFAULT_AUTO_CONTINUE_PROMPT = "Continue exactly where you left off. Do not repeat prior text."
 DEFAULT_AUTO_CONTINUE_MAX_PASSES = 2
@@ -374,7 +394,6 @@ COMPOUND_EDIT_MAX_OPERATIONS = 4
 DIGEST_DELIVERY_HANDOFF_MAX_CHARS = 12_000
 ENV_DIGEST_DELIVERY_OUTBOX_PATH = "BRAINDRIVE_DIGEST_DELIVERY_OUTBOX_PATH"
 DIGEST_DELIVERY_SEND_TIMEOUT_SECONDS = 8.0
-DIGEST_DELIVERY_SEND_MAX_ERROR_CHARS = 1_200
 ENV_DIGEST_DELIVERY_SEND_ENABLED = "BRAINDRIVE_DIGEST_DELIVERY_SEND_ENABLED"
 ENV_DIGEST_DELIVERY_ENDPOINT = "BRAINDRIVE_DIGEST_DELIVERY_ENDPOINT"
 ENV_DIGEST_DELIVERY_TIMEOUT_SECONDS = "BRAINDRIVE_DIGEST_DELIVERY_TIMEOUT_SECONDS"
@@ -1267,6 +1286,18 @@ def _estimate_message_token_count(messages: List[Dict[str, Any]]) -> int:
     return max(1, int(total_chars / 4))
 
 
+def _resolve_history_token_budget(params: Dict[str, Any]) -> int:
+    context_window_tokens = _as_int(
+        params.get("mcp_context_window_tokens", 0),
+        default=0,
+        minimum=0,
+        maximum=2_000_000,
+    )
+    if context_window_tokens > 0:
+        return max(int(context_window_tokens * settings.CONVERSATION_CONTEXT_HISTORY_RATIO), 1)
+    return settings.CONVERSATION_CONTEXT_BUDGET_TOKENS
+
+
 def _extract_pre_compaction_flush_config(provider_params: Dict[str, Any]) -> Dict[str, Any]:
     enabled = _as_bool(provider_params.pop("mcp_pre_compaction_flush_enabled", True), True)
     context_window_tokens = _as_int(
@@ -1514,25 +1545,6 @@ def _extract_digest_delivery_send_config(provider_params: Dict[str, Any]) -> Dic
     }
 
 
-def _collect_mcp_event_ids_from_history(
-    messages: List[Any],
-    *,
-    event_key: str,
-) -> set[str]:
-    event_ids: set[str] = set()
-    for message in messages:
-        metadata = getattr(message, "message_metadata", None)
-        if not isinstance(metadata, dict):
-            continue
-        mcp_meta = metadata.get("mcp")
-        if not isinstance(mcp_meta, dict):
-            continue
-        event_id = str(mcp_meta.get(event_key) or "").strip()
-        if event_id:
-            event_ids.add(event_id)
-    return event_ids
-
-
 def _apply_digest_schedule_prompt(
     *,
     messages: List[Dict[str, Any]],
@@ -1920,7 +1932,7 @@ def _persist_digest_delivery_handoff_payload(
     try:
         output_dir.mkdir(parents=True, exist_ok=True)
         output_path.write_text(
-            json.dumps(handoff_payload, ensure_ascii=True, indent=2, sort_keys=True),
+            json.dumps(handoff_payload, ensure_ascii=True, sort_keys=True),
             encoding="utf-8",
         )
         return {"status": "persisted", "path": str(output_path)}
@@ -1928,120 +1940,7 @@ def _persist_digest_delivery_handoff_payload(
         return {"status": "error", "error": str(exc)}
 
 
-def _dispatch_digest_delivery_handoff_sync(
-    *,
-    endpoint: str,
-    timeout_seconds: float,
-    headers: Dict[str, str],
-    handoff_payload: Dict[str, Any],
-) -> Dict[str, Any]:
-    endpoint_sanitized = _sanitize_delivery_endpoint_for_metadata(endpoint)
-    request_data = json.dumps(handoff_payload, ensure_ascii=True).encode("utf-8")
-    request_obj = urllib_request.Request(
-        url=endpoint,
-        data=request_data,
-        headers=headers,
-        method="POST",
-    )
-    try:
-        with urllib_request.urlopen(request_obj, timeout=timeout_seconds) as response:
-            status_code = int(getattr(response, "status", 0) or response.getcode() or 0)
-            raw_body = response.read().decode("utf-8", errors="replace").strip()
-            result: Dict[str, Any] = {
-                "status": "sent" if 200 <= status_code < 300 else "http_error",
-                "http_status": status_code,
-                "endpoint": endpoint_sanitized,
-            }
-            if raw_body:
-                try:
-                    parsed = json.loads(raw_body)
-                except Exception:
-                    parsed = None
-                if isinstance(parsed, dict):
-                    for key in (
-                        "ack_id",
-                        "ackId",
-                        "delivery_id",
-                        "deliveryId",
-                        "message_id",
-                        "messageId",
-                        "id",
-                    ):
-                        value = parsed.get(key)
-                        if isinstance(value, str) and value.strip():
-                            result["ack_id"] = value.strip()
-                            break
-                    if result["status"] != "sent":
-                        result["error"] = raw_body[:DIGEST_DELIVERY_SEND_MAX_ERROR_CHARS]
-                elif result["status"] != "sent":
-                    result["error"] = raw_body[:DIGEST_DELIVERY_SEND_MAX_ERROR_CHARS]
-            return result
-    except urllib_error.HTTPError as exc:
-        body = exc.read().decode("utf-8", errors="replace").strip()
-        return {
-            "status": "http_error",
-            "http_status": int(exc.code),
-            "error": (body or str(exc))[:DIGEST_DELIVERY_SEND_MAX_ERROR_CHARS],
-            "endpoint": endpoint_sanitized,
-        }
-    except urllib_error.URLError as exc:
-        return {
-            "status": "network_error",
-            "error": str(getattr(exc, "reason", exc)),
-            "endpoint": endpoint_sanitized,
-        }
-    except Exception as exc:
-        return {
-            "status": "error",
-            "error": str(exc),
-            "endpoint": endpoint_sanitized,
-        }
-
-
-async def _send_digest_delivery_handoff(
-    *,
-    handoff_payload: Optional[Dict[str, Any]],
-    send_config: Optional[Dict[str, Any]],
-) -> Dict[str, Any]:
-    if not isinstance(handoff_payload, dict):
-        return {"status": "skipped_invalid_payload"}
-    if not isinstance(send_config, dict):
-        return {"status": "skipped_unconfigured"}
-
-    enabled = bool(send_config.get("enabled"))
-    endpoint = str(send_config.get("endpoint") or "").strip()
-    endpoint_sanitized = _sanitize_delivery_endpoint_for_metadata(endpoint)
-    if not enabled:
-        return {
-            "status": "skipped_disabled",
-            "endpoint": endpoint_sanitized,
-        }
-    if not endpoint:
-        return {
-            "status": "skipped_unconfigured_endpoint",
-            "endpoint": endpoint_sanitized,
-        }
-
-    headers = send_config.get("headers") if isinstance(send_config.get("headers"), dict) else {}
-    timeout_seconds = _as_float(
-        send_config.get("timeout_seconds", DIGEST_DELIVERY_SEND_TIMEOUT_SECONDS),
-        default=DIGEST_DELIVERY_SEND_TIMEOUT_SECONDS,
-        minimum=0.5,
-        maximum=60.0,
-    )
-    result = await asyncio.to_thread(
-        _dispatch_digest_delivery_handoff_sync,
-        endpoint=endpoint,
-        timeout_seconds=timeout_seconds,
-        headers={str(k): str(v) for k, v in headers.items() if str(k).strip()},
-        handoff_payload=handoff_payload,
-    )
-    if "endpoint" not in result:
-        result["endpoint"] = endpoint_sanitized
-    return result
-
-
-def _attach_digest_delivery_persistence(
+async def _attach_digest_delivery_persistence(
     *,
     handoff_payload: Optional[Dict[str, Any]],
     user_id: Any,
@@ -2050,7 +1949,8 @@ def _attach_digest_delivery_persistence(
     if not isinstance(handoff_payload, dict):
         return handoff_payload
 
-    persistence = _persist_digest_delivery_handoff_payload(
+    persistence = await asyncio.to_thread(
+        _persist_digest_delivery_handoff_payload,
         handoff_payload=handoff_payload,
         user_id=user_id,
     )
@@ -2079,7 +1979,7 @@ async def _attach_digest_delivery_delivery_state(
     tooling_metadata: Optional[Dict[str, Any]] = None,
     send_config: Optional[Dict[str, Any]] = None,
 ) -> Optional[Dict[str, Any]]:
-    enriched = _attach_digest_delivery_persistence(
+    enriched = await _attach_digest_delivery_persistence(
         handoff_payload=handoff_payload,
         user_id=user_id,
         tooling_metadata=tooling_metadata,
@@ -2087,35 +1987,57 @@ async def _attach_digest_delivery_delivery_state(
     if not isinstance(enriched, dict):
         return enriched
 
-    send_result = await _send_digest_delivery_handoff(
-        handoff_payload=enriched,
-        send_config=send_config,
-    )
-    send_status = str(send_result.get("status") or "").strip() or "unknown"
+    # Sending happens in the digest delivery dispatch job; here we only decide
+    # whether the handoff is queued. See _queue_digest_delivery_for_message.
+    send_state = resolve_delivery_target(send_config)
+    send_status = send_state["status"]
     enriched["delivery_send_status"] = send_status
-    if send_result.get("endpoint"):
-        enriched["delivery_send_endpoint"] = str(send_result["endpoint"])
-    if isinstance(send_result.get("http_status"), int):
-        enriched["delivery_send_http_status"] = int(send_result["http_status"])
-    if send_result.get("ack_id"):
-        enriched["delivery_send_ack_id"] = str(send_result["ack_id"])
-    if send_result.get("error"):
-        enriched["delivery_send_error"] = str(send_result["error"])
+    if send_state.get("endpoint"):
+        enriched["delivery_send_endpoint"] = str(send_state["endpoint"])
+    if send_status == "queued":
+        enriched["delivery_outbox_id"] = uuid.uuid4().hex
 
     if isinstance(tooling_metadata, dict):
         tooling_metadata["digest_delivery_send_status"] = send_status
-        if send_result.get("endpoint"):
-            tooling_metadata["digest_delivery_send_endpoint"] = str(send_result["endpoint"])
-        if isinstance(send_result.get("http_status"), int):
-            tooling_metadata["digest_delivery_send_http_status"] = int(send_result["http_status"])
-        if send_result.get("ack_id"):
-            tooling_metadata["digest_delivery_send_ack_id"] = str(send_result["ack_id"])
-        if send_result.get("error"):
-            tooling_metadata["digest_delivery_send_error"] = str(send_result["error"])
+        if send_state.get("endpoint"):
+            tooling_metadata["digest_delivery_send_endpoint"] = str(send_state["endpoint"])
+        if enriched.get("delivery_outbox_id"):
+            tooling_metadata["digest_delivery_outbox_id"] = enriched["delivery_outbox_id"]
 
     return enriched
 
 
+def _queue_digest_delivery_for_message(
+    db: AsyncSession,
+    *,
+    handoff_payload: Optional[Dict[str, Any]],
+    user_id: Any,
+    message_id: str,
+    send_config: Optional[Dict[str, Any]],
+) -> bool:
+    """Add the outbox row for a queued handoff to the message's transaction."""
+    if not isinstance(handoff_payload, dict) or handoff_payload.get("delivery_send_status") != "queued":
+        return False
+    send_state = resolve_delivery_target(send_config)
+    if send_state["status"] != "queued" or not user_id:
+        return False
+
+    queue_digest_delivery(
+        db,
+        outbox_id=str(handoff_payload["delivery_outbox_id"]),
+        user_id=str(user_id),
+        message_id=message_id,
+        handoff_payload={
+            key: value
+            for key, value in handoff_payload.items()
+            if not key.startswith("delivery_send_")
+        },
+        target=send_state["target"],
+        endpoint_sanitized=send_state.get("endpoint"),
+    )
+    return True
+
+
 def _is_capture_intake_conversation(conversation_type: str) -> bool:
     normalized = _normalize_conversation_type(conversation_type)
     return normalized == "capture" or _is_digest_reply_conversation(normalized)
@@ -2389,6 +2311,56 @@ def _build_tool_result_message(
 
 
 
+def _append_tool_execution_result(
+    *,
+    provider: Any,
+    tool_call_id: str,
+    tool_name: str,
+    tool_arguments: Dict[str, Any],
+    synthetic_reason: Optional[str],
+    execution: Dict[str, Any],
+    executed_tool_calls: List[Dict[str, Any]],
+    loop_messages: List[Dict[str, Any]],
+) -> None:
+    if execution.get("ok"):
+        tool_content = execution.get("data", {})
+        executed_tool_calls.append(
+            {
+                "id": tool_call_id,
+                "name": tool_name,
+                "status": "success",
+                "latency_ms": execution.get("latency_ms"),
+                "arguments": tool_arguments,
+                "result": tool_content,
+                "synthetic_reason": synthetic_reason,
+            }
+        )
+    else:
+        tool_content = {
+            "ok": False,
+            "error": execution.get("error"),
+        }
+        executed_tool_calls.append(
+            {
+                "id": tool_call_id,
+                "name": tool_name,
+                "status": "error",
+                "arguments": tool_arguments,
+                "error": execution.get("error"),
+                "synthetic_reason": synthetic_reason,
+            }
+        )
+
+    loop_messages.append(
+        _build_tool_result_message(
+            provider=provider,
+            tool_name=tool_name,
+            tool_call_id=tool_call_id,
+            content=json.dumps(tool_content, ensure_ascii=True),
+        )
+    )
+
+
 def _extract_resolved_tool_safety(resolved_tools: List[Dict[str, Any]]) -> Dict[str, str]:
     safety: Dict[str, str] = {}
     for schema in resolved_tools:
@@ -2734,6 +2706,20 @@ def _extract_tool_execution_error_code(tool_call_payload: Dict[str, Any]) -> Opt
     return None
 
 
+def _interpret_scope_metadata_result(
+    execution: Dict[str, Any],
+) -> tuple[Optional[bool], Optional[Dict[str, Any]]]:
+    if execution.get("ok"):
+        return True, None
+
+    error = execution.get("error") if isinstance(execution.get("error"), dict) else {}
+    nested_code = _extract_nested_mcp_error_code(error)
+    if nested_code == "FILE_NOT_FOUND":
+        return False, None
+
+    return None, error if error else {"code": "UNKNOWN_ERROR", "message": "Metadata lookup failed."}
+
+
 async def _check_scope_file_exists(
     *,
     runtime_service: MCPRegistryService,
@@ -2748,15 +2734,50 @@ async def _check_scope_file_exists(
         arguments={"path": path},
         plugin_slug_hint=plugin_slug_hint,
     )
-    if execution.get("ok"):
-        return True, None
+    return _interpret_scope_metadata_result(execution)
 
-    error = execution.get("error") if isinstance(execution.get("error"), dict) else {}
-    nested_code = _extract_nested_mcp_error_code(error)
-    if nested_code == "FILE_NOT_FOUND":
-        return False, None
 
-    return None, error if error else {"code": "UNKNOWN_ERROR", "message": "Metadata lookup failed."}
+async def _check_scope_files_exist(
+    *,
+    runtime_service: MCPRegistryService,
+    mcp_user_id: str,
+    plugin_slug_hint: Optional[str],
+    paths: List[str],
+) -> Dict[str, tuple[Optional[bool], Optional[Dict[str, Any]]]]:
+    """Existence of each path, from the scope context cache or concurrent metadata calls."""
+    generation = scope_context_cache.generation(mcp_user_id)
+    results: Dict[str, tuple[Optional[bool], Optional[Dict[str, Any]]]] = {}
+    misses: List[str] = []
+    for path in paths:
+        cached = scope_context_cache.get_file_exists(mcp_user_id, path)
+        if cached is None:
+            misses.append(path)
+        else:
+            results[path] = (cached, None)
+
+    if misses:
+        executions = await runtime_service.execute_tool_calls(
+            mcp_user_id,
+            [("read_file_metadata", {"path": path}) for path in misses],
+        )
+        for path, execution in zip(misses, executions):
+            error = execution.get("error") if isinstance(execution.get("error"), dict) else {}
+            if not execution.get("ok") and error.get("code") == "TOOL_NOT_ALLOWED":
+                # Runtime tool registry is out of date; resync once via the serial path.
+                results[path] = await _check_scope_file_exists(
+                    runtime_service=runtime_service,
+                    mcp_user_id=mcp_user_id,
+                    plugin_slug_hint=plugin_slug_hint,
+                    path=path,
+                )
+            else:
+                results[path] = _interpret_scope_metadata_result(execution)
+
+            exists = results[path][0]
+            if exists is not None:
+                scope_context_cache.store_file_exists(mcp_user_id, path, exists, generation)
+
+    return {path: results[path] for path in paths}
 
 
 async def _build_orchestration_context_payload(
@@ -2798,14 +2819,13 @@ async def _build_orchestration_context_payload(
             }
             required_files_unverified.append(target_path)
     else:
-        for filename in required_files:
-            target_path = f"{scope_path.rstrip('/')}/{filename}"
-            exists, error = await _check_scope_file_exists(
-                runtime_service=runtime_service,
-                mcp_user_id=mcp_user_id,
-                plugin_slug_hint=plugin_slug_hint,
-                path=target_path,
-            )
+        file_status = await _check_scope_files_exist(
+            runtime_service=runtime_service,
+            mcp_user_id=mcp_user_id,
+            plugin_slug_hint=plugin_slug_hint,
+            paths=[f"{scope_path.rstrip('/')}/{filename}" for filename in required_files],
+        )
+        for target_path, (exists, error) in file_status.items():
             entry: Dict[str, Any] = {"exists": exists}
             if isinstance(error, dict) and error:
                 entry["error"] = error
@@ -2840,14 +2860,13 @@ async def _build_orchestration_context_payload(
             required_file_map = {}
             required_files_missing = []
             required_files_unverified = []
-            for filename in required_files:
-                target_path = f"{scope_path.rstrip('/')}/{filename}"
-                exists, error = await _check_scope_file_exists(
-                    runtime_service=runtime_service,
-                    mcp_user_id=mcp_user_id,
-                    plugin_slug_hint=plugin_slug_hint,
-                    path=target_path,
-                )
+            file_status = await _check_scope_files_exist(
+                runtime_service=runtime_service,
+                mcp_user_id=mcp_user_id,
+                plugin_slug_hint=plugin_slug_hint,
+                paths=[f"{scope_path.rstrip('/')}/{filename}" for filename in required_files],
+            )
+            for target_path, (exists, error) in file_status.items():
                 entry: Dict[str, Any] = {"exists": exists}
                 if isinstance(error, dict) and error:
                     entry["error"] = error
@@ -2872,7 +2891,20 @@ async def _build_orchestration_context_payload(
         onboarding_topic = _extract_life_topic_from_scope_path(scope_path) or _extract_life_topic(
             _normalize_conversation_type(conversation_type)
         )
-        if has_onboarding_state_tool:
+        cached_onboarding_state = (
+            scope_context_cache.get_onboarding_state(mcp_user_id) if has_onboarding_state_tool else None
+        )
+        if cached_onboarding_state is not None:
+            onboarding_state = cached_onboarding_state
+            starter_topics = onboarding_state.get("starter_topics")
+            if (
+                onboarding_topic
+                and isinstance(starter_topics, dict)
+                and isinstance(starter_topics.get(onboarding_topic), str)
+            ):
+                onboarding_topic_status = str(starter_topics[onboarding_topic])
+        elif has_onboarding_state_tool:
+            onboarding_generation = scope_context_cache.generation(mcp_user_id)
             onboarding_result = await _execute_tool_with_resync_fallback(
                 runtime_service=runtime_service,
                 mcp_user_id=mcp_user_id,
@@ -2888,6 +2920,9 @@ async def _build_orchestration_context_payload(
                         state = onboarding_data.get("state")
                         if isinstance(state, dict):
                             onboarding_state = state
+                            scope_context_cache.store_onboarding_state(
+                                mcp_user_id, state, onboarding_generation
+                            )
                             starter_topics = state.get("starter_topics")
                             if (
                                 onboarding_topic
@@ -3245,57 +3280,19 @@ def _latest_non_approval_user_message_text(messages: List[Dict[str, Any]]) -> Op
 def _is_life_onboarding_kickoff_intent(message_text: Optional[str]) -> bool:
     if not isinstance(message_text, str):
         return False
-
-    normalized = message_text.strip().lower()
-    if not normalized:
-        return False
-
-    has_onboarding_context = "onboarding" in normalized or "interview" in normalized
-    has_start_intent = any(
-        token in normalized
-        for token in ("start", "begin", "kickoff", "kick off", "let us start", "lets start")
-    )
-    return has_onboarding_context and has_start_intent
+    return analyze_message(message_text).is_onboarding_kickoff
 
 
 def _is_life_onboarding_skip_intent(message_text: Optional[str]) -> bool:
     if not isinstance(message_text, str):
         return False
-
-    normalized = " ".join(message_text.strip().lower().split())
-    if not normalized:
-        return False
-
-    skip_markers = (
-        "skip",
-        "skip this",
-        "pass",
-        "move on",
-        "next question",
-        "not now",
-        "later",
-    )
-    return any(marker in normalized for marker in skip_markers)
+    return analyze_message(message_text).is_onboarding_skip
 
 
 def _is_life_onboarding_resume_intent(message_text: Optional[str]) -> bool:
     if not isinstance(message_text, str):
         return False
-
-    normalized = " ".join(message_text.strip().lower().split())
-    if not normalized:
-        return False
-
-    resume_markers = (
-        "resume",
-        "continue",
-        "pick up",
-        "where we left off",
-    )
-    has_onboarding_context = "onboarding" in normalized or "interview" in normalized
-    return any(marker in normalized for marker in resume_markers) and (
-        has_onboarding_context or len(normalized.split()) <= 3
-    )
+    return analyze_message(message_text).is_onboarding_resume
 
 
 def _is_life_onboarding_topic_complete(status: Optional[str]) -> bool:
@@ -3529,8 +3526,8 @@ def _normalize_relative_dates_in_text(text: str) -> tuple[str, List[Dict[str, st
         "next week": (now + timedelta(days=7)).date(),
         "month end": _month_end(now).date(),
     }
-    for phrase, resolved_date in static_phrases.items():
-        pattern = re.compile(rf"\b{re.escape(phrase)}\b", flags=re.IGNORECASE)
+    for phrase, pattern in RELATIVE_DATE_PHRASE_PATTERNS:
+        resolved_date = static_phrases[phrase]
         if not pattern.search(normalized_text):
             continue
         replacement = f"{phrase} ({resolved_date.isoformat()})"
@@ -3546,11 +3543,7 @@ def _normalize_relative_dates_in_text(text: str) -> tuple[str, List[Dict[str, st
         "saturday": 5,
         "sunday": 6,
     }
-    weekday_pattern = re.compile(
-        r"\bnext\s+(monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b",
-        flags=re.IGNORECASE,
-    )
-    for match in list(weekday_pattern.finditer(normalized_text)):
+    for match in list(NEXT_WEEKDAY_PATTERN.finditer(normalized_text)):
         weekday_name = match.group(1).lower()
         resolved = _next_weekday(now, weekday_map[weekday_name]).date().isoformat()
         phrase = match.group(0)
@@ -4123,110 +4116,13 @@ def _has_successful_tool_execution(
 def _capture_task_mutation_kind(message_text: Optional[str]) -> Optional[str]:
     if not isinstance(message_text, str):
         return None
-
-    normalized = " ".join(message_text.strip().lower().split())
-    if not normalized:
-        return None
-
-    if not re.search(r"\b(task|tasks|todo|to-do|t-\d{1,6})\b", normalized):
-        return None
-
-    negated_mutation_patterns = (
-        r"\b(?:do\s+not|don't|dont|without)\s+(?:create|add|open|make|edit|modify|update|change|complete|close|finish|resolve|mark)\b",
-        r"\blookup\s+only\b",
-        r"\bread[\s-]?only\b",
-        r"\bno\s+changes?\b",
-    )
-    if any(re.search(pattern, normalized) for pattern in negated_mutation_patterns):
-        return None
-
-    create_new_markers = (
-        "create a task",
-        "create task",
-        "new task",
-        "add a task",
-        "add task",
-        "make a task",
-        "open a task",
-        "log a task",
-        "track a task",
-    )
-    if any(marker in normalized for marker in create_new_markers):
-        return None
-
-    completion_patterns = (
-        r"\bcomplete(d|ing)?\b",
-        r"\bmark\b.{0,32}\b(done|complete|completed)\b",
-        r"\bdone\b",
-        r"\bfinish(ed|ing)?\b",
-        r"\bclose(d|ing)?\b",
-        r"\bresolve(d|ing)?\b",
-    )
-    if any(re.search(pattern, normalized) for pattern in completion_patterns):
-        return "complete"
-
-    edit_patterns = (
-        r"\b(edit|update|modify|change|adjust|rename|reschedule)\b",
-        r"\bassign(?:ed)?\b",
-        r"\bset\b.{0,32}\b(?:due|owner|assignee|priority|status|tags?|scope|project)\b",
-        r"\bmove\b.{0,32}\b(?:due|owner|assignee|priority|status|tags?|scope|project|to\s+p[0-3])\b",
-    )
-    if any(re.search(pattern, normalized) for pattern in edit_patterns):
-        return "edit"
-
-    return None
+    return analyze_message(message_text).task_mutation_kind
 
 
 def _capture_is_task_lookup_intent(message_text: Optional[str]) -> bool:
     if not isinstance(message_text, str):
         return False
-
-    normalized = " ".join(message_text.strip().lower().split())
-    if not normalized:
-        return False
-
-    if not re.search(r"\b(task|tasks|todo|to-do|t-\d{1,6})\b", normalized):
-        return False
-
-    if _capture_task_mutation_kind(normalized) in {"complete", "edit"}:
-        return False
-
-    create_markers = (
-        "create a task",
-        "create task",
-        "new task",
-        "add a task",
-        "add task",
-        "make a task",
-        "open a task",
-        "log a task",
-        "track a task",
-    )
-    if any(marker in normalized for marker in create_markers):
-        return False
-
-    if normalized.endswith("?"):
-        return True
-
-    lookup_markers = (
-        "check",
-        "show",
-        "list",
-        "find",
-        "lookup",
-        "look up",
-        "search",
-        "existing",
-        "open task",
-        "open tasks",
-        "already",
-        "match",
-        "matches",
-        "read-only",
-        "read only",
-        "lookup only",
-    )
-    return any(marker in normalized for marker in lookup_markers)
+    return analyze_message(message_text).is_task_lookup
 
 
 def _is_capture_existing_task_mutation_intent(message_text: Optional[str]) -> bool:
@@ -5029,51 +4925,13 @@ def _build_capture_scope_fanout_tool_call(
 def _capture_is_new_task_intent(message_text: Optional[str]) -> bool:
     if not isinstance(message_text, str):
         return False
-
-    normalized = " ".join(message_text.strip().lower().split())
-    if not normalized:
-        return False
-
-    if not re.search(r"\b(task|tasks|todo|to-do)\b", normalized):
-        return False
-
-    if _capture_task_mutation_kind(normalized) in {"complete", "edit"}:
-        return False
-
-    if "task:" in normalized or normalized.startswith("todo:"):
-        return True
-
-    create_markers = (
-        "create a task",
-        "create task",
-        "new task",
-        "add a task",
-        "add task",
-        "make a task",
-        "open a task",
-        "log a task",
-        "track a task",
-    )
-    return any(marker in normalized for marker in create_markers)
+    return analyze_message(message_text).is_new_task
 
 
 def _extract_capture_priority_from_text(message_text: Optional[str]) -> Optional[str]:
     if not isinstance(message_text, str):
         return None
-
-    lowered = " ".join(message_text.strip().lower().split())
-    if not lowered:
-        return None
-
-    if re.search(r"\b(p0|critical|blocker)\b", lowered):
-        return "p0"
-    if re.search(r"\b(p1|urgent|highest priority|high priority)\b", lowered):
-        return "p1"
-    if re.search(r"\b(p2|medium priority|normal priority)\b", lowered):
-        return "p2"
-    if re.search(r"\b(p3|low priority)\b", lowered):
-        return "p3"
-    return None
+    return analyze_message(message_text).priority
 
 
 def _extract_capture_owner_from_text(message_text: Optional[str]) -> Optional[str]:
@@ -5167,53 +5025,12 @@ def _strip_capture_owner_prefix_from_task_segment(task_text: str) -> str:
 def _extract_capture_tags_from_text(message_text: Optional[str]) -> List[str]:
     if not isinstance(message_text, str):
         return []
+    return list(analyze_message(message_text).capture_tags)
 
-    tags: List[str] = []
-    seen: set[str] = set()
 
-    for hash_tag in re.findall(r"#([a-z0-9][a-z0-9_-]{1,30})", message_text, flags=re.IGNORECASE):
-        normalized = hash_tag.strip().lower()
-        if normalized and normalized not in seen:
-            seen.add(normalized)
-            tags.append(normalized)
-
-    labeled_match = re.search(
-        r"\btags?\s*:\s*([^\n\r;.]*)",
-        message_text,
-        flags=re.IGNORECASE,
-    )
-    if labeled_match:
-        raw_value = str(labeled_match.group(1) or "").strip()
-        if raw_value:
-            stop_match = re.search(
-                r"\b(?:due|by|priority|owner|assign(?:ed)?|scope|project)\b",
-                raw_value,
-                flags=re.IGNORECASE,
-            )
-            if stop_match:
-                raw_value = raw_value[: stop_match.start()].strip(" ,")
-
-        if "," in raw_value:
-            raw_tokens = [token.strip() for token in raw_value.split(",")]
-        else:
-            raw_tokens = re.split(r"\s+", raw_value)
-        for token in raw_tokens:
-            normalized = token.strip().lower().strip("#")
-            if len(normalized) < 2:
-                continue
-            if not re.fullmatch(r"[a-z0-9][a-z0-9_-]{1,30}", normalized):
-                continue
-            if normalized in seen:
-                continue
-            seen.add(normalized)
-            tags.append(normalized)
-
-    return tags
-
-
-def _extract_capture_task_title_from_message(message_text: Optional[str]) -> Optional[str]:
-    if not isinstance(message_text, str):
-        return None
+def _extract_capture_task_title_from_message(message_text: Optional[str]) -> Optional[str]:
+    if not isinstance(message_text, str):
+        return None
 
     compact = " ".join(message_text.strip().split())
     if not compact:
@@ -5438,39 +5255,16 @@ def _extract_new_page_engine_request(
     if not isinstance(message_text, str):
         return None
 
-    normalized = " ".join(message_text.strip().split())
-    if not normalized:
+    new_page_request = analyze_message(message_text).new_page_request
+    if new_page_request is None:
         return None
 
-    verb_pattern = r"(?:create|add|start|open|make|build|spin up|set up|setup)"
-    typed_match = re.search(
-        rf"\b{verb_pattern}\s+(?:a\s+)?(?:new\s+)?(life|project)\s+"
-        r"(?:page|area|scope|workspace|folder)?(?:\s+(?:for|about|called|named))?\s+(.+)$",
-        normalized,
-        flags=re.IGNORECASE,
-    )
-    untyped_match = re.search(
-        rf"\b{verb_pattern}\s+(?:a\s+)?new\s+(?:page|area|scope|workspace|folder)"
-        r"(?:\s+(?:for|about|called|named))?\s+(.+)$",
-        normalized,
-        flags=re.IGNORECASE,
-    )
-    if not typed_match and not untyped_match:
-        return None
-
-    explicit_kind = ""
-    raw_name = ""
-    if typed_match:
-        explicit_kind = str(typed_match.group(1) or "").strip().lower()
-        raw_name = str(typed_match.group(2) or "").strip()
-    else:
-        raw_name = str(untyped_match.group(1) or "").strip()
-
+    explicit_kind, raw_name = new_page_request
     if not raw_name:
         return None
 
     # Keep the first clause as the page label; preserve long-form description in summary.
-    label = re.split(r"\b(?:with|where|so that|because)\b", raw_name, maxsplit=1, flags=re.IGNORECASE)[0]
+    label = NEW_PAGE_LABEL_SPLIT_PATTERN.split(raw_name, maxsplit=1)[0]
     label = label.strip(" .,:;!?")
     page_slug = _slugify_capture_fragment(label, fallback="", max_length=64)
     if not page_slug:
@@ -8104,12 +7898,14 @@ async def get_provider_instance_from_request(request, db):
         user_id = user_id.replace("-", "")
     
     logger = logging.getLogger(__name__)
-    print(f"🚀 PROVIDER REQUEST RECEIVED")
-    print(f"📊 Provider: {request.provider}")
-    print(f"📊 Settings ID: {request.settings_id}")
-    print(f"📊 Server ID: {request.server_id}")
-    print(f"📊 Model: {getattr(request, 'model', 'N/A')}")
-    print(f"📊 User ID: {user_id}")
+    CHAT_LOG.debug(
+        "Provider request received",
+        provider=request.provider,
+        settings_id=request.settings_id,
+        server_id=request.server_id,
+        model=getattr(request, "model", "N/A"),
+        user_id=user_id,
+    )
     logger.info(f"Getting provider instance for: settings_id={request.settings_id}, user_id={user_id}")
     logger.info(f"Original user_id from request: {request.user_id}")
     
@@ -8131,16 +7927,8 @@ async def get_provider_instance_from_request(request, db):
     try:
         # Get settings for the specified user
         MODULE_LOGGER.info(f"Fetching settings with definition_id={request.settings_id}, user_id={user_id}")
-        settings = await SettingInstance.get_all_parameterized(
-            db,
-            definition_id=request.settings_id,
-            scope=SettingScope.USER.value,
-            user_id=user_id
-        )
-        # Fallback to legacy direct SQL if ORM returns none (compat with legacy enum storage)
-        if not settings or len(settings) == 0:
-            MODULE_LOGGER.info("ORM returned no settings; falling back to direct SQL query for settings")
-            settings = await SettingInstance.get_all(
+        with timed_stage("settings_lookup"):
+            settings = await SettingInstance.get_all_parameterized(
                 db,
                 definition_id=request.settings_id,
                 scope=SettingScope.USER.value,
@@ -8168,11 +7956,12 @@ async def get_provider_instance_from_request(request, db):
                 
                 # Get provider instance
                 MODULE_LOGGER.info(f"Getting provider instance for: {request.provider}, {request.server_id}")
-                provider_instance = await provider_registry.get_provider(
-                    request.provider,
-                    request.server_id,
-                    config
-                )
+                with timed_stage("provider_init"):
+                    provider_instance = await provider_registry.get_provider(
+                        request.provider,
+                        request.server_id,
+                        config
+                    )
                 
                 MODULE_LOGGER.info(f"Got provider instance: {provider_instance.provider_name}")
                 
@@ -8193,11 +7982,12 @@ async def get_provider_instance_from_request(request, db):
                     else:
                         config = {"api_key": env_key}
 
-                    provider_instance = await provider_registry.get_provider(
-                        request.provider,
-                        request.server_id,
-                        config
-                    )
+                    with timed_stage("provider_init"):
+                        provider_instance = await provider_registry.get_provider(
+                            request.provider,
+                            request.server_id,
+                            config
+                        )
                     MODULE_LOGGER.info(f"Got provider instance with env key: {provider_instance.provider_name}")
                     return provider_instance
 
@@ -8457,11 +8247,12 @@ async def get_provider_instance_from_request(request, db):
         
         # Get provider instance
         logger.debug(f"Getting provider instance for: {request.provider}, {request.server_id}")
-        provider_instance = await provider_registry.get_provider(
-            request.provider,
-            request.server_id,
-            config
-        )
+        with timed_stage("provider_init"):
+            provider_instance = await provider_registry.get_provider(
+                request.provider,
+                request.server_id,
+                config
+            )
         
         MODULE_LOGGER.info(f"Got provider instance: {provider_instance.provider_name}")
         
@@ -8556,13 +8347,6 @@ async def get_provider_catalog(
             scope=SettingScope.USER.value,
             user_id=user_id
         )
-        if not settings or len(settings) == 0:
-            settings = await SettingInstance.get_all(
-                db,
-                definition_id=settings_id,
-                scope=SettingScope.USER.value,
-                user_id=user_id
-            )
         if not settings or len(settings) == 0:
             return None
 
@@ -8698,15 +8482,6 @@ async def get_models(
         )
         
         print(f"Found {len(settings)} settings for user_id={user_id}")
-        
-        if not settings or len(settings) == 0:
-            print("ORM returned no settings; falling back to direct SQL query")
-            settings = await SettingInstance.get_all(
-                db,
-                definition_id=settings_id,
-                scope=SettingScope.USER.value,
-                user_id=user_id
-            )
 
         if not settings or len(settings) == 0:
             raise HTTPException(status_code=404, detail=f"Provider settings not found for user_id={user_id}")
@@ -8849,11 +8624,18 @@ async def get_models(
 @router.get("/all-models")
 async def get_all_models(
     user_id: Optional[str] = Query("current", description="User ID"),
+    stream: bool = Query(False, description="Stream providers that miss the initial deadline as SSE events"),
     db: AsyncSession = Depends(get_db),
     auth: Optional[AuthContext] = Depends(optional_user),
     _: None = Depends(rate_limit_user(limit=100, window_seconds=60))
 ):
-    """Get models from ALL connected providers for a user."""
+    """
+    Get models from ALL connected providers for a user.
+
+    Providers are queried concurrently and cached by the model catalog service.
+    Providers that have not answered by the response deadline are listed in
+    ``pending_providers``; with ``stream=true`` their models follow as events.
+    """
     try:
         # Resolve user_id from authentication if "current" is specified
         if user_id == "current":
@@ -8864,267 +8646,31 @@ async def get_all_models(
         # Normalize user_id by removing hyphens if present
         user_id = user_id.replace("-", "")
         
-        print(f"Getting all models for user: {user_id}")
-        
-        # Define all possible provider settings
-        provider_settings = [
-            {
-                "provider": "openai",
-                "settings_id": "openai_api_keys_settings",
-                "server_id": "openai_default_server"
-            },
-            {
-                "provider": "openrouter", 
-                "settings_id": "openrouter_api_keys_settings",
-                "server_id": "openrouter_default_server"
-            },
-            {
-                "provider": "claude",
-                "settings_id": "claude_api_keys_settings", 
-                "server_id": "claude_default_server"
-            },
-            {
-                "provider": "groq",
-                "settings_id": "groq_api_keys_settings",
-                "server_id": "groq_default_server"
-            },
-            {
-                "provider": "ollama",
-                "settings_id": "ollama_servers_settings",
-                "server_id": None  # Ollama uses dynamic server IDs
-            }
-        ]
-        
-        all_models = []
-        errors = []
-        successful_providers = 0
-        
-        # Helper to map provider to API key env var
-        def _get_env_api_key(provider_name: str) -> Optional[str]:
-            env_map = {
-                "openrouter": "OPENROUTER_API_KEY",
-                "openai": "OPENAI_API_KEY",
-                "claude": "ANTHROPIC_API_KEY",
-                "groq": "GROQ_API_KEY",
-            }
-            env_var = env_map.get(provider_name.lower())
-            if env_var:
-                return os.getenv(env_var)
-            return None
+        catalog = get_model_catalog_service()
+        if stream:
+            # Settings are read before the response starts; the stream only awaits fetches.
+            snapshot = await catalog.snapshot(db, user_id)
+            catalog.schedule_keep_warm(user_id)
 
-        # Process each provider
-        for provider_config in provider_settings:
-            try:
-                provider = provider_config["provider"]
-                settings_id = provider_config["settings_id"]
-                server_id = provider_config["server_id"]
-                
-                print(f"Processing provider: {provider}")
-                
-                # Get settings for this provider (prefer ORM; fallback to direct SQL if none)
-                settings = await SettingInstance.get_all_parameterized(
-                    db,
-                    definition_id=settings_id,
-                    scope=SettingScope.USER.value,
-                    user_id=user_id
-                )
-                if not settings or len(settings) == 0:
-                    print(f"ORM returned no settings for {provider}; falling back to direct SQL")
-                    settings = await SettingInstance.get_all(
-                        db,
-                        definition_id=settings_id,
-                        scope=SettingScope.USER.value,
-                        user_id=user_id
-                    )
-                
-                if not settings or len(settings) == 0:
-                    print(f"No settings found for {provider}")
-                    # For API-key providers, try env fallback
-                    if provider in {"openai", "openrouter", "claude", "groq"}:
-                        env_key = _get_env_api_key(provider)
-                        if env_key:
-                            try:
-                                if provider == "openai":
-                                    config = {"api_key": env_key, "server_url": "https://api.openai.com/v1", "server_name": "OpenAI API"}
-                                elif provider == "openrouter":
-                                    config = {"api_key": env_key, "server_url": "https://openrouter.ai/api/v1", "server_name": "OpenRouter API"}
-                                elif provider == "claude":
-                                    config = {"api_key": env_key, "server_url": "https://api.anthropic.com", "server_name": "Claude API"}
-                                elif provider == "groq":
-                                    config = {"api_key": env_key, "server_url": "https://api.groq.com", "server_name": "Groq API"}
-                                else:
-                                    config = {"api_key": env_key}
-
-                                provider_instance = await provider_registry.get_provider(provider, server_id or f"{provider}_default_server", config)
-                                models = await provider_instance.get_models()
-                                for model in models:
-                                    model["provider"] = provider
-                                    model["server_id"] = server_id or f"{provider}_default_server"
-                                    model["server_name"] = config["server_name"]
-                                    all_models.append(model)
-                                successful_providers += 1
-                                print(f"Successfully loaded {len(models)} models from {provider} via env key")
-                            except Exception as e:
-                                error_msg = f"Failed to load models from {provider} via env key: {str(e)}"
-                                errors.append(error_msg)
-                                print(f"Error: {error_msg}")
-                        else:
-                            print(f"No env key for {provider}; skipping")
-                    # Continue to next provider
-                    continue
-                
-                # Use the first setting found
-                setting = settings[0]
-                setting_value = setting['value'] if isinstance(setting, dict) else setting.value
-                setting_instance_id = setting['id'] if isinstance(setting, dict) else getattr(setting, 'id', '')
+            async def catalog_event_stream():
+                async for event in catalog.stream_catalog(snapshot):
+                    yield f"data: {json.dumps(event)}\n\n"
 
-                # Robust parse to handle encrypted or malformed values
-                try:
-                    value_dict = None
-                    if isinstance(setting_value, str) and encryption_service.is_encrypted_value(setting_value):
-                        # Decrypt first, then use the decrypted JSON
-                        try:
-                            value_dict = encryption_service.decrypt_field('settings_instances', 'value', setting_value)
-                        except EncryptionError as ee:
-                            raise ValueError(f"Decryption failed for {settings_id}: {str(ee)}")
-                    else:
-                        # Use safe parser which handles multiple JSON edge cases
-                        value_dict = safe_encrypted_json_parse(
-                            setting_value,
-                            context=f"all-models settings_id={settings_id}, user_id={user_id}",
-                            setting_id=setting_instance_id,
-                            definition_id=settings_id,
-                        )
-                except Exception as e:
-                    err = f"Failed to parse settings for {provider}: {str(e)}"
-                    print(err)
-                    errors.append(err)
-                    # For Ollama, attempt a safe default structure; otherwise skip
-                    if provider == "ollama":
-                        value_dict = create_default_ollama_settings()
-                    elif provider in {"openai", "openrouter", "claude", "groq"}:
-                        # Try env fallback for API-key providers
-                        env_key = _get_env_api_key(provider)
-                        if env_key:
-                            value_dict = {"api_key": env_key}
-                        else:
-                            continue
-                
-                # Check if provider has valid configuration
-                if provider == "ollama":
-                    # Ollama needs servers array
-                    if not isinstance(value_dict, dict) or not value_dict.get("servers") or len(value_dict["servers"]) == 0:
-                        print(f"No servers configured for {provider}, skipping")
-                        continue
-                else:
-                    # Other providers need API key (accept both api_key and apiKey)
-                    if not isinstance(value_dict, dict):
-                        print(f"Invalid settings format for {provider}, skipping")
-                        continue
-                    api_key = value_dict.get("api_key") or value_dict.get("apiKey")
-                    if not api_key:
-                        print(f"No API key for {provider}, skipping")
-                        continue
-                
-                # Get provider instance and models
-                if provider == "ollama":
-                    # Handle Ollama servers dynamically
-                    for server in value_dict["servers"]:
-                        try:
-                            config = {
-                                "server_url": server.get("serverAddress"),
-                                "api_key": server.get("apiKey", ""),
-                                "server_name": server.get("serverName", "Unknown Server")
-                            }
-                            
-                            provider_instance = await provider_registry.get_provider(
-                                provider,
-                                server["id"],
-                                config
-                            )
-                            
-                            models = await provider_instance.get_models()
-                            for model in models:
-                                model["provider"] = provider
-                                model["server_id"] = server["id"]
-                                model["server_name"] = server.get("serverName", "Unknown Server")
-                                all_models.append(model)
-                            
-                            successful_providers += 1
-                            print(f"Successfully loaded {len(models)} models from {provider} server: {server['id']}")
-                            
-                        except Exception as e:
-                            error_msg = f"Failed to load models from {provider} server {server.get('id', 'unknown')}: {str(e)}"
-                            errors.append(error_msg)
-                            print(f"Error: {error_msg}")
-                else:
-                    # Handle API key-based providers
-                    try:
-                        if provider == "openai":
-                            config = {
-                                "api_key": value_dict.get("api_key") or value_dict.get("apiKey"),
-                                "server_url": "https://api.openai.com/v1",
-                                "server_name": "OpenAI API"
-                            }
-                        elif provider == "openrouter":
-                            config = {
-                                "api_key": value_dict.get("api_key") or value_dict.get("apiKey") or _get_env_api_key("openrouter"),
-                                "server_url": "https://openrouter.ai/api/v1",
-                                "server_name": "OpenRouter API"
-                            }
-                        elif provider == "claude":
-                            config = {
-                                "api_key": value_dict.get("api_key") or value_dict.get("apiKey") or _get_env_api_key("claude"),
-                                "server_url": "https://api.anthropic.com",
-                                "server_name": "Claude API"
-                            }
-                        elif provider == "groq":
-                            config = {
-                                "api_key": value_dict.get("api_key") or value_dict.get("apiKey") or _get_env_api_key("groq"),
-                                "server_url": "https://api.groq.com",
-                                "server_name": "Groq API"
-                            }
-                        
-                        provider_instance = await provider_registry.get_provider(
-                            provider,
-                            server_id,
-                            config
-                        )
-                        
-                        models = await provider_instance.get_models()
-                        for model in models:
-                            model["provider"] = provider
-                            model["server_id"] = server_id
-                            model["server_name"] = config["server_name"]
-                            all_models.append(model)
-                        
-                        successful_providers += 1
-                        print(f"Successfully loaded {len(models)} models from {provider}")
-                        
-                    except Exception as e:
-                        error_msg = f"Failed to load models from {provider}: {str(e)}"
-                        errors.append(error_msg)
-                        print(f"Error: {error_msg}")
-                
-            except Exception as e:
-                error_msg = f"Error processing {provider}: {str(e)}"
-                errors.append(error_msg)
-                print(f"Error: {error_msg}")
-        
-        print(f"Total models loaded: {len(all_models)} from {successful_providers} providers")
-        
-        return {
-            "models": all_models,
-            "total_count": len(all_models),
-            "successful_providers": successful_providers,
-            "errors": errors,
-            "summary": {
-                "total_providers_checked": len(provider_settings),
-                "successful_providers": successful_providers,
-                "failed_providers": len(errors),
-                "total_models": len(all_models)
-            }
-        }
+            return StreamingResponse(
+                catalog_event_stream(),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+
+        result = await catalog.get_catalog(db, user_id)
+        MODULE_LOGGER.info(
+            "Loaded %d models from %d providers for user %s (%d pending)",
+            result["total_count"],
+            result["successful_providers"],
+            user_id,
+            len(result["pending_providers"]),
+        )
+        return result
         
     except HTTPException:
         raise
@@ -9135,12 +8681,60 @@ async def get_all_models(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _close_session_after_stream(body_iterator, db: AsyncSession):
+    try:
+        async for chunk in body_iterator:
+            yield chunk
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+    finally:
+        await db.close()
+
+
+async def _run_with_own_session(handler):
+    """Run ``handler`` with a session it owns rather than the request-scoped one.
+
+    A coalesced stream is produced by a background task that outlives the
+    request (and its ``get_db`` teardown), so the session is committed and
+    closed when the stream body finishes instead.
+    """
+    db = db_factory.session_factory()
+    try:
+        result = await handler(db)
+    except BaseException:
+        await db.rollback()
+        await db.close()
+        raise
+    if isinstance(result, StreamingResponse):
+        result.body_iterator = _close_session_after_stream(result.body_iterator, db)
+        return result
+    try:
+        await db.commit()
+    finally:
+        await db.close()
+    return result
+
+
 @router.post("/generate")
-async def generate_text(request: TextGenerationRequest, db: AsyncSession = Depends(get_db)):
+async def generate_text(
+    request: TextGenerationRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
     """Generate text from a prompt.
     
     Uses the 'stream' parameter to determine whether to return a streaming or batch response.
+    Retries with the same Idempotency-Key (or an identical in-flight body) share one provider call.
     """
+    return await request_coalescer.run(
+        request_key("generate", request, idempotency_key),
+        lambda: _run_with_own_session(lambda db: _generate_text(request, db)),
+        replayable=bool(idempotency_key),
+    )
+
+
+async def _generate_text(request: TextGenerationRequest, db: AsyncSession):
     try:
         # Get provider instance using the helper function
         provider_instance = await get_provider_instance_from_request(request, db)
@@ -9197,24 +8791,38 @@ async def cancel_generation(request: dict = Body(...)):
         }
 
 @router.post("/chat")
-async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Depends(get_db)):
+async def chat_completion(
+    request: ChatCompletionRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
     """Generate a chat completion.
     
     Uses the 'stream' parameter to determine whether to return a streaming or batch response.
     Also stores the conversation history in the database and uses it for context.
+    Retries with the same Idempotency-Key (or an identical in-flight body) join the running
+    turn instead of starting another provider call.
     """
+    return await request_coalescer.run(
+        request_key("chat", request, idempotency_key),
+        lambda: _run_with_own_session(lambda db: _chat_completion(request, db)),
+        replayable=bool(idempotency_key),
+    )
+
+
+async def _chat_completion(request: ChatCompletionRequest, db: AsyncSession):
     logger = logging.getLogger(__name__)
+    request_timings = begin_request_timings("chat")
     try:
-        print(f"🎯 CHAT COMPLETION ENDPOINT CALLED")
-        print(f"📊 Provider: {request.provider}")
-        print(f"📊 Settings ID: {request.settings_id}")
-        print(f"📊 Server ID: {request.server_id}")
-        print(f"📊 Model: {request.model}")
-        print(f"📊 User ID: {request.user_id}")
-        print(f"📊 Stream: {request.stream}")
-        MODULE_LOGGER.info(f"Production chat endpoint called with: provider={request.provider}, settings_id={request.settings_id}, server_id={request.server_id}, model={request.model}")
-        logger.debug(f"Messages: {request.messages}")
-        logger.debug(f"Params: {request.params}")
+        CHAT_LOG.info(
+            "Chat completion endpoint called",
+            provider=request.provider,
+            settings_id=request.settings_id,
+            server_id=request.server_id,
+            model=request.model,
+            user_id=request.user_id,
+            stream=request.stream,
+        )
+        CHAT_LOG.debug("Chat request payload", messages=lambda: request.messages, params=lambda: request.params)
         
         # Validate persona data if provided
         if request.persona_id or request.persona_system_prompt or request.persona_model_settings:
@@ -9249,7 +8857,7 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
         
         # Convert messages to the format expected by the provider
         current_messages = [message.model_dump() for message in request.messages]
-        print(f"Current messages: {current_messages}")
+        CHAT_LOG.debug("Received %s current messages", len(current_messages), messages=lambda: current_messages)
         
         combined_messages = current_messages.copy()
 
@@ -9257,6 +8865,9 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
         from app.models.conversation import Conversation
         from app.models.message import Message
         import uuid
+
+        # Writes for this turn are staged and committed together (see ChatTurnWriter)
+        turn_writer = ChatTurnWriter(db)
         
         # Extract user_id from the request
         user_id = request.user_id
@@ -9265,35 +8876,35 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
         conversation_was_created = False
         history_pre_compaction_event_ids: set[str] = set()
         history_digest_schedule_event_ids: set[str] = set()
-        print(f"Conversation ID from request: {conversation_id}")
-        print(f"USER ID from request: {user_id} - THIS SHOULD BE THE CURRENT USER'S ID, NOT HARDCODED")
-        
-        # Debug: Print the entire request for inspection
-        print(f"Request details:")
-        print(f"  provider: {request.provider}")
-        print(f"  settings_id: {request.settings_id}")
-        print(f"  server_id: {request.server_id}")
-        print(f"  model: {request.model}")
-        print(f"  user_id: {user_id}")
-        print(f"  conversation_id: {conversation_id}")
-        print(f"  messages count: {len(request.messages)}")
+        history_context = None
+        CHAT_LOG.debug(
+            "Resolved chat request",
+            conversation_id=conversation_id,
+            user_id=user_id,
+            messages_count=len(request.messages),
+        )
         for i, msg in enumerate(request.messages):
-            print(f"    Message {i+1}: role={msg.role}, content={msg.content[:50]}...")
+            CHAT_LOG.debug("Message %s: role=%s", i + 1, msg.role, content=lambda: msg.content[:50])
             
             # If conversation_id is provided, get the existing conversation
             if conversation_id:
-                print(f"Attempting to retrieve conversation with ID: {conversation_id}")
+                CHAT_LOG.debug("Attempting to retrieve conversation with ID: %s", conversation_id)
                 conversation = await Conversation.get_by_id(db, conversation_id)
                 if not conversation:
-                    print(f"ERROR: Conversation with ID {conversation_id} not found in database")
+                    CHAT_LOG.warning("Conversation with ID %s not found in database", conversation_id)
                     raise HTTPException(status_code=404, detail="Conversation not found")
                 
-                print(f"Found conversation: {conversation.id}, user_id: {conversation.user_id}")
+                CHAT_LOG.debug("Found conversation: %s, user_id: %s", conversation.id, conversation.user_id)
                 
                 # Ensure the user owns the conversation
                 if str(conversation.user_id) != str(user_id):
-                    print(f"ERROR: User {user_id} is not authorized to access conversation {conversation_id}")
-                    print(f"Conversation owner: {conversation.user_id}, Request user: {user_id}, Original request user_id: {request.user_id}")
+                    CHAT_LOG.warning("User %s is not authorized to access conversation %s", user_id, conversation_id)
+                    CHAT_LOG.debug(
+                        "Conversation owner: %s, Request user: %s, Original request user_id: %s",
+                        conversation.user_id,
+                        user_id,
+                        request.user_id,
+                    )
                     raise HTTPException(status_code=403, detail="Not authorized to access this conversation")
 
                 requested_page_id = _normalize_page_id(request.page_id)
@@ -9308,74 +8919,38 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                     )
                 if requested_page_id and not conversation_page_id:
                     conversation.page_id = requested_page_id
-                    await db.commit()
-                    await db.refresh(conversation)
                 
                 # Update conversation with persona_id if provided and different from current
                 if request.persona_id and conversation.persona_id != request.persona_id:
                     MODULE_LOGGER.info(f"Updating conversation {conversation_id} with persona_id: {request.persona_id}")
                     conversation.persona_id = request.persona_id
-                    await db.commit()
-                    await db.refresh(conversation)
                 
-                # Get previous messages for this conversation
-                print(f"Retrieving previous messages for conversation {conversation_id}")
-                previous_messages = await conversation.get_messages(db)
-                print(f"Retrieved {len(previous_messages)} previous messages")
-                history_pre_compaction_event_ids = _collect_mcp_event_ids_from_history(
-                    previous_messages,
-                    event_key="pre_compaction_flush_event_id",
-                )
-                history_digest_schedule_event_ids = _collect_mcp_event_ids_from_history(
-                    previous_messages,
-                    event_key="digest_schedule_event_id",
+                # Get the newest messages that fit the history budget (older turns are summarized)
+                CHAT_LOG.debug("Retrieving previous messages for conversation %s", conversation_id)
+                history_started_at = time.perf_counter()
+                history_context = await ConversationContextBuilder(
+                    _resolve_history_token_budget(request.params or {}),
+                    max_messages=max(settings.CONVERSATION_CONTEXT_MAX_MESSAGES - len(current_messages), 1),
+                ).build(db, conversation, skip_trailing_user=len(current_messages) > 0)
+                history_event_ids = await collect_history_event_ids(
+                    db,
+                    conversation.id,
+                    ("pre_compaction_flush_event_id", "digest_schedule_event_id"),
                 )
-                
-                # Convert previous messages to the format expected by the provider
-                if previous_messages and len(previous_messages) > 0:
-                    # Sort messages by created_at to ensure correct order
-                    previous_messages.sort(key=lambda x: x.created_at)
-                    print(f"Sorted {len(previous_messages)} messages by timestamp")
-                    
-                    # Print all previous messages for debugging
-                    for i, msg in enumerate(previous_messages):
-                        print(f"  Previous message {i+1}: sender={msg.sender}, created_at={msg.created_at}, content={msg.message[:50]}...")
-                    
-                    # Convert to the format expected by the provider
-                    # We'll skip the last message if it's from the user, as it's likely duplicated in the current request
-                    skip_last = previous_messages[-1].sender == "user" and len(current_messages) > 0
-                    print(f"Skip last message: {skip_last} (last message sender: {previous_messages[-1].sender}, current messages: {len(current_messages)})")
-                    
-                    history_messages = []
-                    for i, msg in enumerate(previous_messages):
-                        # Skip the last message if it's from the user and we have current messages
-                        if skip_last and i == len(previous_messages) - 1:
-                            print(f"  Skipping last message (index {i})")
-                            continue
-                        
-                        # Prefer explicit role stored in metadata, fall back to sender
-                        role = None
-                        if msg.message_metadata and isinstance(msg.message_metadata, dict):
-                            role = msg.message_metadata.get("role")
-                        if role not in {"assistant", "user", "system"}:
-                            role = "assistant" if msg.sender == "llm" else "user"
-                        
-                        history_messages.append({
-                            "role": role,
-                            "content": msg.message
-                        })
-                        print(f"  Added message to history: role={role}, content={msg.message[:50]}...")
-                    
-                    # Replace combined_messages with history followed by current
-                    combined_messages = history_messages + current_messages
-                    
-                    print(f"Using {len(history_messages)} previous messages + {len(current_messages)} current messages = {len(combined_messages)} total messages")
-                    print(f"Final combined messages:")
-                    for i, msg in enumerate(combined_messages):
-                        print(f"  Combined message {i+1}: role={msg.get('role', 'unknown')}, content={msg.get('content', '')[:50]}...")
-                    
-                    MODULE_LOGGER.info(f"Using {len(history_messages)} previous messages for context")
-                    logger.debug(f"Combined messages: {combined_messages}")
+                history_pre_compaction_event_ids = history_event_ids["pre_compaction_flush_event_id"]
+                history_digest_schedule_event_ids = history_event_ids["digest_schedule_event_id"]
+                request_timings.record("history_load", (time.perf_counter() - history_started_at) * 1000)
+
+                if history_context.messages:
+                    combined_messages = history_context.messages + current_messages
+                    CHAT_LOG.debug(
+                        "Using %s previous messages (%s tokens, %s summarized) + %s current messages",
+                        history_context.included_count,
+                        history_context.history_tokens,
+                        history_context.omitted_count,
+                        len(current_messages),
+                    )
+                    MODULE_LOGGER.info(f"Using {history_context.included_count} previous messages for context")
             else:
                 # Create a new conversation
                 conversation = Conversation(
@@ -9389,11 +8964,9 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                     conversation_type=request.conversation_type or "chat",  # New field with default
                     persona_id=request.persona_id  # Store persona_id when creating conversation
                 )
-                db.add(conversation)
-                await db.commit()
-                await db.refresh(conversation)
+                turn_writer.add(conversation)
                 conversation_was_created = True
-                print(f"Created new conversation with ID: {conversation.id}")
+                CHAT_LOG.debug("Created new conversation with ID: %s", conversation.id)
                 
                 # If persona has a sample greeting, add it as the first assistant message
                 if request.persona_sample_greeting:
@@ -9410,9 +8983,9 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                             "temperature": 0.0  # Greeting is static, not generated
                         }
                     )
-                    db.add(greeting_message)
-                    await db.commit()
-                    print(f"Added persona sample greeting: {request.persona_sample_greeting[:50]}...")
+                    turn_writer.add(greeting_message)
+                    CHAT_LOG.debug("Added persona sample greeting to conversation %s", conversation.id)
+            turn_writer.bind_conversation(conversation)
             
             document_context_mode = (request.params or {}).get("document_context_mode")
 
@@ -9422,7 +8995,7 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                 request.params or {},
                 request.persona_system_prompt,
                 request.persona_model_settings,
-                max_history=100  # trim oldest history messages if needed
+                max_history=settings.CONVERSATION_CONTEXT_MAX_MESSAGES  # trim oldest history messages if needed
             )
             owner_profile_system_message, owner_profile_metadata = _build_owner_profile_system_message(
                 user_id
@@ -9516,6 +9089,8 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
             if scope_source:
                 mcp_tooling_metadata["mcp_scope_source"] = scope_source
             mcp_tooling_metadata.update(owner_profile_metadata)
+            if history_context is not None:
+                mcp_tooling_metadata.update(history_context.metadata())
             tool_routing_decision = _resolve_tool_routing_decision(
                 provider=request.provider,
                 model=request.model,
@@ -9711,7 +9286,10 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                     pending_meta["mcp"] = pending_mcp
                     pending_message.message_metadata = pending_meta
                     flag_modified(pending_message, "message_metadata")
-                    await db.commit()
+                    # The resolution must be durable before an approved tool runs, or a
+                    # failed turn would leave the request pending and let it run again.
+                    with request_timings.span("db_commit"):
+                        await turn_writer.commit()
 
                     approval_resume_context = {
                         "action": approval_action,
@@ -9825,6 +9403,7 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                     "policy_mode"
                 )
 
+            tool_resolution_started_at = time.perf_counter()
             resolved_tools: List[Dict[str, Any]] = []
             mcp_user_id = user_id or "current"
             if bool(mcp_scope.get("mcp_tools_enabled")) and str(mcp_scope.get("mcp_scope_mode")) == "project":
@@ -9832,10 +9411,12 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
 
                 if bool(mcp_scope.get("mcp_sync_on_request")) and mcp_user_id != "current":
                     try:
-                        await mcp_service.sync_user_servers(
-                            mcp_user_id,
-                            plugin_slug_filter=mcp_scope.get("mcp_plugin_slug"),
-                        )
+                        # Syncing commits, so it gets its own session rather than committing the turn's.
+                        async with db_factory.session_factory() as sync_db:
+                            await MCPRegistryService(sync_db).sync_user_servers(
+                                mcp_user_id,
+                                plugin_slug_filter=mcp_scope.get("mcp_plugin_slug"),
+                            )
                     except Exception as sync_error:
                         logger.warning(
                             "mcp_sync_on_request_failed user_id=%s error=%s",
@@ -9868,6 +9449,7 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                 resolved_tools,
                 request.provider,
             )
+            request_timings.record("tool_resolution", (time.perf_counter() - tool_resolution_started_at) * 1000)
             if sanitized_schema_count > 0:
                 mcp_tooling_metadata["sanitized_tool_schema_count"] = sanitized_schema_count
                 mcp_tooling_metadata["sanitized_tool_schema_provider"] = str(
@@ -9980,6 +9562,7 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                     db,
                     call_timeout_seconds=mcp_tool_timeout_seconds,
                 )
+                orchestration_started_at = time.perf_counter()
                 try:
                     orchestration_context_payload = await _build_orchestration_context_payload(
                         runtime_service=context_runtime_service,
@@ -10012,6 +9595,9 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                         "context_missing": ["orchestration_context_build"],
                         "context_ready": False,
                     }
+                request_timings.record(
+                    "orchestration_context", (time.perf_counter() - orchestration_started_at) * 1000
+                )
 
                 if isinstance(orchestration_context_payload, dict):
                     mcp_tooling_metadata["orchestration_context"] = orchestration_context_payload
@@ -10039,7 +9625,7 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
             # Store incoming messages (user/system) in the database
             for msg in request.messages:
                 if msg.role == "system" and document_context_mode == "one-shot":
-                    print("Skipping persistence of one-shot document context system message.")
+                    CHAT_LOG.debug("Skipping persistence of one-shot document context system message.")
                     continue
 
                 if msg.role in {"user", "system"}:
@@ -10051,8 +9637,8 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                         message=msg.content,
                         message_metadata={"role": msg.role}
                     )
-                    db.add(db_message)
-                    print(f"Added {msg.role} message to database: {msg.content[:50]}...")
+                    turn_writer.add(db_message)
+                    CHAT_LOG.debug("Added %s message to database", msg.role)
             
             deterministic_tool_calls: List[Dict[str, Any]] = []
             deterministic_response_content: Optional[str] = None
@@ -11463,17 +11049,16 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                         "tool_calls_executed": deterministic_tool_calls,
                         deterministic_state_key: deterministic_state_to_store,
                     },
+                    "timings": request_timings.metadata(),
                 }
-                db_message = Message(
-                    id=str(uuid.uuid4()),
-                    conversation_id=conversation.id,
-                    sender="llm",
-                    message=deterministic_response_content,
-                    message_metadata=message_metadata,
+                turn_writer.stage_assistant_message(
+                    message_id=str(uuid.uuid4()),
+                    content=deterministic_response_content,
+                    metadata=message_metadata,
                 )
-                db.add(db_message)
-                conversation.updated_at = db_message.created_at
-                await db.commit()
+                with request_timings.span("db_commit"):
+                    await turn_writer.commit()
+                request_timings.finish(mode="deterministic")
 
                 if request.stream:
                     async def deterministic_stream_generator():
@@ -11550,9 +11135,15 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
 
             # Handle streaming
             if request.stream:
+                # The conversation and the user's messages must be durable before the client sees the conversation id
+                with request_timings.span("db_commit"):
+                    await turn_writer.commit()
+
                 async def stream_generator():
+                    stream_outcome = "ok"
+                    assistant_message_id = str(uuid.uuid4())
                     try:
-                        print(f"Starting streaming with model: {request.model}")
+                        CHAT_LOG.debug("Starting streaming with model: %s", request.model)
                         full_response = ""
                         token_count = 0
                         start_time = time.time()
@@ -11573,7 +11164,7 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                             yield f"data: {json.dumps(initial_evt)}\n\n"
                         except Exception as init_evt_error:
                             # Don't fail the stream if the initial event fails
-                            print(f"Warning: failed to emit initial conversation_id event: {init_evt_error}")
+                            CHAT_LOG.warning("Failed to emit initial conversation_id event: %s", init_evt_error)
 
                         try:
                             tooling_evt = {
@@ -11583,7 +11174,7 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                             }
                             yield f"data: {json.dumps(tooling_evt)}\n\n"
                         except Exception as tooling_evt_error:
-                            print(f"Warning: failed to emit tooling_state event: {tooling_evt_error}")
+                            CHAT_LOG.warning("Failed to emit tooling_state event: %s", tooling_evt_error)
 
                         if (
                             str(mcp_scope.get("mcp_scope_mode")) == "project"
@@ -11601,7 +11192,7 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                                 }
                                 yield f"data: {json.dumps(scope_evt)}\n\n"
                             except Exception as scope_evt_error:
-                                print(f"Warning: failed to emit project_scope_selected event: {scope_evt_error}")
+                                CHAT_LOG.warning("Failed to emit project_scope_selected event: %s", scope_evt_error)
 
                         pass_index = 1
                         loop_messages = _apply_digest_schedule_prompt(
@@ -11731,7 +11322,7 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                                         resume_tool_evt["synthetic_reason"] = resume_synthetic_reason
                                     yield f"data: {json.dumps(resume_tool_evt)}\n\n"
                                 except Exception as resume_evt_error:
-                                    print(f"Warning: failed to emit resumed tool_call event: {resume_evt_error}")
+                                    CHAT_LOG.warning("Failed to emit resumed tool_call event: %s", resume_evt_error)
 
                                 resume_tool_record = await mcp_runtime_service.get_enabled_tool(
                                     user_id or "current",
@@ -11832,17 +11423,18 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                                     }
                                     yield f"data: {json.dumps(resume_result_evt)}\n\n"
                                 except Exception as resume_result_evt_error:
-                                    print(
-                                        f"Warning: failed to emit resumed tool_result event: {resume_result_evt_error}"
+                                    CHAT_LOG.warning(
+                                        "Failed to emit resumed tool_result event: %s",
+                                        resume_result_evt_error,
                                     )
 
                         if approval_resolution_payload:
                             try:
                                 yield f"data: {json.dumps(approval_resolution_payload)}\n\n"
                             except Exception as approval_resolution_evt_error:
-                                print(
-                                    f"Warning: failed to emit approval_resolution event: "
-                                    f"{approval_resolution_evt_error}"
+                                CHAT_LOG.warning(
+                                    "Failed to emit approval_resolution event: %s",
+                                    approval_resolution_evt_error,
                                 )
 
                         while True:
@@ -11880,6 +11472,7 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
 
                                     content = extract_chunk_content(chunk)
                                     if content:
+                                        request_timings.mark_first_token()
                                         pass_text += content
                                         full_response += content
 
@@ -11897,6 +11490,13 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                                     yield f"data: {json.dumps(chunk)}\n\n"
                                     # Add an explicit flush marker
                                     yield ""
+
+                                    if turn_writer.checkpoint_due():
+                                        await turn_writer.checkpoint(
+                                            message_id=assistant_message_id,
+                                            content=full_response,
+                                            metadata={"model": request.model, "streaming": True},
+                                        )
                             except asyncio.TimeoutError:
                                 provider_pass_timed_out = True
                                 provider_timeout_count += 1
@@ -11910,9 +11510,9 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                                     mcp_provider_timeout_seconds,
                                 )
                             finally:
-                                provider_call_latencies_ms.append(
-                                    int((time.perf_counter() - pass_started_at) * 1000)
-                                )
+                                pass_latency_ms = int((time.perf_counter() - pass_started_at) * 1000)
+                                provider_call_latencies_ms.append(pass_latency_ms)
+                                request_timings.record("llm", pass_latency_ms)
 
                             if provider_pass_timed_out:
                                 break
@@ -11991,6 +11591,11 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                                 loop_messages.append(assistant_payload)
 
                                 executed_any = False
+                                tool_scheduler = ToolPassScheduler(
+                                    mcp_runtime_service,
+                                    user_id or "current",
+                                    pass_index,
+                                )
                                 for tool_call in pass_tool_calls:
                                     tool_call_id = str(tool_call.get("id") or "").strip()
                                     if not tool_call_id:
@@ -12062,6 +11667,22 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                                         tool_arguments=tool_arguments,
                                         synthetic_reason=synthetic_reason,
                                     )
+                                    tool_record = await mcp_runtime_service.get_enabled_tool(user_id or "current", tool_name)
+                                    defer_tool_call = tool_scheduler.can_defer(tool_name, tool_record)
+                                    if not defer_tool_call:
+                                        # Finish earlier read-only calls before anything order-sensitive.
+                                        for deferred in await tool_scheduler.drain():
+                                            _append_tool_execution_result(
+                                                provider=request.provider,
+                                                tool_call_id=deferred.tool_call_id,
+                                                tool_name=deferred.tool_name,
+                                                tool_arguments=deferred.arguments,
+                                                synthetic_reason=deferred.synthetic_reason,
+                                                execution=deferred.execution,
+                                                executed_tool_calls=stream_executed_tool_calls,
+                                                loop_messages=loop_messages,
+                                            )
+                                            yield f"data: {json.dumps({'type': 'tool_result', 'name': deferred.tool_name, 'ok': bool(deferred.execution.get('ok'))})}\n\n"
                                     try:
                                         tool_call_event = {
                                             "type": "tool_call",
@@ -12070,7 +11691,7 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                                         }
                                         yield f"data: {json.dumps(tool_call_event)}\n\n"
                                     except Exception as tool_call_evt_error:
-                                        print(f"Warning: failed to emit tool_call event: {tool_call_evt_error}")
+                                        CHAT_LOG.warning("Failed to emit tool_call event: %s", tool_call_evt_error)
 
                                     guard_error = _capture_task_guard_error(
                                         conversation_type=effective_conversation_type,
@@ -12110,13 +11731,12 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                                             }
                                             yield f"data: {json.dumps(tool_result_event)}\n\n"
                                         except Exception as tool_result_evt_error:
-                                            print(
-                                                "Warning: failed to emit blocked tool_result event: "
-                                                f"{tool_result_evt_error}"
+                                            CHAT_LOG.warning(
+                                                "Failed to emit blocked tool_result event: %s",
+                                                tool_result_evt_error,
                                             )
                                         continue
 
-                                    tool_record = await mcp_runtime_service.get_enabled_tool(user_id or "current", tool_name)
                                     if tool_record is None:
                                         tool_error = {
                                             "ok": False,
@@ -12182,7 +11802,10 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                                             }
                                             yield f"data: {json.dumps(context_evt)}\n\n"
                                         except Exception as context_evt_error:
-                                            print(f"Warning: failed to emit orchestration_context_error event: {context_evt_error}")
+                                            CHAT_LOG.warning(
+                                                "Failed to emit orchestration_context_error event: %s",
+                                                context_evt_error,
+                                            )
                                         break
 
                                     if (
@@ -12211,51 +11834,39 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                                         try:
                                             yield f"data: {json.dumps(approval_request_payload)}\n\n"
                                         except Exception as approval_evt_error:
-                                            print(f"Warning: failed to emit approval_request event: {approval_evt_error}")
+                                            CHAT_LOG.warning(
+                                                "Failed to emit approval_request event: %s",
+                                                approval_evt_error,
+                                            )
                                         break
 
+                                    if defer_tool_call:
+                                        tool_scheduler.defer(
+                                            tool_call_id=tool_call_id,
+                                            tool_name=tool_name,
+                                            arguments=tool_arguments,
+                                            synthetic_reason=synthetic_reason,
+                                            tool_record=tool_record,
+                                        )
+                                        executed_any = True
+                                        continue
+
                                     execution = await mcp_runtime_service.execute_tool_call(
                                         user_id or "current",
                                         tool_name,
                                         tool_arguments,
                                     )
                                     executed_any = True
-                                    if execution.get("ok"):
-                                        tool_result_payload = execution.get("data", {})
-                                        stream_executed_tool_calls.append(
-                                            {
-                                                "id": tool_call_id,
-                                                "name": tool_name,
-                                                "status": "success",
-                                                "latency_ms": execution.get("latency_ms"),
-                                                "arguments": tool_arguments,
-                                                "result": tool_result_payload,
-                                                "synthetic_reason": synthetic_reason,
-                                            }
-                                        )
-                                    else:
-                                        tool_result_payload = {
-                                            "ok": False,
-                                            "error": execution.get("error"),
-                                        }
-                                        stream_executed_tool_calls.append(
-                                            {
-                                                "id": tool_call_id,
-                                                "name": tool_name,
-                                                "status": "error",
-                                                "arguments": tool_arguments,
-                                                "error": execution.get("error"),
-                                                "synthetic_reason": synthetic_reason,
-                                            }
-                                        )
-
-                                    loop_messages.append(
-                                        _build_tool_result_message(
-                                            provider=request.provider,
-                                            tool_name=tool_name,
-                                            tool_call_id=tool_call_id,
-                                            content=json.dumps(tool_result_payload, ensure_ascii=True),
-                                        )
+                                    tool_scheduler.record_serial(tool_name, execution)
+                                    _append_tool_execution_result(
+                                        provider=request.provider,
+                                        tool_call_id=tool_call_id,
+                                        tool_name=tool_name,
+                                        tool_arguments=tool_arguments,
+                                        synthetic_reason=synthetic_reason,
+                                        execution=execution,
+                                        executed_tool_calls=stream_executed_tool_calls,
+                                        loop_messages=loop_messages,
                                     )
                                     try:
                                         tool_result_event = {
@@ -12265,7 +11876,24 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                                         }
                                         yield f"data: {json.dumps(tool_result_event)}\n\n"
                                     except Exception as tool_result_evt_error:
-                                        print(f"Warning: failed to emit tool_result event: {tool_result_evt_error}")
+                                        CHAT_LOG.warning("Failed to emit tool_result event: %s", tool_result_evt_error)
+
+                                for deferred in await tool_scheduler.drain():
+                                    _append_tool_execution_result(
+                                        provider=request.provider,
+                                        tool_call_id=deferred.tool_call_id,
+                                        tool_name=deferred.tool_name,
+                                        tool_arguments=deferred.arguments,
+                                        synthetic_reason=deferred.synthetic_reason,
+                                        execution=deferred.execution,
+                                        executed_tool_calls=stream_executed_tool_calls,
+                                        loop_messages=loop_messages,
+                                    )
+                                    yield f"data: {json.dumps({'type': 'tool_result', 'name': deferred.tool_name, 'ok': bool(deferred.execution.get('ok'))})}\n\n"
+                                pass_timing = await tool_scheduler.close()
+                                if pass_timing:
+                                    mcp_tooling_metadata.setdefault("tool_pass_timings", []).append(pass_timing)
+                                    request_timings.record("mcp_tools", pass_timing["wall_ms"])
 
                                 if approval_request_payload:
                                     break
@@ -12480,9 +12108,7 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                                 }
                                 yield f"data: {json.dumps(handoff_evt)}\n\n"
                             except Exception as handoff_evt_error:
-                                print(
-                                    f"Warning: failed to emit delivery_handoff event: {handoff_evt_error}"
-                                )
+                                CHAT_LOG.warning("Failed to emit delivery_handoff event: %s", handoff_evt_error)
 
                         # Store the LLM response in the database with persona metadata
                         message_metadata = {
@@ -12509,6 +12135,7 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                             message_metadata["mcp"]["approval_resolution"] = approval_resolution_payload
                         if stopped_by_guardrail:
                             message_metadata["stopped_by_guardrail"] = stopped_by_guardrail
+                        message_metadata["timings"] = request_timings.metadata()
                         
                         # Add persona metadata if persona was used
                         if request.persona_id:
@@ -12518,19 +12145,23 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                                 "persona_model_settings_applied": bool(request.persona_model_settings)
                             })
                         
-                        db_message = Message(
-                            id=str(uuid.uuid4()),
-                            conversation_id=conversation.id,
-                            sender="llm",
-                            message=full_response,
-                            message_metadata=message_metadata
+                        db_message = turn_writer.stage_assistant_message(
+                            message_id=assistant_message_id,
+                            content=full_response,
+                            metadata=message_metadata,
+                        )
+                        digest_delivery_queued = _queue_digest_delivery_for_message(
+                            db,
+                            handoff_payload=delivery_handoff_payload,
+                            user_id=user_id,
+                            message_id=db_message.id,
+                            send_config=digest_delivery_send_config,
                         )
-                        db.add(db_message)
-                        
-                        # Update the conversation's updated_at timestamp
-                        conversation.updated_at = db_message.created_at
                         
-                        await db.commit()
+                        with request_timings.span("db_commit"):
+                            await turn_writer.commit()
+                        if digest_delivery_queued:
+                            await enqueue_digest_delivery_dispatch(str(user_id))
 
                         if approval_request_payload:
                             approval_event = {
@@ -12541,8 +12172,14 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
 
                         yield "data: [DONE]\n\n"
                     except Exception as stream_error:
-                        print(f"Error in stream_generator: {stream_error}")
+                        stream_outcome = "error"
+                        CHAT_LOG.error("Error in stream_generator: %s", stream_error)
                         logger.error(f"Streaming error with persona_id {request.persona_id}: {stream_error}")
+                        await turn_writer.save_partial(
+                            message_id=assistant_message_id,
+                            content=full_response,
+                            metadata={"model": request.model, "streaming": True, "error": str(stream_error)},
+                        )
                         
                         # Enhanced error message for persona-related errors
                         error_message = f"Streaming error: {str(stream_error)}"
@@ -12556,6 +12193,8 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                         })
                         yield f"data: {error_json}\n\n"
                         yield "data: [DONE]\n\n"
+                    finally:
+                        request_timings.finish(mode="stream", outcome=stream_outcome)
                 
                 # Add headers to prevent buffering
                 headers = {
@@ -12572,11 +12211,13 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                 )
             
             # Handle non-streaming
-            print(f"Starting non-streaming chat completion with model: {request.model}")
+            CHAT_LOG.debug("Starting non-streaming chat completion with model: %s", request.model)
             start_time = time.time()
-            print(f"Sending {len(combined_messages)} messages to chat_completion")
-            for i, msg in enumerate(combined_messages):
-                print(f"  Message {i+1}: role={msg.get('role', 'unknown')}, content={msg.get('content', '')[:50]}...")
+            CHAT_LOG.debug(
+                "Sending %s messages to chat_completion",
+                len(combined_messages),
+                roles=lambda: [msg.get("role", "unknown") for msg in combined_messages],
+            )
 
             loop_messages = _apply_digest_schedule_prompt(
                 messages=list(combined_messages),
@@ -12830,9 +12471,9 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                             result = {}
                             break
                         finally:
-                            provider_call_latencies_ms.append(
-                                int((time.perf_counter() - provider_call_started_at) * 1000)
-                            )
+                            provider_call_latency_ms = int((time.perf_counter() - provider_call_started_at) * 1000)
+                            provider_call_latencies_ms.append(provider_call_latency_ms)
+                            request_timings.record("llm", provider_call_latency_ms)
                         if isinstance(result, dict) and result.get("error"):
                             error_value = result.get("error")
                             message_value = result.get("message")
@@ -12895,6 +12536,7 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                     loop_messages.append(assistant_payload)
 
                     executed_in_iteration = False
+                    tool_scheduler = ToolPassScheduler(mcp_runtime_service, user_id or "current", iteration)
                     for tool_call in tool_calls:
                         tool_call_id = str(tool_call.get("id") or "").strip()
                         if not tool_call_id:
@@ -12964,6 +12606,21 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                             tool_arguments=tool_arguments,
                             synthetic_reason=synthetic_reason,
                         )
+                        tool_record = await mcp_runtime_service.get_enabled_tool(user_id or "current", tool_name)
+                        defer_tool_call = tool_scheduler.can_defer(tool_name, tool_record)
+                        if not defer_tool_call:
+                            # Finish earlier read-only calls before anything order-sensitive.
+                            for deferred in await tool_scheduler.drain():
+                                _append_tool_execution_result(
+                                    provider=request.provider,
+                                    tool_call_id=deferred.tool_call_id,
+                                    tool_name=deferred.tool_name,
+                                    tool_arguments=deferred.arguments,
+                                    synthetic_reason=deferred.synthetic_reason,
+                                    execution=deferred.execution,
+                                    executed_tool_calls=executed_tool_calls,
+                                    loop_messages=loop_messages,
+                                )
                         guard_error = _capture_task_guard_error(
                             conversation_type=effective_conversation_type,
                             latest_user_message=capture_intent_message_hint,
@@ -12994,7 +12651,6 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                                 }
                             )
                             continue
-                        tool_record = await mcp_runtime_service.get_enabled_tool(user_id or "current", tool_name)
                         if tool_record is None:
                             error_payload = {
                                 "ok": False,
@@ -13079,50 +12735,51 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                             tool_loop_stop_reason = "approval_required"
                             break
 
+                        if defer_tool_call:
+                            tool_scheduler.defer(
+                                tool_call_id=tool_call_id,
+                                tool_name=tool_name,
+                                arguments=tool_arguments,
+                                synthetic_reason=synthetic_reason,
+                                tool_record=tool_record,
+                            )
+                            executed_in_iteration = True
+                            continue
+
                         execution = await mcp_runtime_service.execute_tool_call(
                             user_id or "current",
                             tool_name,
                             tool_arguments,
                         )
-                        if execution.get("ok"):
-                            tool_content = execution.get("data", {})
-                            executed_tool_calls.append(
-                                {
-                                    "id": tool_call_id,
-                                    "name": tool_name,
-                                    "status": "success",
-                                    "latency_ms": execution.get("latency_ms"),
-                                    "arguments": tool_arguments,
-                                    "result": tool_content,
-                                    "synthetic_reason": synthetic_reason,
-                                }
-                            )
-                        else:
-                            tool_content = {
-                                "ok": False,
-                                "error": execution.get("error"),
-                            }
-                            executed_tool_calls.append(
-                                {
-                                    "id": tool_call_id,
-                                    "name": tool_name,
-                                    "status": "error",
-                                    "arguments": tool_arguments,
-                                    "error": execution.get("error"),
-                                    "synthetic_reason": synthetic_reason,
-                                }
-                            )
-
-                        loop_messages.append(
-                            _build_tool_result_message(
-                                provider=request.provider,
-                                tool_name=tool_name,
-                                tool_call_id=tool_call_id,
-                                content=json.dumps(tool_content, ensure_ascii=True),
-                            )
+                        tool_scheduler.record_serial(tool_name, execution)
+                        _append_tool_execution_result(
+                            provider=request.provider,
+                            tool_call_id=tool_call_id,
+                            tool_name=tool_name,
+                            tool_arguments=tool_arguments,
+                            synthetic_reason=synthetic_reason,
+                            execution=execution,
+                            executed_tool_calls=executed_tool_calls,
+                            loop_messages=loop_messages,
                         )
                         executed_in_iteration = True
 
+                    for deferred in await tool_scheduler.drain():
+                        _append_tool_execution_result(
+                            provider=request.provider,
+                            tool_call_id=deferred.tool_call_id,
+                            tool_name=deferred.tool_name,
+                            tool_arguments=deferred.arguments,
+                            synthetic_reason=deferred.synthetic_reason,
+                            execution=deferred.execution,
+                            executed_tool_calls=executed_tool_calls,
+                            loop_messages=loop_messages,
+                        )
+                    pass_timing = await tool_scheduler.close()
+                    if pass_timing:
+                        mcp_tooling_metadata.setdefault("tool_pass_timings", []).append(pass_timing)
+                        request_timings.record("mcp_tools", pass_timing["wall_ms"])
+
                     if approval_request_payload:
                         break
 
@@ -13306,7 +12963,7 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                 mcp_tooling_metadata["digest_delivery_handoff"] = delivery_handoff_payload
 
             elapsed_time = time.time() - start_time
-            print(f"Chat completion result: {result}")
+            CHAT_LOG.debug("Chat completion finished in %.2fs", elapsed_time, result=lambda: result)
             
             # Estimate token count (this is a rough estimate)
             token_count = len(response_content.split()) * 1.3  # Rough estimate: words * 1.3
@@ -13329,6 +12986,7 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                 message_metadata["mcp"]["approval_request"] = approval_request_payload
             if approval_resolution_payload:
                 message_metadata["mcp"]["approval_resolution"] = approval_resolution_payload
+            message_metadata["timings"] = request_timings.metadata()
             
             # Add persona metadata if persona was used
             if request.persona_id:
@@ -13338,19 +12996,23 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
                     "persona_model_settings_applied": bool(request.persona_model_settings)
                 })
             
-            db_message = Message(
-                id=str(uuid.uuid4()),
-                conversation_id=conversation.id,
-                sender="llm",
-                message=response_content,
-                message_metadata=message_metadata
+            db_message = turn_writer.stage_assistant_message(
+                message_id=str(uuid.uuid4()),
+                content=response_content,
+                metadata=message_metadata,
+            )
+            digest_delivery_queued = _queue_digest_delivery_for_message(
+                db,
+                handoff_payload=delivery_handoff_payload,
+                user_id=user_id,
+                message_id=db_message.id,
+                send_config=digest_delivery_send_config,
             )
-            db.add(db_message)
-            
-            # Update the conversation's updated_at timestamp
-            conversation.updated_at = db_message.created_at
             
-            await db.commit()
+            with request_timings.span("db_commit"):
+                await turn_writer.commit()
+            if digest_delivery_queued:
+                await enqueue_digest_delivery_dispatch(str(user_id))
             
             # Add conversation_id to the result
             result["conversation_id"] = conversation.id
@@ -13366,11 +13028,14 @@ async def chat_completion(request: ChatCompletionRequest, db: AsyncSession = Dep
             if isinstance(delivery_handoff_payload, dict):
                 result["delivery_handoff"] = delivery_handoff_payload
             
+            request_timings.finish(mode="sync")
             return result
     except HTTPException:
+        request_timings.finish(mode="sync", outcome="http_error")
         # Re-raise HTTP exceptions with their original status codes and details
         raise
     except Exception as e:
+        request_timings.finish(mode="sync", outcome="error")
         logger.error(f"Exception in chat_completion: {e}")
         import traceback
         logger.error(traceback.format_exc())
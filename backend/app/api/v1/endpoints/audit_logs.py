@@ -0,0 +1,81 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.auth_context import AuthContext
+from app.core.auth_deps import require_admin
+from app.core.database import db_factory, get_db
+from app.schemas.audit import AuditCompactionResponse, AuditLogPageResponse, AuditLogResponse
+from app.services.audit_storage import (
+    AuditLogFilters,
+    InvalidAuditCursor,
+    enqueue_audit_compaction,
+    export_audit_logs_ndjson,
+    list_audit_logs,
+)
+
+router = APIRouter(prefix="/audit-logs", tags=["audit"])
+
+
+def _audit_filters(
+    event_type: Optional[str] = Query(None, description="Exact event type, e.g. auth.login_failed"),
+    actor_id: Optional[str] = Query(None),
+    status_filter: Optional[str] = Query(None, alias="status", description="success or failure"),
+    request_id: Optional[str] = Query(None),
+    since: Optional[datetime] = Query(None, description="Inclusive lower bound on the event timestamp"),
+    until: Optional[datetime] = Query(None, description="Exclusive upper bound on the event timestamp"),
+) -> AuditLogFilters:
+    return AuditLogFilters(
+        event_type=event_type,
+        actor_id=actor_id,
+        status=status_filter,
+        request_id=request_id,
+        since=since,
+        until=until,
+    )
+
+
+@router.get("", response_model=AuditLogPageResponse)
+async def list_audit_log_events(
+    filters: AuditLogFilters = Depends(_audit_filters),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    auth: AuthContext = Depends(require_admin),
+) -> AuditLogPageResponse:
+    """Audit events in the hot window, newest first (admin-only)."""
+    try:
+        rows, next_cursor = await list_audit_logs(db, filters, cursor=cursor, limit=limit)
+    except InvalidAuditCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return AuditLogPageResponse(
+        items=[AuditLogResponse.model_validate(row) for row in rows],
+        next_cursor=next_cursor,
+    )
+
+
+@router.get("/export")
+async def export_audit_log_events(
+    filters: AuditLogFilters = Depends(_audit_filters),
+    auth: AuthContext = Depends(require_admin),
+) -> StreamingResponse:
+    """Stream matching audit events as NDJSON, newest first (admin-only)."""
+    return StreamingResponse(
+        export_audit_logs_ndjson(db_factory.session_factory, filters),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="audit-logs.ndjson"'},
+    )
+
+
+@router.post("/compaction", response_model=AuditCompactionResponse, status_code=status.HTTP_202_ACCEPTED)
+async def run_audit_compaction(
+    auth: AuthContext = Depends(require_admin),
+) -> AuditCompactionResponse:
+    """Archive expired audit events and apply retention now (admin-only)."""
+    job_id = await enqueue_audit_compaction(str(auth.user_id), deduplicate=False)
+    if job_id is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Could not queue compaction")
+    return AuditCompactionResponse(job_id=job_id)
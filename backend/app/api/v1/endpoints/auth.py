@@ -29,28 +29,24 @@ logger = logging.getLogger(__name__)
 
 
 def _log_auth_event_background(request: Request, event_type: str, success: bool, user_id: str = None, reason: str = None):
-    """Schedule audit log write in background."""
-    import asyncio
-    async def _write():
-        try:
-            from app.core.audit import audit_logger, AuditEventType
-            if success:
-                await audit_logger.log_auth_success(
-                    request=request,
-                    user_id=user_id,
-                    event_type=AuditEventType(event_type),
-                )
-            else:
-                await audit_logger.log_auth_failure(
-                    request=request,
-                    reason=reason or "Unknown error",
-                    event_type=AuditEventType(event_type),
-                    user_id=user_id,
-                )
-        except Exception as e:
-            logger.warning(f"Failed to write auth audit log: {e}")
-    
-    asyncio.create_task(_write())
+    """Queue an audit event for the background audit writer."""
+    try:
+        from app.core.audit import audit_logger, AuditEventType
+        if success:
+            audit_logger.log_auth_success(
+                request=request,
+                user_id=user_id,
+                event_type=AuditEventType(event_type),
+            )
+        else:
+            audit_logger.log_auth_failure(
+                request=request,
+                reason=reason or "Unknown error",
+                event_type=AuditEventType(event_type),
+                user_id=user_id,
+            )
+    except Exception as e:
+        logger.warning(f"Failed to queue auth audit log: {e}")
 
 
 # Enhanced logging for token debugging
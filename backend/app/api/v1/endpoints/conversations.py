@@ -18,11 +18,14 @@ from app.schemas.conversation_schemas import (
     ConversationUpdate,
     ConversationWithMessages,
     ConversationWithPersona,
+    ConversationSearchResponse,
     Message as MessageSchema,
     MessageCreate
 )
+from app.services.conversation_search import ConversationSearchService, InvalidSearchCursor
 from app.services.conversation_service import get_user_conversation, ensure_user_id_matches
 from app.services.persona_service import PersonaService
+from app.services.tag_index import conversation_tag_index
 
 router = APIRouter()
 
@@ -74,13 +77,13 @@ async def get_user_conversations(
     result = await db.execute(query)
     conversations = result.scalars().all()
     
-    # Get tags for each conversation
+    # Get tags for all conversations in one query
+    tags_by_conversation = await conversation_tag_index.tags_by_owner(db, [c.id for c in conversations])
     conversation_with_tags = []
     for conversation in conversations:
-        tags = await conversation.get_tags(db)
         conversation_with_tags.append({
             **conversation.__dict__,
-            "tags": tags
+            "tags": tags_by_conversation[conversation.id]
         })
     
     return conversation_with_tags
@@ -118,6 +121,26 @@ async def create_conversation(
     return db_conversation
 
 
+@router.get("/conversations/search", response_model=ConversationSearchResponse)
+async def search_conversations(
+    q: str = Query(..., min_length=1, max_length=500, description="Words to search for in titles and messages"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    conversation_id: Optional[str] = Query(None, description="Only search this conversation"),
+    db: AsyncSession = Depends(get_db),
+    auth: AuthContext = Depends(require_user)
+):
+    """Search the current user's conversation titles and messages, best matches first."""
+    user_id = str(auth.user_id).replace('-', '')
+    try:
+        items, next_cursor = await ConversationSearchService(db).search(
+            user_id, q, limit=limit, cursor=cursor, conversation_id=conversation_id
+        )
+    except InvalidSearchCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"items": items, "next_cursor": next_cursor}
+
+
 @router.get("/conversations/{conversation_id}", response_model=ConversationSchema)
 async def get_conversation(
     conversation_id: str,
@@ -370,13 +393,13 @@ async def get_conversations_by_persona(
     result = await db.execute(query)
     conversations = result.scalars().all()
     
-    # Get tags for each conversation
+    # Get tags for all conversations in one query
+    tags_by_conversation = await conversation_tag_index.tags_by_owner(db, [c.id for c in conversations])
     conversation_with_tags = []
     for conversation in conversations:
-        tags = await conversation.get_tags(db)
         conversation_with_tags.append({
             **conversation.__dict__,
-            "tags": tags
+            "tags": tags_by_conversation[conversation.id]
         })
     
     return conversation_with_tags
@@ -94,6 +94,9 @@ async def create_job(
     auth: AuthContext = Depends(require_user),
     job_manager: JobManager = Depends(get_job_manager),
 ) -> JobResponse:
+    handler = job_manager.get_handler(request.job_type)
+    if handler and "admin" in (handler.required_permissions or []) and not auth.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin required")
     job, _ = await job_manager.enqueue_job(
         job_type=request.job_type,
         payload=request.payload,
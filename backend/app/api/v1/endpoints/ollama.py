@@ -3,6 +3,7 @@ from fastapi.responses import StreamingResponse
 import httpx
 import json
 import asyncio
+from contextlib import contextmanager
 from typing import Optional, List, Dict, Any, AsyncGenerator
 from pydantic import BaseModel, AnyHttpUrl
 from urllib.parse import unquote
@@ -17,6 +18,7 @@ from app.models.job import Job, JobStatus
 from app.models.settings import SettingDefinition, SettingScope
 from app.models.user import User
 from app.services.job_manager import HandlerRegistrationError, JobManager
+from app.services.ollama_gateway import OllamaServerUnavailable, ollama_gateway
 from app.utils.ollama import normalize_server_base, make_dedupe_key
 
 router = APIRouter()
@@ -43,6 +45,9 @@ TERMINAL_JOB_STATUSES = {
     JobStatus.FAILED.value,
     JobStatus.CANCELED.value,
 }
+# Progress wakes the event stream immediately; this only bounds how long it
+# misses updates recorded by another worker process.
+INSTALL_EVENTS_FALLBACK_SECONDS = 5.0
 
 
 def _map_job_status_to_legacy(job: Job) -> str:
@@ -122,6 +127,51 @@ async def ensure_ollama_settings_definition(db: AsyncSession):
         await definition.save(db)
     return definition
 
+def _server_base(server_url: str, suffix: str = "") -> str:
+    """Validate a user-supplied server URL and strip an endpoint ``suffix`` from it."""
+    server_url = unquote(server_url).strip()
+    if not server_url.startswith(('http://', 'https://')):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid server URL. Must start with http:// or https://"
+        )
+    server_url = server_url.rstrip('/')
+    if suffix and server_url.endswith(suffix):
+        server_url = server_url[: -len(suffix)]
+    return server_url
+
+
+@contextmanager
+def _upstream_errors():
+    """Map connection failures talking to Ollama onto HTTP errors."""
+    try:
+        yield
+    except OllamaServerUnavailable:
+        raise HTTPException(
+            status_code=503,
+            detail="Could not connect to server. Please check if the server is running."
+        )
+    except httpx.TimeoutException:
+        raise HTTPException(
+            status_code=504,
+            detail="Connection timed out. Server might be down or unreachable."
+        )
+    except httpx.ConnectError:
+        raise HTTPException(
+            status_code=503,
+            detail="Could not connect to server. Please check if the server is running."
+        )
+    except httpx.RequestError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Error connecting to Ollama server: {str(e)}"
+        )
+
+
+def _response_data(response: httpx.Response) -> Any:
+    return response.json() if response.headers.get("content-type") == "application/json" else response.text
+
+
 @router.get("/test", response_model=OllamaResponse)
 async def test_ollama_connection(
     server_url: str,
@@ -135,52 +185,22 @@ async def test_ollama_connection(
     # await ensure_ollama_settings_definition(db)
 
     try:
-        # Clean and validate the URL
-        server_url = unquote(server_url).strip()
-        if not server_url.startswith(('http://', 'https://')):
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid server URL. Must start with http:// or https://"
-            )
+        server_base = _server_base(server_url, '/api/version')
 
-        # Ensure the URL ends with /api/version
-        if not server_url.endswith('/api/version'):
-            server_url = server_url.rstrip('/') + '/api/version'
-        
-        # Prepare headers
-        headers = {'Content-Type': 'application/json'}
-        if api_key:
-            headers['Authorization'] = f'Bearer {api_key}'
-
-        # Set a reasonable timeout and disable redirects
-        async with httpx.AsyncClient(timeout=5.0, follow_redirects=False) as client:
-            try:
-                response = await client.get(server_url, headers=headers)
-                if response.status_code == 200:
-                    return OllamaResponse(
-                        status="success",
-                        version=response.json().get("version", "unknown")
-                    )
-                else:
-                    raise HTTPException(
-                        status_code=response.status_code,
-                        detail=f"Server returned status code {response.status_code}"
-                    )
-            except httpx.TimeoutException:
-                raise HTTPException(
-                    status_code=504,
-                    detail="Connection timed out. Server might be down or unreachable."
-                )
-            except httpx.ConnectError:
-                raise HTTPException(
-                    status_code=503,
-                    detail="Could not connect to server. Please check if the server is running."
-                )
-            except httpx.RequestError as e:
-                raise HTTPException(
-                    status_code=503,
-                    detail=f"Error connecting to Ollama server: {str(e)}"
-                )
+        # An explicit test always contacts the server, even one marked down.
+        with _upstream_errors():
+            response = await ollama_gateway.request(
+                server_base, "GET", "/api/version", api_key=api_key, timeout=5.0, fail_fast=False
+            )
+        if response.status_code == 200:
+            return OllamaResponse(
+                status="success",
+                version=response.json().get("version", "unknown")
+            )
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"Server returned status code {response.status_code}"
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -189,59 +209,23 @@ async def test_ollama_connection(
             detail=f"Unexpected error: {str(e)}"
         )
 
-async def stream_response(response: httpx.Response) -> AsyncGenerator[bytes, None]:
-    """
-    Stream the response from Ollama API
-    
-    Ollama's streaming format is a series of newline-delimited JSON objects.
-    Each JSON object contains a 'response' field with a chunk of text.
-    For model installation, it contains progress information.
-    """
-    try:
-        # Check if response is successful
-        if response.status_code != 200:
-            error_json = json.dumps({"error": f"Server returned status {response.status_code}"})
-            yield error_json.encode() + b'\n'
-            return
-
-        # Try to read the response content
-        try:
-            async for line in response.aiter_lines():
-                if line.strip():
-                    try:
-                        # Parse the JSON and yield it back as a properly formatted JSON line
-                        data = json.loads(line)
-                        # Add a newline to ensure proper streaming format
-                        yield json.dumps(data).encode() + b'\n'
-                    except json.JSONDecodeError:
-                        # If it's not valid JSON, just pass it through
-                        yield line.encode() + b'\n'
-        except Exception as stream_error:
-            # If streaming fails, try to get the response content directly
-            try:
-                content = response.text
-                if content.strip():
-                    # Try to parse as JSON first
-                    try:
-                        data = json.loads(content)
-                        yield json.dumps(data).encode() + b'\n'
-                    except json.JSONDecodeError:
-                        # If not JSON, send as plain text
-                        yield content.encode() + b'\n'
-                else:
-                    # Empty response but successful status - send success message
-                    success_json = json.dumps({"status": "success", "message": "Operation completed successfully"})
-                    yield success_json.encode() + b'\n'
-            except Exception as content_error:
-                print(f"Error reading response content: {content_error}")
-                # Send a generic success message if we can't read the content
-                success_json = json.dumps({"status": "success", "message": "Operation completed"})
-                yield success_json.encode() + b'\n'
-                
-    except Exception as e:
-        print(f"Error in stream_response: {e}")
-        error_json = json.dumps({"error": str(e)})
-        yield error_json.encode() + b'\n'
+def _passthrough_params(request_data: Dict[str, Any], default_method: str):
+    server_url = request_data.get("server_url")
+    endpoint = request_data.get("endpoint")
+    method = request_data.get("method", default_method).upper()
+
+    # Validate required parameters
+    if not server_url or not endpoint:
+        raise HTTPException(
+            status_code=400,
+            detail="server_url and endpoint are required"
+        )
+    if method not in ("GET", "POST"):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported method: {method}"
+        )
+    return _server_base(server_url), endpoint, method
 
 @router.post("/passthrough")
 async def ollama_passthrough(
@@ -253,69 +237,25 @@ async def ollama_passthrough(
     Generic passthrough for Ollama API requests (non-streaming)
     """
     try:
-        # Extract required parameters
-        server_url = request_data.get("server_url")
-        endpoint = request_data.get("endpoint")
-        method = request_data.get("method", "GET").upper()
-        api_key = request_data.get("api_key")
+        server_base, endpoint, method = _passthrough_params(request_data, "GET")
         payload = request_data.get("payload", {})
-        
-        # Validate required parameters
-        if not server_url or not endpoint:
-            raise HTTPException(
-                status_code=400,
-                detail="server_url and endpoint are required"
-            )
-            
-        # Clean and validate the URL
-        server_url = unquote(server_url).strip()
-        if not server_url.startswith(('http://', 'https://')):
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid server URL. Must start with http:// or https://"
+
+        # Long timeout for large models
+        with _upstream_errors():
+            response = await ollama_gateway.request(
+                server_base,
+                method,
+                endpoint,
+                api_key=request_data.get("api_key"),
+                timeout=120.0,
+                params=payload if method == "GET" else None,
+                json=payload if method == "POST" else None,
             )
-            
-        # Construct the full URL
-        full_url = f"{server_url.rstrip('/')}/{endpoint.lstrip('/')}"
-        
-        # Prepare headers
-        headers = {'Content-Type': 'application/json'}
-        if api_key:
-            headers['Authorization'] = f'Bearer {api_key}'
-            
-        # Set a longer timeout for large models and disable redirects
-        async with httpx.AsyncClient(timeout=120.0, follow_redirects=False) as client:
-            try:
-                if method == "GET":
-                    response = await client.get(full_url, headers=headers, params=payload)
-                elif method == "POST":
-                    response = await client.post(full_url, headers=headers, json=payload)
-                else:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Unsupported method: {method}"
-                    )
-                
-                # Return the response data
-                return {
-                    "status_code": response.status_code,
-                    "data": response.json() if response.headers.get("content-type") == "application/json" else response.text
-                }
-            except httpx.TimeoutException:
-                raise HTTPException(
-                    status_code=504,
-                    detail="Connection timed out. Server might be down or unreachable."
-                )
-            except httpx.ConnectError:
-                raise HTTPException(
-                    status_code=503,
-                    detail="Could not connect to server. Please check if the server is running."
-                )
-            except httpx.RequestError as e:
-                raise HTTPException(
-                    status_code=503,
-                    detail=f"Error connecting to Ollama server: {str(e)}"
-                )
+
+        return {
+            "status_code": response.status_code,
+            "data": _response_data(response)
+        }
     except HTTPException:
         raise
     except Exception as e:
@@ -331,76 +271,43 @@ async def ollama_stream(
 ):
     """
     Streaming endpoint for Ollama API requests
+
+    Ollama streams newline-delimited JSON; the body is relayed as received,
+    without parsing each line.
     """
     try:
-        # Extract required parameters
-        server_url = request_data.get("server_url")
-        endpoint = request_data.get("endpoint")
-        method = request_data.get("method", "POST").upper()  # Default to POST for streaming
-        api_key = request_data.get("api_key")
+        server_base, endpoint, method = _passthrough_params(request_data, "POST")
         payload = request_data.get("payload", {})
-        
+
         # Ensure streaming is enabled in the payload
         if isinstance(payload, dict):
             payload["stream"] = True
-        
-        # Validate required parameters
-        if not server_url or not endpoint:
-            raise HTTPException(
-                status_code=400,
-                detail="server_url and endpoint are required"
+
+        with _upstream_errors():
+            response = await ollama_gateway.open_stream(
+                server_base,
+                method,
+                endpoint,
+                api_key=request_data.get("api_key"),
+                timeout=120.0,
+                params=payload if method == "GET" else None,
+                json=payload if method == "POST" else None,
             )
-            
-        # Clean and validate the URL
-        server_url = unquote(server_url).strip()
-        if not server_url.startswith(('http://', 'https://')):
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid server URL. Must start with http:// or https://"
+
+        if response.status_code != 200:
+            await response.aclose()
+            error_json = json.dumps({"error": f"Server returned status {response.status_code}"})
+            return Response(
+                content=error_json.encode() + b'\n',
+                media_type="application/json",
+                status_code=response.status_code
             )
-            
-        # Construct the full URL
-        full_url = f"{server_url.rstrip('/')}/{endpoint.lstrip('/')}"
-        
-        # Prepare headers
-        headers = {'Content-Type': 'application/json'}
-        if api_key:
-            headers['Authorization'] = f'Bearer {api_key}'
-            
-        # Set a longer timeout for large models and disable redirects
-        async with httpx.AsyncClient(timeout=120.0, follow_redirects=False) as client:
-            try:
-                if method == "GET":
-                    response = await client.get(full_url, headers=headers, params=payload, stream=True)
-                elif method == "POST":
-                    response = await client.post(full_url, headers=headers, json=payload, stream=True)
-                else:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Unsupported method: {method}"
-                    )
-                
-                # Return a streaming response
-                return StreamingResponse(
-                    stream_response(response),
-                    media_type="application/json",
-                    status_code=response.status_code
-                )
-            except httpx.TimeoutException:
-                raise HTTPException(
-                    status_code=504,
-                    detail="Connection timed out. Server might be down or unreachable."
-                )
-            except httpx.ConnectError:
-                raise HTTPException(
-                    status_code=503,
-                    detail="Could not connect to server. Please check if the server is running."
-                )
-            except httpx.RequestError as e:
-                raise HTTPException(
-                    status_code=503,
-                    detail=f"Error connecting to Ollama server: {str(e)}"
-                )
+
+        return StreamingResponse(
+            ollama_gateway.relay(server_base, response),
+            media_type="application/json",
+            status_code=response.status_code
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -416,54 +323,17 @@ async def get_ollama_models(
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Get a list of available models from an Ollama server
+    Get a list of available models from an Ollama server (cached briefly per server)
     """
     try:
-        # Clean and validate the URL
-        server_url = unquote(server_url).strip()
-        if not server_url.startswith(('http://', 'https://')):
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid server URL. Must start with http:// or https://"
-            )
-
-        # Ensure the URL ends with /api/tags
-        if not server_url.endswith('/api/tags'):
-            server_url = server_url.rstrip('/') + '/api/tags'
-        
-        # Prepare headers
-        headers = {'Content-Type': 'application/json'}
-        if api_key:
-            headers['Authorization'] = f'Bearer {api_key}'
-
-        # Set a reasonable timeout and disable redirects
-        async with httpx.AsyncClient(timeout=10.0, follow_redirects=False) as client:
-            try:
-                response = await client.get(server_url, headers=headers)
-                if response.status_code == 200:
-                    # Extract the models from the response
-                    models = response.json().get("models", [])
-                    return models
-                else:
-                    raise HTTPException(
-                        status_code=response.status_code,
-                        detail=f"Server returned status code {response.status_code}"
-                    )
-            except httpx.TimeoutException:
-                raise HTTPException(
-                    status_code=504,
-                    detail="Connection timed out. Server might be down or unreachable."
-                )
-            except httpx.ConnectError:
-                raise HTTPException(
-                    status_code=503,
-                    detail="Could not connect to server. Please check if the server is running."
-                )
-            except httpx.RequestError as e:
-                raise HTTPException(
-                    status_code=503,
-                    detail=f"Error connecting to Ollama server: {str(e)}"
-                )
+        server_base = _server_base(server_url, '/api/tags')
+        with _upstream_errors():
+            return await ollama_gateway.list_models(server_base, api_key)
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=e.response.status_code,
+            detail=f"Server returned status code {e.response.status_code}"
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -472,25 +342,12 @@ async def get_ollama_models(
             detail=f"Unexpected error: {str(e)}"
         )
 
-async def check_model_exists(client: httpx.AsyncClient, server_base: str, model_name: str, headers: dict) -> bool:
+async def check_model_exists(server_base: str, model_name: str, api_key: Optional[str] = None) -> bool:
     """
-    Check if a model already exists on the Ollama server
+    Check if a model already exists on the Ollama server, using the cached model list
     """
     try:
-        # Construct the models endpoint URL
-        base = server_base.rstrip('/')
-        models_url = f"{base}/api/tags"
-        
-        response = await client.get(models_url, headers=headers)
-        if response.status_code == 200:
-            models_data = response.json()
-            models = models_data.get("models", [])
-            
-            # Check if the model name exists in the list
-            for model in models:
-                if model.get("name") == model_name:
-                    return True
-        return False
+        return await ollama_gateway.model_exists(server_base, model_name, api_key)
     except Exception as e:
         print(f"Error checking if model exists: {e}")
         # If we can't check, assume it doesn't exist to allow installation
@@ -556,6 +413,7 @@ async def stream_install_events(
         yield f"data: {json.dumps(_serialize_install_job(job))}\n\n".encode()
 
         while True:
+            update = job_manager.job_update_signal(task_id)
             events = await job_manager.get_progress_events(task_id, since=last_sequence)
             if events:
                 job_snapshot = await job_manager.get_job(task_id)
@@ -574,7 +432,9 @@ async def stream_install_events(
                 break
 
             try:
-                await asyncio.sleep(1)
+                await asyncio.wait_for(update.wait(), timeout=INSTALL_EVENTS_FALLBACK_SECONDS)
+            except asyncio.TimeoutError:
+                pass
             except asyncio.CancelledError:
                 break
 
@@ -606,58 +466,27 @@ async def delete_ollama_model(
     Delete a model from the Ollama server
     """
     try:
-        # Clean and validate the URL
-        server_url = unquote(request.server_url).strip()
-        if not server_url.startswith(('http://', 'https://')):
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid server URL. Must start with http:// or https://"
+        server_base = _server_base(request.server_url, '/api/delete')
+
+        with _upstream_errors():
+            response = await ollama_gateway.request(
+                server_base,
+                "DELETE",
+                "/api/delete",
+                api_key=request.api_key,
+                timeout=30.0,
+                json={"name": request.name},
             )
-
-        # Ensure the URL ends with /api/delete
-        if not server_url.endswith('/api/delete'):
-            server_url = server_url.rstrip('/') + '/api/delete'
-        
-        # Prepare headers
-        headers = {'Content-Type': 'application/json'}
-        if request.api_key:
-            headers['Authorization'] = f'Bearer {request.api_key}'
-
-        # Prepare payload
-        payload = {
-            "name": request.name
-        }
-
-        # Set a reasonable timeout and disable redirects
-        async with httpx.AsyncClient(timeout=30.0, follow_redirects=False) as client:
-            try:
-                # Use client.request for DELETE with JSON body
-                response = await client.request("DELETE", server_url, headers=headers, json=payload)
-                if response.status_code == 200:
-                    return {
-                        "status": "success",
-                        "data": response.json() if response.headers.get("content-type") == "application/json" else response.text
-                    }
-                else:
-                    raise HTTPException(
-                        status_code=response.status_code,
-                        detail=f"Server returned status code {response.status_code}"
-                    )
-            except httpx.TimeoutException:
-                raise HTTPException(
-                    status_code=504,
-                    detail="Connection timed out. Server might be down or unreachable."
-                )
-            except httpx.ConnectError:
-                raise HTTPException(
-                    status_code=503,
-                    detail="Could not connect to server. Please check if the server is running."
-                )
-            except httpx.RequestError as e:
-                raise HTTPException(
-                    status_code=503,
-                    detail=f"Error connecting to Ollama server: {str(e)}"
-                )
+        if response.status_code == 200:
+            ollama_gateway.invalidate_models(server_base)
+            return {
+                "status": "success",
+                "data": _response_data(response)
+            }
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"Server returned status code {response.status_code}"
+        )
     except HTTPException:
         raise
     except Exception as e:
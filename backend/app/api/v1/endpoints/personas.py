@@ -94,6 +94,24 @@ async def create_persona(
         raise HTTPException(status_code=500, detail=f"Error creating persona: {str(e)}")
 
 
+@router.get("/personas/tags", response_model=List[str])
+async def get_available_tags(
+    db: AsyncSession = Depends(get_db),
+    auth: AuthContext = Depends(require_user)
+):
+    """Get all unique tags used by user's personas."""
+    try:
+        tags = await PersonaService.get_available_tags(
+            db=db,
+            user_id=str(auth.user_id)
+        )
+        
+        return tags
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving tags: {str(e)}")
+
+
 @router.get("/personas/{persona_id}", response_model=PersonaResponse)
 async def get_persona(
     persona_id: str,
@@ -169,21 +187,3 @@ async def delete_persona(
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting persona: {str(e)}")
-
-
-@router.get("/personas/tags", response_model=List[str])
-async def get_available_tags(
-    db: AsyncSession = Depends(get_db),
-    auth: AuthContext = Depends(require_user)
-):
-    """Get all unique tags used by user's personas."""
-    try:
-        tags = await PersonaService.get_available_tags(
-            db=db,
-            user_id=str(auth.user_id)
-        )
-        
-        return tags
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error retrieving tags: {str(e)}")
@@ -4,8 +4,7 @@ from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
-import asyncio
+from typing import Dict, List, Optional
 from app.core.database import get_db
 from app.core.auth_deps import require_user, require_admin, optional_user
 from app.core.auth_context import AuthContext
@@ -22,11 +21,22 @@ from app.schemas.settings import (
 import logging
 import uuid
 import json
-from sqlalchemy import text, func
+from sqlalchemy import bindparam, text, func
 
 router = APIRouter(prefix="/settings", dependencies=[Depends(require_user)])
 logger = logging.getLogger(__name__)
 
+# Upper bound on definition_ids per GET /instances/batch request
+MAX_BATCH_DEFINITION_IDS = 100
+
+
+def _api_scope(stored_scope):
+    """Scope as the API reports it ('user'); rows store the enum name ('USER')."""
+    try:
+        return SettingScope(stored_scope).value
+    except ValueError:
+        return stored_scope
+
 
 def _log_settings_audit_background(
     request: Request, 
@@ -35,22 +45,19 @@ def _log_settings_audit_background(
     resource_id: str = None,
     metadata: dict = None
 ):
-    """Schedule audit log write in background for settings changes."""
-    async def _write():
-        try:
-            from app.core.audit import audit_logger, AuditEventType
-            await audit_logger.log_admin_action(
-                request=request,
-                user_id=user_id,
-                event_type=AuditEventType(event_type),
-                resource_type="setting",
-                resource_id=resource_id,
-                metadata=metadata,
-            )
-        except Exception as e:
-            logger.warning(f"Failed to write settings audit log: {e}")
-    
-    asyncio.create_task(_write())
+    """Queue an audit event for settings changes."""
+    try:
+        from app.core.audit import audit_logger, AuditEventType
+        audit_logger.log_admin_action(
+            request=request,
+            user_id=user_id,
+            event_type=AuditEventType(event_type),
+            resource_type="setting",
+            resource_id=resource_id,
+            metadata=metadata,
+        )
+    except Exception as e:
+        logger.warning(f"Failed to queue settings audit log: {e}")
 
 def mask_sensitive_data(definition_id: str, value: any) -> any:
     """
@@ -784,7 +791,7 @@ async def create_setting_instance(
                     "definition_id": updated_row[1],
                     "name": updated_row[2],
                     "value": decrypted_value,
-                    "scope": updated_row[4],
+                    "scope": _api_scope(updated_row[4]),
                     "user_id": updated_row[5],
                     "page_id": updated_row[6],
                     "created_at": updated_row[7],
@@ -881,7 +888,7 @@ async def create_setting_instance(
                 conditions = ["definition_id = :definition_id", "scope = :scope"]
                 params = {
                     "definition_id": instance_data.definition_id,
-                    "scope": scope_value
+                    "scope": SettingScope(scope_value).stored_value
                 }
                 
                 resolved_user_id = instance_data.user_id
@@ -892,13 +899,13 @@ async def create_setting_instance(
                     conditions.append("user_id = :user_id")
                     params["user_id"] = resolved_user_id
                 else:
-                    conditions.append("(user_id IS NULL OR user_id = '')")
+                    conditions.append("user_id IS NULL")
                 
                 if instance_data.page_id:
                     conditions.append("page_id = :page_id")
                     params["page_id"] = instance_data.page_id
                 else:
-                    conditions.append("(page_id IS NULL OR page_id = '')")
+                    conditions.append("page_id IS NULL")
                 
                 # Build and execute the query
                 where_clause = " AND ".join(conditions)
@@ -959,7 +966,7 @@ async def create_setting_instance(
                         "definition_id": updated_row[1],
                         "name": updated_row[2],
                         "value": decrypted_value,
-                        "scope": updated_row[4],
+                        "scope": _api_scope(updated_row[4]),
                         "user_id": updated_row[5],
                         "page_id": updated_row[6],
                         "created_at": updated_row[7],
@@ -1017,8 +1024,8 @@ async def create_setting_instance(
                 name=instance_data.name,
                 value=instance_data.value,  # This will be automatically encrypted
                 scope=scope_enum,
-                user_id=user_id_value,
-                page_id=instance_data.page_id
+                user_id=user_id_value or None,
+                page_id=instance_data.page_id or None
             )
             
             # Add and commit the instance
@@ -1066,18 +1073,16 @@ async def create_setting_instance(
         )
 
 
-@router.get("/instances", response_model=List[SettingInstanceResponse])
-async def get_setting_instances(
-    definition_id: Optional[str] = None,
-    scope: Optional[str] = None,
-    user_id: Optional[str] = None,
-    page_id: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
-    auth: Optional[AuthContext] = Depends(optional_user)
+def _resolve_instance_filters(
+    scope: Optional[str],
+    user_id: Optional[str],
+    auth: Optional[AuthContext],
 ):
-    """Get settings instances based on filters."""
-    logger.info(f"Getting settings instances with filters: definition_id={definition_id}, scope={scope}, user_id={user_id}, page_id={page_id}")
-    
+    """Resolve the scope/user filters shared by the instance list endpoints.
+
+    Returns ``(stored_scope, user_id)``, or ``None`` when the caller asked for
+    the 'current' user without being authenticated.
+    """
     # If user_id is specified but no current user, require authentication
     if user_id and not auth:
         raise HTTPException(
@@ -1091,105 +1096,135 @@ async def get_setting_instances(
         logger.info(f"Using current user ID: {user_id}")
     elif user_id == "current" and not auth:
         logger.warning("User ID 'current' specified but no current user available")
-        # Return empty list if no current user is available
-        return []
+        return None
     
     # If scope is 'user' but no user_id is provided, use the current user's ID
     if scope and scope.lower() == "user" and not user_id and auth:
         user_id = str(auth.user_id)
         logger.info(f"Scope is 'user' but no user_id provided, using current user ID: {user_id}")
 
-    # Handle scope conversion - ensure it's lowercase for case-insensitive matching
-    scope_value = None
+    # Rows store the enum name, so match it exactly rather than with LOWER(scope)
+    stored_scope = None
     if scope:
-        scope_value = scope.lower()
-        logger.info(f"Normalized scope to lowercase: {scope_value}")
+        try:
+            stored_scope = SettingScope(scope).stored_value
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid scope value: {scope}. Valid values are: {', '.join([s.value for s in SettingScope])}"
+            )
+    return stored_scope, user_id
+
+
+async def _query_setting_instances(
+    db: AsyncSession,
+    definition_ids: Optional[List[str]],
+    stored_scope: Optional[str],
+    user_id: Optional[str],
+    page_id: Optional[str],
+) -> List[dict]:
+    """Fetch matching instances in one query, decrypted and masked for the frontend.
+
+    Every filter is an equality on a column of ``idx_settings_instances_lookup``.
+    """
+    conditions = []
+    params = {}
     
-    logger.info(f"Final query parameters: definition_id={definition_id}, scope={scope_value}, user_id={user_id}, page_id={page_id}")
+    if definition_ids:
+        conditions.append("definition_id IN :definition_ids")
+        params["definition_ids"] = definition_ids
     
-    try:
-        # Build conditions for the SQL query
-        conditions = []
-        params = {}
-        
-        if definition_id:
-            conditions.append("definition_id = :definition_id")
-            params["definition_id"] = definition_id
-        
-        if scope_value:
-            conditions.append("LOWER(scope) = :scope")
-            params["scope"] = scope_value
-        
-        if user_id:
-            conditions.append("user_id = :user_id")
-            params["user_id"] = user_id
-        else:
-            # If no user_id is specified, include instances with null user_id
-            conditions.append("(user_id IS NULL OR user_id = '')")
-        
-        if page_id:
-            conditions.append("page_id = :page_id")
-            params["page_id"] = page_id
-        else:
-            # If no page_id is specified, include instances with null page_id
-            conditions.append("(page_id IS NULL OR page_id = '')")
-        
-        # Build the WHERE clause
-        where_clause = " AND ".join(conditions) if conditions else "1=1"
-        
-        # Build and execute the query
-        query = text(f"""
-        SELECT id, definition_id, name, value, scope, user_id, page_id, created_at, updated_at
-        FROM settings_instances
-        WHERE {where_clause}
-        ORDER BY updated_at DESC
-        """)
-        
-        result = await db.execute(query, params)
-        rows = result.fetchall()
-        
-        # Convert rows to dictionaries with proper decryption
-        from app.core.encrypted_column import EncryptedJSON
-        encrypted_column = EncryptedJSON("settings_instances", "value")
-        
-        instances = []
-        for row in rows:
-            # Decrypt the value using our encrypted column type
+    if stored_scope:
+        conditions.append("scope = :scope")
+        params["scope"] = stored_scope
+    
+    if user_id:
+        conditions.append("user_id = :user_id")
+        params["user_id"] = user_id
+    else:
+        # If no user_id is specified, include instances with null user_id
+        conditions.append("user_id IS NULL")
+    
+    if page_id:
+        conditions.append("page_id = :page_id")
+        params["page_id"] = page_id
+    else:
+        # If no page_id is specified, include instances with null page_id
+        conditions.append("page_id IS NULL")
+    
+    query = text(f"""
+    SELECT id, definition_id, name, value, scope, user_id, page_id, created_at, updated_at
+    FROM settings_instances
+    WHERE {" AND ".join(conditions)}
+    ORDER BY updated_at DESC
+    """)
+    if definition_ids:
+        query = query.bindparams(bindparam("definition_ids", expanding=True))
+    
+    result = await db.execute(query, params)
+    rows = result.fetchall()
+    
+    # Convert rows to dictionaries with proper decryption
+    from app.core.encrypted_column import EncryptedJSON
+    encrypted_column = EncryptedJSON("settings_instances", "value")
+    
+    instances = []
+    for row in rows:
+        # Decrypt the value using our encrypted column type
+        try:
+            decrypted_value = encrypted_column.process_result_value(row[3], None)
+        except Exception as e:
+            # If decryption fails, try parsing as plain JSON (for backward compatibility)
+            logger.warning(f"Failed to decrypt value for instance {row[0]}, trying plain JSON: {e}")
             try:
-                decrypted_value = encrypted_column.process_result_value(row[3], None)
-            except Exception as e:
-                # If decryption fails, try parsing as plain JSON (for backward compatibility)
-                logger.warning(f"Failed to decrypt value for instance {row[0]}, trying plain JSON: {e}")
-                try:
-                    decrypted_value = json.loads(row[3]) if row[3] else None
-                except Exception as json_error:
-                    logger.error(f"Failed to parse value as JSON for instance {row[0]}: {json_error}")
-                    decrypted_value = None
-            
-            # Mask sensitive data before sending to frontend
-            masked_value = mask_sensitive_data(row[1], decrypted_value)
-            
-            instance = {
-                "id": row[0],
-                "definition_id": row[1],
-                "name": row[2],
-                "value": masked_value,
-                "scope": row[4],
-                "user_id": row[5],
-                "page_id": row[6],
-                "created_at": row[7],
-                "updated_at": row[8]
-            }
-            instances.append(instance)
-        
-        logger.info(f"Found {len(instances)} settings instances")
+                decrypted_value = json.loads(row[3]) if row[3] else None
+            except Exception as json_error:
+                logger.error(f"Failed to parse value as JSON for instance {row[0]}: {json_error}")
+                decrypted_value = None
         
-        # Debug: Log the instances
-        for instance in instances:
-            logger.info(f"Instance: id={instance['id']}, definition_id={instance['definition_id']}, name={instance['name']}, scope={instance['scope']}, user_id={instance['user_id']}")
+        # Mask sensitive data before sending to frontend
+        masked_value = mask_sensitive_data(row[1], decrypted_value)
         
-        # Return empty list instead of null if no instances found
-        return instances or []
+        instances.append({
+            "id": row[0],
+            "definition_id": row[1],
+            "name": row[2],
+            "value": masked_value,
+            "scope": _api_scope(row[4]),
+            "user_id": row[5],
+            "page_id": row[6],
+            "created_at": row[7],
+            "updated_at": row[8]
+        })
+    return instances
+
+
+@router.get("/instances", response_model=List[SettingInstanceResponse])
+async def get_setting_instances(
+    definition_id: Optional[str] = None,
+    scope: Optional[str] = None,
+    user_id: Optional[str] = None,
+    page_id: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    auth: Optional[AuthContext] = Depends(optional_user)
+):
+    """Get settings instances based on filters."""
+    logger.info(f"Getting settings instances with filters: definition_id={definition_id}, scope={scope}, user_id={user_id}, page_id={page_id}")
+    
+    resolved = _resolve_instance_filters(scope, user_id, auth)
+    if resolved is None:
+        # Return empty list if no current user is available
+        return []
+    stored_scope, user_id = resolved
+    
+    logger.info(f"Final query parameters: definition_id={definition_id}, scope={stored_scope}, user_id={user_id}, page_id={page_id}")
+    
+    try:
+        instances = await _query_setting_instances(
+            db, [definition_id] if definition_id else None, stored_scope, user_id, page_id
+        )
+        logger.info(f"Found {len(instances)} settings instances")
+        return instances
     except HTTPException as e:
         # Re-raise HTTP exceptions
         logger.error(f"HTTP exception in get_setting_instances: {e.detail}")
@@ -1204,6 +1239,52 @@ async def get_setting_instances(
             detail=f"Could not retrieve settings: {str(e)}"
         )
 
+
+@router.get("/instances/batch", response_model=Dict[str, List[SettingInstanceResponse]])
+async def get_setting_instances_batch(
+    definition_ids: List[str] = Query(..., description="Repeat for each definition, e.g. ?definition_ids=a&definition_ids=b"),
+    scope: Optional[str] = None,
+    user_id: Optional[str] = None,
+    page_id: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    auth: Optional[AuthContext] = Depends(optional_user)
+):
+    """Get the instances of several definitions in one query, grouped by definition ID.
+
+    Filters behave as in ``GET /instances``; every requested definition is present
+    in the response, with an empty list when it has no instances.
+    """
+    definition_ids = list(dict.fromkeys(d for d in definition_ids if d))
+    if not definition_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one definition_id is required"
+        )
+    if len(definition_ids) > MAX_BATCH_DEFINITION_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_DEFINITION_IDS} definition_ids can be requested at once"
+        )
+    
+    grouped = {definition_id: [] for definition_id in definition_ids}
+    resolved = _resolve_instance_filters(scope, user_id, auth)
+    if resolved is None:
+        return grouped
+    stored_scope, user_id = resolved
+    
+    try:
+        for instance in await _query_setting_instances(db, definition_ids, stored_scope, user_id, page_id):
+            grouped[instance["definition_id"]].append(instance)
+        return grouped
+    except Exception as e:
+        logger.error(f"Unexpected error in get_setting_instances_batch: {e}")
+        import traceback
+        logger.error(traceback.format_exc())
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Could not retrieve settings: {str(e)}"
+        )
+
 @router.get("/instances/{instance_id}", response_model=SettingInstanceResponse)
 async def get_setting_instance(
     instance_id: str,
@@ -1252,7 +1333,7 @@ async def get_setting_instance(
             "definition_id": row[1],
             "name": row[2],
             "value": masked_value,
-            "scope": row[4],
+            "scope": _api_scope(row[4]),
             "user_id": row[5],
             "page_id": row[6],
             "created_at": row[7],
@@ -1322,7 +1403,7 @@ async def update_setting_instance(
             "definition_id": row[1],
             "name": row[2],
             "value": json.loads(row[3]) if row[3] else None,
-            "scope": row[4],
+            "scope": _api_scope(row[4]),
             "user_id": row[5],
             "page_id": row[6],
             "created_at": row[7],
@@ -1396,7 +1477,7 @@ async def update_setting_instance(
             "definition_id": updated_row[1],
             "name": updated_row[2],
             "value": json.loads(updated_row[3]) if updated_row[3] else None,
-            "scope": updated_row[4],
+            "scope": _api_scope(updated_row[4]),
             "user_id": updated_row[5],
             "page_id": updated_row[6],
             "created_at": updated_row[7],
@@ -1450,7 +1531,7 @@ async def put_setting_instance(
             "definition_id": row[1],
             "name": row[2],
             "value": json.loads(row[3]) if row[3] else None,
-            "scope": row[4],
+            "scope": _api_scope(row[4]),
             "user_id": row[5],
             "page_id": row[6],
             "created_at": row[7],
@@ -1506,9 +1587,9 @@ async def put_setting_instance(
             "definition_id": update_data.definition_id,
             "name": update_data.name,
             "value": value_json,
-            "scope": scope_value,
-            "user_id": user_id_value,
-            "page_id": update_data.page_id,
+            "scope": SettingScope(scope_value).stored_value,
+            "user_id": user_id_value or None,
+            "page_id": update_data.page_id or None,
             "id": instance_id
         })
         
@@ -1536,7 +1617,7 @@ async def put_setting_instance(
             "definition_id": updated_row[1],
             "name": updated_row[2],
             "value": json.loads(updated_row[3]) if updated_row[3] else None,
-            "scope": updated_row[4],
+            "scope": _api_scope(updated_row[4]),
             "user_id": updated_row[5],
             "page_id": updated_row[6],
             "created_at": updated_row[7],
@@ -1589,7 +1670,7 @@ async def delete_setting_instance(
             "definition_id": row[1],
             "name": row[2],
             "value": json.loads(row[3]) if row[3] else None,
-            "scope": row[4],
+            "scope": _api_scope(row[4]),
             "user_id": row[5],
             "page_id": row[6],
             "created_at": row[7],
@@ -1694,7 +1775,7 @@ async def create_ollama_definition(
                 'ollama_settings', 
                 'Ollama Server Settings', 
                 :value, 
-                'user', 
+                'USER', 
                 :user_id, 
                 CURRENT_TIMESTAMP, 
                 CURRENT_TIMESTAMP
@@ -20,6 +20,7 @@ from app.schemas.tag_schemas import (
     ConversationWithTags
 )
 from app.services.tag_service import get_user_tag, ensure_conversation_belongs_to_user
+from app.services.tag_index import conversation_tag_index
 
 router = APIRouter()
 
@@ -173,13 +174,13 @@ async def get_conversations_by_tag(
     result = await db.execute(query)
     conversations = result.scalars().all()
     
-    # Get tags for each conversation
+    # Get tags for all conversations in one query
+    tags_by_conversation = await conversation_tag_index.tags_by_owner(db, [c.id for c in conversations])
     conversation_with_tags = []
     for conversation in conversations:
-        tags = await conversation.get_tags(db)
         conversation_with_tags.append({
             **conversation.__dict__,
-            "tags": tags
+            "tags": tags_by_conversation[conversation.id]
         })
     
     return conversation_with_tags
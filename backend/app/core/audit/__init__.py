@@ -11,6 +11,13 @@ from app.core.audit.models import (
     AuditEvent,
 )
 from app.core.audit.logger import audit_logger, AuditLogger
+from app.core.audit.writer import (
+    audit_writer,
+    AuditWriter,
+    AuditSink,
+    DatabaseAuditSink,
+    NdjsonFileAuditSink,
+)
 from app.core.audit.redaction import redact_sensitive_data, SENSITIVE_HEADERS
 
 __all__ = [
@@ -22,6 +29,12 @@ __all__ = [
     # Logger
     "audit_logger",
     "AuditLogger",
+    # Buffered writer and sinks
+    "audit_writer",
+    "AuditWriter",
+    "AuditSink",
+    "DatabaseAuditSink",
+    "NdjsonFileAuditSink",
     # Redaction
     "redact_sensitive_data",
     "SENSITIVE_HEADERS",
@@ -20,6 +20,7 @@ from app.core.audit.redaction import (
     get_client_ip,
     safe_path,
 )
+from app.core.audit.writer import audit_writer
 
 logger = logging.getLogger(__name__)
 
@@ -28,18 +29,21 @@ class AuditLogger:
     """
     Audit logger service for recording security events.
     
+    Events are queued for the buffered audit writer, so the log methods
+    never wait on the database and are safe to call on the request path.
+    
     Usage:
         from app.core.audit import audit_logger
         
         # Log an authentication failure
-        await audit_logger.log_auth_failure(
+        audit_logger.log_auth_failure(
             request=request,
             reason="Invalid credentials",
             event_type=AuditEventType.AUTH_LOGIN_FAILED
         )
         
         # Log an admin action
-        await audit_logger.log_admin_action(
+        audit_logger.log_admin_action(
             request=request,
             user_id="...",
             event_type=AuditEventType.ADMIN_SETTINGS_UPDATED,
@@ -67,42 +71,24 @@ class AuditLogger:
             "path": safe_path(str(request.url.path)),
         }
     
-    async def _write_to_db(self, event: AuditEvent) -> None:
+    def _submit(self, event: AuditEvent) -> bool:
         """
-        Write an audit event to the database.
+        Queue an audit event for the background audit writer.
         
         Args:
             event: The audit event to write
+            
+        Returns:
+            False if the event was dropped because the audit queue is full
         """
-        # Import here to avoid circular imports
-        from app.core.database import db_factory
-        from app.models.audit_log import AuditLog
-        
         try:
-            async with db_factory.session_factory() as session:
-                audit_log = AuditLog(
-                    event_type=event.event_type,
-                    actor_type=event.actor_type,
-                    actor_id=event.actor_id,
-                    request_id=event.request_id,
-                    ip=event.ip,
-                    user_agent=event.user_agent,
-                    method=event.method,
-                    path=event.path,
-                    resource_type=event.resource_type,
-                    resource_id=event.resource_id,
-                    status=event.status,
-                    reason=event.reason,
-                    extra_data=event.metadata,
-                    timestamp=event.timestamp,
-                )
-                session.add(audit_log)
-                await session.commit()
+            return audit_writer.submit(event)
         except Exception as e:
             # Log error but don't fail the request
-            logger.error(f"Failed to write audit log: {e}", exc_info=True)
+            logger.error(f"Failed to queue audit log: {e}", exc_info=True)
+            return False
     
-    async def log_event(
+    def log_event(
         self,
         event_type: AuditEventType,
         actor_type: ActorType,
@@ -113,7 +99,7 @@ class AuditLogger:
         resource_id: Optional[str] = None,
         reason: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
-    ) -> None:
+    ) -> bool:
         """
         Log a generic audit event.
         
@@ -127,6 +113,9 @@ class AuditLogger:
             resource_id: Optional resource ID
             reason: Optional reason string
             metadata: Optional additional metadata (will be redacted)
+            
+        Returns:
+            False if the event was dropped because the audit queue is full
         """
         # Build event
         event_data = {
@@ -147,20 +136,20 @@ class AuditLogger:
         
         event = AuditEvent(**event_data)
         
-        # Write to database
-        await self._write_to_db(event)
+        # Hand off to the audit writer; never blocks the caller
+        return self._submit(event)
     
     # === Authentication Events ===
     
-    async def log_auth_success(
+    def log_auth_success(
         self,
         request: Request,
         user_id: str,
         event_type: AuditEventType = AuditEventType.AUTH_LOGIN_SUCCESS,
         metadata: Optional[Dict[str, Any]] = None,
-    ) -> None:
+    ) -> bool:
         """Log a successful authentication event."""
-        await self.log_event(
+        return self.log_event(
             event_type=event_type,
             actor_type=ActorType.USER,
             actor_id=user_id,
@@ -169,16 +158,16 @@ class AuditLogger:
             metadata=metadata,
         )
     
-    async def log_auth_failure(
+    def log_auth_failure(
         self,
         request: Request,
         reason: str,
         event_type: AuditEventType = AuditEventType.AUTH_LOGIN_FAILED,
         user_id: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
-    ) -> None:
+    ) -> bool:
         """Log an authentication failure event."""
-        await self.log_event(
+        return self.log_event(
             event_type=event_type,
             actor_type=ActorType.ANONYMOUS if not user_id else ActorType.USER,
             actor_id=user_id,
@@ -188,7 +177,7 @@ class AuditLogger:
             metadata=metadata,
         )
     
-    async def log_authorization_failure(
+    def log_authorization_failure(
         self,
         request: Request,
         user_id: str,
@@ -196,9 +185,9 @@ class AuditLogger:
         resource_type: Optional[str] = None,
         resource_id: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
-    ) -> None:
+    ) -> bool:
         """Log an authorization (403) failure."""
-        await self.log_event(
+        return self.log_event(
             event_type=AuditEventType.AUTH_FORBIDDEN,
             actor_type=ActorType.USER,
             actor_id=user_id,
@@ -212,14 +201,14 @@ class AuditLogger:
     
     # === Service Authentication Events ===
     
-    async def log_service_auth_success(
+    def log_service_auth_success(
         self,
         request: Request,
         service_name: str,
         metadata: Optional[Dict[str, Any]] = None,
-    ) -> None:
+    ) -> bool:
         """Log a successful service authentication."""
-        await self.log_event(
+        return self.log_event(
             event_type=AuditEventType.SERVICE_AUTH_SUCCESS,
             actor_type=ActorType.SERVICE,
             actor_id=service_name,
@@ -228,15 +217,15 @@ class AuditLogger:
             metadata=metadata,
         )
     
-    async def log_service_auth_failure(
+    def log_service_auth_failure(
         self,
         request: Request,
         reason: str,
         service_name: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
-    ) -> None:
+    ) -> bool:
         """Log a service authentication failure."""
-        await self.log_event(
+        return self.log_event(
             event_type=AuditEventType.SERVICE_AUTH_FAILED,
             actor_type=ActorType.SERVICE,
             actor_id=service_name,
@@ -248,7 +237,7 @@ class AuditLogger:
     
     # === Admin Events ===
     
-    async def log_admin_action(
+    def log_admin_action(
         self,
         request: Request,
         user_id: str,
@@ -257,9 +246,9 @@ class AuditLogger:
         resource_id: Optional[str] = None,
         reason: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
-    ) -> None:
+    ) -> bool:
         """Log an administrative action."""
-        await self.log_event(
+        return self.log_event(
             event_type=event_type,
             actor_type=ActorType.USER,
             actor_id=user_id,
@@ -273,7 +262,7 @@ class AuditLogger:
     
     # === Plugin Events ===
     
-    async def log_plugin_action(
+    def log_plugin_action(
         self,
         request: Request,
         user_id: str,
@@ -281,13 +270,13 @@ class AuditLogger:
         plugin_id: str,
         plugin_name: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
-    ) -> None:
+    ) -> bool:
         """Log a plugin lifecycle action."""
         event_metadata = {"plugin_name": plugin_name} if plugin_name else {}
         if metadata:
             event_metadata.update(metadata)
         
-        await self.log_event(
+        return self.log_event(
             event_type=event_type,
             actor_type=ActorType.USER,
             actor_id=user_id,
@@ -300,7 +289,7 @@ class AuditLogger:
     
     # === Job Events ===
     
-    async def log_job_event(
+    def log_job_event(
         self,
         event_type: AuditEventType,
         job_id: str,
@@ -309,7 +298,7 @@ class AuditLogger:
         status: EventStatus = EventStatus.SUCCESS,
         reason: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
-    ) -> None:
+    ) -> bool:
         """
         Log a job lifecycle event.
         
@@ -319,7 +308,7 @@ class AuditLogger:
         if metadata:
             event_metadata.update(metadata)
         
-        await self.log_event(
+        return self.log_event(
             event_type=event_type,
             actor_type=ActorType.USER,
             actor_id=user_id,
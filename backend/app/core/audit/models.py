@@ -52,6 +52,9 @@ class AuditEventType(str, Enum):
     JOB_FAILED = "job.failed"
     JOB_CANCELED = "job.canceled"
     JOB_CREATED = "job.created"
+    
+    # Audit pipeline events
+    AUDIT_EVENTS_DROPPED = "audit.events_dropped"
 
 
 class ActorType(str, Enum):
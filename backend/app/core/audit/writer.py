@@ -0,0 +1,341 @@
+"""
+Buffered Audit Writer.
+
+Audit events used to be written one row per session and commit, each from its
+own fire-and-forget task, so a burst of failed logins turned into as many
+concurrent SQLite commits. Events now go through a bounded in-memory queue
+drained by a single writer task:
+
+- the writer collects events until it has ``AUDIT_BATCH_SIZE`` of them or
+  ``AUDIT_FLUSH_INTERVAL_SECONDS`` have passed since the first one, then hands
+  the batch to every configured sink (one bulk insert for the database);
+- when the queue is full, new events are dropped rather than blocking the
+  request. Drops are counted per event type, reported in a rate-limited
+  warning, and recorded in the audit trail itself as an
+  ``audit.events_dropped`` event once the queue drains;
+- a sink that fails is retried once. ``failed`` in ``stats()`` counts events
+  a sink could not take; a batch that no sink accepted is added to
+  ``dropped`` and logged, never to ``written``;
+- ``stop()`` drains the queue and is awaited from the application lifespan so
+  buffered events survive a clean shutdown.
+
+Sinks are configured with ``AUDIT_SINKS`` (``db``, ``ndjson`` or both).
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Protocol, Sequence
+
+from app.core.audit.models import ActorType, AuditEvent, AuditEventType, EventStatus
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AuditSink(Protocol):
+    """Destination for batches of audit events."""
+
+    name: str
+
+    async def write_batch(self, events: Sequence[AuditEvent]) -> None:
+        ...
+
+    async def close(self) -> None:
+        ...
+
+
+class DatabaseAuditSink:
+    """Bulk-inserts batches into the ``audit_logs`` table."""
+
+    name = "db"
+
+    async def write_batch(self, events: Sequence[AuditEvent]) -> None:
+        # Import here to avoid circular imports
+        from sqlalchemy import insert
+        from app.core.database import db_factory
+        from app.models.audit_log import AuditLog
+
+        rows = [
+            {
+                "event_type": event.event_type,
+                "actor_type": event.actor_type,
+                "actor_id": event.actor_id,
+                "request_id": event.request_id,
+                "ip": event.ip,
+                "user_agent": event.user_agent,
+                "method": event.method,
+                "path": event.path,
+                "resource_type": event.resource_type,
+                "resource_id": event.resource_id,
+                "status": event.status,
+                "reason": event.reason,
+                "extra_data": event.metadata,
+                "timestamp": event.timestamp,
+            }
+            for event in events
+        ]
+        async with db_factory.session_factory() as session:
+            await session.execute(insert(AuditLog), rows)
+            await session.commit()
+
+    async def close(self) -> None:
+        return None
+
+
+class NdjsonFileAuditSink:
+    """Appends batches to a size-rotated newline-delimited JSON file."""
+
+    name = "ndjson"
+
+    def __init__(self, path: str, max_bytes: int, backup_count: int) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+
+    def _rotate(self) -> None:
+        for index in range(self.backup_count - 1, 0, -1):
+            source = self.path.with_name(f"{self.path.name}.{index}")
+            if source.exists():
+                os.replace(source, self.path.with_name(f"{self.path.name}.{index + 1}"))
+        if self.backup_count > 0:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+
+    def _write(self, payload: str) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if (
+            self.max_bytes > 0
+            and self.path.exists()
+            and self.path.stat().st_size + len(payload) > self.max_bytes
+        ):
+            self._rotate()
+        with self.path.open("a", encoding="utf-8") as handle:
+            handle.write(payload)
+
+    async def write_batch(self, events: Sequence[AuditEvent]) -> None:
+        payload = "".join(
+            json.dumps(event.model_dump(mode="json"), separators=(",", ":")) + "\n"
+            for event in events
+        )
+        await asyncio.to_thread(self._write, payload)
+
+    async def close(self) -> None:
+        return None
+
+
+def build_sinks(names: str) -> List[AuditSink]:
+    """Create the sinks listed in a comma-separated ``AUDIT_SINKS`` value."""
+    sinks: List[AuditSink] = []
+    for name in (part.strip().lower() for part in names.split(",")):
+        if not name:
+            continue
+        if name == "db":
+            sinks.append(DatabaseAuditSink())
+        elif name == "ndjson":
+            sinks.append(
+                NdjsonFileAuditSink(
+                    settings.AUDIT_NDJSON_PATH,
+                    settings.AUDIT_NDJSON_MAX_BYTES,
+                    settings.AUDIT_NDJSON_BACKUP_COUNT,
+                )
+            )
+        else:
+            logger.warning(f"Unknown audit sink '{name}' ignored")
+    return sinks
+
+
+class AuditWriter:
+    """Bounded queue of audit events drained in batches by one task."""
+
+    def __init__(
+        self,
+        sinks: Optional[List[AuditSink]] = None,
+        max_queue_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        flush_interval_seconds: Optional[float] = None,
+    ) -> None:
+        self._sinks = sinks
+        self.max_queue_size = max_queue_size or settings.AUDIT_QUEUE_MAX_SIZE
+        self.batch_size = max(1, batch_size or settings.AUDIT_BATCH_SIZE)
+        self.flush_interval_seconds = (
+            settings.AUDIT_FLUSH_INTERVAL_SECONDS
+            if flush_interval_seconds is None
+            else flush_interval_seconds
+        )
+        self.written_count = 0
+        self.dropped_count = 0
+        self.failed_count = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._collecting: List[AuditEvent] = []
+        self._writing: Optional[asyncio.Future] = None
+        self._pending_drops: Dict[str, int] = {}
+        self._last_drop_report = 0.0
+
+    @property
+    def sinks(self) -> List[AuditSink]:
+        if self._sinks is None:
+            self._sinks = build_sinks(settings.AUDIT_SINKS)
+        return self._sinks
+
+    def start(self) -> None:
+        """Start the writer task on the running loop (no-op if already running there)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._task is not None and not self._task.done():
+            return
+        if self._loop is not loop or self._queue is None:
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = loop.create_task(self._run())
+
+    def submit(self, event: AuditEvent) -> bool:
+        """Queue ``event`` without blocking; returns False if it was dropped."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is not None:
+            if loop is self._loop:
+                if self._task is None or self._task.done():
+                    self.start()
+            elif self._loop is None or self._loop.is_closed() or not self._loop.is_running():
+                self.start()
+
+        if loop is not None and loop is self._loop:
+            return self._enqueue(event)
+        if self._loop is not None and self._loop.is_running():
+            # Called from another thread; hand the event to the writer's loop.
+            self._loop.call_soon_threadsafe(self._enqueue, event)
+            return True
+        self._record_drop(event)
+        return False
+
+    def _enqueue(self, event: AuditEvent) -> bool:
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self._record_drop(event)
+            return False
+        return True
+
+    def _record_drop(self, event: AuditEvent) -> None:
+        self.dropped_count += 1
+        event_type = str(event.event_type)
+        self._pending_drops[event_type] = self._pending_drops.get(event_type, 0) + 1
+        now = time.monotonic()
+        if now - self._last_drop_report >= settings.AUDIT_DROP_LOG_INTERVAL_SECONDS:
+            self._last_drop_report = now
+            logger.warning(
+                f"Audit queue full ({self.max_queue_size}); dropped {self.dropped_count} events so far, "
+                f"pending report: {self._pending_drops}"
+            )
+
+    def _take_drop_report(self) -> Optional[AuditEvent]:
+        if not self._pending_drops:
+            return None
+        dropped, self._pending_drops = self._pending_drops, {}
+        return AuditEvent(
+            event_type=AuditEventType.AUDIT_EVENTS_DROPPED,
+            actor_type=ActorType.SYSTEM,
+            status=EventStatus.FAILURE,
+            reason=f"Audit queue full; {sum(dropped.values())} events dropped",
+            metadata={"dropped_by_type": dropped},
+        )
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            self._collecting = [await queue.get()]
+            deadline = time.monotonic() + self.flush_interval_seconds
+            while len(self._collecting) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    self._collecting.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            batch, self._collecting = self._collecting, []
+            # Shielded so that stop() cancelling the loop never interrupts a batch mid-write.
+            self._writing = asyncio.ensure_future(self._write(batch))
+            await asyncio.shield(self._writing)
+
+    async def _write_to_sink(self, sink: AuditSink, batch: List[AuditEvent]) -> bool:
+        # One retry covers transient failures such as a locked SQLite database.
+        for attempt in (1, 2):
+            try:
+                await sink.write_batch(batch)
+                return True
+            except Exception as e:
+                # Log error but never let audit failures reach the request path
+                logger.error(
+                    f"Failed to write {len(batch)} audit events to {sink.name} (attempt {attempt}): {e}",
+                    exc_info=True,
+                )
+        self.failed_count += len(batch)
+        return False
+
+    async def _write(self, batch: List[AuditEvent]) -> None:
+        if self._queue is not None and self._queue.empty():
+            report = self._take_drop_report()
+            if report is not None:
+                batch.append(report)
+        written = False
+        for sink in self.sinks:
+            written = await self._write_to_sink(sink, batch) or written
+        if written:
+            self.written_count += len(batch)
+        else:
+            self.dropped_count += len(batch)
+            if self.sinks:
+                logger.error(f"Dropped {len(batch)} audit events: every audit sink failed")
+
+    async def flush(self) -> None:
+        """Write everything queued so far."""
+        if self._queue is None:
+            return
+        batch: List[AuditEvent] = []
+        while not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+            if len(batch) >= self.batch_size:
+                await self._write(batch)
+                batch = []
+        if batch or self._pending_drops:
+            await self._write(batch)
+
+    async def stop(self) -> None:
+        """Stop the writer task and flush what is left in the queue."""
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._loop is asyncio.get_running_loop():
+            if self._writing is not None and not self._writing.done():
+                await self._writing
+            batch, self._collecting = self._collecting, []
+            if batch:
+                await self._write(batch)
+            await self.flush()
+        for sink in self.sinks:
+            await sink.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "written": self.written_count,
+            "dropped": self.dropped_count,
+            "failed": self.failed_count,
+        }
+
+
+# Global singleton instance
+audit_writer = AuditWriter()
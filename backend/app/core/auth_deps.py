@@ -2,7 +2,6 @@ from fastapi import Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import Optional
-import asyncio
 
 from app.core.database import get_db
 from app.core.auth_context import AuthContext
@@ -20,20 +19,17 @@ def extract_access_token(request: Request) -> Optional[str]:
 
 
 def _log_auth_failure_background(request: Request, reason: str, event_type: str, user_id: Optional[str] = None):
-    """Schedule audit log write in background to not block request."""
-    async def _write():
-        try:
-            from app.core.audit import audit_logger, AuditEventType
-            await audit_logger.log_auth_failure(
-                request=request,
-                reason=reason,
-                event_type=AuditEventType(event_type),
-                user_id=user_id,
-            )
-        except Exception:
-            pass  # Don't fail request if audit logging fails
-    
-    asyncio.create_task(_write())
+    """Queue an audit event for the background audit writer; never blocks the request."""
+    try:
+        from app.core.audit import audit_logger, AuditEventType
+        audit_logger.log_auth_failure(
+            request=request,
+            reason=reason,
+            event_type=AuditEventType(event_type),
+            user_id=user_id,
+        )
+    except Exception:
+        pass  # Don't fail request if audit logging fails
 
 
 async def get_auth_context(
@@ -138,17 +134,15 @@ async def require_admin(
     #Require authenticated admin user.
     if not auth.is_admin:
         # Log authorization failure
-        async def _log_forbidden():
-            try:
-                from app.core.audit import audit_logger
-                await audit_logger.log_authorization_failure(
-                    request=request,
-                    user_id=auth.user_id,
-                    reason="Admin privileges required",
-                )
-            except Exception:
-                pass
-        asyncio.create_task(_log_forbidden())
+        try:
+            from app.core.audit import audit_logger
+            audit_logger.log_authorization_failure(
+                request=request,
+                user_id=auth.user_id,
+                reason="Admin privileges required",
+            )
+        except Exception:
+            pass
         
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
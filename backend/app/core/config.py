@@ -43,6 +43,11 @@ class Settings(BaseSettings):
     PORT: int = 8005
     RELOAD: bool = True
     LOG_LEVEL: str = "info"
+    HOT_PATH_LOG_LEVELS: str = "chat=info,providers=info"  # Per-category levels for chat/provider request logs
+    HOT_PATH_TRACE_SAMPLE_RATE: float = 0.0  # Fraction of requests traced at debug level
+    HOT_PATH_TRACE_REQUEST_IDS: str = ""  # Comma-separated X-Request-ID values that are always traced
+    CHAT_METRICS_ENABLED: bool = False  # Expose Prometheus metrics at /metrics (admin-only)
+    CHAT_SLOW_REQUEST_MS: int = 0  # Log the stage breakdown of chat requests slower than this (0 disables)
     PROXY_HEADERS: bool = True
     FORWARDED_ALLOW_IPS: str = "*"
     SSL_KEYFILE: Optional[str] = None
@@ -64,6 +69,62 @@ class Settings(BaseSettings):
     JOB_WORKER_TOKEN: str = ""  # For background job worker callbacks
     PLUGIN_LIFECYCLE_TOKEN: str = ""  # For plugin lifecycle operations
 
+    # Plugin endpoint sandbox
+    PLUGIN_ENDPOINT_TIMEOUT_SECONDS: float = 30.0  # Wall-clock limit per plugin endpoint call
+    PLUGIN_ENDPOINT_MAX_CONCURRENCY: int = 8  # Concurrent calls allowed per plugin
+    PLUGIN_ENDPOINT_THREADPOOL_WORKERS: int = 16  # Shared pool for synchronous plugin handlers
+    PLUGIN_MANIFEST_CACHE_TTL_SECONDS: float = 300.0  # Backstop TTL for cached per-user manifests
+    PLUGIN_ASSET_LOOKUP_TTL_SECONDS: float = 60.0  # Re-run cached plugin id/slug lookups for asset requests this often
+    PAGE_CACHE_MAX_ENTRIES: int = 512  # Serialized page detail responses kept in memory
+    PAGE_CACHE_TTL_SECONDS: float = 300.0  # Backstop TTL for writers that bypass invalidation
+
+    # Model catalog (/ai/providers/all-models)
+    MODEL_CATALOG_TTL_SECONDS: float = 300.0  # Serve a provider's model list without refetching
+    MODEL_CATALOG_STALE_SECONDS: float = 3600.0  # Serve stale lists while refreshing in the background
+    MODEL_CATALOG_ERROR_TTL_SECONDS: float = 30.0  # Cache provider failures this long
+    MODEL_CATALOG_PROVIDER_TIMEOUT_SECONDS: float = 10.0  # Per-provider get_models() limit
+    MODEL_CATALOG_RESPONSE_WAIT_SECONDS: float = 3.0  # Slower providers are reported as pending
+    MODEL_CATALOG_REFRESH_INTERVAL_SECONDS: float = 240.0  # Keep-warm job interval (0 disables)
+    MODEL_CATALOG_WARM_IDLE_SECONDS: float = 3600.0  # Stop keeping warm after this much inactivity
+    SCOPE_CONTEXT_CACHE_TTL_SECONDS: float = 30.0  # Cached scope file/onboarding checks per chat turn (0 disables)
+    MCP_READ_ONLY_TOOL_CONCURRENCY: int = 4  # Concurrent read-only MCP tool calls per user within a tool pass (1 disables)
+    DIGEST_DELIVERY_MAX_ATTEMPTS: int = 6  # Webhook attempts per digest handoff before giving up
+    DIGEST_DELIVERY_RETRY_BASE_SECONDS: float = 30.0  # First retry delay; doubles per attempt
+    DIGEST_DELIVERY_RETRY_MAX_SECONDS: float = 3600.0
+    DIGEST_DELIVERY_BATCH_SIZE: int = 50  # Outbox rows claimed per dispatch round
+    DIGEST_DELIVERY_ENDPOINT_CONCURRENCY: int = 4  # Concurrent POSTs per webhook endpoint
+    CONVERSATION_CONTEXT_BUDGET_TOKENS: int = 24000  # History budget when the model's context window is unknown
+    CONVERSATION_CONTEXT_HISTORY_RATIO: float = 0.6  # Share of a known context window given to history
+    CONVERSATION_CONTEXT_MAX_MESSAGES: int = 100
+    CONVERSATION_SUMMARY_MAX_CHARS: int = 4000  # Rolling summary of out-of-window turns (0 disables)
+    CHAT_STREAM_CHECKPOINT_SECONDS: float = 15.0  # Persist partial streamed replies this often (0 disables)
+    REQUEST_COALESCING_ENABLED: bool = True  # Duplicate in-flight /generate and /chat requests share one provider call
+    REQUEST_REPLAY_TTL_SECONDS: int = 120  # Keep responses to Idempotency-Key requests this long for retries
+    AUDIT_SINKS: str = "db"  # Comma-separated audit destinations: db, ndjson
+    AUDIT_QUEUE_MAX_SIZE: int = 10000  # Buffered audit events; further events are dropped and counted
+    AUDIT_BATCH_SIZE: int = 200  # Audit events written per bulk insert
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0  # Longest an audit event waits for its batch to fill
+    AUDIT_DROP_LOG_INTERVAL_SECONDS: float = 60.0  # At most one dropped-events warning per interval
+    AUDIT_NDJSON_PATH: str = "./logs/audit.ndjson"
+    AUDIT_NDJSON_MAX_BYTES: int = 50 * 1024 * 1024  # Rotate the NDJSON audit file at this size
+    AUDIT_NDJSON_BACKUP_COUNT: int = 5
+    AUDIT_HOT_RETENTION_DAYS: int = 30  # Events older than this leave the audit_logs table
+    AUDIT_ARCHIVE_ENABLED: bool = True  # Move expired events to monthly archive files instead of deleting them
+    AUDIT_ARCHIVE_DIR: str = "./storage/audit_archive"
+    AUDIT_ARCHIVE_RETENTION_DAYS: int = 365  # Delete monthly archives past this age (0 keeps them forever)
+    AUDIT_COMPACTION_INTERVAL_HOURS: float = 24.0  # Compaction job interval (0 disables scheduling)
+    AUDIT_COMPACTION_BATCH_SIZE: int = 1000  # Rows moved per compaction transaction
+    AUDIT_EXPORT_PAGE_SIZE: int = 1000  # Rows read per page by the NDJSON export
+    CONVERSATION_SEARCH_BACKFILL_BATCH_SIZE: int = 200  # Conversations (re)indexed per backfill transaction
+    DIAGNOSTICS_SAMPLE_INTERVAL_SECONDS: float = 30.0  # Refresh interval of the diagnostics snapshot (0 samples on request)
+    OLLAMA_GATEWAY_MAX_CONNECTIONS: int = 10  # Pooled connections per Ollama server
+    OLLAMA_GATEWAY_IDLE_SECONDS: float = 600.0  # Close a server's client after this long unused
+    OLLAMA_TAGS_CACHE_TTL_SECONDS: float = 10.0  # Cache /api/tags per server this long (0 disables)
+    OLLAMA_HEALTH_PROBE_INTERVAL_SECONDS: float = 15.0  # Probe used Ollama servers this often (0 disables)
+    OLLAMA_PULL_CONCURRENCY_PER_SERVER: int = 2  # Model pulls run at once against one Ollama server
+    OLLAMA_PULL_MAX_RESUMES: int = 5  # Times an interrupted pull is re-issued before the install fails
+    OLLAMA_PULL_RESUME_DELAY_SECONDS: float = 2.0  # First resume delay; doubles per resume
+
     # Database
     DATABASE_URL: str = "sqlite:///braindrive.db"
     DATABASE_TYPE: str = "sqlite"
@@ -90,6 +151,12 @@ class Settings(BaseSettings):
     ALLOWED_HOSTS: List[str] = ["localhost", "127.0.0.1"]
 
     ENCRYPTION_MASTER_KEY: str = ""
+    ENCRYPTION_KEY_VERSION: int = 1  # Version of ENCRYPTION_MASTER_KEY; bump it when rotating to a new key
+    ENCRYPTION_PREVIOUS_KEYS: str = ""  # Retired keys still accepted for decryption: "1:old-secret,2:..."
+    ENCRYPTION_ROTATION_BATCH_SIZE: int = 500  # Rows re-encrypted per transaction
+    ENCRYPTION_ROTATION_BATCH_DELAY_SECONDS: float = 0.05  # Pause between batches to leave room for other writers
+    ENCRYPTED_VALUE_CACHE_MAX_ENTRIES: int = 2048  # Decrypted column values kept in memory (0 disables)
+    ENCRYPTED_VALUE_CACHE_MAX_VALUE_CHARS: int = 65536  # Larger ciphertexts are always decrypted
     ENABLE_TEST_ROUTES: bool = True
     CORS_METHODS: List[str] = ["GET", "POST", "PUT", "DELETE", "OPTIONS", "HEAD"]
     CORS_HEADERS: List[str] = ["Authorization", "Content-Type", "Accept", "Origin", "X-Requested-With"]
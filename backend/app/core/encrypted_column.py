@@ -1,17 +1,125 @@
 """
 SQLAlchemy encrypted column type for automatic field encryption/decryption
+
+Decrypted values are kept in a process-local LRU keyed by a digest of the
+ciphertext, so rows that are loaded repeatedly (settings pages, provider
+lookups) skip the base64/AES-GCM/gunzip/JSON work. A ciphertext never changes
+meaning, so entries need no invalidation: an update writes a new ciphertext
+with a fresh IV. Entries are stored as compact JSON text and parsed on every
+hit, so callers always get their own copy to mutate. Fields opt out with ``"cache": False`` in their
+encryption settings; ENCRYPTED_VALUE_CACHE_MAX_ENTRIES=0 disables the cache.
 """
 import hashlib
+import json
 import logging
-from typing import Any, Optional, Iterable
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Iterable, Tuple
 from itertools import islice
+from prometheus_client import Counter
 from sqlalchemy import TypeDecorator, Text
 from sqlalchemy.engine import Dialect
 
+from .config import settings
 from .encryption import encryption_service, EncryptionError
+from .encryption_config import encryption_config
 
 logger = logging.getLogger(__name__)
 
+DECRYPTED_VALUE_CACHE_REQUESTS = Counter(
+    "braindrive_decrypted_value_cache_requests_total",
+    "Decrypted-value cache lookups for encrypted columns",
+    ["table", "field", "result"],
+)
+
+_MISSING = object()
+
+
+class DecryptedValueCache:
+    """Size-bounded LRU of decrypted column values keyed by ciphertext digest."""
+
+    def __init__(self, max_entries: Optional[int] = None, max_value_chars: Optional[int] = None) -> None:
+        self._max_entries = max_entries
+        self._max_value_chars = max_value_chars
+        self._entries: "OrderedDict[Tuple[str, str, bytes], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, str], Tuple[Any, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_entries(self) -> int:
+        if self._max_entries is not None:
+            return self._max_entries
+        return settings.ENCRYPTED_VALUE_CACHE_MAX_ENTRIES
+
+    @property
+    def max_value_chars(self) -> int:
+        if self._max_value_chars is not None:
+            return self._max_value_chars
+        return settings.ENCRYPTED_VALUE_CACHE_MAX_VALUE_CHARS
+
+    def enabled_for(self, table_name: str, field_name: str) -> bool:
+        if self.max_entries <= 0:
+            return False
+        return encryption_config.get_field_settings(table_name, field_name).get("cache", True)
+
+    @staticmethod
+    def _key(table_name: str, field_name: str, ciphertext: str) -> Tuple[str, str, bytes]:
+        digest = hashlib.blake2b(ciphertext.encode("utf-8"), digest_size=16).digest()
+        return table_name, field_name, digest
+
+    def get(self, table_name: str, field_name: str, ciphertext: str) -> Any:
+        """Cached value for ``ciphertext`` (a fresh copy), or ``_MISSING``."""
+        key = self._key(table_name, field_name, ciphertext)
+        with self._lock:
+            serialized = self._entries.get(key)
+            if serialized is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        counters = self._counters.get((table_name, field_name))
+        if counters is None:
+            counters = (
+                DECRYPTED_VALUE_CACHE_REQUESTS.labels(table_name, field_name, "hit"),
+                DECRYPTED_VALUE_CACHE_REQUESTS.labels(table_name, field_name, "miss"),
+            )
+            self._counters[(table_name, field_name)] = counters
+        counters[serialized is None].inc()
+        return _MISSING if serialized is None else json.loads(serialized)
+
+    def put(self, table_name: str, field_name: str, ciphertext: str, value: Any) -> None:
+        if len(ciphertext) > self.max_value_chars:
+            return
+        key = self._key(table_name, field_name, ciphertext)
+        try:
+            serialized = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            self._entries[key] = serialized
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+decrypted_value_cache = DecryptedValueCache()
+
 
 def _summarize_value(value: Any) -> str:
     """Return a sanitised summary of a value for debug logging."""
@@ -120,6 +228,13 @@ class EncryptedType(TypeDecorator):
         """
         if value is None:
             return None
+        
+        # Only values that decrypted successfully are cached, so a hit needs no further checks
+        use_cache = decrypted_value_cache.enabled_for(self.table_name, self.field_name)
+        if use_cache:
+            cached_value = decrypted_value_cache.get(self.table_name, self.field_name, value)
+            if cached_value is not _MISSING:
+                return cached_value
             
         # Check if field should be encrypted
         if not encryption_service.should_encrypt_field(self.table_name, self.field_name):
@@ -140,6 +255,8 @@ class EncryptedType(TypeDecorator):
                     value
                 )
                 
+                if use_cache:
+                    decrypted_value_cache.put(self.table_name, self.field_name, value, decrypted_value)
                 logger.debug(f"Decrypted field {self.table_name}.{self.field_name}")
                 return decrypted_value
             else:
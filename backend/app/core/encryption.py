@@ -1,13 +1,21 @@
 """
 Universal encryption service for BrainDrive
 Provides AES-256-GCM encryption with automatic compression and key derivation
+
+Keys are versioned so old and new keys can coexist during a rotation:
+- ENCRYPTION_MASTER_KEY is the current key, with version ENCRYPTION_KEY_VERSION
+- ENCRYPTION_PREVIOUS_KEYS lists retired keys ("1:secret,2:secret") that are
+  still accepted for decryption
+Version 1 ciphertexts keep the original unprefixed format; later versions are
+prefixed with "v<version>:" so the key can be picked without trial decryption.
 """
 import os
+import re
 import json
 import gzip
 import base64
 import logging
-from typing import Any, Optional, Union
+from typing import Any, Dict, Optional, Tuple, Union
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.primitives import hashes
@@ -24,36 +32,137 @@ class EncryptionError(Exception):
     """Custom exception for encryption-related errors"""
     pass
 
+LEGACY_KEY_VERSION = 1
+_VERSION_PREFIX = re.compile(r'^v(\d+):')
+
 class UniversalEncryptionService:
     """Universal encryption service with configuration-driven field encryption"""
     
     def __init__(self):
         self.backend = default_backend()
-        self._master_key = None
-        self._salt = b'BrainDrive2025'  # Static salt for key derivation
+        self._keys: Dict[Tuple[int, str], bytes] = {}
+        self._salt = b'BrainDrive2025'  # Static salt for key derivation (key version 1)
+    
+    @property
+    def current_key_version(self) -> int:
+        """Key version used for new ciphertexts"""
+        return max(int(settings.ENCRYPTION_KEY_VERSION or LEGACY_KEY_VERSION), LEGACY_KEY_VERSION)
+    
+    def _key_secrets(self) -> Dict[int, str]:
+        """Map of key version to secret for every key accepted for decryption"""
+        secrets: Dict[int, str] = {}
+        for entry in (settings.ENCRYPTION_PREVIOUS_KEYS or "").split(","):
+            version, sep, secret = entry.strip().partition(":")
+            if sep and version.strip().isdigit() and secret:
+                secrets[int(version)] = secret
         
-    def _get_master_key(self) -> bytes:
-        """Get or derive the master encryption key"""
-        if self._master_key is None:
-            # Get master key from environment
-            master_key_str = settings.ENCRYPTION_MASTER_KEY or os.getenv('ENCRYPTION_MASTER_KEY')
-            if not master_key_str:
+        master_key_str = settings.ENCRYPTION_MASTER_KEY or os.getenv('ENCRYPTION_MASTER_KEY')
+        if master_key_str:
+            secrets[self.current_key_version] = master_key_str
+        return secrets
+    
+    def available_key_versions(self) -> Tuple[int, ...]:
+        """Key versions that can currently be decrypted"""
+        return tuple(sorted(self._key_secrets()))
+    
+    def _get_key(self, version: int) -> bytes:
+        """Get or derive the encryption key for a key version"""
+        secret = self._key_secrets().get(version)
+        if not secret:
+            if version == self.current_key_version:
                 raise EncryptionError(
                     "ENCRYPTION_MASTER_KEY environment variable not set. "
                     "Please set it to a secure random string."
                 )
-            
-            # Derive a 32-byte key using PBKDF2
+            raise EncryptionError(
+                f"No key configured for key version {version}. "
+                "Add it to ENCRYPTION_PREVIOUS_KEYS until its data has been rotated."
+            )
+        
+        cache_key = (version, secret)
+        key = self._keys.get(cache_key)
+        if key is None:
+            # Derive a 32-byte key using PBKDF2, with a distinct salt per key version
+            salt = self._salt if version == LEGACY_KEY_VERSION else self._salt + f":v{version}".encode('ascii')
             kdf = PBKDF2HMAC(
                 algorithm=hashes.SHA256(),
                 length=32,
-                salt=self._salt,
+                salt=salt,
                 iterations=100000,
                 backend=self.backend
             )
-            self._master_key = kdf.derive(master_key_str.encode('utf-8'))
+            key = kdf.derive(secret.encode('utf-8'))
+            self._keys[cache_key] = key
+        return key
+    
+    def _get_master_key(self) -> bytes:
+        """Get or derive the current encryption key"""
+        return self._get_key(self.current_key_version)
+    
+    def key_version_of(self, encrypted_value: str) -> int:
+        """Key version a ciphertext was written with"""
+        match = _VERSION_PREFIX.match(encrypted_value)
+        return int(match.group(1)) if match else LEGACY_KEY_VERSION
+    
+    def _split_ciphertext(self, encrypted_value: str) -> Tuple[int, str]:
+        match = _VERSION_PREFIX.match(encrypted_value)
+        if match:
+            return int(match.group(1)), encrypted_value[match.end():]
+        return LEGACY_KEY_VERSION, encrypted_value
+    
+    def _seal(self, data: bytes, version: int) -> bytes:
+        """AES-GCM encrypt ``data`` with a key version; returns IV + ciphertext + tag"""
+        # Generate a random 96-bit (12-byte) IV for GCM
+        iv = os.urandom(12)
+        
+        # Create cipher
+        cipher = Cipher(
+            algorithms.AES(self._get_key(version)),
+            modes.GCM(iv),
+            backend=self.backend
+        )
+        encryptor = cipher.encryptor()
+        
+        # Encrypt the data
+        ciphertext = encryptor.update(data) + encryptor.finalize()
+        
+        # Combine IV + ciphertext + authentication tag
+        return iv + ciphertext + encryptor.tag
+    
+    def _open(self, encrypted_data: bytes, version: int) -> bytes:
+        """AES-GCM decrypt IV + ciphertext + tag with a key version"""
+        # Extract IV (12 bytes), ciphertext, and tag (16 bytes)
+        if len(encrypted_data) < 28:  # 12 + 16 = minimum size
+            raise EncryptionError("Invalid encrypted data: too short")
             
-        return self._master_key
+        iv = encrypted_data[:12]
+        tag = encrypted_data[-16:]
+        ciphertext = encrypted_data[12:-16]
+        
+        # Create cipher
+        cipher = Cipher(
+            algorithms.AES(self._get_key(version)),
+            modes.GCM(iv, tag),
+            backend=self.backend
+        )
+        decryptor = cipher.decryptor()
+        
+        # Decrypt the data
+        return decryptor.update(ciphertext) + decryptor.finalize()
+    
+    def _encode(self, encrypted_data: bytes, version: int, encoding: str) -> str:
+        if encoding != 'base64':
+            raise EncryptionError(f"Unsupported encoding: {encoding}")
+        encoded = base64.b64encode(encrypted_data).decode('ascii')
+        if version == LEGACY_KEY_VERSION:
+            return encoded
+        return f"v{version}:{encoded}"
+    
+    def _decode(self, encrypted_value: str, encoding: str) -> Tuple[int, bytes]:
+        if encoding != 'base64':
+            raise EncryptionError(f"Unsupported encoding: {encoding}")
+        version, payload = self._split_ciphertext(encrypted_value)
+        return version, base64.b64decode(payload.encode('ascii'))
     
     def _compress_data(self, data: bytes) -> bytes:
         """Compress data using gzip"""
@@ -81,7 +190,13 @@ class UniversalEncryptionService:
         json_str = data.decode('utf-8')
         return json.loads(json_str)
     
-    def encrypt_field(self, table_name: str, field_name: str, value: Any) -> Optional[str]:
+    def encrypt_field(
+        self,
+        table_name: str,
+        field_name: str,
+        value: Any,
+        key_version: Optional[int] = None,
+    ) -> Optional[str]:
         """
         Encrypt a field value based on its configuration
         
@@ -89,6 +204,7 @@ class UniversalEncryptionService:
             table_name: Name of the database table
             field_name: Name of the field
             value: Value to encrypt
+            key_version: Key version to encrypt with (defaults to the current key)
             
         Returns:
             Base64-encoded encrypted string or None if value is None
@@ -107,32 +223,8 @@ class UniversalEncryptionService:
             if settings.get('compress', False):
                 data = self._compress_data(data)
             
-            # Generate a random 96-bit (12-byte) IV for GCM
-            iv = os.urandom(12)
-            
-            # Create cipher
-            cipher = Cipher(
-                algorithms.AES(self._get_master_key()),
-                modes.GCM(iv),
-                backend=self.backend
-            )
-            encryptor = cipher.encryptor()
-            
-            # Encrypt the data
-            ciphertext = encryptor.update(data) + encryptor.finalize()
-            
-            # Get the authentication tag
-            tag = encryptor.tag
-            
-            # Combine IV + ciphertext + tag
-            encrypted_data = iv + ciphertext + tag
-            
-            # Encode based on settings
-            encoding = settings.get('encoding', 'base64')
-            if encoding == 'base64':
-                return base64.b64encode(encrypted_data).decode('ascii')
-            else:
-                raise EncryptionError(f"Unsupported encoding: {encoding}")
+            version = key_version or self.current_key_version
+            return self._encode(self._seal(data, version), version, settings.get('encoding', 'base64'))
                 
         except Exception as e:
             logger.error(f"Error encrypting field {table_name}.{field_name}: {e}")
@@ -157,31 +249,8 @@ class UniversalEncryptionService:
             # Get field settings
             settings = encryption_config.get_field_settings(table_name, field_name)
             
-            # Decode based on settings
-            encoding = settings.get('encoding', 'base64')
-            if encoding == 'base64':
-                encrypted_data = base64.b64decode(encrypted_value.encode('ascii'))
-            else:
-                raise EncryptionError(f"Unsupported encoding: {encoding}")
-            
-            # Extract IV (12 bytes), ciphertext, and tag (16 bytes)
-            if len(encrypted_data) < 28:  # 12 + 16 = minimum size
-                raise EncryptionError("Invalid encrypted data: too short")
-                
-            iv = encrypted_data[:12]
-            tag = encrypted_data[-16:]
-            ciphertext = encrypted_data[12:-16]
-            
-            # Create cipher
-            cipher = Cipher(
-                algorithms.AES(self._get_master_key()),
-                modes.GCM(iv, tag),
-                backend=self.backend
-            )
-            decryptor = cipher.decryptor()
-            
-            # Decrypt the data
-            data = decryptor.update(ciphertext) + decryptor.finalize()
+            version, encrypted_data = self._decode(encrypted_value, settings.get('encoding', 'base64'))
+            data = self._open(encrypted_data, version)
             
             # Decompress if configured
             if settings.get('compress', False):
@@ -197,6 +266,34 @@ class UniversalEncryptionService:
             logger.error(f"Error decrypting field {table_name}.{field_name}: {e}")
             raise EncryptionError(f"Failed to decrypt field: {e}")
     
+    def reencrypt_field(
+        self,
+        table_name: str,
+        field_name: str,
+        encrypted_value: str,
+        key_version: Optional[int] = None,
+    ) -> str:
+        """
+        Re-encrypt a ciphertext under another key version (defaults to the current key)
+        
+        The payload is not decompressed or deserialized, so the stored value is
+        preserved byte for byte.
+        """
+        target_version = key_version or self.current_key_version
+        try:
+            encoding = encryption_config.get_field_settings(table_name, field_name).get('encoding', 'base64')
+            version, encrypted_data = self._decode(encrypted_value, encoding)
+            data = self._open(encrypted_data, version)
+            return self._encode(self._seal(data, target_version), target_version, encoding)
+        except InvalidTag:
+            logger.error(f"Authentication failed for field {table_name}.{field_name}")
+            raise EncryptionError("Decryption failed: data may have been tampered with")
+        except EncryptionError:
+            raise
+        except Exception as e:
+            logger.error(f"Error re-encrypting field {table_name}.{field_name}: {e}")
+            raise EncryptionError(f"Failed to re-encrypt field: {e}")
+    
     def should_encrypt_field(self, table_name: str, field_name: str) -> bool:
         """Check if a field should be encrypted"""
         return encryption_config.should_encrypt_field(table_name, field_name)
@@ -212,6 +309,9 @@ class UniversalEncryptionService:
         try:
             # Strip whitespace that may legitimately surround encoded data
             candidate = value.strip()
+            match = _VERSION_PREFIX.match(candidate)
+            if match:
+                candidate = candidate[match.end():]
             # Strict validation so JSON/plaintext does not masquerade as ciphertext
             decoded = base64.b64decode(candidate.encode('ascii'), validate=True)
             # Encrypted values should be at least 28 bytes (12 IV + 16 tag)
@@ -9,6 +9,7 @@ from typing import Dict, List
 # Format: {"table_name": ["field1", "field2"]}
 ENCRYPTED_FIELDS: Dict[str, List[str]] = {
     "settings_instances": ["value"],
+    "digest_delivery_outbox": ["target"],
     # Add more tables and fields as needed
     # "users": ["password"],  # Future: if we want to double-encrypt passwords
     # "sessions": ["session_data"],  # Future: encrypt session data
@@ -20,7 +21,15 @@ FIELD_ENCRYPTION_SETTINGS: Dict[str, Dict[str, any]] = {
         "algorithm": "AES-256-GCM",
         "key_derivation": "PBKDF2",
         "compress": True,  # Compress JSON before encryption
-        "encoding": "base64"
+        "encoding": "base64",
+        "cache": True,  # Keep decrypted values in the process-local LRU
+    },
+    "digest_delivery_outbox.target": {
+        "algorithm": "AES-256-GCM",
+        "key_derivation": "PBKDF2",
+        "compress": False,
+        "encoding": "base64",
+        "cache": False,  # Read once per delivery attempt; caching would only hold webhook secrets in memory
     },
     # Future field settings can be added here
 }
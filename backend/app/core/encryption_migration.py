@@ -1,138 +1,270 @@
 """
-Migration utilities for encrypting existing data
+Migration utilities for encrypting existing data and rotating encryption keys
+
+Rows are read in keyset-paginated batches (``WHERE id > :after_id ORDER BY id``)
+so memory stays bounded however large the table is. Each batch is encrypted or
+re-encrypted in a worker thread, written back with one executemany UPDATE and
+committed, then the next batch starts after ENCRYPTION_ROTATION_BATCH_DELAY_SECONDS.
+Updates only apply if the stored value is unchanged since it was read, so a
+concurrent write by the application is never overwritten. Re-running a migration
+skips rows already at the current key version, and ``after_id`` resumes from a
+reported checkpoint.
 """
+import asyncio
 import logging
 import json
-from typing import List, Dict, Any, Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text, select, update
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import text
 
+from .config import settings
 from .encryption import encryption_service, EncryptionError
 from .encryption_config import encryption_config
 
 logger = logging.getLogger(__name__)
 
+# Errors kept in a report; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+BatchCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
 class EncryptionMigrationService:
-    """Service for migrating existing plain-text data to encrypted format"""
+    """Service for migrating plain-text data to encrypted format and rotating keys"""
     
     def __init__(self):
         self.encryption_service = encryption_service
         self.config = encryption_config
     
+    def _check_field(self, table_name: str, field_name: str) -> None:
+        # Table and field names are interpolated into SQL; only allow configured fields
+        if not self.config.should_encrypt_field(table_name, field_name):
+            raise EncryptionError(f"{table_name}.{field_name} is not configured for encryption")
+    
+    async def _iter_batches(
+        self,
+        db: AsyncSession,
+        table_name: str,
+        field_name: str,
+        after_id: Optional[str],
+        batch_size: int,
+    ) -> AsyncIterator[Sequence[Tuple[Any, Any]]]:
+        """Yield ``(id, value)`` rows in id order, one keyset page at a time"""
+        while True:
+            params: Dict[str, Any] = {"limit": batch_size}
+            where = ""
+            if after_id is not None:
+                where = "WHERE id > :after_id"
+                params["after_id"] = after_id
+            result = await db.execute(
+                text(f"SELECT id, {field_name} FROM {table_name} {where} ORDER BY id LIMIT :limit"),
+                params,
+            )
+            rows = result.fetchall()
+            if not rows:
+                return
+            yield rows
+            after_id = rows[-1][0]
+            if len(rows) < batch_size:
+                return
+    
+    def _add_error(self, report: Dict[str, Any], message: str) -> None:
+        logger.error(message)
+        report["error_count"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append(message)
+    
+    def _prepare_batch(
+        self,
+        table_name: str,
+        field_name: str,
+        rows: Sequence[Tuple[Any, Any]],
+        rotate_keys: bool,
+        dry_run: bool,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Dict[str, int], List[str]]:
+        """Classify a batch and compute new ciphertexts; runs in a worker thread"""
+        current_version = self.encryption_service.current_key_version
+        encrypt_updates: List[Dict[str, Any]] = []
+        rotate_updates: List[Dict[str, Any]] = []
+        counts = {"encrypted_records": 0, "plain_text_records": 0, "stale_key_records": 0}
+        errors: List[str] = []
+        
+        for record_id, field_value in rows:
+            if field_value is None:
+                continue
+            
+            try:
+                # Check if the value is already encrypted
+                if isinstance(field_value, str) and self.encryption_service.is_encrypted_value(field_value):
+                    counts["encrypted_records"] += 1
+                    if self.encryption_service.key_version_of(field_value.strip()) == current_version:
+                        continue
+                    counts["stale_key_records"] += 1
+                    if rotate_keys and not dry_run:
+                        rotate_updates.append({
+                            "record_id": record_id,
+                            "old_value": field_value,
+                            "new_value": self.encryption_service.reencrypt_field(
+                                table_name, field_name, field_value.strip()
+                            ),
+                        })
+                    continue
+                
+                # Value is plain text, needs encryption
+                counts["plain_text_records"] += 1
+                if dry_run:
+                    continue
+                
+                # Parse the JSON value if it's a string
+                if isinstance(field_value, str):
+                    try:
+                        parsed_value = json.loads(field_value)
+                    except json.JSONDecodeError:
+                        parsed_value = field_value
+                else:
+                    parsed_value = field_value
+                
+                encrypt_updates.append({
+                    "record_id": record_id,
+                    "old_value": field_value,
+                    "new_value": self.encryption_service.encrypt_field(table_name, field_name, parsed_value),
+                })
+            except Exception as e:
+                errors.append(f"Failed to process record {record_id}: {str(e)}")
+        
+        return encrypt_updates, rotate_updates, counts, errors
+    
     async def migrate_table_field(
         self, 
         db: AsyncSession, 
         table_name: str, 
         field_name: str,
-        dry_run: bool = True
+        dry_run: bool = True,
+        rotate_keys: bool = False,
+        after_id: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        on_batch: Optional[BatchCallback] = None,
     ) -> Dict[str, Any]:
         """
-        Migrate a specific table field from plain-text to encrypted format
+        Encrypt plain-text values of a table field and, with ``rotate_keys``,
+        re-encrypt values written with a previous key version
         
         Args:
             db: Database session
             table_name: Name of the table
             field_name: Name of the field to encrypt
             dry_run: If True, only analyze without making changes
+            rotate_keys: Re-encrypt values written with an older key version
+            after_id: Resume after this record id (the ``last_id`` of a previous report)
+            batch_size: Rows per batch (defaults to ENCRYPTION_ROTATION_BATCH_SIZE)
+            on_batch: Awaited with the report after each committed batch
             
         Returns:
             Migration report with statistics
         """
-        logger.info(f"Starting migration for {table_name}.{field_name} (dry_run={dry_run})")
+        logger.info(
+            f"Starting migration for {table_name}.{field_name} "
+            f"(dry_run={dry_run}, rotate_keys={rotate_keys}, after_id={after_id})"
+        )
         
         report = {
             "table_name": table_name,
             "field_name": field_name,
             "dry_run": dry_run,
+            "rotate_keys": rotate_keys,
+            "key_version": self.encryption_service.current_key_version,
             "total_records": 0,
             "encrypted_records": 0,
             "plain_text_records": 0,
+            "stale_key_records": 0,
             "errors": [],
-            "migrated_records": 0
+            "error_count": 0,
+            "migrated_records": 0,
+            "rotated_records": 0,
+            "batches": 0,
+            "last_id": after_id,
         }
         
+        batch_size = max(batch_size or settings.ENCRYPTION_ROTATION_BATCH_SIZE, 1)
+        encrypt_query = text(f"""
+            UPDATE {table_name} 
+            SET {field_name} = :new_value, updated_at = CURRENT_TIMESTAMP 
+            WHERE id = :record_id AND {field_name} = :old_value
+        """)
+        # Rotation leaves the value unchanged, so updated_at is not touched
+        rotate_query = text(f"""
+            UPDATE {table_name} 
+            SET {field_name} = :new_value 
+            WHERE id = :record_id AND {field_name} = :old_value
+        """)
+        
         try:
-            # Get all records from the table
-            query = text(f"SELECT id, {field_name} FROM {table_name}")
-            result = await db.execute(query)
-            records = result.fetchall()
-            
-            report["total_records"] = len(records)
+            self._check_field(table_name, field_name)
+        except EncryptionError as e:
+            self._add_error(report, f"Migration failed for {table_name}.{field_name}: {str(e)}")
+            return report
+        
+        batches = self._iter_batches(db, table_name, field_name, after_id, batch_size)
+        while True:
+            try:
+                rows = await batches.__anext__()
+            except StopAsyncIteration:
+                break
+            except Exception as e:
+                self._add_error(report, f"Migration failed for {table_name}.{field_name}: {str(e)}")
+                break
             
-            for record in records:
-                record_id = record[0]
-                field_value = record[1]
-                
-                if field_value is None:
-                    continue
-                
-                try:
-                    # Check if the value is already encrypted
-                    if isinstance(field_value, str) and self.encryption_service.is_encrypted_value(field_value):
-                        report["encrypted_records"] += 1
-                        logger.debug(f"Record {record_id} already encrypted")
-                        continue
-                    
-                    # Value is plain text, needs encryption
-                    report["plain_text_records"] += 1
-                    
-                    if not dry_run:
-                        # Parse the JSON value if it's a string
-                        if isinstance(field_value, str):
-                            try:
-                                parsed_value = json.loads(field_value)
-                            except json.JSONDecodeError:
-                                parsed_value = field_value
-                        else:
-                            parsed_value = field_value
-                        
-                        # Encrypt the value
-                        encrypted_value = self.encryption_service.encrypt_field(
-                            table_name, 
-                            field_name, 
-                            parsed_value
-                        )
-                        
-                        # Update the record
-                        update_query = text(f"""
-                            UPDATE {table_name} 
-                            SET {field_name} = :encrypted_value, updated_at = CURRENT_TIMESTAMP 
-                            WHERE id = :record_id
-                        """)
-                        
-                        await db.execute(update_query, {
-                            "encrypted_value": encrypted_value,
-                            "record_id": record_id
-                        })
-                        
-                        report["migrated_records"] += 1
-                        logger.debug(f"Encrypted record {record_id}")
-                    
-                except Exception as e:
-                    error_msg = f"Failed to process record {record_id}: {str(e)}"
-                    logger.error(error_msg)
-                    report["errors"].append(error_msg)
+            try:
+                encrypt_updates, rotate_updates, counts, errors = await asyncio.to_thread(
+                    self._prepare_batch, table_name, field_name, rows, rotate_keys, dry_run
+                )
+                if not dry_run:
+                    if encrypt_updates:
+                        await db.execute(encrypt_query, encrypt_updates)
+                    if rotate_updates:
+                        await db.execute(rotate_query, rotate_updates)
+                    await db.commit()
+            except Exception as e:
+                self._add_error(report, f"Migration failed for {table_name}.{field_name}: {str(e)}")
+                if not dry_run:
+                    await db.rollback()
+                break
             
+            report["total_records"] += len(rows)
+            for key, count in counts.items():
+                report[key] += count
+            for error in errors:
+                self._add_error(report, error)
             if not dry_run:
-                await db.commit()
-                logger.info(f"Migration completed: {report['migrated_records']} records encrypted")
-            else:
-                logger.info(f"Dry run completed: {report['plain_text_records']} records would be encrypted")
-                
-        except Exception as e:
-            error_msg = f"Migration failed for {table_name}.{field_name}: {str(e)}"
-            logger.error(error_msg)
-            report["errors"].append(error_msg)
-            if not dry_run:
-                await db.rollback()
+                report["migrated_records"] += len(encrypt_updates)
+                report["rotated_records"] += len(rotate_updates)
+            report["batches"] += 1
+            report["last_id"] = rows[-1][0]
+            
+            # The callback may raise to stop the migration (e.g. job cancellation)
+            if on_batch is not None:
+                await on_batch(report)
+            if not dry_run and settings.ENCRYPTION_ROTATION_BATCH_DELAY_SECONDS > 0:
+                await asyncio.sleep(settings.ENCRYPTION_ROTATION_BATCH_DELAY_SECONDS)
+        
+        if not dry_run:
+            logger.info(
+                f"Migration completed: {report['migrated_records']} records encrypted, "
+                f"{report['rotated_records']} re-encrypted with key version {report['key_version']}"
+            )
+        else:
+            logger.info(
+                f"Dry run completed: {report['plain_text_records']} records would be encrypted, "
+                f"{report['stale_key_records']} use an older key version"
+            )
         
         return report
     
     async def migrate_all_configured_fields(
         self, 
         db: AsyncSession, 
-        dry_run: bool = True
+        dry_run: bool = True,
+        rotate_keys: bool = False,
     ) -> List[Dict[str, Any]]:
         """
         Migrate all fields configured for encryption
@@ -140,6 +272,7 @@ class EncryptionMigrationService:
         Args:
             db: Database session
             dry_run: If True, only analyze without making changes
+            rotate_keys: Re-encrypt values written with an older key version
             
         Returns:
             List of migration reports for each field
@@ -150,17 +283,58 @@ class EncryptionMigrationService:
         for table_name, field_names in encrypted_fields.items():
             for field_name in field_names:
                 report = await self.migrate_table_field(
-                    db, table_name, field_name, dry_run
+                    db, table_name, field_name, dry_run, rotate_keys=rotate_keys
                 )
                 reports.append(report)
         
         return reports
     
+    def _verify_batch(
+        self,
+        table_name: str,
+        field_name: str,
+        rows: Sequence[Tuple[Any, Any]],
+    ) -> Tuple[Dict[str, int], Dict[int, int], List[str]]:
+        """Try to decrypt every encrypted value in a batch; runs in a worker thread"""
+        counts = {"encrypted_records": 0, "decryption_successful": 0, "decryption_failed": 0}
+        key_versions: Dict[int, int] = {}
+        errors: List[str] = []
+        
+        for record_id, field_value in rows:
+            if field_value is None:
+                continue
+            
+            # Check if the value appears to be encrypted
+            if not (isinstance(field_value, str) and self.encryption_service.is_encrypted_value(field_value)):
+                continue
+            counts["encrypted_records"] += 1
+            version = self.encryption_service.key_version_of(field_value.strip())
+            key_versions[version] = key_versions.get(version, 0) + 1
+            
+            try:
+                # Try to decrypt it
+                decrypted_value = self.encryption_service.decrypt_field(
+                    table_name, 
+                    field_name, 
+                    field_value.strip()
+                )
+                
+                if decrypted_value is not None:
+                    counts["decryption_successful"] += 1
+                else:
+                    counts["decryption_failed"] += 1
+            except Exception as e:
+                errors.append(f"Failed to decrypt record {record_id}: {str(e)}")
+                counts["decryption_failed"] += 1
+        
+        return counts, key_versions, errors
+    
     async def verify_encryption(
         self, 
         db: AsyncSession, 
         table_name: str, 
-        field_name: str
+        field_name: str,
+        batch_size: Optional[int] = None,
     ) -> Dict[str, Any]:
         """
         Verify that encryption/decryption is working correctly for a field
@@ -169,9 +343,10 @@ class EncryptionMigrationService:
             db: Database session
             table_name: Name of the table
             field_name: Name of the field
+            batch_size: Rows per batch (defaults to ENCRYPTION_ROTATION_BATCH_SIZE)
             
         Returns:
-            Verification report
+            Verification report, including a count of values per key version
         """
         logger.info(f"Verifying encryption for {table_name}.{field_name}")
         
@@ -182,51 +357,28 @@ class EncryptionMigrationService:
             "encrypted_records": 0,
             "decryption_successful": 0,
             "decryption_failed": 0,
-            "errors": []
+            "key_versions": {},
+            "errors": [],
+            "error_count": 0,
         }
         
+        batch_size = max(batch_size or settings.ENCRYPTION_ROTATION_BATCH_SIZE, 1)
         try:
-            # Get all records from the table
-            query = text(f"SELECT id, {field_name} FROM {table_name}")
-            result = await db.execute(query)
-            records = result.fetchall()
-            
-            report["total_records"] = len(records)
-            
-            for record in records:
-                record_id = record[0]
-                field_value = record[1]
-                
-                if field_value is None:
-                    continue
-                
-                try:
-                    # Check if the value appears to be encrypted
-                    if isinstance(field_value, str) and self.encryption_service.is_encrypted_value(field_value):
-                        report["encrypted_records"] += 1
-                        
-                        # Try to decrypt it
-                        decrypted_value = self.encryption_service.decrypt_field(
-                            table_name, 
-                            field_name, 
-                            field_value
-                        )
-                        
-                        if decrypted_value is not None:
-                            report["decryption_successful"] += 1
-                        else:
-                            report["decryption_failed"] += 1
-                            
-                except Exception as e:
-                    error_msg = f"Failed to decrypt record {record_id}: {str(e)}"
-                    logger.error(error_msg)
-                    report["errors"].append(error_msg)
-                    report["decryption_failed"] += 1
+            self._check_field(table_name, field_name)
+            async for rows in self._iter_batches(db, table_name, field_name, None, batch_size):
+                counts, key_versions, errors = await asyncio.to_thread(
+                    self._verify_batch, table_name, field_name, rows
+                )
+                report["total_records"] += len(rows)
+                for key, count in counts.items():
+                    report[key] += count
+                for version, count in key_versions.items():
+                    report["key_versions"][version] = report["key_versions"].get(version, 0) + count
+                for error in errors:
+                    self._add_error(report, error)
                     
         except Exception as e:
-            error_msg = f"Verification failed for {table_name}.{field_name}: {str(e)}"
-            logger.error(error_msg)
-            report["errors"].append(error_msg)
+            self._add_error(report, f"Verification failed for {table_name}.{field_name}: {str(e)}")
         
         return report
     
@@ -242,16 +394,18 @@ class EncryptionMigrationService:
             print(f"Total records: {report['total_records']}")
             print(f"Already encrypted: {report['encrypted_records']}")
             print(f"Plain text records: {report['plain_text_records']}")
+            print(f"Older key version: {report['stale_key_records']}")
             
             if not report['dry_run']:
                 print(f"Successfully migrated: {report['migrated_records']}")
+                print(f"Re-encrypted with key version {report['key_version']}: {report['rotated_records']}")
             
             if report['errors']:
-                print(f"Errors: {len(report['errors'])}")
+                print(f"Errors: {report['error_count']}")
                 for error in report['errors'][:3]:  # Show first 3 errors
                     print(f"  - {error}")
-                if len(report['errors']) > 3:
-                    print(f"  ... and {len(report['errors']) - 3} more errors")
+                if report['error_count'] > 3:
+                    print(f"  ... and {report['error_count'] - 3} more errors")
         
         print("\n" + "="*60)
 
@@ -0,0 +1,172 @@
+"""
+Structured logging for the chat and provider request hot paths.
+
+The chat endpoint and the providers used to ``print()`` dozens of lines per
+request (including whole message lists), which is synchronous stdout I/O on
+the event loop. ``get_hot_path_logger(category)`` returns a structlog logger
+that:
+
+- filters by a per-category level (``HOT_PATH_LOG_LEVELS``, e.g.
+  ``"chat=info,providers=warning"``) before anything is formatted; messages
+  use ``%s`` placeholders and callables passed as keyword values are only
+  evaluated for events that are emitted;
+- lets a traced request log at debug level regardless of its category level.
+  A request is traced when its X-Request-ID is listed in
+  ``HOT_PATH_TRACE_REQUEST_IDS`` or it is sampled by
+  ``HOT_PATH_TRACE_SAMPLE_RATE`` (see ``begin_request_trace``);
+- once ``start_hot_path_logging`` has run, hands records to a queue so
+  rendering and stdout I/O happen on a background thread.
+"""
+
+import logging
+import queue
+import random
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+import structlog
+
+from app.core.config import settings
+
+HOT_PATH_LOGGER_PREFIX = "braindrive.hot_path"
+
+_LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL,
+}
+_METHOD_LEVELS = {**_LEVELS, "warn": logging.WARNING, "exception": logging.ERROR, "fatal": logging.CRITICAL}
+
+_trace_active: ContextVar[bool] = ContextVar("hot_path_trace_active", default=False)
+_category_levels: Optional[Dict[str, int]] = None
+_listener: Optional[QueueListener] = None
+
+
+def _parse_category_levels(raw: str) -> Dict[str, int]:
+    levels: Dict[str, int] = {}
+    for item in (raw or "").split(","):
+        category, _, level = item.partition("=")
+        category, level = category.strip().lower(), level.strip().lower()
+        if category and level in _LEVELS:
+            levels[category] = _LEVELS[level]
+    return levels
+
+
+def _category_level(category: str) -> int:
+    global _category_levels
+    if _category_levels is None:
+        _category_levels = _parse_category_levels(settings.HOT_PATH_LOG_LEVELS)
+    return _category_levels.get(category, logging.INFO)
+
+
+def begin_request_trace(request_id: Optional[str]) -> bool:
+    """Decide whether the current request is traced at debug level."""
+    trace_ids = {item.strip() for item in settings.HOT_PATH_TRACE_REQUEST_IDS.split(",") if item.strip()}
+    traced = bool(request_id and request_id in trace_ids)
+    if not traced and settings.HOT_PATH_TRACE_SAMPLE_RATE > 0:
+        traced = random.random() < settings.HOT_PATH_TRACE_SAMPLE_RATE
+    _trace_active.set(traced)
+    structlog.contextvars.bind_contextvars(request_id=request_id)
+    return traced
+
+
+def is_request_traced() -> bool:
+    return _trace_active.get()
+
+
+class HotPathLogger(structlog.stdlib.BoundLogger):
+    """Bound logger that drops events below its category level before any processing."""
+
+    def _proxy_to_logger(self, method_name: str, event: Optional[str] = None, *event_args: Any, **event_kw: Any) -> Any:
+        level = _METHOD_LEVELS.get(method_name, logging.INFO)
+        if level < _category_level(self._context["_category"]) and not _trace_active.get():
+            return None
+        return super()._proxy_to_logger(method_name, event, *event_args, **event_kw)
+
+
+def _drop_category(logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    event_dict.pop("_category", None)
+    return event_dict
+
+
+def _resolve_lazy_values(logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    for key, value in event_dict.items():
+        if callable(value):
+            try:
+                event_dict[key] = value()
+            except Exception as exc:  # pragma: no cover - logging must never raise
+                event_dict[key] = f"<unavailable: {exc}>"
+    return event_dict
+
+
+def _rendering_handler() -> logging.Handler:
+    handler = logging.StreamHandler()
+    handler.setFormatter(
+        structlog.stdlib.ProcessorFormatter(processor=structlog.dev.ConsoleRenderer(colors=False))
+    )
+    return handler
+
+
+def _set_hot_path_handler(handler: logging.Handler) -> None:
+    hot_path_root = logging.getLogger(HOT_PATH_LOGGER_PREFIX)
+    hot_path_root.handlers = [handler]
+    hot_path_root.propagate = False
+
+
+class _StructlogQueueHandler(QueueHandler):
+    """Queue handler that keeps structlog's event dict intact for the listener."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def get_hot_path_logger(category: str) -> HotPathLogger:
+    """Return the hot-path logger for ``category`` (e.g. ``"chat"``, ``"providers"``)."""
+    if not logging.getLogger(HOT_PATH_LOGGER_PREFIX).handlers:
+        # Synchronous until start_hot_path_logging switches to the queue.
+        _set_hot_path_handler(_rendering_handler())
+    stdlib_logger = logging.getLogger(f"{HOT_PATH_LOGGER_PREFIX}.{category}")
+    # Level filtering happens in HotPathLogger so traced requests can log debug.
+    stdlib_logger.setLevel(logging.DEBUG)
+    return structlog.wrap_logger(
+        stdlib_logger,
+        processors=[
+            _drop_category,
+            structlog.contextvars.merge_contextvars,
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.add_log_level,
+            structlog.stdlib.PositionalArgumentsFormatter(),
+            _resolve_lazy_values,
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.format_exc_info,
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+        ],
+        wrapper_class=HotPathLogger,
+        context_class=dict,
+        cache_logger_on_first_use=True,
+    ).bind(_category=category)
+
+
+def start_hot_path_logging() -> None:
+    """Route hot-path records through a queue to a background rendering thread."""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    _listener = QueueListener(log_queue, _rendering_handler(), respect_handler_level=False)
+    _listener.start()
+    _set_hot_path_handler(_StructlogQueueHandler(log_queue))
+
+
+def stop_hot_path_logging() -> None:
+    """Flush queued records and stop the background thread."""
+    global _listener
+    if _listener is None:
+        return
+    _set_hot_path_handler(_rendering_handler())
+    _listener.stop()
+    _listener = None
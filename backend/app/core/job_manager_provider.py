@@ -1,10 +1,20 @@
 import asyncio
-from typing import Optional
+import logging
+from typing import Any, Callable, Optional
+
+from sqlalchemy import select
 
 from app.core.database import db_factory
 from app.services.job_manager import JobManager, SleepJobHandler
 from app.services.job_handlers import OllamaInstallHandler
 from app.services.job_handlers.service_install import ServiceInstallHandler
+from app.services.job_handlers.model_catalog_refresh import ModelCatalogRefreshHandler
+from app.services.job_handlers.digest_delivery_dispatch import DigestDeliveryDispatchHandler
+from app.services.job_handlers.audit_compaction import AuditCompactionHandler
+from app.services.job_handlers.encryption_rotation import EncryptionRotationHandler
+from app.services.job_handlers.conversation_search_backfill import ConversationSearchBackfillHandler
+
+logger = logging.getLogger(__name__)
 
 job_manager: Optional[JobManager] = None
 _handlers_registered = False
@@ -30,6 +40,27 @@ async def get_job_manager() -> JobManager:
         return job_manager
 
 
+async def get_system_job_owner_id(session_factory: Callable[[], Any]) -> Optional[str]:
+    """First admin user's ID, used to own system jobs (every job belongs to a user)."""
+    from app.models.tenant_models import TenantUser, UserRole
+
+    try:
+        async with session_factory() as db:
+            admin_id = (
+                await db.execute(
+                    select(TenantUser.user_id)
+                    .join(UserRole)
+                    .where(UserRole.role_name == "admin")
+                    .order_by(TenantUser.user_id)
+                    .limit(1)
+                )
+            ).scalar_one_or_none()
+    except Exception as e:
+        logger.warning("Could not look up an admin user for system jobs: %s", e)
+        return None
+    return str(admin_id) if admin_id is not None else None
+
+
 async def _ensure_job_manager() -> None:
     global job_manager, _handlers_registered
     if job_manager is None:
@@ -38,5 +69,10 @@ async def _ensure_job_manager() -> None:
         await job_manager.register_handler(SleepJobHandler())
         await job_manager.register_handler(OllamaInstallHandler())
         await job_manager.register_handler(ServiceInstallHandler())
+        await job_manager.register_handler(ModelCatalogRefreshHandler())
+        await job_manager.register_handler(DigestDeliveryDispatchHandler())
+        await job_manager.register_handler(AuditCompactionHandler())
+        await job_manager.register_handler(EncryptionRotationHandler())
+        await job_manager.register_handler(ConversationSearchBackfillHandler())
         _handlers_registered = True
     await job_manager.start()
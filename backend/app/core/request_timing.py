@@ -0,0 +1,169 @@
+"""
+Per-request stage timings for the chat pipeline.
+
+``begin_request_timings`` starts a ``RequestTimings`` for the current request
+(keyed by the X-Request-ID assigned in ``RequestIdMiddleware``) and makes it
+available to helpers via ``timed_stage(stage)``, which is a no-op outside a
+timed request. Stage durations accumulate, so a stage that runs once per
+tool pass (``llm``, ``mcp_tools``) reports its total.
+
+When the request finishes, the breakdown is:
+
+- stored on the assistant message metadata under ``timings``;
+- observed into Prometheus histograms exposed at ``/metrics``;
+- dumped as a warning on the hot-path ``chat`` logger when the request took
+  longer than ``CHAT_SLOW_REQUEST_MS`` (0 disables the dump).
+
+Every uvicorn worker has its own metric values. With ``--workers N`` the
+``PROMETHEUS_MULTIPROC_DIR`` environment variable must point at an empty,
+writable directory before the workers start (prometheus_client reads it at
+import time); ``render_metrics`` then aggregates the per-process files, so
+``/metrics`` reports the whole server instead of whichever worker answered.
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Histogram, generate_latest, multiprocess
+
+from app.core.config import settings
+from app.core.hot_path_logging import get_hot_path_logger
+from app.middleware.request_id import get_current_request_id
+
+SLOW_REQUEST_LOG = get_hot_path_logger("chat")
+logger = logging.getLogger(__name__)
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+CHAT_STAGE_SECONDS = Histogram(
+    "braindrive_chat_stage_seconds",
+    "Time spent in each stage of a chat request",
+    ["endpoint", "stage"],
+    buckets=_LATENCY_BUCKETS,
+)
+CHAT_REQUEST_SECONDS = Histogram(
+    "braindrive_chat_request_seconds",
+    "End-to-end chat request time",
+    ["endpoint", "mode", "outcome"],
+    buckets=_LATENCY_BUCKETS,
+)
+CHAT_FIRST_TOKEN_SECONDS = Histogram(
+    "braindrive_chat_first_token_seconds",
+    "Time from request start to the first streamed model token",
+    ["endpoint"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+_current_timings: ContextVar[Optional["RequestTimings"]] = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """Accumulated stage durations for one request."""
+
+    def __init__(self, request_id: Optional[str], endpoint: str) -> None:
+        self.request_id = request_id
+        self.endpoint = endpoint
+        self.first_token_ms: Optional[float] = None
+        self._started_at = time.perf_counter()
+        self._stages: Dict[str, float] = {}
+        self._counts: Dict[str, int] = {}
+        self._finished = False
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._started_at) * 1000
+
+    def record(self, stage: str, elapsed_ms: float) -> None:
+        self._stages[stage] = self._stages.get(stage, 0.0) + float(elapsed_ms)
+        self._counts[stage] = self._counts.get(stage, 0) + 1
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - started_at) * 1000)
+
+    def mark_first_token(self) -> None:
+        if self.first_token_ms is None:
+            self.first_token_ms = self.elapsed_ms
+
+    def metadata(self) -> Dict[str, Any]:
+        return {
+            "request_id": self.request_id,
+            "elapsed_ms": int(self.elapsed_ms),
+            "first_token_ms": int(self.first_token_ms) if self.first_token_ms is not None else None,
+            "stages_ms": {stage: round(elapsed, 1) for stage, elapsed in self._stages.items()},
+            "stage_counts": dict(self._counts),
+        }
+
+    def finish(self, *, mode: str, outcome: str = "ok") -> None:
+        """Observe the histograms and dump slow requests; later calls are ignored."""
+        if self._finished:
+            return
+        self._finished = True
+        elapsed_ms = self.elapsed_ms
+        for stage, stage_ms in self._stages.items():
+            CHAT_STAGE_SECONDS.labels(self.endpoint, stage).observe(stage_ms / 1000)
+        CHAT_REQUEST_SECONDS.labels(self.endpoint, mode, outcome).observe(elapsed_ms / 1000)
+        if self.first_token_ms is not None:
+            CHAT_FIRST_TOKEN_SECONDS.labels(self.endpoint).observe(self.first_token_ms / 1000)
+
+        if settings.CHAT_SLOW_REQUEST_MS > 0 and elapsed_ms >= settings.CHAT_SLOW_REQUEST_MS:
+            SLOW_REQUEST_LOG.warning(
+                "Slow %s request took %sms",
+                self.endpoint,
+                int(elapsed_ms),
+                mode=mode,
+                outcome=outcome,
+                timings=self.metadata(),
+            )
+
+
+def begin_request_timings(endpoint: str) -> RequestTimings:
+    """Start timing the current request and make it the active ``RequestTimings``."""
+    timings = RequestTimings(get_current_request_id(), endpoint)
+    _current_timings.set(timings)
+    return timings
+
+
+def current_request_timings() -> Optional[RequestTimings]:
+    return _current_timings.get()
+
+
+@contextmanager
+def timed_stage(stage: str) -> Iterator[None]:
+    """Time ``stage`` on the active request, if any."""
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+    with timings.span(stage):
+        yield
+
+
+def multiprocess_metrics_dir() -> Optional[str]:
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or None
+
+
+def warn_if_metrics_per_worker() -> None:
+    """Log at startup when /metrics is enabled but would only see one worker."""
+    if settings.CHAT_METRICS_ENABLED and multiprocess_metrics_dir() is None:
+        logger.warning(
+            "CHAT_METRICS_ENABLED without PROMETHEUS_MULTIPROC_DIR: /metrics only reports the worker "
+            "that serves the scrape; set it when running uvicorn with --workers"
+        )
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Prometheus text exposition, aggregated across workers in multiprocess mode."""
+    if multiprocess_metrics_dir() is None:
+        return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -7,7 +7,6 @@ Services authenticate with static bearer tokens (not user JWTs).
 from fastapi import Depends, HTTPException, Request, status
 from typing import Optional, Set
 import logging
-import asyncio
 
 from app.core.config import settings
 from app.core.service_context import ServiceContext
@@ -17,25 +16,22 @@ logger = logging.getLogger(__name__)
 
 
 def _log_service_auth_background(request: Request, reason: str, success: bool, service_name: Optional[str] = None):
-    """Schedule audit log write in background to not block request."""
-    async def _write():
-        try:
-            from app.core.audit import audit_logger
-            if success:
-                await audit_logger.log_service_auth_success(
-                    request=request,
-                    service_name=service_name or "unknown",
-                )
-            else:
-                await audit_logger.log_service_auth_failure(
-                    request=request,
-                    reason=reason,
-                    service_name=service_name,
-                )
-        except Exception:
-            pass  # Don't fail request if audit logging fails
-    
-    asyncio.create_task(_write())
+    """Queue an audit event for the background audit writer; never blocks the request."""
+    try:
+        from app.core.audit import audit_logger
+        if success:
+            audit_logger.log_service_auth_success(
+                request=request,
+                service_name=service_name or "unknown",
+            )
+        else:
+            audit_logger.log_service_auth_failure(
+                request=request,
+                reason=reason,
+                service_name=service_name,
+            )
+    except Exception:
+        pass  # Don't fail request if audit logging fails
 
 
 # Service definitions with their scopes
@@ -16,7 +16,7 @@ from sqlalchemy import select, text
 from app.core.user_initializer.base import UserInitializerBase
 from app.core.user_initializer.registry import register_initializer
 from app.core.user_initializer.utils import prepare_record_for_new_user
-from app.models.settings import SettingInstance, SettingDefinition
+from app.models.settings import SettingInstance, SettingDefinition, SettingScope
 
 logger = logging.getLogger(__name__)
 
@@ -238,7 +238,7 @@ class SettingsInitializer(UserInitializerBase):
                         "definition_id": prepared_data["definition_id"],
                         "name": prepared_data["name"],
                         "value": prepared_data["value"],
-                        "scope": prepared_data["scope"],
+                        "scope": SettingScope(prepared_data["scope"]).stored_value,
                         "user_id": user_id,
                         "page_id": prepared_data.get("page_id"),
                         "created_at": current_time,
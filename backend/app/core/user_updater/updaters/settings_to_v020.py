@@ -7,6 +7,7 @@ from sqlalchemy import text
 
 from app.core.user_updater.base import UserUpdaterBase
 from app.core.user_updater.registry import register_updater
+from app.models.settings import SettingScope
 
 logger = logging.getLogger(__name__)
 
@@ -103,7 +104,7 @@ class SettingsToV020(UserUpdaterBase):
                         "definition_id": "general_settings",
                         "name": "General Settings",
                         "value": setting_value,
-                        "scope": "user",
+                        "scope": SettingScope.USER.stored_value,
                         "user_id": user_id,
                         "page_id": None,
                         "created_at": current_time,
@@ -12,6 +12,7 @@ from app.core.job_manager_provider import (
     initialize_job_manager,
     shutdown_job_manager,
 )
+from app.plugins.endpoint_executor import shutdown_plugin_endpoint_executor
 from app.plugins.route_loader import get_plugin_loader
 from app.plugins.service_installler.start_stop_plugin_services import (
     start_plugin_services_on_startup,
@@ -56,6 +57,7 @@ async def lifespan(app: FastAPI):
             "Shutting down application and stopping plugin services..."
         )
         await stop_all_plugin_services_on_shutdown()
+        shutdown_plugin_endpoint_executor()
         await shutdown_job_manager()
         logger.info("Application shutdown completed.")
 
@@ -5,16 +5,23 @@ Generates or propagates a unique request ID for each request,
 enabling correlation of logs and audit events across services.
 """
 import uuid
+from contextvars import ContextVar
+from typing import Optional
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.responses import Response
 import structlog
 
+from app.core.hot_path_logging import begin_request_trace
+
 logger = structlog.get_logger()
 
 # Header name for request ID (standard convention)
 REQUEST_ID_HEADER = "X-Request-ID"
 
+# Request ID of the request being handled, for code without access to the Request
+_current_request_id: ContextVar[Optional[str]] = ContextVar("current_request_id", default=None)
+
 
 class RequestIdMiddleware(BaseHTTPMiddleware):
     """
@@ -24,6 +31,7 @@ class RequestIdMiddleware(BaseHTTPMiddleware):
     - If X-Request-ID header is present, use that value
     - Otherwise, generate a new UUID
     - Store the ID on request.state.request_id
+    - Decide whether the request is traced by the hot-path loggers
     - Return the ID in the X-Request-ID response header
     """
     
@@ -51,6 +59,9 @@ class RequestIdMiddleware(BaseHTTPMiddleware):
         
         # Store on request state for access in endpoints and audit logger
         request.state.request_id = request_id
+        _current_request_id.set(request_id)
+        # Decide whether chat/provider hot-path logs run at debug level for this request
+        begin_request_trace(request_id)
         
         # Process the request
         response = await call_next(request)
@@ -86,3 +97,13 @@ def get_request_id(request: Request) -> str:
         The request ID string, or "unknown" if not set
     """
     return getattr(request.state, 'request_id', 'unknown')
+
+
+def get_current_request_id() -> Optional[str]:
+    """
+    Get the request ID of the request currently being handled.
+    
+    Returns:
+        The request ID string, or None outside a request
+    """
+    return _current_request_id.get()
@@ -35,6 +35,7 @@ from app.models.job import (
     JobStatus,
 )
 from app.models.audit_log import AuditLog
+from app.models.digest_delivery import DigestDeliveryOutbox
 
 # Import relationships module last to establish relationships
 from app.models.relationships import *
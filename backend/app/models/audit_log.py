@@ -100,28 +100,20 @@ class AuditLog(Base, TimestampMixin):
     )
     """When the event occurred (server time)"""
     
-    # Indexes for efficient querying
+    # Indexes, trimmed to the query patterns in app/services/audit_storage.py:
+    # every index is paid for on each insert.
     __table_args__ = (
-        # Query by event type (most common filter)
-        Index("idx_audit_event_type", "event_type"),
+        # Keyset pagination, time-range filters, retention sweeps
+        Index("idx_audit_time_id", "timestamp", "id"),
         
-        # Query by actor (who did what)
-        Index("idx_audit_actor", "actor_type", "actor_id"),
+        # Filter by event type, newest first
+        Index("idx_audit_type_time", "event_type", "timestamp"),
         
-        # Query by time range (compliance, incident response)
-        Index("idx_audit_timestamp", "timestamp"),
+        # Filter by actor (who did what), newest first
+        Index("idx_audit_actor_time", "actor_id", "timestamp"),
         
-        # Correlate with request logs
+        # Correlate every event of one request
         Index("idx_audit_request_id", "request_id"),
-        
-        # Query by affected resource
-        Index("idx_audit_resource", "resource_type", "resource_id"),
-        
-        # Query by status (find failures)
-        Index("idx_audit_status", "status"),
-        
-        # Composite for common queries (type + time)
-        Index("idx_audit_type_time", "event_type", "timestamp"),
     )
     
     def __repr__(self) -> str:
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Text, ForeignKey, DateTime, select, func
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, select, func
 from sqlalchemy.dialects.postgresql import JSON
 # Remove PostgreSQL UUID import as we're standardizing on String
 from sqlalchemy.orm import relationship
@@ -19,6 +19,10 @@ class Conversation(Base, TimestampMixin):
     server = Column(String)  # Store which server was used
     conversation_type = Column(String(100), nullable=True, default="chat")  # New field for categorization
     persona_id = Column(String(32), ForeignKey("personas.id", ondelete="SET NULL"), nullable=True)  # NEW - persona tracking
+    # Rolling summary of messages that no longer fit the chat context window
+    context_summary = Column(Text, nullable=True)
+    context_summary_count = Column(Integer, nullable=True)
+    context_summary_through = Column(DateTime(timezone=True), nullable=True)
 
     # Relationships
     user = relationship("User", back_populates="conversations")
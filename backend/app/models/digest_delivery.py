@@ -0,0 +1,53 @@
+import uuid
+
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Index, Integer, String, Text
+
+from app.core.encrypted_column import EncryptedJSON
+from app.models.base import Base
+from app.models.mixins import TimestampMixin
+
+
+class DigestDeliveryStatus:
+    """Lifecycle states of a digest delivery outbox entry."""
+
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
+class DigestDeliveryOutbox(Base, TimestampMixin):
+    """A digest handoff waiting to be POSTed to a delivery webhook.
+
+    Rows are written in the same transaction as the assistant message that
+    produced them and are drained by the digest delivery dispatch job.
+    """
+
+    __tablename__ = "digest_delivery_outbox"
+
+    id = Column(String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    user_id = Column(String(32), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    message_id = Column(String(36), ForeignKey("messages.id", ondelete="CASCADE"), nullable=True)
+    conversation_id = Column(String(36), nullable=True)
+    channel = Column(String(32), nullable=False)
+
+    # Endpoint, headers (may carry an auth token) and timeout, encrypted at rest.
+    target = Column(EncryptedJSON("digest_delivery_outbox", "target"), nullable=False)
+    endpoint_key = Column(String(64), nullable=False)
+    endpoint_sanitized = Column(Text, nullable=True)
+    payload = Column(JSON, nullable=False)
+
+    status = Column(String(20), nullable=False, default=DigestDeliveryStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=6)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False)
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+    last_http_status = Column(Integer, nullable=True)
+    last_error = Column(Text, nullable=True)
+    ack_id = Column(String(255), nullable=True)
+
+    __table_args__ = (
+        Index("idx_digest_delivery_outbox_due", "user_id", "status", "next_attempt_at"),
+        Index("idx_digest_delivery_outbox_message", "message_id"),
+    )
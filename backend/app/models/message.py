@@ -1,7 +1,7 @@
 import uuid
 import json
 from datetime import datetime
-from sqlalchemy import Column, String, Text, ForeignKey, DateTime, select
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index, event, select
 # Remove PostgreSQL UUID import as we're standardizing on String
 from sqlalchemy.types import TypeDecorator, TEXT
 from sqlalchemy.orm import relationship
@@ -24,6 +24,14 @@ class JSONType(TypeDecorator):
             value = json.loads(value)
         return value
 
+
+def estimate_context_tokens(text) -> int:
+    """Rough token count (~4 characters per token) used for context budgeting."""
+    if not text:
+        return 0
+    return max(1, (len(text) + 3) // 4)
+
+
 class Message(Base, TimestampMixin):
     __tablename__ = "messages"
 
@@ -32,6 +40,7 @@ class Message(Base, TimestampMixin):
     sender = Column(String, nullable=False)  # 'user' or 'llm'
     message = Column(Text, nullable=False)
     message_metadata = Column(JSONType, nullable=True)  # JSON field for evolving message data
+    context_tokens = Column(Integer, nullable=True)  # Estimated prompt tokens, set on write
     # Example message_metadata:
     # {
     #     "token_count": 153,
@@ -43,6 +52,10 @@ class Message(Base, TimestampMixin):
     # Relationships
     conversation = relationship("Conversation", back_populates="messages")
 
+    __table_args__ = (
+        Index("idx_messages_conversation_created", "conversation_id", "created_at"),
+    )
+
     @classmethod
     async def get_by_id(cls, db, message_id):
         """Get a message by its ID."""
@@ -75,3 +88,9 @@ class Message(Base, TimestampMixin):
             return result.scalars().all()
             
         return []
+
+
+@event.listens_for(Message, "before_insert")
+@event.listens_for(Message, "before_update")
+def _set_context_tokens(mapper, connection, target):
+    target.context_tokens = estimate_context_tokens(target.message)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Boolean, JSON, ForeignKey, Enum, func, select, ARRAY
+from sqlalchemy import Column, String, DateTime, Boolean, JSON, ForeignKey, Enum, Index, func, select, ARRAY
 from sqlalchemy.orm import relationship
 from app.models.base import Base
 from app.core.encrypted_column import create_encrypted_column
@@ -26,6 +26,11 @@ class SettingScope(str, enum.Enum):
                     return member
         return None
 
+    @property
+    def stored_value(self) -> str:
+        """Form persisted in ``settings_instances.scope`` (SQLAlchemy stores enum names)."""
+        return self.name
+
 class SettingDefinition(Base):
     __tablename__ = "settings_definitions"
 
@@ -86,6 +91,9 @@ class SettingInstance(Base):
     __mapper_args__ = {
         'confirm_deleted_rows': False  # This forces SQLAlchemy to load this mapper later
     }
+    __table_args__ = (
+        Index("idx_settings_instances_lookup", "user_id", "definition_id", "scope", "page_id"),
+    )
 
     id = Column(String(32), primary_key=True, default=lambda: str(uuid4()).replace('-', ''))
     definition_id = Column(String(32), ForeignKey("settings_definitions.id"), nullable=False)
@@ -144,31 +152,14 @@ class SettingInstance(Base):
         if definition_id:
             query = query.where(cls.definition_id == definition_id)
         if scope:
-            # Prefer ORM with enum conversion so encrypted columns decrypt automatically
+            # Every row stores the enum name, so the ORM filter matches legacy rows too
+            # and encrypted columns decrypt automatically
             try:
-                enum_scope = None
-                if isinstance(scope, SettingScope):
-                    enum_scope = scope
-                elif isinstance(scope, str):
-                    for s in SettingScope:
-                        if s.value.lower() == scope.lower():
-                            enum_scope = s
-                            break
-                if enum_scope:
-                    logger.info(f"Converted scope '{scope}' to enum value '{enum_scope}' for ORM query")
-                    if isinstance(enum_scope, SettingScope) and enum_scope == SettingScope.USER:
-                        logger.info("Legacy data stores 'user' in lowercase; using direct SQL fallback for USER scope")
-                        return await cls.get_all(db, definition_id, scope, user_id, page_id)
-                    scope_value = enum_scope.value if isinstance(enum_scope, SettingScope) else enum_scope
-                    logger.debug(f"Filtering settings by scope value '{scope_value}'")
-                    query = query.where(cls.scope == scope_value)
-                else:
-                    logger.warning(f"Could not convert scope '{scope}' to enum; falling back to direct SQL query")
-                    # Fallback to direct SQL (returns dictionaries; may bypass decryption)
-                    return await cls.get_all(db, definition_id, scope, user_id, page_id)
-            except Exception as e:
-                logger.error(f"Error applying scope filter via ORM: {e}; falling back to direct SQL query")
-                return await cls.get_all(db, definition_id, scope, user_id, page_id)
+                enum_scope = scope if isinstance(scope, SettingScope) else SettingScope(scope)
+            except ValueError:
+                logger.warning(f"Unknown settings scope '{scope}'")
+                return []
+            query = query.where(cls.scope == enum_scope)
         if user_id:
             query = query.where(cls.user_id == user_id)
         if page_id:
@@ -187,59 +178,6 @@ class SettingInstance(Base):
             logger.error(traceback.format_exc())
             # Return empty list instead of raising an exception
             return []
-    
-    @classmethod
-    async def get_all(cls, db, definition_id: str = None, scope: str = None, user_id: str = None, page_id: str = None):
-        """Get all settings instances with optional filters (legacy method, uses direct SQL)."""
-        import logging
-        logger = logging.getLogger(__name__)
-        
-        logger.info(f"Getting all settings with filters: definition_id={definition_id}, scope={scope}, user_id={user_id}, page_id={page_id}")
-        logger.warning("Using deprecated get_all method with direct SQL. Consider using get_all_parameterized instead.")
-        
-        # Build SQL query directly
-        from sqlalchemy import text
-        
-        conditions = []
-        if definition_id:
-            conditions.append(f"definition_id = '{definition_id}'")
-        if scope:
-            # Use case-insensitive comparison for scope
-            conditions.append(f"LOWER(scope) = LOWER('{scope}')")
-        if user_id:
-            conditions.append(f"user_id = '{user_id}'")
-        if page_id:
-            conditions.append(f"page_id = '{page_id}'")
-            
-        where_clause = " AND ".join(conditions) if conditions else "1=1"
-        query = f"""
-        SELECT * FROM settings_instances
-        WHERE {where_clause}
-        """
-        
-        logger.info(f"Direct SQL query: {query}")
-        
-        try:
-            result = await db.execute(text(query))
-            rows = result.fetchall()
-            logger.info(f"Direct SQL query found {len(rows)} rows")
-            
-            # Return rows as dictionaries instead of trying to create SettingInstance objects
-            # This avoids triggering SQLAlchemy's mapper initialization
-            instances = []
-            for row in rows:
-                # Create a dict from the row
-                row_dict = {column: value for column, value in row._mapping.items()}
-                logger.debug(f"Row dict: {row_dict}")
-                instances.append(row_dict)
-            
-            logger.info(f"Converted {len(instances)} rows to dictionaries")
-            return instances
-        except Exception as e:
-            logger.error(f"Error in direct SQL query: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
-            return []
 
     @classmethod
     async def create_with_sql(cls, db, data):
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, ForeignKey, DateTime, select
+from sqlalchemy import Column, String, ForeignKey, DateTime, Index, select
 # Remove PostgreSQL UUID import as we're standardizing on String
 from sqlalchemy.orm import relationship
 from app.models.base import Base
@@ -18,6 +18,10 @@ class Tag(Base, TimestampMixin):
     user = relationship("User", back_populates="tags")
     conversations = relationship("ConversationTag", back_populates="tag", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_tags_user_name", "user_id", "name"),
+    )
+
     @classmethod
     async def get_by_id(cls, db, tag_id):
         """Get a tag by its ID."""
@@ -43,3 +47,7 @@ class ConversationTag(Base):
     # Relationships
     conversation = relationship("Conversation", back_populates="tags")
     tag = relationship("Tag", back_populates="conversations")
+
+    __table_args__ = (
+        Index("ix_conversation_tags_tag", "tag_id", "conversation_id"),
+    )
@@ -0,0 +1,358 @@
+"""
+Cached static asset serving for plugin bundles.
+
+``/plugins/{plugin_id}/{path}`` and ``/public/plugins/{plugin_id}/{path}``
+resolve a plugin row and then probe several on-disk layouts for the requested
+file. ``PluginAssetServer`` caches both steps:
+
+* plugin lookups (id or slug, optionally scoped to a user) are cached for
+  ``PLUGIN_ASSET_LOOKUP_TTL_SECONDS`` and dropped when plugins are installed,
+  updated or removed (``invalidate_plugin_assets``). That only reaches the
+  worker that made the change, so every hit is also checked against the
+  plugin row with one primary-key query; a changed version, slug or owner,
+  or a deleted row, forgets the plugin and its resolved files;
+* ``(plugin, version, path)`` resolutions keep the winning file, its
+  content-hash ETag and any pre-compressed ``.br``/``.gz`` siblings,
+  revalidated with a single ``stat`` per request.
+
+Responses carry strong ETags, answer ``If-None-Match`` with 304, get
+``immutable`` caching for content-hashed file names or ``?v=`` URLs, and
+support Range requests through ``FileResponse``. ``If-Range`` is compared
+against the same content-hash ETag that is sent, not Starlette's own
+mtime/size ETag.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import re
+import stat
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from email.utils import formatdate
+from mimetypes import guess_type
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import structlog
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.plugin import Plugin
+
+logger = structlog.get_logger()
+
+# Filenames such as ``remoteEntry.3f9a1c2b.js`` or ``chunk-5d41402abc.js``.
+_HASHED_NAME_RE = re.compile(r"[.\-_][0-9a-f]{8,}\.[A-Za-z0-9]+$")
+_IMMUTABLE_MAX_AGE = 31536000
+_ENCODING_SUFFIXES: Sequence[Tuple[str, str]] = (("br", ".br"), ("gzip", ".gz"))
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class PluginRef:
+    """The plugin columns needed to locate asset directories."""
+
+    id: str
+    plugin_slug: Optional[str]
+    version: Optional[str]
+    user_id: Optional[str]
+
+
+@dataclass
+class ResolvedAsset:
+    """A resolved asset file plus its validators and encoded siblings."""
+
+    path: str
+    mtime_ns: int
+    size: int
+    etag: str
+    encoded: Dict[str, str] = field(default_factory=dict)
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:32]
+
+
+def _stat_regular_file(path: str) -> Optional[os.stat_result]:
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(stat_result.st_mode):
+        return None
+    return stat_result
+
+
+def _accepted_encodings(request: Request) -> List[str]:
+    accepted: List[str] = []
+    for part in request.headers.get("accept-encoding", "").split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        if params.replace(" ", "").lower() in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.append(token)
+    return accepted
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison is fine for GET revalidation.
+    return etag in candidates or f"W/{etag}" in candidates
+
+
+class _AssetFileResponse(FileResponse):
+    """``FileResponse`` whose ``If-Range`` check uses the ETag actually sent."""
+
+    def __init__(self, *args, etag: str, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._asset_etag = etag
+
+    def _should_use_range(self, http_if_range: str, stat_result: os.stat_result) -> bool:
+        # Same validators the response carries: our ETag or Last-Modified.
+        http_if_range = http_if_range.strip()
+        return http_if_range in (self._asset_etag, formatdate(stat_result.st_mtime, usegmt=True))
+
+
+class PluginAssetServer:
+    """Resolves and serves plugin static files with caching validators."""
+
+    def __init__(self, max_entries: int = 4096, lookup_ttl_seconds: Optional[float] = None) -> None:
+        self._max_entries = max_entries
+        self._lookup_ttl_seconds = (
+            lookup_ttl_seconds if lookup_ttl_seconds is not None else settings.PLUGIN_ASSET_LOOKUP_TTL_SECONDS
+        )
+        self._plugins: Dict[Tuple[str, Optional[str]], Tuple[PluginRef, float]] = {}
+        self._assets: "OrderedDict[Tuple[str, Optional[str], str, str], ResolvedAsset]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def invalidate(self, plugin_key: Optional[str] = None) -> None:
+        """Forget cached lookups for one plugin (id or slug), or for all plugins."""
+        with self._lock:
+            if plugin_key is None:
+                self._plugins.clear()
+                self._assets.clear()
+                return
+            stale_ids = {
+                ref.id
+                for ref, _ in self._plugins.values()
+                if plugin_key in (ref.id, ref.plugin_slug)
+            }
+            stale_ids.add(plugin_key)
+            self._plugins = {
+                key: cached for key, cached in self._plugins.items() if cached[0].id not in stale_ids
+            }
+            for key in [key for key in self._assets if key[0] in stale_ids]:
+                self._assets.pop(key, None)
+
+    async def lookup_plugin(
+        self, db: AsyncSession, plugin_key: str, user_id: Optional[str] = None
+    ) -> Optional[PluginRef]:
+        """
+        Find a plugin by id, then by slug. With ``user_id`` the user's own
+        plugin is preferred, falling back to any user's for compatibility.
+        """
+        cache_key = (plugin_key, user_id)
+        with self._lock:
+            cached = self._plugins.get(cache_key)
+        if cached is not None:
+            ref, stored_at = cached
+            fresh = self._lookup_ttl_seconds <= 0 or time.monotonic() - stored_at <= self._lookup_ttl_seconds
+            if fresh and await self._matches_row(db, ref):
+                return ref
+            if fresh:
+                self.invalidate(ref.id)
+            else:
+                with self._lock:
+                    self._plugins.pop(cache_key, None)
+
+        conditions = [Plugin.id == plugin_key, Plugin.plugin_slug == plugin_key]
+        scopes = [user_id, None] if user_id else [None]
+        plugin: Optional[Plugin] = None
+        for scope_user_id in scopes:
+            for condition in conditions:
+                query = select(Plugin).where(condition)
+                if scope_user_id:
+                    query = query.where(Plugin.user_id == scope_user_id)
+                plugin = (await db.execute(query)).scalars().first()
+                if plugin is not None:
+                    break
+            if plugin is not None:
+                break
+
+        if plugin is None:
+            return None
+
+        ref = PluginRef(
+            id=plugin.id,
+            plugin_slug=plugin.plugin_slug,
+            version=plugin.version,
+            user_id=plugin.user_id,
+        )
+        with self._lock:
+            self._plugins[cache_key] = (ref, time.monotonic())
+        return ref
+
+    async def _matches_row(self, db: AsyncSession, ref: PluginRef) -> bool:
+        """Whether the plugin row still exists with the cached slug, version and owner."""
+        stmt = select(Plugin.plugin_slug, Plugin.version, Plugin.user_id).where(Plugin.id == ref.id)
+        row = (await db.execute(stmt)).first()
+        return row is not None and tuple(row) == (ref.plugin_slug, ref.version, ref.user_id)
+
+    def _resolve_uncached(self, candidates: Sequence[Path]) -> Optional[ResolvedAsset]:
+        for candidate in candidates:
+            candidate_path = str(candidate)
+            stat_result = _stat_regular_file(candidate_path)
+            if stat_result is None:
+                continue
+            encoded = {
+                encoding: candidate_path + suffix
+                for encoding, suffix in _ENCODING_SUFFIXES
+                if _stat_regular_file(candidate_path + suffix) is not None
+            }
+            return ResolvedAsset(
+                path=candidate_path,
+                mtime_ns=stat_result.st_mtime_ns,
+                size=stat_result.st_size,
+                etag="",
+                encoded=encoded,
+            )
+        return None
+
+    async def resolve(
+        self,
+        plugin: PluginRef,
+        layout: str,
+        path: str,
+        candidates_for: Callable[[PluginRef, str], List[Path]],
+    ) -> Optional[ResolvedAsset]:
+        """Return the cached resolution for ``path``, re-probing if the file moved."""
+        cache_key = (plugin.id, plugin.version, layout, path)
+        with self._lock:
+            asset = self._assets.get(cache_key)
+            if asset is not None:
+                self._assets.move_to_end(cache_key)
+
+        if asset is not None:
+            stat_result = _stat_regular_file(asset.path)
+            if stat_result is None:
+                asset = None
+            elif (stat_result.st_mtime_ns, stat_result.st_size) != (asset.mtime_ns, asset.size):
+                asset.mtime_ns = stat_result.st_mtime_ns
+                asset.size = stat_result.st_size
+                asset.etag = ""
+
+        if asset is None:
+            asset = self._resolve_uncached(candidates_for(plugin, path))
+            if asset is None:
+                return None
+
+        if not asset.etag:
+            asset.etag = f'"{await asyncio.to_thread(_hash_file, asset.path)}"'
+
+        with self._lock:
+            self._assets[cache_key] = asset
+            self._assets.move_to_end(cache_key)
+            while len(self._assets) > self._max_entries:
+                self._assets.popitem(last=False)
+        return asset
+
+    def build_response(self, request: Request, asset: ResolvedAsset, public: bool) -> Response:
+        """Build a 200/206/304 response for ``asset`` honoring request validators."""
+        visibility = "public" if public else "private"
+        if _HASHED_NAME_RE.search(asset.path) or "v" in request.query_params:
+            cache_control = f"{visibility}, max-age={_IMMUTABLE_MAX_AGE}, immutable"
+        else:
+            cache_control = f"{visibility}, no-cache"
+
+        media_type = guess_type(asset.path)[0] or "text/plain"
+        headers = {"Cache-Control": cache_control}
+        file_path = asset.path
+        etag = asset.etag
+
+        if asset.encoded:
+            headers["Vary"] = "Accept-Encoding"
+            # Ranges are served from the identity file so byte offsets stay meaningful.
+            if "range" not in request.headers:
+                accepted = _accepted_encodings(request)
+                for encoding, _ in _ENCODING_SUFFIXES:
+                    encoded_path = asset.encoded.get(encoding)
+                    if encoded_path and encoding in accepted and os.path.isfile(encoded_path):
+                        file_path = encoded_path
+                        etag = f'{asset.etag[:-1]}-{encoding}"'
+                        headers["Content-Encoding"] = encoding
+                        break
+
+        headers["ETag"] = etag
+        if _etag_matches(request, etag):
+            not_modified_headers = {
+                key: value for key, value in headers.items() if key != "Content-Encoding"
+            }
+            return Response(status_code=304, headers=not_modified_headers)
+
+        return _AssetFileResponse(file_path, media_type=media_type, headers=headers, etag=asset.etag)
+
+    async def serve(
+        self,
+        request: Request,
+        db: AsyncSession,
+        plugin_key: str,
+        path: str,
+        layout: str,
+        candidates_for: Callable[[PluginRef, str], List[Path]],
+        user_id: Optional[str] = None,
+    ) -> Response:
+        """Resolve and serve ``path`` for ``plugin_key``; raises 404 when missing."""
+        normalized = os.path.normpath(path).replace("\\", "/")
+        if normalized.startswith("../") or normalized == ".." or os.path.isabs(normalized):
+            raise HTTPException(status_code=404, detail="File not found")
+
+        plugin = await self.lookup_plugin(db, plugin_key, user_id=user_id)
+        if plugin is None:
+            logger.error(f"Plugin not found: {plugin_key}")
+            raise HTTPException(status_code=404, detail="Plugin not found")
+
+        asset = await self.resolve(plugin, layout, normalized, candidates_for)
+        if asset is None:
+            logger.error(
+                "Plugin asset not found",
+                plugin_id=plugin.id,
+                path=normalized,
+                tried=[str(candidate) for candidate in candidates_for(plugin, normalized)],
+            )
+            raise HTTPException(status_code=404, detail="File not found")
+
+        return self.build_response(request, asset, public=user_id is None)
+
+
+_plugin_asset_server: Optional[PluginAssetServer] = None
+
+
+def get_plugin_asset_server() -> PluginAssetServer:
+    global _plugin_asset_server
+    if _plugin_asset_server is None:
+        _plugin_asset_server = PluginAssetServer()
+    return _plugin_asset_server
+
+
+def invalidate_plugin_assets(plugin_key: Optional[str] = None) -> None:
+    """Drop cached plugin lookups/resolutions after install, update or removal."""
+    get_plugin_asset_server().invalidate(plugin_key)
@@ -27,6 +27,7 @@ class PluginEndpointDefinition:
     methods: Tuple[str, ...]
     admin_only: bool
     endpoint: Callable[..., Any]
+    timeout_seconds: Optional[float] = None
 
 
 @dataclass
@@ -107,16 +108,26 @@ def _normalize_methods(methods: Optional[Iterable[str]]) -> Tuple[str, ...]:
     return tuple(normalized)
 
 
-def plugin_endpoint(path: str, methods: Optional[Iterable[str]] = None, admin_only: bool = False):
+def plugin_endpoint(
+    path: str,
+    methods: Optional[Iterable[str]] = None,
+    admin_only: bool = False,
+    timeout_seconds: Optional[float] = None,
+):
     """
     Mark a function as a plugin-owned API endpoint.
 
+    ``timeout_seconds`` overrides the server-wide plugin endpoint timeout for
+    handlers that legitimately run longer (exports, imports).
+
     Example:
     ``@plugin_endpoint("/health", methods=["GET"])``
     """
 
     normalized_path = _normalize_endpoint_path(path)
     normalized_methods = _normalize_methods(methods)
+    if timeout_seconds is not None and float(timeout_seconds) <= 0:
+        raise ValueError("Plugin endpoint timeout_seconds must be positive.")
 
     def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
         endpoint_def = PluginEndpointDefinition(
@@ -124,6 +135,7 @@ def plugin_endpoint(path: str, methods: Optional[Iterable[str]] = None, admin_on
             methods=normalized_methods,
             admin_only=bool(admin_only),
             endpoint=func,
+            timeout_seconds=float(timeout_seconds) if timeout_seconds is not None else None,
         )
         setattr(func, _PLUGIN_ENDPOINT_ATTR, endpoint_def)
         return func
@@ -0,0 +1,271 @@
+"""
+Execution sandbox for plugin-owned API endpoints.
+
+Plugin endpoints mounted by ``PluginRouteLoader`` run through a shared
+``PluginEndpointExecutor`` which:
+
+* offloads synchronous handlers to a bounded thread pool so a blocking or
+  CPU-heavy plugin cannot stall the event loop,
+* enforces a per-plugin concurrency limit and a wall-clock timeout,
+* records latency/error counters per ``plugin_slug``/endpoint for the admin
+  usage endpoint.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import inspect
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+_LATENCY_WINDOW = 256
+
+
+class PluginEndpointBusyError(Exception):
+    """Raised when a plugin has no free concurrency slot within the timeout."""
+
+
+class PluginEndpointTimeoutError(Exception):
+    """Raised when a plugin endpoint exceeds its wall-clock timeout."""
+
+
+class _EndpointUsage:
+    """Mutable latency/error counters for a single plugin endpoint."""
+
+    __slots__ = (
+        "calls",
+        "errors",
+        "timeouts",
+        "rejected",
+        "in_flight",
+        "total_ms",
+        "max_ms",
+        "last_error",
+        "last_called_at",
+        "recent_ms",
+    )
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_error: Optional[str] = None
+        self.last_called_at: Optional[float] = None
+        self.recent_ms: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+
+    def record(self, elapsed_ms: float) -> None:
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.recent_ms.append(elapsed_ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        recent = sorted(self.recent_ms)
+
+        def _percentile(pct: float) -> Optional[float]:
+            if not recent:
+                return None
+            index = min(len(recent) - 1, int(round(pct * (len(recent) - 1))))
+            return round(recent[index], 2)
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "in_flight": self.in_flight,
+            "avg_ms": round(self.total_ms / self.calls, 2) if self.calls else None,
+            "max_ms": round(self.max_ms, 2),
+            "p50_ms": _percentile(0.5),
+            "p95_ms": _percentile(0.95),
+            "last_error": self.last_error,
+            "last_called_at": self.last_called_at,
+        }
+
+
+class PluginEndpointExecutor:
+    """Runs plugin endpoint handlers with isolation, limits and accounting."""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_concurrency_per_plugin: Optional[int] = None,
+        timeout_seconds: Optional[float] = None,
+    ) -> None:
+        self._max_workers = max(1, int(max_workers or settings.PLUGIN_ENDPOINT_THREADPOOL_WORKERS))
+        self._max_concurrency = max(
+            1, int(max_concurrency_per_plugin or settings.PLUGIN_ENDPOINT_MAX_CONCURRENCY)
+        )
+        self._default_timeout = float(timeout_seconds or settings.PLUGIN_ENDPOINT_TIMEOUT_SECONDS)
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._usage: Dict[Tuple[str, str], _EndpointUsage] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def default_timeout(self) -> float:
+        return self._default_timeout
+
+    def _get_thread_pool(self) -> ThreadPoolExecutor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(
+                max_workers=self._max_workers,
+                thread_name_prefix="plugin-endpoint",
+            )
+        return self._thread_pool
+
+    def _get_semaphore(self, plugin_slug: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(plugin_slug)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self._max_concurrency)
+            self._semaphores[plugin_slug] = semaphore
+        return semaphore
+
+    def _get_usage(self, plugin_slug: str, endpoint_name: str) -> _EndpointUsage:
+        key = (plugin_slug, endpoint_name)
+        with self._lock:
+            usage = self._usage.get(key)
+            if usage is None:
+                usage = _EndpointUsage()
+                self._usage[key] = usage
+            return usage
+
+    async def run(
+        self,
+        plugin_slug: str,
+        endpoint_func: Callable[..., Any],
+        *args: Any,
+        timeout_seconds: Optional[float] = None,
+    ) -> Any:
+        """
+        Execute ``endpoint_func`` for ``plugin_slug`` under the sandbox limits.
+
+        Coroutine handlers run on the event loop; synchronous handlers run in
+        the shared thread pool. The per-plugin slot stays held until a timed-out
+        thread actually finishes, so stuck handlers cannot exhaust the pool.
+        """
+        endpoint_name = getattr(endpoint_func, "__name__", "endpoint")
+        usage = self._get_usage(plugin_slug, endpoint_name)
+        timeout = float(timeout_seconds or self._default_timeout)
+        semaphore = self._get_semaphore(plugin_slug)
+
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=timeout)
+        except asyncio.TimeoutError as exc:
+            usage.rejected += 1
+            raise PluginEndpointBusyError(
+                f"Plugin {plugin_slug} has no free execution slot"
+            ) from exc
+
+        usage.in_flight += 1
+        usage.last_called_at = time.time()
+        started = time.perf_counter()
+        release_on_exit = True
+        try:
+            if inspect.iscoroutinefunction(endpoint_func):
+                return await asyncio.wait_for(endpoint_func(*args), timeout=timeout)
+
+            loop = asyncio.get_running_loop()
+            context = contextvars.copy_context()
+            future = loop.run_in_executor(
+                self._get_thread_pool(), context.run, endpoint_func, *args
+            )
+            try:
+                result = await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+            except asyncio.TimeoutError:
+                # The worker thread cannot be interrupted; free the slot once it returns.
+                release_on_exit = False
+                future.add_done_callback(lambda _: semaphore.release())
+                raise
+
+            if inspect.isawaitable(result):
+                remaining = max(0.0, timeout - (time.perf_counter() - started))
+                return await asyncio.wait_for(result, timeout=remaining)
+            return result
+        except asyncio.TimeoutError as exc:
+            usage.timeouts += 1
+            usage.errors += 1
+            usage.last_error = f"timeout after {timeout:.1f}s"
+            raise PluginEndpointTimeoutError(
+                f"Plugin endpoint {plugin_slug}/{endpoint_name} timed out after {timeout:.1f}s"
+            ) from exc
+        except Exception as exc:
+            usage.errors += 1
+            usage.last_error = f"{type(exc).__name__}: {exc}"[:500]
+            raise
+        finally:
+            usage.in_flight -= 1
+            usage.record((time.perf_counter() - started) * 1000)
+            if release_on_exit:
+                semaphore.release()
+
+    def get_usage(self, plugin_slug: Optional[str] = None) -> Dict[str, Any]:
+        """Return per-plugin endpoint usage, optionally filtered to one plugin."""
+        with self._lock:
+            items = list(self._usage.items())
+
+        plugins: Dict[str, Dict[str, Any]] = {}
+        for (slug, endpoint_name), usage in sorted(items):
+            if plugin_slug and slug != plugin_slug:
+                continue
+            entry = plugins.setdefault(
+                slug,
+                {
+                    "calls": 0,
+                    "errors": 0,
+                    "timeouts": 0,
+                    "rejected": 0,
+                    "in_flight": 0,
+                    "endpoints": {},
+                },
+            )
+            endpoint_usage = usage.to_dict()
+            entry["endpoints"][endpoint_name] = endpoint_usage
+            for counter in ("calls", "errors", "timeouts", "rejected", "in_flight"):
+                entry[counter] += endpoint_usage[counter]
+
+        return {
+            "limits": {
+                "thread_pool_workers": self._max_workers,
+                "max_concurrency_per_plugin": self._max_concurrency,
+                "timeout_seconds": self._default_timeout,
+            },
+            "plugins": plugins,
+        }
+
+    def shutdown(self) -> None:
+        """Stop accepting sync work; running threads are not waited on."""
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False, cancel_futures=True)
+            self._thread_pool = None
+
+
+_plugin_endpoint_executor: Optional[PluginEndpointExecutor] = None
+
+
+def get_plugin_endpoint_executor() -> PluginEndpointExecutor:
+    global _plugin_endpoint_executor
+    if _plugin_endpoint_executor is None:
+        _plugin_endpoint_executor = PluginEndpointExecutor()
+    return _plugin_endpoint_executor
+
+
+def shutdown_plugin_endpoint_executor() -> None:
+    global _plugin_endpoint_executor
+    if _plugin_endpoint_executor is not None:
+        _plugin_endpoint_executor.shutdown()
+        _plugin_endpoint_executor = None
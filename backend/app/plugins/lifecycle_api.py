@@ -19,11 +19,12 @@ import json
 import structlog
 import tempfile
 import shutil
-import asyncio
 from pydantic import BaseModel
 
 # Import the remote installer
 from .remote_installer import RemotePluginInstaller, install_plugin_from_url
+from .asset_server import invalidate_plugin_assets
+from .manifest_service import invalidate_plugin_manifest
 from .route_loader import get_plugin_loader
 from app.models.plugin import Plugin
 
@@ -38,22 +39,19 @@ def _log_plugin_audit_background(
     plugin_name: str = None,
     metadata: dict = None
 ):
-    """Schedule audit log write in background for plugin lifecycle events."""
-    async def _write():
-        try:
-            from app.core.audit import audit_logger, AuditEventType
-            await audit_logger.log_plugin_action(
-                request=request,
-                user_id=user_id,
-                event_type=AuditEventType(event_type),
-                plugin_id=plugin_id,
-                plugin_name=plugin_name,
-                metadata=metadata,
-            )
-        except Exception as e:
-            logger.warning(f"Failed to write plugin audit log: {e}")
-    
-    asyncio.create_task(_write())
+    """Queue an audit event for plugin lifecycle events."""
+    try:
+        from app.core.audit import audit_logger, AuditEventType
+        audit_logger.log_plugin_action(
+            request=request,
+            user_id=user_id,
+            event_type=AuditEventType(event_type),
+            plugin_id=plugin_id,
+            plugin_name=plugin_name,
+            metadata=metadata,
+        )
+    except Exception as e:
+        logger.warning(f"Failed to queue plugin audit log: {e}")
 
 def _get_error_suggestions(step: str, error_message: str) -> list:
     """Provide helpful suggestions based on the error step and message"""
@@ -158,6 +156,10 @@ async def _reload_routes_if_backend_plugin(
     plugin_slug: str,
     plugin_type_hint: Optional[str] = None,
 ) -> None:
+    # Every lifecycle operation changes the user's manifest and plugin files.
+    invalidate_plugin_manifest(user_id)
+    invalidate_plugin_assets(plugin_slug)
+
     resolved_type = plugin_type_hint
     try:
         resolved_type = await _resolve_plugin_type(
@@ -0,0 +1,204 @@
+"""
+Per-user cached plugin manifests.
+
+``/plugins/manifest`` and ``/plugins/manifest/designer`` are requested on every
+page load. The transformed manifests are cached per user as pre-serialized
+JSON together with a strong ETag. Entries are tied to a version stamp with two
+parts:
+
+- an in-process version, bumped whenever this process installs, updates,
+  enables, disables or removes plugins (see ``invalidate_plugin_manifest``);
+- a fingerprint of the user's ``plugin`` and ``module`` rows (row counts and
+  latest ``updated_at``), read with one aggregate query per request. This is
+  what invalidates the cache in the other workers when the backend runs with
+  several, and it also covers writers that bypass the hooks.
+
+``updated_at`` has one-second resolution, so two changes to the same plugin
+within a second in another worker can go unnoticed until the TTL expires.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import structlog
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.plugin import Module, Plugin
+from app.plugins.repository import PluginRepository
+
+logger = structlog.get_logger()
+
+MANIFEST_VARIANT_DEFAULT = "manifest"
+MANIFEST_VARIANT_DESIGNER = "designer"
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    """Serialized manifest ready to be written to the response."""
+
+    body: bytes
+    etag: str
+    plugin_count: int
+
+
+def _strip_leading_slash(path: str) -> str:
+    return path[1:] if path.startswith("/") else path
+
+
+def _transform_for_manifest(plugins: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Key plugins by slug and normalize ``bundlelocation`` for the frontend."""
+    transformed_plugins: Dict[str, Any] = {}
+    for plugin_id, plugin_data in plugins.items():
+        plugin_slug = plugin_data.get("plugin_slug")
+        if not plugin_slug:
+            # Fallback for plugins without a slug
+            transformed_plugins[plugin_id] = plugin_data
+            continue
+
+        plugin_copy = dict(plugin_data)
+        # The frontend addresses plugins by slug; keep the database id alongside.
+        plugin_copy["id"] = plugin_slug
+        plugin_copy["database_id"] = plugin_id
+        if plugin_copy.get("bundlelocation"):
+            plugin_copy["bundlelocation"] = _strip_leading_slash(plugin_copy["bundlelocation"])
+        transformed_plugins[plugin_slug] = plugin_copy
+    return transformed_plugins
+
+
+def _transform_for_designer(plugins: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Designer variant: also rewrites module ``pluginId`` references to slugs."""
+    transformed_plugins: Dict[str, Any] = {}
+    for plugin_id, plugin_data in plugins.items():
+        plugin_slug = plugin_data.get("plugin_slug")
+        if not plugin_slug:
+            transformed_plugins[plugin_id] = plugin_data
+            continue
+
+        plugin_copy = dict(plugin_data)
+        plugin_copy["id"] = plugin_slug
+        plugin_copy["database_id"] = plugin_id
+
+        if plugin_copy.get("bundle_location"):
+            plugin_copy["bundlelocation"] = _strip_leading_slash(plugin_copy["bundle_location"])
+            del plugin_copy["bundle_location"]
+        elif plugin_copy.get("bundlelocation"):
+            plugin_copy["bundlelocation"] = _strip_leading_slash(plugin_copy["bundlelocation"])
+
+        for module in plugin_copy.get("modules", []):
+            if "pluginId" in module:
+                module["pluginId"] = plugin_slug
+
+        transformed_plugins[plugin_slug] = plugin_copy
+    return transformed_plugins
+
+
+class PluginManifestService:
+    """Builds and caches transformed plugin manifests per user."""
+
+    def __init__(self, ttl_seconds: Optional[float] = None) -> None:
+        self._ttl_seconds = float(
+            ttl_seconds if ttl_seconds is not None else settings.PLUGIN_MANIFEST_CACHE_TTL_SECONDS
+        )
+        self._global_version = 0
+        self._user_versions: Dict[str, int] = {}
+        self._entries: Dict[Tuple[str, str], Tuple[Tuple[Any, ...], float, ManifestEntry]] = {}
+        self._lock = threading.Lock()
+
+    def _version_stamp(self, user_id: str) -> Tuple[int, int]:
+        return self._global_version, self._user_versions.get(user_id, 0)
+
+    async def _db_fingerprint(self, db: AsyncSession, user_id: str) -> Tuple[str, ...]:
+        """Counts and latest ``updated_at`` of the user's plugins and modules."""
+        stmt = select(
+            select(func.count()).select_from(Plugin).where(Plugin.user_id == user_id).scalar_subquery(),
+            select(func.max(Plugin.updated_at)).where(Plugin.user_id == user_id).scalar_subquery(),
+            select(func.count()).select_from(Module).where(Module.user_id == user_id).scalar_subquery(),
+            select(func.max(Module.updated_at)).where(Module.user_id == user_id).scalar_subquery(),
+        )
+        row = (await db.execute(stmt)).one()
+        return tuple(str(value) for value in row)
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """Bump the manifest version for one user, or for everyone."""
+        with self._lock:
+            if user_id:
+                self._user_versions[user_id] = self._user_versions.get(user_id, 0) + 1
+                for key in [key for key in self._entries if key[0] == user_id]:
+                    self._entries.pop(key, None)
+            else:
+                self._global_version += 1
+                self._entries.clear()
+
+    def _get_cached(self, user_id: str, variant: str, fingerprint: Tuple[str, ...]) -> Optional[ManifestEntry]:
+        with self._lock:
+            cached = self._entries.get((user_id, variant))
+            if cached is None:
+                return None
+            stamp, stored_at, entry = cached
+            if stamp != (*self._version_stamp(user_id), fingerprint):
+                return None
+            if self._ttl_seconds > 0 and time.monotonic() - stored_at > self._ttl_seconds:
+                return None
+            return entry
+
+    async def get_manifest(self, db: AsyncSession, user_id: str, variant: str) -> ManifestEntry:
+        """Return the cached manifest for ``user_id``, rebuilding it on a miss."""
+        fingerprint = await self._db_fingerprint(db, user_id)
+        cached = self._get_cached(user_id, variant, fingerprint)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            version = self._version_stamp(user_id)
+
+        repo = PluginRepository(db)
+        if variant == MANIFEST_VARIANT_DESIGNER:
+            plugin_rows = await repo.get_all_plugins_with_modules(user_id=user_id)
+            manifest = _transform_for_designer({plugin["id"]: plugin for plugin in plugin_rows})
+        else:
+            plugin_rows = await repo.get_all_plugins(user_id=user_id)
+            manifest = _transform_for_manifest({plugin["id"]: plugin for plugin in plugin_rows})
+
+        body = json.dumps(manifest, separators=(",", ":"), default=str).encode("utf-8")
+        entry = ManifestEntry(
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            plugin_count=len(manifest),
+        )
+
+        with self._lock:
+            # Skip storing if an invalidation raced with the rebuild. A write in another
+            # worker changes the fingerprint, which was read before the rebuild.
+            if version == self._version_stamp(user_id):
+                self._entries[(user_id, variant)] = ((*version, fingerprint), time.monotonic(), entry)
+
+        logger.info(
+            "Plugin manifest rebuilt",
+            user_id=user_id,
+            variant=variant,
+            plugin_count=entry.plugin_count,
+        )
+        return entry
+
+
+_manifest_service: Optional[PluginManifestService] = None
+
+
+def get_plugin_manifest_service() -> PluginManifestService:
+    global _manifest_service
+    if _manifest_service is None:
+        _manifest_service = PluginManifestService()
+    return _manifest_service
+
+
+def invalidate_plugin_manifest(user_id: Optional[str] = None) -> None:
+    """Drop cached manifests after plugin install/update/enable/disable/delete."""
+    get_plugin_manifest_service().invalidate(user_id)
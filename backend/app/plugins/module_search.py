@@ -0,0 +1,185 @@
+"""
+SQL-side search for the plugin manager module listing.
+
+Uses the ``module_search`` FTS5 index and ``module_tags`` table created by
+migration ``4c8e2f1a9b3d`` when they exist (SQLite), the ``to_tsvector`` GIN
+index on PostgreSQL, and otherwise falls back to ``LIKE`` filters. In every
+case filtering, ranking, ``COUNT`` and ``LIMIT/OFFSET`` run in the database.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, List, Optional, Sequence, Tuple
+
+import structlog
+from sqlalchemy import and_, column, exists, func, literal_column, or_, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.plugin import Module
+
+logger = structlog.get_logger()
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Written out as the ix_module_search_tsv expression from migration 4c8e2f1a9b3d:
+# PostgreSQL only uses the GIN index for an identical expression, and bound
+# parameters for the '' and ' ' literals would not match it.
+_MODULE_TSVECTOR = literal_column(
+    "to_tsvector('simple', coalesce(module.name, '') || ' ' || coalesce(module.display_name, '') "
+    "|| ' ' || coalesce(module.description, ''))"
+)
+
+module_search_table = table(
+    "module_search",
+    column("module_id"),
+    column("plugin_id"),
+    column("user_id"),
+)
+
+module_tags_table = table(
+    "module_tags",
+    column("module_id"),
+    column("plugin_id"),
+    column("user_id"),
+    column("tag"),
+)
+
+# Per-process detection result; migrations run before the app starts serving.
+_sqlite_index_available: Optional[bool] = None
+
+
+def build_fts_query(search: str) -> Optional[str]:
+    """Turn free text into a safe FTS5 prefix query (implicit AND of terms)."""
+    tokens = _TOKEN_RE.findall(search or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+async def _has_sqlite_index(db: AsyncSession) -> bool:
+    global _sqlite_index_available
+    if _sqlite_index_available is None:
+        result = await db.execute(
+            text(
+                "SELECT COUNT(*) FROM sqlite_master "
+                "WHERE name IN ('module_search', 'module_tags', 'module_search_ai')"
+            )
+        )
+        _sqlite_index_available = result.scalar() == 3
+        if not _sqlite_index_available:
+            logger.warning("Module search index missing; falling back to LIKE filters")
+    return _sqlite_index_available
+
+
+class ModuleSearchService:
+    """Filters, ranks and paginates a user's modules for the plugin manager."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _mode(self) -> str:
+        dialect = self.db.bind.dialect.name if self.db.bind is not None else "sqlite"
+        if dialect == "sqlite":
+            return "fts5" if await _has_sqlite_index(self.db) else "like"
+        if dialect == "postgresql":
+            return "tsvector"
+        return "like"
+
+    async def search(
+        self,
+        user_id: str,
+        search: Optional[str] = None,
+        category: Optional[str] = None,
+        tags: Sequence[str] = (),
+        page: int = 1,
+        page_size: int = 16,
+    ) -> Tuple[List[Module], int]:
+        """Return one page of matching modules and the total match count."""
+        mode = await self._mode()
+        conditions: List[Any] = [Module.user_id == user_id]
+        rank = None
+        query = select(Module)
+
+        search_text = (search or "").strip()
+        if search_text:
+            if mode == "fts5":
+                fts_query = build_fts_query(search_text)
+                if fts_query is None:
+                    return [], 0
+                matches = (
+                    select(
+                        module_search_table.c.module_id,
+                        module_search_table.c.plugin_id,
+                        func.bm25(literal_column("module_search"), 0.0, 0.0, 0.0, 10.0, 5.0, 1.0).label("rank"),
+                    )
+                    .where(
+                        literal_column("module_search").op("MATCH")(fts_query),
+                        module_search_table.c.user_id == user_id,
+                    )
+                    .subquery("matches")
+                )
+                query = query.join(
+                    matches,
+                    and_(matches.c.module_id == Module.id, matches.c.plugin_id == Module.plugin_id),
+                )
+                rank = matches.c.rank
+            elif mode == "tsvector":
+                document = _MODULE_TSVECTOR
+                ts_query = func.plainto_tsquery(literal_column("'simple'"), search_text)
+                conditions.append(document.op("@@")(ts_query))
+                rank = -func.ts_rank(document, ts_query)
+            else:
+                pattern = f"%{search_text.lower()}%"
+                conditions.append(
+                    or_(
+                        func.lower(Module.name).like(pattern),
+                        func.lower(Module.display_name).like(pattern),
+                        func.lower(Module.description).like(pattern),
+                    )
+                )
+
+        if category:
+            conditions.append(Module.category == category)
+
+        tag_list = [tag.strip() for tag in tags if tag and tag.strip()]
+        if tag_list:
+            if mode == "fts5":
+                conditions.append(
+                    exists().where(
+                        module_tags_table.c.module_id == Module.id,
+                        module_tags_table.c.plugin_id == Module.plugin_id,
+                        module_tags_table.c.user_id == user_id,
+                        module_tags_table.c.tag.in_(tag_list),
+                    )
+                )
+            else:
+                conditions.append(or_(*[Module.tags.like(f'%"{tag}"%') for tag in tag_list]))
+
+        query = query.where(*conditions)
+
+        count_query = select(func.count()).select_from(query.order_by(None).subquery())
+        total_items = (await self.db.execute(count_query)).scalar() or 0
+        if total_items == 0:
+            return [], 0
+
+        order_by = [rank] if rank is not None else []
+        order_by.extend([Module.display_name, Module.name, Module.id])
+        page = max(1, page)
+        page_size = max(1, page_size)
+        result = await self.db.execute(
+            query.order_by(*order_by).limit(page_size).offset((page - 1) * page_size)
+        )
+        return list(result.scalars().all()), total_items
+
+    async def list_tags(self, user_id: str) -> Optional[List[str]]:
+        """Distinct tags for ``user_id`` from the tag index, or None when unavailable."""
+        if await self._mode() != "fts5":
+            return None
+        result = await self.db.execute(
+            select(module_tags_table.c.tag)
+            .where(module_tags_table.c.user_id == user_id)
+            .distinct()
+            .order_by(module_tags_table.c.tag)
+        )
+        return [row[0] for row in result.all()]
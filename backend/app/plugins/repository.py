@@ -2,7 +2,7 @@ import json
 import logging
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple, Union
-from sqlalchemy import select, update, delete, text
+from sqlalchemy import and_, select, update, delete, text
 from sqlalchemy.ext.asyncio import AsyncSession
 import structlog
 
@@ -11,6 +11,16 @@ from app.dto.plugin import PluginServiceRuntimeDTO
 
 logger = structlog.get_logger()
 
+
+def _invalidate_plugin_caches() -> None:
+    # Imported lazily: the manifest service depends on this repository.
+    from app.plugins.asset_server import invalidate_plugin_assets
+    from app.plugins.manifest_service import invalidate_plugin_manifest
+
+    invalidate_plugin_manifest()
+    invalidate_plugin_assets()
+
+
 class PluginRepository:
     """
     Repository for plugin data operations using SQLAlchemy.
@@ -57,51 +67,42 @@ class PluginRepository:
             raise
             
     async def get_all_plugins_with_modules(self, user_id: str = None) -> List[Dict[str, Any]]:
-        """Get all plugins with their modules."""
+        """Get all plugins with their modules using a single joined query."""
         try:
-            # Log the user ID filter
             logger.info(f"Getting all plugins with modules for user: {user_id}")
-            
-            # Get all plugins
-            query = select(Plugin).where(Plugin.enabled == True)
-            
-            # Filter by user_id if provided
+
+            # Module user filter lives in the join condition so plugins
+            # without matching modules are still returned.
+            join_condition = Module.plugin_id == Plugin.id
+            if user_id:
+                join_condition = and_(join_condition, Module.user_id == user_id)
+
+            query = (
+                select(Plugin, Module)
+                .outerjoin(Module, join_condition)
+                .where(Plugin.enabled == True)
+                .order_by(Plugin.id)
+            )
+
             if user_id:
-                logger.info(f"Applying user ID filter: {user_id}")
                 query = query.where(Plugin.user_id == user_id)
             else:
                 logger.warning("No user ID provided, returning all plugins")
-            
+
             result = await self.db.execute(query)
-            plugins = result.scalars().all()
-            
-            # Log the number of plugins found
-            logger.info(f"Found {len(plugins)} plugins")
-            
-            # Log the plugin IDs
-            plugin_ids = [plugin.id for plugin in plugins]
-            logger.info(f"Plugin IDs: {plugin_ids}")
-            
-            # Convert to dictionaries and fetch modules separately
-            plugin_dicts = []
-            for plugin in plugins:
-                plugin_dict = plugin.to_dict()
 
-                # Get modules for this plugin
-                modules_query = select(Module).where(Module.plugin_id == plugin.id)
-                
-                # Filter modules by user_id if provided
-                if user_id:
-                    modules_query = modules_query.where(Module.user_id == user_id)
-                    
-                modules_result = await self.db.execute(modules_query)
-                modules = modules_result.scalars().all()
-                
-                # Add modules to plugin dictionary
-                plugin_dict["modules"] = [module.to_dict() for module in modules]
-                plugin_dicts.append(plugin_dict)
-                
-            return plugin_dicts
+            plugin_dicts: Dict[str, Dict[str, Any]] = {}
+            for plugin, module in result.all():
+                plugin_dict = plugin_dicts.get(plugin.id)
+                if plugin_dict is None:
+                    plugin_dict = plugin.to_dict()
+                    plugin_dict["modules"] = []
+                    plugin_dicts[plugin.id] = plugin_dict
+                if module is not None:
+                    plugin_dict["modules"].append(module.to_dict())
+
+            logger.info(f"Found {len(plugin_dicts)} plugins")
+            return list(plugin_dicts.values())
         except Exception as e:
             logger.error("Error getting plugins with modules", error=str(e))
             raise
@@ -358,6 +359,7 @@ class PluginRepository:
             
             # Commit changes
             await self.db.commit()
+            _invalidate_plugin_caches()
             
             return plugin.id
         except Exception as e:
@@ -449,6 +451,7 @@ class PluginRepository:
             
             # Commit changes
             await self.db.commit()
+            _invalidate_plugin_caches()
             
             return True
         except Exception as e:
@@ -499,6 +502,7 @@ class PluginRepository:
             
             # Commit changes
             await self.db.commit()
+            _invalidate_plugin_caches()
             
             return True
         except Exception as e:
@@ -529,6 +533,7 @@ class PluginRepository:
             
             # Commit changes
             await self.db.commit()
+            _invalidate_plugin_caches()
             
             return True
         except Exception as e:
@@ -566,6 +571,7 @@ class PluginRepository:
             
             # Commit changes
             await self.db.commit()
+            _invalidate_plugin_caches()
             
             return True
         except Exception as e:
@@ -593,6 +599,7 @@ class PluginRepository:
             
             # Commit changes
             await self.db.commit()
+            _invalidate_plugin_caches()
             
             return True
         except Exception as e:
@@ -624,6 +631,7 @@ class PluginRepository:
             
             # Commit changes
             await self.db.commit()
+            _invalidate_plugin_caches()
             
             return True
         except Exception as e:
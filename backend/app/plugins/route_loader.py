@@ -8,7 +8,6 @@ This loader mounts endpoints declared in plugin ``endpoints.py`` modules under:
 from __future__ import annotations
 
 import importlib.util
-import inspect
 from pathlib import Path
 from types import ModuleType
 from typing import Any, Callable, Dict, List, Optional, Sequence, Set
@@ -23,6 +22,11 @@ from app.core.auth_context import AuthContext
 from app.core.auth_deps import require_admin, require_user
 from app.models.plugin import Plugin
 from app.plugins.decorators import PluginEndpointDefinition, PluginRequest, get_plugin_endpoints
+from app.plugins.endpoint_executor import (
+    PluginEndpointBusyError,
+    PluginEndpointTimeoutError,
+    get_plugin_endpoint_executor,
+)
 
 logger = structlog.get_logger()
 
@@ -192,14 +196,35 @@ class PluginRouteLoader:
                 route_prefix=route_prefix,
             )
             try:
-                if inspect.iscoroutinefunction(endpoint_func):
-                    return await endpoint_func(plugin_request)
-                result = endpoint_func(plugin_request)
-                if inspect.isawaitable(result):
-                    return await result
-                return result
+                return await get_plugin_endpoint_executor().run(
+                    plugin_slug,
+                    endpoint_func,
+                    plugin_request,
+                    timeout_seconds=endpoint_def.timeout_seconds,
+                )
             except HTTPException:
                 raise
+            except PluginEndpointBusyError as exc:
+                logger.warning(
+                    "Plugin endpoint rejected: concurrency limit reached",
+                    plugin_slug=plugin_slug,
+                    endpoint=endpoint_func.__name__,
+                )
+                raise HTTPException(
+                    status_code=503,
+                    detail=f"Plugin endpoint busy: {plugin_slug}/{endpoint_func.__name__}",
+                ) from exc
+            except PluginEndpointTimeoutError as exc:
+                logger.warning(
+                    "Plugin endpoint timed out",
+                    plugin_slug=plugin_slug,
+                    endpoint=endpoint_func.__name__,
+                    error=str(exc),
+                )
+                raise HTTPException(
+                    status_code=504,
+                    detail=f"Plugin endpoint timed out: {plugin_slug}/{endpoint_func.__name__}",
+                ) from exc
             except Exception as exc:
                 logger.exception(
                     "Plugin endpoint execution failed",
@@ -1,10 +1,19 @@
-from fastapi import APIRouter, HTTPException, Body, Depends, Query
+from fastapi import APIRouter, HTTPException, Body, Depends, Query, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, text
 from ..plugins import PluginManager
 from ..plugins.repository import PluginRepository
+from ..plugins.endpoint_executor import get_plugin_endpoint_executor
+from ..plugins.asset_server import PluginRef, get_plugin_asset_server
+from ..plugins.module_search import ModuleSearchService
+from ..plugins.manifest_service import (
+    MANIFEST_VARIANT_DEFAULT,
+    MANIFEST_VARIANT_DESIGNER,
+    ManifestEntry,
+    get_plugin_manifest_service,
+)
 from ..core.database import get_db
 from ..models.plugin import Plugin, Module
 from ..models.user import User
@@ -23,7 +32,7 @@ PLUGINS_DIR = Path(__file__).parent.parent.parent / "plugins"
 plugin_manager = PluginManager(str(PLUGINS_DIR))
 
 # Import new auth dependencies
-from ..core.auth_deps import require_user
+from ..core.auth_deps import require_admin, require_user
 from ..core.auth_context import AuthContext
 
 # Create a router for plugin management endpoints WITHOUT a prefix
@@ -83,127 +92,43 @@ async def initialize_plugin_manager_on_startup() -> None:
 
         break  # Only need one session
 
+def _manifest_response(request: Request, entry: ManifestEntry) -> Response:
+    """Serve a cached manifest, answering matching ``If-None-Match`` with 304."""
+    headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if entry.etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
 @router.get("/plugins/manifest")
-async def get_plugin_manifest(auth: AuthContext = Depends(require_user)):
+async def get_plugin_manifest(
+    request: Request,
+    auth: AuthContext = Depends(require_user),
+    db: AsyncSession = Depends(get_db),
+):
     """Get the manifest of all available plugins for the current user."""
-    logger.info(f"Getting plugin manifest for user: {auth.user_id}")
-    
     if not plugin_manager._initialized:
         await plugin_manager.initialize()
-    
-    plugins = await plugin_manager.get_all_plugins(user_id=auth.user_id)
-    
-    # Log the number of plugins returned
-    logger.info(f"Found {len(plugins)} plugins for user {auth.user_id}")
-    
-    # Log the plugin IDs
-    plugin_ids = list(plugins.keys())
-    logger.info(f"Plugin IDs: {plugin_ids}")
-    
-    # Transform the response to maintain backward compatibility
-    transformed_plugins = {}
-    for plugin_id, plugin_data in plugins.items():
-        # Use plugin_slug as the key in the response
-        plugin_slug = plugin_data.get("plugin_slug")
-        if plugin_slug:
-            # Create a copy of the plugin data
-            plugin_copy = dict(plugin_data)
-            
-            # Ensure the id field in the response is the plugin_slug for frontend compatibility
-            plugin_copy["id"] = plugin_slug
-            
-            # Store the actual database ID as a separate field if needed
-            plugin_copy["database_id"] = plugin_id
-            
-            # Make sure bundlelocation is using the public endpoint
-            if "bundlelocation" in plugin_copy and plugin_copy["bundlelocation"]:
-                # Extract the path part from the bundlelocation
-                bundle_path = plugin_copy["bundlelocation"]
-                if bundle_path.startswith("/"):
-                    bundle_path = bundle_path[1:]
-                
-                # Update to use the public endpoint
-                plugin_copy["bundlelocation"] = bundle_path
-            
-            transformed_plugins[plugin_slug] = plugin_copy
-        else:
-            # Fallback for plugins without a slug
-            transformed_plugins[plugin_id] = plugin_data
-    
-    # Log the transformed plugin slugs
-    transformed_slugs = list(transformed_plugins.keys())
-    logger.info(f"Transformed plugin slugs: {transformed_slugs}")
-    
-    return transformed_plugins
+
+    entry = await get_plugin_manifest_service().get_manifest(
+        db, auth.user_id, MANIFEST_VARIANT_DEFAULT
+    )
+    return _manifest_response(request, entry)
 
 @router.get("/plugins/manifest/designer")
-async def get_plugin_manifest_for_designer(auth: AuthContext = Depends(require_user)):
+async def get_plugin_manifest_for_designer(
+    request: Request,
+    auth: AuthContext = Depends(require_user),
+    db: AsyncSession = Depends(get_db),
+):
     """Get the manifest of all available plugins with layout information for the page designer."""
-    logger.info(f"Getting plugin manifest for user: {auth.user_id}")
-    
     if not plugin_manager._initialized:
         await plugin_manager.initialize()
-    
-    plugins = await plugin_manager.get_all_plugins_for_designer(user_id=auth.user_id)
-    
-    logger.info(f"Found {len(plugins)} plugins for user {auth.user_id}")
-    
-    # Log the plugin IDs
-    plugin_ids = list(plugins.keys())
-    logger.info(f"Plugin IDs: {plugin_ids}")
-    
-    # Transform the response to maintain backward compatibility
-    transformed_plugins = {}
-    for plugin_id, plugin_data in plugins.items():
-        # Use plugin_slug as the key in the response
-        plugin_slug = plugin_data.get("plugin_slug")
-        if plugin_slug:
-            # Create a copy of the plugin data
-            plugin_copy = dict(plugin_data)
-            
-            # Ensure the id field in the response is the plugin_slug for frontend compatibility
-            plugin_copy["id"] = plugin_slug
-            
-            # Store the actual database ID as a separate field if needed
-            plugin_copy["database_id"] = plugin_id
-            
-            # Transform bundle_location to bundlelocation for frontend compatibility
-            if "bundle_location" in plugin_copy and plugin_copy["bundle_location"]:
-                # Extract the path part from the bundle_location
-                bundle_path = plugin_copy["bundle_location"]
-                if bundle_path.startswith("/"):
-                    bundle_path = bundle_path[1:]
-
-                # Set bundlelocation field for frontend
-                plugin_copy["bundlelocation"] = bundle_path
-                # Remove the old field
-                del plugin_copy["bundle_location"]
-            elif "bundlelocation" in plugin_copy and plugin_copy["bundlelocation"]:
-                # Handle case where bundlelocation is already set
-                bundle_path = plugin_copy["bundlelocation"]
-                if bundle_path.startswith("/"):
-                    bundle_path = bundle_path[1:]
-                
-                # Update to use the public endpoint
-                plugin_copy["bundlelocation"] = bundle_path
-            
-            # Update module references if needed
-            if "modules" in plugin_copy:
-                for module in plugin_copy["modules"]:
-                    # Ensure pluginId references use the slug
-                    if "pluginId" in module:
-                        module["pluginId"] = plugin_slug
-            
-            transformed_plugins[plugin_slug] = plugin_copy
-        else:
-            # Fallback for plugins without a slug
-            transformed_plugins[plugin_id] = plugin_data
-    
-    # Log the transformed plugin slugs
-    transformed_slugs = list(transformed_plugins.keys())
-    logger.info(f"Transformed plugin slugs: {transformed_slugs}")
-    
-    return transformed_plugins
+
+    entry = await get_plugin_manifest_service().get_manifest(
+        db, auth.user_id, MANIFEST_VARIANT_DESIGNER
+    )
+    return _manifest_response(request, entry)
 
 @router.get("/plugins/{plugin_id}/info")
 async def get_plugin_info(plugin_id: str, auth: AuthContext = Depends(require_user)):
@@ -331,6 +256,17 @@ async def refresh_plugin_cache(auth: AuthContext = Depends(require_user)):
             detail=f"Failed to refresh plugin cache: {str(e)}"
         )
 
+@router.get("/plugins/runtime/endpoint-usage")
+async def get_plugin_endpoint_usage(
+    plugin_slug: Optional[str] = None,
+    auth: AuthContext = Depends(require_admin),
+):
+    """Per-plugin endpoint latency, error and concurrency counters (admin-only)."""
+    return {
+        "status": "success",
+        "data": get_plugin_endpoint_executor().get_usage(plugin_slug),
+    }
+
 # Plugin Manager API Endpoints
 
 @router.get("/plugins/manager")
@@ -354,49 +290,19 @@ async def get_plugins_for_manager(
         pageSize: Number of items per page
     """
     try:
-        # Parse tags if provided
         tag_list = tags.split(',') if tags else []
-        
-        # Build query for modules
-        query = select(Module).where(Module.user_id == auth.user_id)
-        
-        # Apply filters
-        if search:
-            search_lower = f"%{search.lower()}%"
-            query = query.filter(
-                (func.lower(Module.name).like(search_lower)) |
-                (func.lower(Module.display_name).like(search_lower)) |
-                (func.lower(Module.description).like(search_lower))
-            )
-        
-        if category:
-            query = query.filter(Module.category == category)
-        
-        # Execute query to get all matching modules
-        result = await db.execute(query)
-        all_modules = result.scalars().all()
-        
-        # Filter by tags if needed (this needs to be done in Python since tags are stored as JSON)
-        if tag_list:
-            filtered_modules = []
-            for module in all_modules:
-                if module.tags:
-                    module_tags = json.loads(module.tags) if isinstance(module.tags, str) else module.tags
-                    if any(tag in module_tags for tag in tag_list):
-                        filtered_modules.append(module)
-            all_modules = filtered_modules
-        
-        # Calculate total count
-        total_items = len(all_modules)
-        
-        # Apply pagination
-        start_idx = (page - 1) * pageSize
-        end_idx = start_idx + pageSize
-        paginated_modules = all_modules[start_idx:end_idx]
-        
-        # Convert to dictionaries
+
+        modules, total_items = await ModuleSearchService(db).search(
+            auth.user_id,
+            search=search,
+            category=category,
+            tags=tag_list,
+            page=page,
+            page_size=pageSize,
+        )
+
         module_dicts = []
-        for module in paginated_modules:
+        for module in modules:
             module_dict = module.to_dict()
             
             # Parse tags from JSON string
@@ -441,6 +347,10 @@ async def get_tags(
 ):
     """Get all available module tags."""
     try:
+        indexed_tags = await ModuleSearchService(db).list_tags(auth.user_id)
+        if indexed_tags is not None:
+            return {"tags": indexed_tags}
+
         # Query all modules to extract tags for the current user
         result = await db.execute(select(Module.tags).where(Module.user_id == auth.user_id))
         all_tags = []
@@ -1026,115 +936,74 @@ router.include_router(lifecycle_router, tags=["Plugin Lifecycle Management"])
 
 
 # Add this route at the end so it doesn't catch other routes
-@router.get("/plugins/{plugin_id}/{path:path}")
-async def serve_plugin_static(
-    plugin_id: str,
-    path: str,
-    db: AsyncSession = Depends(get_db),
-    auth: AuthContext = Depends(require_user)
-):
-    """Serve static files from plugin directory."""
-    # Skip if the path starts with "modules/" to avoid catching module endpoints
-    if path.startswith("modules/"):
-        raise HTTPException(status_code=404, detail="File not found")
-    
-    # Skip if the path starts with "update/" to avoid catching update endpoints
-    if path.startswith("update/"):
-        raise HTTPException(status_code=404, detail="File not found")
-
-    logger.debug(f"Serving static file for plugin_id: {plugin_id}, path: {path}")
-    
-    # First try to find the plugin by ID
-    plugin_query = await db.execute(
-        select(Plugin).where(
-            Plugin.id == plugin_id,
-            Plugin.user_id == auth.user_id
-        )
-    )
-    plugin = plugin_query.scalars().first()
-    
-    # If not found by ID, try to find by plugin_slug
-    if not plugin:
-        logger.debug(f"Plugin not found by ID, trying plugin_slug: {plugin_id}")
-        plugin_query = await db.execute(
-            select(Plugin).where(
-                Plugin.plugin_slug == plugin_id,
-                Plugin.user_id == auth.user_id
-            )
-        )
-        plugin = plugin_query.scalars().first()
-    
-    if not plugin:
-        # For backward compatibility, try without user_id check
-        logger.debug(f"Plugin not found for current user, trying without user check")
-        plugin_query = await db.execute(
-            select(Plugin).where(Plugin.id == plugin_id)
-        )
-        plugin = plugin_query.scalars().first()
-        
-        if not plugin:
-            plugin_query = await db.execute(
-                select(Plugin).where(Plugin.plugin_slug == plugin_id)
-            )
-            plugin = plugin_query.scalars().first()
-    
-    if not plugin:
-        logger.error(f"Plugin not found: {plugin_id}")
-        raise HTTPException(status_code=404, detail="Plugin not found")
-    
-    logger.debug(f"Found plugin: {plugin.id}, plugin_slug: {plugin.plugin_slug}, user_id: {plugin.user_id}")
-    
-    # Try multiple possible locations for the file
+def _plugin_asset_candidates(plugin: PluginRef, path: str, shared_root: Path) -> List[Path]:
+    """Possible on-disk locations of a plugin asset, in lookup order."""
     possible_paths = []
-    
+
     # 1. New architecture: Shared storage with version
     if plugin.plugin_slug and plugin.version:
-        # The actual path is backend/backend/plugins/shared/ relative to project root
-        # PLUGINS_DIR is already /path/to/project/plugins, so PLUGINS_DIR.parent is /path/to/project
-        # We need to go to /path/to/project/backend/backend/plugins/shared/
-        shared_plugin_dir = PLUGINS_DIR.parent / "backend" / "plugins" / "shared" / plugin.plugin_slug / f"v{plugin.version}"
-        possible_paths.append(shared_plugin_dir / path)
+        possible_paths.append(shared_root / plugin.plugin_slug / f"v{plugin.version}" / path)
 
     # 2. New architecture: Shared storage without version (fallback)
     if plugin.plugin_slug:
-        shared_plugin_dir = PLUGINS_DIR.parent / "backend" / "plugins" / "shared" / plugin.plugin_slug
-        possible_paths.append(shared_plugin_dir / path)
+        possible_paths.append(shared_root / plugin.plugin_slug / path)
 
     # 3. Backend plugins directory (where webpack builds to)
     if plugin.plugin_slug:
-        backend_plugin_dir = PLUGINS_DIR.parent / "backend" / "plugins" / plugin.plugin_slug
-        possible_paths.append(backend_plugin_dir / path)
+        possible_paths.append(PLUGINS_DIR.parent / "backend" / "plugins" / plugin.plugin_slug / path)
 
     # 4. User-specific directory with plugin_slug
     if plugin.user_id and plugin.plugin_slug:
-        user_plugin_dir = PLUGINS_DIR / plugin.user_id / plugin.plugin_slug
-        possible_paths.append(user_plugin_dir / path)
-    
+        possible_paths.append(PLUGINS_DIR / plugin.user_id / plugin.plugin_slug / path)
+
     # 5. User-specific directory with plugin ID
     if plugin.user_id:
-        user_plugin_dir = PLUGINS_DIR / plugin.user_id / plugin.id
-        possible_paths.append(user_plugin_dir / path)
-    
+        possible_paths.append(PLUGINS_DIR / plugin.user_id / plugin.id / path)
+
     # 6. Legacy path directly under plugins directory with plugin_slug
     if plugin.plugin_slug:
         possible_paths.append(PLUGINS_DIR / plugin.plugin_slug / path)
-    
+
     # 7. Legacy path directly under plugins directory with plugin ID
     possible_paths.append(PLUGINS_DIR / plugin.id / path)
+    return possible_paths
+
+def _private_asset_candidates(plugin: PluginRef, path: str) -> List[Path]:
+    return _plugin_asset_candidates(plugin, path, PLUGINS_DIR.parent / "backend" / "plugins" / "shared")
+
+def _public_asset_candidates(plugin: PluginRef, path: str) -> List[Path]:
+    return _plugin_asset_candidates(plugin, path, PLUGINS_DIR.parent / "plugins" / "shared")
+
+@router.get("/plugins/{plugin_id}/{path:path}")
+async def serve_plugin_static(
+    request: Request,
+    plugin_id: str,
+    path: str,
+    db: AsyncSession = Depends(get_db),
+    auth: AuthContext = Depends(require_user)
+):
+    """Serve static files from plugin directory."""
+    # Skip if the path starts with "modules/" to avoid catching module endpoints
+    if path.startswith("modules/"):
+        raise HTTPException(status_code=404, detail="File not found")
     
-    # Try each path
-    for plugin_path in possible_paths:
-        logger.debug(f"Trying path: {plugin_path}")
-        if plugin_path.exists():
-            logger.debug(f"Found file at: {plugin_path}")
-            return FileResponse(plugin_path)
-    
-    # If we get here, the file wasn't found in any of the possible locations
-    logger.error(f"File not found in any location. Tried: {[str(p) for p in possible_paths]}")
-    raise HTTPException(status_code=404, detail="File not found")
+    # Skip if the path starts with "update/" to avoid catching update endpoints
+    if path.startswith("update/"):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    return await get_plugin_asset_server().serve(
+        request,
+        db,
+        plugin_id,
+        path,
+        layout="private",
+        candidates_for=_private_asset_candidates,
+        user_id=auth.user_id,
+    )
 
 @router.get("/public/plugins/{plugin_id}/{path:path}")
 async def serve_plugin_static_public(
+    request: Request,
     plugin_id: str,
     path: str,
     db: AsyncSession = Depends(get_db)
@@ -1154,72 +1023,12 @@ async def serve_plugin_static_public(
     # Skip if the path starts with "modules/" to avoid catching module endpoints
     if path.startswith("modules/"):
         raise HTTPException(status_code=404, detail="File not found")
-    
-    logger.debug(f"Serving public static file for plugin_id: {plugin_id}, path: {path}")
-    
-    # Try to find the plugin by ID first
-    plugin_query = await db.execute(select(Plugin).where(Plugin.id == plugin_id))
-    plugin = plugin_query.scalars().first()
-    
-    # If not found by ID, try to find by plugin_slug
-    if not plugin:
-        plugin_query = await db.execute(select(Plugin).where(Plugin.plugin_slug == plugin_id))
-        plugin = plugin_query.scalars().first()
-    
-    if not plugin:
-        logger.error(f"Plugin not found: {plugin_id}")
-        raise HTTPException(status_code=404, detail="Plugin not found")
-    
-    logger.debug(f"Found plugin: {plugin.id}, plugin_slug: {plugin.plugin_slug}, user_id: {plugin.user_id}")
-    
-    # Try multiple possible locations for the file
-    possible_paths = []
-    
-    # 1. New architecture: Shared storage with version
-    if plugin.plugin_slug and plugin.version:
-        # The actual path is backend/backend/plugins/shared/ relative to project root
-        # PLUGINS_DIR is already /path/to/project/plugins, so PLUGINS_DIR.parent is /path/to/project
-        # We need to go to /path/to/project/backend/backend/plugins/shared/
-        shared_plugin_dir = PLUGINS_DIR.parent / "plugins" / "shared" / plugin.plugin_slug / f"v{plugin.version}"
-        possible_paths.append(shared_plugin_dir / path)
-        logger.debug(f"Added new architecture path with version: {shared_plugin_dir / path}")
-
-    # 2. New architecture: Shared storage without version (fallback)
-    if plugin.plugin_slug:
-        shared_plugin_dir = PLUGINS_DIR.parent / "plugins" / "shared" / plugin.plugin_slug
-        possible_paths.append(shared_plugin_dir / path)
-        logger.debug(f"Added new architecture path without version: {shared_plugin_dir / path}")
 
-    # 3. Backend plugins directory (where webpack builds to)
-    if plugin.plugin_slug:
-        backend_plugin_dir = PLUGINS_DIR.parent / "backend" / "plugins" / plugin.plugin_slug
-        possible_paths.append(backend_plugin_dir / path)
-        logger.debug(f"Added backend plugins path: {backend_plugin_dir / path}")
-
-    # 4. User-specific directory with plugin_slug
-    if plugin.user_id and plugin.plugin_slug:
-        user_plugin_dir = PLUGINS_DIR / plugin.user_id / plugin.plugin_slug
-        possible_paths.append(user_plugin_dir / path)
-    
-    # 5. User-specific directory with plugin ID
-    if plugin.user_id:
-        user_plugin_dir = PLUGINS_DIR / plugin.user_id / plugin.id
-        possible_paths.append(user_plugin_dir / path)
-    
-    # 6. Legacy path directly under plugins directory with plugin_slug
-    if plugin.plugin_slug:
-        possible_paths.append(PLUGINS_DIR / plugin.plugin_slug / path)
-    
-    # 7. Legacy path directly under plugins directory with plugin ID
-    possible_paths.append(PLUGINS_DIR / plugin.id / path)
-    
-    # Try each path
-    for plugin_path in possible_paths:
-        logger.debug(f"Trying path: {plugin_path}")
-        if plugin_path.exists():
-            logger.debug(f"Found file at: {plugin_path}")
-            return FileResponse(plugin_path)
-    
-    # If we get here, the file wasn't found in any of the possible locations
-    logger.error(f"File not found in any location. Tried: {[str(p) for p in possible_paths]}")
-    raise HTTPException(status_code=404, detail="File not found")
+    return await get_plugin_asset_server().serve(
+        request,
+        db,
+        plugin_id,
+        path,
+        layout="public",
+        candidates_for=_public_asset_candidates,
+    )
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from uuid import UUID
@@ -20,6 +20,7 @@ from app.schemas.page import (
     PageHierarchyUpdate
 )
 from app.services.page_service import get_user_page, ensure_page_belongs_to_user
+from app.services.page_cache import page_read_cache, page_cache_response, invalidate_page_cache
 from app.services.navigation_service import ensure_route_belongs_to_user
 
 router = APIRouter(prefix="/pages", tags=["pages"])
@@ -198,6 +199,7 @@ async def update_page_hierarchy(
     
     # Save the updated page
     await page.save(db)
+    invalidate_page_cache(page_id=page.id)
     
     # Convert Page object to PageResponse
     return PageResponse(
@@ -316,57 +318,47 @@ async def get_pages(
 @router.get("/{page_id}", response_model=PageDetailResponse)
 async def get_page(
     page_id: UUID,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     auth: AuthContext = Depends(require_user)
 ):
     """Get a specific page by ID."""
-    page = await Page.get_by_id(db, page_id)
-    if not page:
+    entry = await page_read_cache.get_by_id(db, page_id)
+    if entry is None:
+        generation = page_read_cache.generation
+        # Verify user has access to the page (owner or published)
+        # This will raise 404 if user doesn't have access
+        page = await get_user_page(db, page_id, auth, allow_published=True)
+        entry = page_read_cache.store(page, generation)
+    elif entry.creator_id != str(auth.user_id).replace('-', '') and not entry.is_published:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Page not found"
         )
-    
-    # Verify user has access to the page (owner or published)
-    # This will raise 404 if user doesn't have access
-    page = await get_user_page(db, page.id, auth, allow_published=True)
-    
-    # Convert Page object to PageDetailResponse
-    return PageDetailResponse(
-        id=page.id,
-        name=page.name,
-        route=page.route,
-        parent_route=page.parent_route,
-        parent_type=page.parent_type,
-        content=page.content,
-        content_backup=page.content_backup,
-        creator_id=page.creator_id,
-        is_published=page.is_published,
-        created_at=page.created_at,
-        updated_at=page.updated_at,
-        publish_date=page.publish_date,
-        backup_date=page.backup_date,
-        description=page.description,
-        icon=page.icon,
-        navigation_route_id=page.navigation_route_id
-    )
+
+    return page_cache_response(request, entry)
 
 @router.get("/route/{route}", response_model=PageDetailResponse)
 async def get_page_by_route(
     route: str,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     auth: Optional[AuthContext] = Depends(optional_user)
 ):
     """Get a specific page by route."""
-    page = await Page.get_by_route(db, route)
-    if not page:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Page not found"
-        )
+    entry = await page_read_cache.get_by_route(db, route)
+    if entry is None:
+        generation = page_read_cache.generation
+        page = await Page.get_by_route(db, route)
+        if not page:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Page not found"
+            )
+        entry = page_read_cache.store(page, generation, index_route=True)
     
     # Check if user has access to the page
-    if not page.is_published:
+    if not entry.is_published:
         if not auth:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -374,27 +366,13 @@ async def get_page_by_route(
             )
         
         # Verify user has permission to access the page
-        ensure_page_belongs_to_user(page, auth)
-    
-    # Convert Page object to PageDetailResponse
-    return PageDetailResponse(
-        id=page.id,
-        name=page.name,
-        route=page.route,
-        parent_route=page.parent_route,
-        parent_type=page.parent_type,
-        content=page.content,
-        content_backup=page.content_backup,
-        creator_id=page.creator_id,
-        is_published=page.is_published,
-        created_at=page.created_at,
-        updated_at=page.updated_at,
-        publish_date=page.publish_date,
-        backup_date=page.backup_date,
-        description=page.description,
-        icon=page.icon,
-        navigation_route_id=page.navigation_route_id
-    )
+        if entry.creator_id != str(auth.user_id).replace('-', ''):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Page not found"
+            )
+
+    return page_cache_response(request, entry)
 
 @router.put("/{page_id}", response_model=PageResponse)
 async def update_page(
@@ -546,6 +524,7 @@ async def update_page(
             await page.publish()
     
     await page.save(db)
+    invalidate_page_cache(page_id=page.id)
     
     # Convert Page object to PageResponse
     return PageResponse(
@@ -586,6 +565,7 @@ async def delete_page(
     # Delete the page
     await db.delete(page)
     await db.commit()
+    invalidate_page_cache(page_id=page_id)
     
     return None
 
@@ -611,6 +591,7 @@ async def create_page_backup(
     if backup_data.create_backup:
         await page.create_backup()
         await page.save(db)
+        invalidate_page_cache(page_id=page.id)
     
     # Convert Page object to PageResponse
     return PageResponse(
@@ -656,6 +637,7 @@ async def publish_page(
         await page.unpublish()
     
     await page.save(db)
+    invalidate_page_cache(page_id=page.id)
     
     # Convert Page object to PageResponse
     return PageResponse(
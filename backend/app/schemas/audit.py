@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class AuditLogResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+
+    id: str
+    event_type: str
+    actor_type: str
+    actor_id: Optional[str]
+    request_id: Optional[str]
+    ip: Optional[str]
+    user_agent: Optional[str]
+    method: Optional[str]
+    path: Optional[str]
+    resource_type: Optional[str]
+    resource_id: Optional[str]
+    status: str
+    reason: Optional[str]
+    metadata: Optional[Dict[str, Any]] = Field(default=None, validation_alias="extra_data")
+    timestamp: datetime
+
+
+class AuditLogPageResponse(BaseModel):
+    items: List[AuditLogResponse]
+    next_cursor: Optional[str] = Field(
+        default=None, description="Pass as `cursor` to fetch the next (older) page; null on the last page"
+    )
+
+
+class AuditCompactionResponse(BaseModel):
+    job_id: str
@@ -106,3 +106,19 @@ class ConversationWithPersona(Conversation):
                 }
             }
         }
+
+
+class ConversationSearchHit(BaseModel):
+    """A conversation title or message matching a search query."""
+    conversation_id: str
+    conversation_title: Optional[str] = None
+    message_id: Optional[str] = Field(None, description="Matching message; null when the title matched")
+    sender: Optional[str] = None
+    snippet: str = Field(..., description="HTML-escaped excerpt with the matches wrapped in <mark>")
+    rank: float = Field(..., description="Lower is a better match")
+    created_at: Optional[datetime] = None
+
+
+class ConversationSearchResponse(BaseModel):
+    items: List[ConversationSearchHit]
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to fetch the next page")
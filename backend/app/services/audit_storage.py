@@ -0,0 +1,341 @@
+"""
+Audit log storage: queries, export, and time-bucketed retention.
+
+The ``audit_logs`` table holds the recent ("hot") window of events, on the same
+SQLite file as user data, so it must stay small. The ``system.audit_compaction``
+job moves rows older than ``AUDIT_HOT_RETENTION_DAYS`` into one SQLite file per
+month under ``AUDIT_ARCHIVE_DIR`` (``audit-YYYY-MM.db``, same columns) and
+deletes month files whose newest possible event is older than
+``AUDIT_ARCHIVE_RETENTION_DAYS``. With ``AUDIT_ARCHIVE_ENABLED`` off, expired
+rows are deleted without archiving.
+
+Queries page with keyset cursors on ``(timestamp, id)``, newest first, so a
+page costs the same however deep into the log it is. The NDJSON export walks
+the same pages, holding one page in memory and no read transaction between
+pages.
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, delete, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.audit_log import AuditLog
+
+logger = logging.getLogger(__name__)
+
+AUDIT_COMPACTION_JOB_TYPE = "system.audit_compaction"
+
+_ARCHIVE_COLUMNS = (
+    "id",
+    "event_type",
+    "actor_type",
+    "actor_id",
+    "request_id",
+    "ip",
+    "user_agent",
+    "method",
+    "path",
+    "resource_type",
+    "resource_id",
+    "status",
+    "reason",
+    "extra_data",
+    "timestamp",
+)
+
+_ARCHIVE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit_logs (
+    id TEXT PRIMARY KEY,
+    event_type TEXT NOT NULL,
+    actor_type TEXT NOT NULL,
+    actor_id TEXT,
+    request_id TEXT,
+    ip TEXT,
+    user_agent TEXT,
+    method TEXT,
+    path TEXT,
+    resource_type TEXT,
+    resource_id TEXT,
+    status TEXT NOT NULL,
+    reason TEXT,
+    extra_data TEXT,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_audit_time_id ON audit_logs (timestamp, id);
+"""
+
+
+class InvalidAuditCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+@dataclass
+class AuditLogFilters:
+    event_type: Optional[str] = None
+    actor_id: Optional[str] = None
+    status: Optional[str] = None
+    request_id: Optional[str] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # Audit timestamps are stored as naive UTC.
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def encode_cursor(timestamp: datetime, row_id: str) -> str:
+    raw = f"{_naive_utc(timestamp).isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        timestamp, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(timestamp), row_id
+    except Exception as exc:
+        raise InvalidAuditCursor("Invalid cursor") from exc
+
+
+def serialize_audit_log(row: AuditLog) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "event_type": row.event_type,
+        "actor_type": row.actor_type,
+        "actor_id": row.actor_id,
+        "request_id": row.request_id,
+        "ip": row.ip,
+        "user_agent": row.user_agent,
+        "method": row.method,
+        "path": row.path,
+        "resource_type": row.resource_type,
+        "resource_id": row.resource_id,
+        "status": row.status,
+        "reason": row.reason,
+        "metadata": row.extra_data,
+        "timestamp": row.timestamp.isoformat() if row.timestamp else None,
+    }
+
+
+def _filtered_query(filters: AuditLogFilters):
+    stmt = select(AuditLog)
+    if filters.event_type:
+        stmt = stmt.where(AuditLog.event_type == filters.event_type)
+    if filters.actor_id:
+        stmt = stmt.where(AuditLog.actor_id == filters.actor_id)
+    if filters.status:
+        stmt = stmt.where(AuditLog.status == filters.status)
+    if filters.request_id:
+        stmt = stmt.where(AuditLog.request_id == filters.request_id)
+    if filters.since:
+        stmt = stmt.where(AuditLog.timestamp >= _naive_utc(filters.since))
+    if filters.until:
+        stmt = stmt.where(AuditLog.timestamp < _naive_utc(filters.until))
+    return stmt
+
+
+async def list_audit_logs(
+    db: AsyncSession,
+    filters: AuditLogFilters,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+) -> Tuple[List[AuditLog], Optional[str]]:
+    """One page of events, newest first, and the cursor for the next page."""
+    stmt = _filtered_query(filters)
+    if cursor:
+        cursor_timestamp, cursor_id = decode_cursor(cursor)
+        stmt = stmt.where(
+            or_(
+                AuditLog.timestamp < cursor_timestamp,
+                and_(AuditLog.timestamp == cursor_timestamp, AuditLog.id < cursor_id),
+            )
+        )
+    stmt = stmt.order_by(AuditLog.timestamp.desc(), AuditLog.id.desc()).limit(limit + 1)
+    rows = list((await db.execute(stmt)).scalars().all())
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id)
+    return rows, next_cursor
+
+
+async def export_audit_logs_ndjson(
+    session_factory: Callable[[], Any],
+    filters: AuditLogFilters,
+    page_size: Optional[int] = None,
+) -> AsyncIterator[str]:
+    """Yield matching events as NDJSON lines, one keyset page at a time."""
+    page_size = page_size or settings.AUDIT_EXPORT_PAGE_SIZE
+    cursor: Optional[str] = None
+    while True:
+        # A session per page: no long-lived read transaction pins the WAL.
+        async with session_factory() as db:
+            rows, cursor = await list_audit_logs(db, filters, cursor=cursor, limit=page_size)
+            lines = "".join(
+                json.dumps(serialize_audit_log(row), default=str, separators=(",", ":")) + "\n"
+                for row in rows
+            )
+        if lines:
+            yield lines
+        if cursor is None:
+            return
+
+
+class AuditArchive:
+    """Per-month SQLite files holding events that left the hot table."""
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self.directory = Path(directory or settings.AUDIT_ARCHIVE_DIR)
+
+    def path_for_month(self, month: str) -> Path:
+        return self.directory / f"audit-{month}.db"
+
+    def _write_month(self, month: str, rows: Sequence[Tuple[Any, ...]]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path_for_month(month))
+        try:
+            connection.executescript(_ARCHIVE_SCHEMA)
+            placeholders = ", ".join("?" for _ in _ARCHIVE_COLUMNS)
+            connection.executemany(
+                f"INSERT OR IGNORE INTO audit_logs ({', '.join(_ARCHIVE_COLUMNS)}) VALUES ({placeholders})",
+                rows,
+            )
+            connection.commit()
+        finally:
+            connection.close()
+
+    async def append(self, rows: Sequence[AuditLog]) -> None:
+        by_month: Dict[str, List[Tuple[Any, ...]]] = {}
+        for row in rows:
+            month = row.timestamp.strftime("%Y-%m")
+            values = []
+            for column in _ARCHIVE_COLUMNS:
+                value = getattr(row, column)
+                if column == "extra_data":
+                    value = json.dumps(value, default=str) if value is not None else None
+                elif column == "timestamp":
+                    value = _naive_utc(value).isoformat(sep=" ")
+                values.append(value)
+            by_month.setdefault(month, []).append(tuple(values))
+        for month, month_rows in by_month.items():
+            await asyncio.to_thread(self._write_month, month, month_rows)
+
+    def prune(self, older_than: datetime) -> List[str]:
+        """Delete month files whose whole month is before ``older_than``."""
+        removed = []
+        if not self.directory.exists():
+            return removed
+        for path in sorted(self.directory.glob("audit-*.db")):
+            try:
+                month_start = datetime.strptime(path.stem[len("audit-"):], "%Y-%m")
+            except ValueError:
+                continue
+            next_month = (month_start.replace(day=28) + timedelta(days=4)).replace(day=1)
+            if next_month <= older_than:
+                path.unlink()
+                removed.append(path.name)
+        return removed
+
+
+async def compact_audit_logs(
+    session_factory: Callable[[], Any],
+    now: Optional[datetime] = None,
+    archive: Optional[AuditArchive] = None,
+    check_cancel: Optional[Callable[[], Awaitable[None]]] = None,
+) -> Dict[str, Any]:
+    """Move expired events out of the hot table and prune expired archives."""
+    now = _naive_utc(now or datetime.now(timezone.utc))
+    cutoff = now - timedelta(days=settings.AUDIT_HOT_RETENTION_DAYS)
+    archive = archive or AuditArchive()
+    batch_size = max(settings.AUDIT_COMPACTION_BATCH_SIZE, 1)
+    moved = 0
+
+    while True:
+        if check_cancel is not None:
+            await check_cancel()
+        async with session_factory() as db:
+            rows = list(
+                (
+                    await db.execute(
+                        select(AuditLog)
+                        .where(AuditLog.timestamp < cutoff)
+                        .order_by(AuditLog.timestamp, AuditLog.id)
+                        .limit(batch_size)
+                    )
+                ).scalars().all()
+            )
+            if not rows:
+                break
+            if settings.AUDIT_ARCHIVE_ENABLED:
+                # Archive first: a crash before the delete re-archives (INSERT OR IGNORE), never loses rows.
+                await archive.append(rows)
+            await db.execute(delete(AuditLog).where(AuditLog.id.in_([row.id for row in rows])))
+            await db.commit()
+        moved += len(rows)
+        if len(rows) < batch_size:
+            break
+
+    pruned: List[str] = []
+    if settings.AUDIT_ARCHIVE_RETENTION_DAYS > 0:
+        pruned = archive.prune(now - timedelta(days=settings.AUDIT_ARCHIVE_RETENTION_DAYS))
+
+    logger.info("Audit compaction moved %s events older than %s; pruned archives %s", moved, cutoff, pruned)
+    return {
+        "cutoff": cutoff.isoformat(),
+        "moved": moved,
+        "archived": settings.AUDIT_ARCHIVE_ENABLED,
+        "pruned_archives": pruned,
+    }
+
+
+async def enqueue_audit_compaction(
+    user_id: str, delay_seconds: float = 0.0, deduplicate: bool = True
+) -> Optional[str]:
+    """Queue a compaction job; scheduled runs are deduplicated per compaction interval."""
+    from app.core.job_manager_provider import get_job_manager
+
+    interval = max(settings.AUDIT_COMPACTION_INTERVAL_HOURS * 3600, 60)
+    scheduled_for = datetime.now(timezone.utc) + timedelta(seconds=delay_seconds)
+    bucket = int(scheduled_for.timestamp() // interval)
+    try:
+        job_manager = await get_job_manager()
+        job, _ = await job_manager.enqueue_job(
+            job_type=AUDIT_COMPACTION_JOB_TYPE,
+            payload={"user_id": user_id},
+            user_id=user_id,
+            scheduled_for=scheduled_for,
+            idempotency_key=f"audit-compaction:{bucket}" if deduplicate else None,
+            max_retries=0,
+        )
+        return job.id
+    except Exception as e:
+        logger.warning("Could not schedule audit compaction: %s", e)
+        return None
+
+
+async def schedule_audit_compaction_on_startup(session_factory: Callable[[], Any]) -> None:
+    """Start the compaction job chain as the first admin user (jobs belong to a user)."""
+    from app.core.job_manager_provider import get_system_job_owner_id
+
+    if settings.AUDIT_COMPACTION_INTERVAL_HOURS <= 0:
+        return
+    admin_id = await get_system_job_owner_id(session_factory)
+    if admin_id is None:
+        logger.info("No admin user yet; audit compaction will start when an admin triggers it")
+        return
+    await enqueue_audit_compaction(admin_id)
@@ -0,0 +1,284 @@
+"""
+Intent analysis for the chat routing heuristics.
+
+The chat endpoint asks many keyword/regex questions about the latest user
+message on every turn (is it a task edit, a lookup, an onboarding kickoff,
+which tags does it carry, ...). Each helper used to re-strip, re-lowercase
+and re-scan the text and build its patterns inline.
+
+``analyze_message`` normalizes a message once and returns a cached
+``MessageFeatures`` whose properties are computed lazily, at most once per
+message, from patterns compiled at import. Marker lists are folded into one
+alternation per decision so each check is a single scan. Routing helpers in
+``ai_providers`` read these properties; new intents should be added here as
+another compiled pattern plus a cached property.
+
+``scripts/benchmark_chat_intent.py`` times the routing decisions over a
+representative corpus.
+"""
+
+from __future__ import annotations
+
+import re
+from functools import cached_property, lru_cache
+from typing import Iterable, List, Optional, Pattern, Tuple
+
+
+def _keyword_pattern(markers: Iterable[str]) -> Pattern[str]:
+    """Compile plain substring markers into one alternation (longest first)."""
+    ordered = sorted(set(markers), key=len, reverse=True)
+    return re.compile("|".join(re.escape(marker) for marker in ordered))
+
+
+TASK_REFERENCE_PATTERN = re.compile(r"\b(task|tasks|todo|to-do|t-\d{1,6})\b")
+TASK_WORD_PATTERN = re.compile(r"\b(task|tasks|todo|to-do)\b")
+
+NEGATED_MUTATION_PATTERN = re.compile(
+    r"\b(?:do\s+not|don't|dont|without)\s+(?:create|add|open|make|edit|modify|update|change|complete|close|finish|resolve|mark)\b"
+    r"|\blookup\s+only\b"
+    r"|\bread[\s-]?only\b"
+    r"|\bno\s+changes?\b"
+)
+COMPLETION_PATTERN = re.compile(
+    r"\bcomplete(d|ing)?\b"
+    r"|\bmark\b.{0,32}\b(done|complete|completed)\b"
+    r"|\bdone\b"
+    r"|\bfinish(ed|ing)?\b"
+    r"|\bclose(d|ing)?\b"
+    r"|\bresolve(d|ing)?\b"
+)
+EDIT_PATTERN = re.compile(
+    r"\b(edit|update|modify|change|adjust|rename|reschedule)\b"
+    r"|\bassign(?:ed)?\b"
+    r"|\bset\b.{0,32}\b(?:due|owner|assignee|priority|status|tags?|scope|project)\b"
+    r"|\bmove\b.{0,32}\b(?:due|owner|assignee|priority|status|tags?|scope|project|to\s+p[0-3])\b"
+)
+
+CREATE_TASK_MARKERS = (
+    "create a task",
+    "create task",
+    "new task",
+    "add a task",
+    "add task",
+    "make a task",
+    "open a task",
+    "log a task",
+    "track a task",
+)
+CREATE_TASK_PATTERN = _keyword_pattern(CREATE_TASK_MARKERS)
+TASK_LOOKUP_PATTERN = _keyword_pattern(
+    (
+        "check",
+        "show",
+        "list",
+        "find",
+        "lookup",
+        "look up",
+        "search",
+        "existing",
+        "open task",
+        "open tasks",
+        "already",
+        "match",
+        "matches",
+        "read-only",
+        "read only",
+        "lookup only",
+    )
+)
+
+ONBOARDING_CONTEXT_PATTERN = _keyword_pattern(("onboarding", "interview"))
+ONBOARDING_START_PATTERN = _keyword_pattern(
+    ("start", "begin", "kickoff", "kick off", "let us start", "lets start")
+)
+ONBOARDING_SKIP_PATTERN = _keyword_pattern(
+    ("skip", "skip this", "pass", "move on", "next question", "not now", "later")
+)
+ONBOARDING_RESUME_PATTERN = _keyword_pattern(("resume", "continue", "pick up", "where we left off"))
+
+PRIORITY_PATTERNS = (
+    ("p0", re.compile(r"\b(p0|critical|blocker)\b")),
+    ("p1", re.compile(r"\b(p1|urgent|highest priority|high priority)\b")),
+    ("p2", re.compile(r"\b(p2|medium priority|normal priority)\b")),
+    ("p3", re.compile(r"\b(p3|low priority)\b")),
+)
+
+HASH_TAG_PATTERN = re.compile(r"#([a-z0-9][a-z0-9_-]{1,30})", flags=re.IGNORECASE)
+LABELED_TAGS_PATTERN = re.compile(r"\btags?\s*:\s*([^\n\r;.]*)", flags=re.IGNORECASE)
+TAG_STOP_PATTERN = re.compile(
+    r"\b(?:due|by|priority|owner|assign(?:ed)?|scope|project)\b",
+    flags=re.IGNORECASE,
+)
+TAG_TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9_-]{1,30}")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+RELATIVE_DATE_PHRASE_PATTERNS = tuple(
+    (phrase, re.compile(rf"\b{re.escape(phrase)}\b", flags=re.IGNORECASE))
+    for phrase in ("today", "tomorrow", "next week", "month end")
+)
+NEXT_WEEKDAY_PATTERN = re.compile(
+    r"\bnext\s+(monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b",
+    flags=re.IGNORECASE,
+)
+
+_NEW_PAGE_VERBS = r"(?:create|add|start|open|make|build|spin up|set up|setup)"
+NEW_PAGE_TYPED_PATTERN = re.compile(
+    rf"\b{_NEW_PAGE_VERBS}\s+(?:a\s+)?(?:new\s+)?(life|project)\s+"
+    r"(?:page|area|scope|workspace|folder)?(?:\s+(?:for|about|called|named))?\s+(.+)$",
+    flags=re.IGNORECASE,
+)
+NEW_PAGE_UNTYPED_PATTERN = re.compile(
+    rf"\b{_NEW_PAGE_VERBS}\s+(?:a\s+)?new\s+(?:page|area|scope|workspace|folder)"
+    r"(?:\s+(?:for|about|called|named))?\s+(.+)$",
+    flags=re.IGNORECASE,
+)
+NEW_PAGE_LABEL_SPLIT_PATTERN = re.compile(r"\b(?:with|where|so that|because)\b", flags=re.IGNORECASE)
+
+
+class MessageFeatures:
+    """Normalized forms of one message and the routing intents derived from it."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.stripped = text.strip()
+        # Lowercased with whitespace runs collapsed; what most heuristics match on.
+        self.normalized = " ".join(self.stripped.lower().split())
+
+    @cached_property
+    def compact(self) -> str:
+        """Whitespace-collapsed text with the original casing."""
+        return " ".join(self.stripped.split())
+
+    @cached_property
+    def new_page_request(self) -> Optional[Tuple[str, str]]:
+        """``(kind, raw name)`` of a "create a new page" request, kind ``""`` when untyped."""
+        typed_match = NEW_PAGE_TYPED_PATTERN.search(self.compact)
+        if typed_match:
+            return str(typed_match.group(1) or "").strip().lower(), str(typed_match.group(2) or "").strip()
+        untyped_match = NEW_PAGE_UNTYPED_PATTERN.search(self.compact)
+        if untyped_match:
+            return "", str(untyped_match.group(1) or "").strip()
+        return None
+
+    @property
+    def mentions_new_page(self) -> bool:
+        return self.new_page_request is not None
+
+    @cached_property
+    def word_count(self) -> int:
+        return len(self.normalized.split())
+
+    @cached_property
+    def mentions_task(self) -> bool:
+        return bool(TASK_REFERENCE_PATTERN.search(self.normalized))
+
+    @cached_property
+    def has_create_task_marker(self) -> bool:
+        return bool(CREATE_TASK_PATTERN.search(self.normalized))
+
+    @cached_property
+    def task_mutation_kind(self) -> Optional[str]:
+        """``"complete"`` or ``"edit"`` when the message changes an existing task."""
+        normalized = self.normalized
+        if not normalized or not self.mentions_task:
+            return None
+        if NEGATED_MUTATION_PATTERN.search(normalized):
+            return None
+        if self.has_create_task_marker:
+            return None
+        if COMPLETION_PATTERN.search(normalized):
+            return "complete"
+        if EDIT_PATTERN.search(normalized):
+            return "edit"
+        return None
+
+    @cached_property
+    def is_task_lookup(self) -> bool:
+        normalized = self.normalized
+        if not normalized or not self.mentions_task:
+            return False
+        if self.task_mutation_kind in {"complete", "edit"}:
+            return False
+        if self.has_create_task_marker:
+            return False
+        if normalized.endswith("?"):
+            return True
+        return bool(TASK_LOOKUP_PATTERN.search(normalized))
+
+    @cached_property
+    def is_new_task(self) -> bool:
+        normalized = self.normalized
+        if not normalized or not TASK_WORD_PATTERN.search(normalized):
+            return False
+        if self.task_mutation_kind in {"complete", "edit"}:
+            return False
+        if "task:" in normalized or normalized.startswith("todo:"):
+            return True
+        return self.has_create_task_marker
+
+    @cached_property
+    def has_onboarding_context(self) -> bool:
+        return bool(ONBOARDING_CONTEXT_PATTERN.search(self.normalized))
+
+    @cached_property
+    def is_onboarding_kickoff(self) -> bool:
+        return self.has_onboarding_context and bool(ONBOARDING_START_PATTERN.search(self.normalized))
+
+    @cached_property
+    def is_onboarding_skip(self) -> bool:
+        return bool(self.normalized) and bool(ONBOARDING_SKIP_PATTERN.search(self.normalized))
+
+    @cached_property
+    def is_onboarding_resume(self) -> bool:
+        if not self.normalized or not ONBOARDING_RESUME_PATTERN.search(self.normalized):
+            return False
+        return self.has_onboarding_context or self.word_count <= 3
+
+    @cached_property
+    def priority(self) -> Optional[str]:
+        for priority, pattern in PRIORITY_PATTERNS:
+            if pattern.search(self.normalized):
+                return priority
+        return None
+
+    @cached_property
+    def capture_tags(self) -> List[str]:
+        tags: List[str] = []
+        seen: set[str] = set()
+
+        for hash_tag in HASH_TAG_PATTERN.findall(self.text):
+            normalized = hash_tag.strip().lower()
+            if normalized and normalized not in seen:
+                seen.add(normalized)
+                tags.append(normalized)
+
+        labeled_match = LABELED_TAGS_PATTERN.search(self.text)
+        if labeled_match:
+            raw_value = str(labeled_match.group(1) or "").strip()
+            if raw_value:
+                stop_match = TAG_STOP_PATTERN.search(raw_value)
+                if stop_match:
+                    raw_value = raw_value[: stop_match.start()].strip(" ,")
+
+            if "," in raw_value:
+                raw_tokens = [token.strip() for token in raw_value.split(",")]
+            else:
+                raw_tokens = WHITESPACE_PATTERN.split(raw_value)
+            for token in raw_tokens:
+                normalized = token.strip().lower().strip("#")
+                if len(normalized) < 2:
+                    continue
+                if not TAG_TOKEN_PATTERN.fullmatch(normalized):
+                    continue
+                if normalized in seen:
+                    continue
+                seen.add(normalized)
+                tags.append(normalized)
+
+        return tags
+
+
+@lru_cache(maxsize=256)
+def analyze_message(text: str) -> MessageFeatures:
+    """Return the (cached) features of ``text``; treat the result as read-only."""
+    return MessageFeatures(text)
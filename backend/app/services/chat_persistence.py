@@ -0,0 +1,130 @@
+"""
+Unit-of-work persistence for one chat turn.
+
+A chat turn used to commit separately for the page binding, the persona
+update, the new conversation, the persona greeting, the approval state and
+the assistant message. On SQLite every commit is an fsync under the database
+write lock, which job progress and audit writes also need.
+
+``ChatTurnWriter`` collects the turn's writes in the session (the session
+factory does not autoflush, so staged rows take no lock) and commits them in
+as few transactions as possible:
+
+- non-streaming and deterministic turns commit once, with the reply;
+- streaming turns commit once before the stream starts, so the conversation
+  and the user's messages are durable when the client receives the
+  conversation id, and once when the stream ends.
+
+A turn that resolves an MCP approval also commits the resolution before the
+approved tool runs.
+
+The assistant message is written once at the end of the turn. Streams that
+run longer than ``CHAT_STREAM_CHECKPOINT_SECONDS`` checkpoint the partial
+output into the same row (``partial: true`` in its metadata), and a stream
+that fails keeps what it produced. Every commit also sets the conversation's
+``updated_at``.
+"""
+
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import inspect, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.conversation import Conversation
+from app.models.message import Message
+
+logger = logging.getLogger(__name__)
+
+
+class ChatTurnWriter:
+    """Collects a chat turn's writes and commits them in few transactions."""
+
+    def __init__(self, db: AsyncSession, checkpoint_interval_seconds: Optional[float] = None) -> None:
+        self.db = db
+        self.conversation: Optional[Conversation] = None
+        self.checkpoint_interval_seconds = (
+            settings.CHAT_STREAM_CHECKPOINT_SECONDS
+            if checkpoint_interval_seconds is None
+            else checkpoint_interval_seconds
+        )
+        self.commit_count = 0
+        self.checkpoint_count = 0
+        self._assistant_message: Optional[Message] = None
+        self._last_checkpoint_at = time.monotonic()
+
+    def bind_conversation(self, conversation: Conversation) -> None:
+        self.conversation = conversation
+
+    def add(self, *instances: Any) -> None:
+        for instance in instances:
+            self.db.add(instance)
+
+    async def commit(self) -> None:
+        """Commit everything staged so far and touch the conversation."""
+        if self.conversation is not None:
+            now = datetime.now(timezone.utc)
+            self.conversation.updated_at = now
+            if inspect(self.conversation).detached:
+                # The request session is closed before a stream finishes, detaching the conversation.
+                await self.db.execute(
+                    update(Conversation).where(Conversation.id == self.conversation.id).values(updated_at=now)
+                )
+        await self.db.commit()
+        self.commit_count += 1
+
+    def stage_assistant_message(self, *, message_id: str, content: str, metadata: Dict[str, Any]) -> Message:
+        """Stage the turn's assistant message, reusing the checkpointed row if there is one."""
+        message = self._assistant_message
+        if message is None:
+            message = Message(
+                id=message_id,
+                conversation_id=self.conversation.id,
+                sender="llm",
+                message=content,
+                message_metadata=metadata,
+            )
+            self.db.add(message)
+            self._assistant_message = message
+        else:
+            message.message = content
+            message.message_metadata = metadata
+        return message
+
+    def checkpoint_due(self) -> bool:
+        return (
+            self.checkpoint_interval_seconds > 0
+            and time.monotonic() - self._last_checkpoint_at >= self.checkpoint_interval_seconds
+        )
+
+    async def checkpoint(self, *, message_id: str, content: str, metadata: Dict[str, Any]) -> bool:
+        """Persist the partial assistant output if the checkpoint interval has elapsed."""
+        if not content or not self.checkpoint_due():
+            return False
+        await self._commit_partial(message_id=message_id, content=content, metadata=metadata)
+        return True
+
+    async def save_partial(self, *, message_id: str, content: str, metadata: Dict[str, Any]) -> bool:
+        """Keep the output of a turn that failed part-way; never raises."""
+        if not content:
+            return False
+        try:
+            await self._commit_partial(message_id=message_id, content=content, metadata=metadata)
+        except Exception as exc:
+            logger.warning("chat_partial_save_failed message_id=%s error=%s", message_id, exc)
+            await self.db.rollback()
+            return False
+        return True
+
+    async def _commit_partial(self, *, message_id: str, content: str, metadata: Dict[str, Any]) -> None:
+        self.checkpoint_count += 1
+        self.stage_assistant_message(
+            message_id=message_id,
+            content=content,
+            metadata={**metadata, "partial": True, "checkpoint_count": self.checkpoint_count},
+        )
+        await self.commit()
+        self._last_checkpoint_at = time.monotonic()
@@ -0,0 +1,254 @@
+"""
+Token-budgeted conversation history for chat completion.
+
+Every message stores an estimated ``context_tokens`` count when it is
+written. ``ConversationContextBuilder`` uses it to select, in one query over
+``(conversation_id, created_at)``, the newest messages whose running token
+total fits the history budget, so the cost of a turn no longer grows with the
+length of the conversation.
+
+Messages older than the window are not dropped silently: they are folded into
+a rolling summary stored on the conversation. Each turn only adds the
+messages that have left the window since the previous turn, and the summary
+is sent to the model as a system message ahead of the history.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+from sqlalchemy import Text, and_, func, or_, select, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.conversation import Conversation
+from app.models.message import Message, estimate_context_tokens
+
+SUMMARY_LINE_MAX_CHARS = 240
+SUMMARY_HEADER = (
+    "Summary of {count} earlier messages in this conversation that are outside "
+    "the context window (oldest first):"
+)
+
+
+def _message_role(sender: str, metadata: Any) -> str:
+    role = metadata.get("role") if isinstance(metadata, dict) else None
+    if role not in {"assistant", "user", "system"}:
+        role = "assistant" if sender == "llm" else "user"
+    return role
+
+
+def _summary_line(sender: str, text: str, metadata: Any) -> str:
+    collapsed = " ".join(str(text or "").split())
+    if len(collapsed) > SUMMARY_LINE_MAX_CHARS:
+        collapsed = collapsed[:SUMMARY_LINE_MAX_CHARS].rstrip() + "..."
+    return f"{_message_role(sender, metadata).capitalize()}: {collapsed}"
+
+
+def _fold_summary(existing: Optional[str], lines: Iterable[str], max_chars: int) -> str:
+    """Append ``lines`` and drop the oldest lines until the summary fits ``max_chars``."""
+    all_lines = [line for line in (existing or "").split("\n") if line] + list(lines)
+    total = sum(len(line) + 1 for line in all_lines)
+    start = 0
+    while start < len(all_lines) - 1 and total > max_chars:
+        total -= len(all_lines[start]) + 1
+        start += 1
+    return "\n".join(all_lines[start:])
+
+
+@dataclass
+class ConversationContext:
+    """History selected for one chat turn."""
+
+    messages: List[Dict[str, Any]] = field(default_factory=list)
+    included_count: int = 0
+    omitted_count: int = 0
+    history_tokens: int = 0
+    budget_tokens: int = 0
+    summary_tokens: int = 0
+
+    def metadata(self) -> Dict[str, Any]:
+        return {
+            "history_messages_included": self.included_count,
+            "history_messages_omitted": self.omitted_count,
+            "history_tokens": self.history_tokens,
+            "history_budget_tokens": self.budget_tokens,
+            "history_summary_applied": self.summary_tokens > 0,
+            "history_summary_tokens": self.summary_tokens,
+        }
+
+
+class ConversationContextBuilder:
+    """Selects the newest messages that fit a token budget and maintains the summary."""
+
+    def __init__(
+        self,
+        budget_tokens: int,
+        max_messages: Optional[int] = None,
+        summary_max_chars: Optional[int] = None,
+    ) -> None:
+        self.summary_max_chars = (
+            settings.CONVERSATION_SUMMARY_MAX_CHARS if summary_max_chars is None else summary_max_chars
+        )
+        # Leave room for the summary so window + summary stays within the budget.
+        self.budget_tokens = max(budget_tokens, 1)
+        self.window_budget_tokens = max(self.budget_tokens - self.summary_max_chars // 4, 1)
+        self.max_messages = max(
+            settings.CONVERSATION_CONTEXT_MAX_MESSAGES if max_messages is None else max_messages,
+            1,
+        )
+
+    async def _select_window(self, db: AsyncSession, conversation_id: str) -> tuple[List[Any], int]:
+        newest_first = (Message.created_at.desc(),)
+        tokens = func.coalesce(Message.context_tokens, func.length(Message.message) / 4 + 1)
+        ranked = (
+            select(
+                Message.id.label("id"),
+                func.sum(tokens).over(order_by=newest_first).label("running_tokens"),
+                func.row_number().over(order_by=newest_first).label("position"),
+                func.count().over().label("total_count"),
+            )
+            .where(Message.conversation_id == conversation_id)
+            .subquery()
+        )
+        query = (
+            select(
+                Message.id,
+                Message.sender,
+                Message.message,
+                Message.message_metadata,
+                Message.created_at,
+                tokens.label("tokens"),
+                ranked.c.total_count,
+            )
+            .join(ranked, ranked.c.id == Message.id)
+            .where(
+                ranked.c.position <= self.max_messages,
+                # The newest message is always kept, even when it alone exceeds the budget.
+                or_(ranked.c.running_tokens <= self.window_budget_tokens, ranked.c.position == 1),
+            )
+            .order_by(Message.created_at)
+        )
+        rows = list((await db.execute(query)).all())
+        total_count = int(rows[0].total_count) if rows else 0
+        return rows, total_count
+
+    async def _update_summary(
+        self,
+        db: AsyncSession,
+        conversation: Conversation,
+        window_start: datetime,
+    ) -> None:
+        summarized_through = conversation.context_summary_through
+        if summarized_through is not None and summarized_through.tzinfo is None and window_start.tzinfo:
+            summarized_through = summarized_through.replace(tzinfo=window_start.tzinfo)
+
+        # The window only moves forward in normal use; if it moved back (larger
+        # budget), rebuild from scratch rather than repeat messages.
+        rebuild = summarized_through is None or summarized_through >= window_start
+        conditions = [Message.conversation_id == conversation.id, Message.created_at < window_start]
+        if not rebuild:
+            conditions.append(Message.created_at > summarized_through)
+
+        result = await db.execute(
+            select(Message.sender, Message.message, Message.message_metadata, Message.created_at)
+            .where(and_(*conditions))
+            .order_by(Message.created_at)
+        )
+        rows = result.all()
+        if not rows and not rebuild:
+            return
+
+        lines = [_summary_line(row.sender, row.message, row.message_metadata) for row in rows]
+        if rebuild:
+            conversation.context_summary = _fold_summary(None, lines, self.summary_max_chars)
+            conversation.context_summary_count = len(rows)
+        else:
+            conversation.context_summary = _fold_summary(
+                conversation.context_summary, lines, self.summary_max_chars
+            )
+            conversation.context_summary_count = (conversation.context_summary_count or 0) + len(rows)
+        if rows:
+            conversation.context_summary_through = rows[-1].created_at
+
+    async def build(
+        self,
+        db: AsyncSession,
+        conversation: Conversation,
+        *,
+        skip_trailing_user: bool = False,
+    ) -> ConversationContext:
+        """Return provider-format history for ``conversation``.
+
+        ``skip_trailing_user`` drops the newest stored message when it is a
+        user message already repeated in the current request.
+        """
+        rows, total_count = await self._select_window(db, conversation.id)
+        context = ConversationContext(budget_tokens=self.budget_tokens)
+        if not rows:
+            return context
+
+        if skip_trailing_user and rows[-1].sender == "user":
+            total_count -= 1
+            rows = rows[:-1]
+        context.omitted_count = max(total_count - len(rows), 0)
+
+        if context.omitted_count and self.summary_max_chars > 0 and rows:
+            await self._update_summary(db, conversation, rows[0].created_at)
+            if conversation.context_summary:
+                summary_content = "\n".join(
+                    [
+                        SUMMARY_HEADER.format(count=conversation.context_summary_count or context.omitted_count),
+                        conversation.context_summary,
+                    ]
+                )
+                context.summary_tokens = estimate_context_tokens(summary_content)
+                context.messages.append({"role": "system", "content": summary_content})
+
+        for row in rows:
+            context.messages.append(
+                {"role": _message_role(row.sender, row.message_metadata), "content": row.message}
+            )
+            context.history_tokens += int(row.tokens or 0)
+        context.included_count = len(rows)
+        return context
+
+
+async def collect_history_event_ids(
+    db: AsyncSession,
+    conversation_id: str,
+    event_keys: Sequence[str],
+) -> Dict[str, Set[str]]:
+    """Collect MCP event ids recorded in a conversation's message metadata.
+
+    Only rows whose metadata mentions one of ``event_keys`` are loaded, so the
+    duplicate guards still see events that have left the context window.
+    """
+    collected: Dict[str, Set[str]] = {key: set() for key in event_keys}
+    if not event_keys:
+        return collected
+
+    metadata_text = type_coerce(Message.message_metadata, Text)
+    result = await db.execute(
+        select(Message.message_metadata).where(
+            Message.conversation_id == conversation_id,
+            or_(*[metadata_text.like(f'%"{key}"%') for key in event_keys]),
+        )
+    )
+    for metadata in result.scalars():
+        if isinstance(metadata, str):
+            try:
+                metadata = json.loads(metadata)
+            except ValueError:
+                continue
+        mcp_meta = metadata.get("mcp") if isinstance(metadata, dict) else None
+        if not isinstance(mcp_meta, dict):
+            continue
+        for key in event_keys:
+            event_id = str(mcp_meta.get(key) or "").strip()
+            if event_id:
+                collected[key].add(event_id)
+    return collected
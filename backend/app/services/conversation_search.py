@@ -0,0 +1,454 @@
+"""
+Full-text search over a user's conversation titles and messages.
+
+Uses the ``conversation_search`` FTS5 index created by migration
+``e5b9d2a7c3f1`` when it exists (SQLite), the ``to_tsvector`` GIN indexes on
+PostgreSQL, and otherwise falls back to ``LIKE`` filters. Hits are ranked
+(BM25 on SQLite, ``ts_rank`` on PostgreSQL, with titles weighted above
+message bodies), carry an HTML-escaped snippet with the matches wrapped in
+``<mark>``, and are paged with a keyset cursor over ``(rank, key)``.
+
+The SQLite index is maintained by triggers in the transaction that writes the
+conversation or message. History written before the migration is indexed by
+the ``system.conversation_search_backfill`` job.
+"""
+
+from __future__ import annotations
+
+import base64
+import html
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, bindparam, column, func, literal, literal_column, or_, select, table, text, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.conversation import Conversation
+from app.models.message import Message
+from app.plugins.module_search import build_fts_query
+
+logger = logging.getLogger(__name__)
+
+CONVERSATION_SEARCH_BACKFILL_JOB_TYPE = "system.conversation_search_backfill"
+CONVERSATION_SEARCH_BACKFILL_IDEMPOTENCY_KEY = "conversation-search-backfill"
+
+# Placeholders the database wraps around matches; replaced after escaping the snippet
+_MARK_START = "\x02"
+_MARK_END = "\x03"
+_SNIPPET_TOKENS = 16
+_LIKE_SNIPPET_CHARS = 60
+_TITLE_WEIGHT = 4.0
+
+search_docs_table = table(
+    "conversation_search_docs",
+    column("id"),
+    column("conversation_id"),
+    column("message_id"),
+    column("user_id"),
+)
+
+# The GIN index expressions from migration e5b9d2a7c3f1, spelled out: PostgreSQL
+# only uses an expression index for an identical expression, with no bound parameters.
+_MESSAGE_TSVECTOR = literal_column("to_tsvector('simple', coalesce(messages.message, ''))")
+_TITLE_TSVECTOR = literal_column("to_tsvector('simple', coalesce(conversations.title, ''))")
+
+# Per-process detection result; migrations run before the app starts serving.
+_sqlite_index_available: Optional[bool] = None
+
+
+class InvalidSearchCursor(ValueError):
+    """Raised for a cursor that was not produced by a previous search page."""
+
+
+def encode_search_cursor(rank: float, key: str) -> str:
+    raw = json.dumps([rank, key], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        return float(rank), str(key)
+    except Exception as exc:
+        raise InvalidSearchCursor("Invalid cursor") from exc
+
+
+def render_snippet(snippet: Optional[str]) -> str:
+    """Escape ``snippet`` for HTML and turn the match placeholders into ``<mark>`` tags."""
+    escaped = html.escape(snippet or "", quote=False)
+    return escaped.replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>")
+
+
+def _like_snippet(value: Optional[str], term: str) -> str:
+    value = value or ""
+    index = value.lower().find(term)
+    if index < 0:
+        return value[: _LIKE_SNIPPET_CHARS * 2]
+    start = max(0, index - _LIKE_SNIPPET_CHARS)
+    end = index + len(term)
+    snippet = (
+        value[start:index] + _MARK_START + value[index:end] + _MARK_END + value[end:end + _LIKE_SNIPPET_CHARS]
+    )
+    return ("…" if start > 0 else "") + snippet + ("…" if end + _LIKE_SNIPPET_CHARS < len(value) else "")
+
+
+async def _has_sqlite_index(db: AsyncSession) -> bool:
+    global _sqlite_index_available
+    if _sqlite_index_available is None:
+        result = await db.execute(
+            text(
+                "SELECT COUNT(*) FROM sqlite_master WHERE name IN "
+                "('conversation_search', 'conversation_search_docs', 'conversation_search_message_ai')"
+            )
+        )
+        _sqlite_index_available = result.scalar() == 3
+        if not _sqlite_index_available:
+            logger.warning("Conversation search index missing; falling back to LIKE filters")
+    return _sqlite_index_available
+
+
+async def search_mode(db: AsyncSession) -> str:
+    dialect = db.bind.dialect.name if db.bind is not None else "sqlite"
+    if dialect == "sqlite":
+        return "fts5" if await _has_sqlite_index(db) else "like"
+    if dialect == "postgresql":
+        return "tsvector"
+    return "like"
+
+
+class ConversationSearchService:
+    """Ranks and pages a user's conversation titles and messages for a query."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def _fts5_matches(self, fts_query: str, user_id: str, conversation_id: Optional[str]):
+        index = literal_column("conversation_search")
+        docs = search_docs_table
+        conditions = [index.op("MATCH")(fts_query), docs.c.user_id == user_id]
+        if conversation_id:
+            conditions.append(docs.c.conversation_id == conversation_id)
+        return (
+            select(
+                docs.c.conversation_id,
+                docs.c.message_id,
+                func.coalesce(docs.c.message_id, docs.c.conversation_id).label("key"),
+                func.bm25(index, _TITLE_WEIGHT, 1.0).label("rank"),
+                func.snippet(index, -1, _MARK_START, _MARK_END, "…", _SNIPPET_TOKENS).label("snippet"),
+            )
+            .select_from(table("conversation_search").join(docs, docs.c.id == literal_column("conversation_search.rowid")))
+            .where(*conditions)
+        )
+
+    def _tsvector_matches(self, search_text: str, user_id: str, conversation_id: Optional[str]):
+        ts_query = func.plainto_tsquery(literal_column("'simple'"), search_text)
+        headline_options = f"StartSel={_MARK_START}, StopSel={_MARK_END}, MaxWords=30, MinWords=10"
+        message_document = _MESSAGE_TSVECTOR
+        title_document = _TITLE_TSVECTOR
+
+        message_conditions = [Conversation.user_id == user_id, message_document.op("@@")(ts_query)]
+        title_conditions = [Conversation.user_id == user_id, title_document.op("@@")(ts_query)]
+        if conversation_id:
+            message_conditions.append(Conversation.id == conversation_id)
+            title_conditions.append(Conversation.id == conversation_id)
+
+        messages = (
+            select(
+                Message.conversation_id.label("conversation_id"),
+                Message.id.label("message_id"),
+                Message.id.label("key"),
+                (-func.ts_rank(message_document, ts_query)).label("rank"),
+                func.ts_headline(literal_column("'simple'"), Message.message, ts_query, headline_options).label("snippet"),
+            )
+            .join(Conversation, Conversation.id == Message.conversation_id)
+            .where(*message_conditions)
+        )
+        titles = select(
+            Conversation.id.label("conversation_id"),
+            literal(None).label("message_id"),
+            Conversation.id.label("key"),
+            (-func.ts_rank(title_document, ts_query) * _TITLE_WEIGHT).label("rank"),
+            func.ts_headline(literal_column("'simple'"), Conversation.title, ts_query, headline_options).label("snippet"),
+        ).where(*title_conditions)
+        return union_all(messages, titles)
+
+    def _like_matches(self, search_text: str, user_id: str, conversation_id: Optional[str]):
+        pattern = f"%{search_text.lower()}%"
+        message_conditions = [Conversation.user_id == user_id, func.lower(Message.message).like(pattern)]
+        title_conditions = [Conversation.user_id == user_id, func.lower(Conversation.title).like(pattern)]
+        if conversation_id:
+            message_conditions.append(Conversation.id == conversation_id)
+            title_conditions.append(Conversation.id == conversation_id)
+
+        messages = (
+            select(
+                Message.conversation_id.label("conversation_id"),
+                Message.id.label("message_id"),
+                Message.id.label("key"),
+                literal(0.0).label("rank"),
+                Message.message.label("snippet"),
+            )
+            .join(Conversation, Conversation.id == Message.conversation_id)
+            .where(*message_conditions)
+        )
+        titles = select(
+            Conversation.id.label("conversation_id"),
+            literal(None).label("message_id"),
+            Conversation.id.label("key"),
+            literal(-1.0).label("rank"),
+            Conversation.title.label("snippet"),
+        ).where(*title_conditions)
+        return union_all(messages, titles)
+
+    async def search(
+        self,
+        user_id: str,
+        query: str,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        conversation_id: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Return one page of hits, best first, and the cursor for the next page."""
+        search_text = (query or "").strip()
+        if not search_text:
+            return [], None
+
+        mode = await search_mode(self.db)
+        if mode == "fts5":
+            fts_query = build_fts_query(search_text)
+            if fts_query is None:
+                return [], None
+            matches = self._fts5_matches(fts_query, user_id, conversation_id).subquery("matches")
+        elif mode == "tsvector":
+            matches = self._tsvector_matches(search_text, user_id, conversation_id).subquery("matches")
+        else:
+            matches = self._like_matches(search_text, user_id, conversation_id).subquery("matches")
+
+        stmt = (
+            select(
+                matches.c.conversation_id,
+                matches.c.message_id,
+                matches.c.key,
+                matches.c.rank,
+                matches.c.snippet,
+                Conversation.title,
+                Message.sender,
+                func.coalesce(Message.created_at, Conversation.created_at).label("created_at"),
+            )
+            .join(Conversation, Conversation.id == matches.c.conversation_id)
+            .outerjoin(Message, Message.id == matches.c.message_id)
+        )
+        if cursor:
+            after_rank, after_key = decode_search_cursor(cursor)
+            stmt = stmt.where(
+                or_(
+                    matches.c.rank > after_rank,
+                    and_(matches.c.rank == after_rank, matches.c.key > after_key),
+                )
+            )
+        stmt = stmt.order_by(matches.c.rank, matches.c.key).limit(limit + 1)
+
+        rows = (await self.db.execute(stmt)).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        hits = []
+        for row in rows:
+            snippet = row.snippet if mode != "like" else _like_snippet(row.snippet, search_text.lower())
+            hits.append(
+                {
+                    "conversation_id": row.conversation_id,
+                    "conversation_title": row.title,
+                    "message_id": row.message_id,
+                    "sender": row.sender,
+                    "snippet": render_snippet(snippet),
+                    "rank": float(row.rank),
+                    "created_at": row.created_at,
+                }
+            )
+        next_cursor = encode_search_cursor(float(rows[-1].rank), rows[-1].key) if has_more else None
+        return hits, next_cursor
+
+
+async def backfill_conversation_search(
+    session_factory: Callable[[], Any],
+    after_id: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    check_cancel: Optional[Callable[[], Awaitable[None]]] = None,
+    on_batch: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+) -> Dict[str, Any]:
+    """(Re)index conversations in id order, one transaction per batch.
+
+    Each batch drops and rebuilds the documents of its conversations, so the
+    job can be resumed from ``after_id`` or re-run at any time.
+    """
+    batch_size = max(1, batch_size or settings.CONVERSATION_SEARCH_BACKFILL_BATCH_SIZE)
+    report: Dict[str, Any] = {"conversations": 0, "messages": 0, "batches": 0, "last_id": after_id}
+
+    async with session_factory() as db:
+        if await search_mode(db) != "fts5":
+            report["skipped"] = True
+            return report
+        total = (await db.execute(select(func.count()).select_from(Conversation))).scalar() or 0
+    report["total"] = total
+
+    ids_param = bindparam("ids", expanding=True)
+    statements = [
+        text(
+            "DELETE FROM conversation_search WHERE rowid IN "
+            "(SELECT id FROM conversation_search_docs WHERE conversation_id IN :ids)"
+        ).bindparams(ids_param),
+        text("DELETE FROM conversation_search_docs WHERE conversation_id IN :ids").bindparams(ids_param),
+        text(
+            "INSERT INTO conversation_search_docs (conversation_id, message_id, user_id, created_at) "
+            "SELECT id, NULL, user_id, created_at FROM conversations WHERE id IN :ids"
+        ).bindparams(ids_param),
+        text(
+            "INSERT INTO conversation_search_docs (conversation_id, message_id, user_id, created_at) "
+            "SELECT m.conversation_id, m.id, c.user_id, m.created_at "
+            "FROM messages m JOIN conversations c ON c.id = m.conversation_id WHERE c.id IN :ids"
+        ).bindparams(ids_param),
+        text(
+            "INSERT INTO conversation_search (rowid, title, body) "
+            "SELECT d.id, coalesce(c.title, ''), '' FROM conversation_search_docs d "
+            "JOIN conversations c ON c.id = d.conversation_id "
+            "WHERE d.message_id IS NULL AND d.conversation_id IN :ids"
+        ).bindparams(ids_param),
+        text(
+            "INSERT INTO conversation_search (rowid, title, body) "
+            "SELECT d.id, '', m.message FROM conversation_search_docs d "
+            "JOIN messages m ON m.id = d.message_id WHERE d.conversation_id IN :ids"
+        ).bindparams(ids_param),
+    ]
+
+    while True:
+        if check_cancel is not None:
+            await check_cancel()
+        async with session_factory() as db:
+            query = select(Conversation.id).order_by(Conversation.id).limit(batch_size)
+            if report["last_id"] is not None:
+                query = query.where(Conversation.id > report["last_id"])
+            ids = list((await db.execute(query)).scalars().all())
+            if not ids:
+                break
+            for statement in statements:
+                await db.execute(statement, {"ids": ids})
+            message_count = (
+                await db.execute(select(func.count()).select_from(Message).where(Message.conversation_id.in_(ids)))
+            ).scalar() or 0
+            await db.commit()
+
+        report["conversations"] += len(ids)
+        report["messages"] += message_count
+        report["batches"] += 1
+        report["last_id"] = ids[-1]
+        if on_batch is not None:
+            await on_batch(report)
+    return report
+
+
+def _backfill_generation(idempotency_key: str) -> int:
+    _, _, suffix = idempotency_key.partition(":")
+    return int(suffix) if suffix.isdigit() else 0
+
+
+def _backfill_idempotency_key(generation: int) -> str:
+    if generation == 0:
+        return CONVERSATION_SEARCH_BACKFILL_IDEMPOTENCY_KEY
+    return f"{CONVERSATION_SEARCH_BACKFILL_IDEMPOTENCY_KEY}:{generation}"
+
+
+async def _next_backfill(job_manager: Any, user_id: str) -> Tuple[str, Optional[str]]:
+    """Idempotency key for the next backfill and the cursor to resume from.
+
+    Each backfill run gets its own generation of the key. An unfinished job
+    (queued, running, failed or cancelled) keeps its key, so it is returned
+    or requeued from the ``last_id`` it reached; once the latest job has
+    completed, the next generation starts a fresh pass.
+    """
+    from app.models.job import Job, JobStatus
+
+    async with job_manager.session() as session:
+        jobs = (
+            await session.execute(
+                select(Job.id, Job.idempotency_key, Job.status).where(
+                    Job.idempotency_key.like(f"{CONVERSATION_SEARCH_BACKFILL_IDEMPOTENCY_KEY}%"),
+                    Job.user_id == user_id,
+                    Job.job_type == CONVERSATION_SEARCH_BACKFILL_JOB_TYPE,
+                )
+            )
+        ).all()
+    if not jobs:
+        return _backfill_idempotency_key(0), None
+    latest = max(jobs, key=lambda job: _backfill_generation(job.idempotency_key))
+    generation = _backfill_generation(latest.idempotency_key)
+    if latest.status == JobStatus.COMPLETED.value:
+        return _backfill_idempotency_key(generation + 1), None
+    if latest.status not in (JobStatus.FAILED.value, JobStatus.CANCELED.value):
+        return latest.idempotency_key, None
+    for event in reversed(await job_manager.get_progress_events(latest.id)):
+        last_id = (event.data or {}).get("last_id")
+        if last_id:
+            return latest.idempotency_key, str(last_id)
+    return latest.idempotency_key, None
+
+
+async def enqueue_conversation_search_backfill(user_id: str) -> Optional[str]:
+    """Queue a backfill job owned by ``user_id``.
+
+    While a backfill is queued or running, this returns it. A failed or
+    cancelled job is requeued from the last conversation it indexed rather
+    than from the start, and after a completed one (e.g. conversations were
+    restored or imported since) a new job runs.
+    """
+    from app.core.job_manager_provider import get_job_manager
+
+    try:
+        job_manager = await get_job_manager()
+        idempotency_key, after_id = await _next_backfill(job_manager, user_id)
+        payload: Dict[str, Any] = {"user_id": user_id}
+        if after_id:
+            payload["after_id"] = after_id
+        job, _ = await job_manager.enqueue_job(
+            job_type=CONVERSATION_SEARCH_BACKFILL_JOB_TYPE,
+            payload=payload,
+            user_id=user_id,
+            idempotency_key=idempotency_key,
+            max_retries=0,
+        )
+        return job.id
+    except Exception as e:
+        logger.warning("Could not schedule conversation search backfill: %s", e)
+        return None
+
+
+async def schedule_conversation_search_backfill_on_startup(session_factory: Callable[[], Any]) -> None:
+    """Queue a backfill when some conversations are not in the search index yet."""
+    from app.core.job_manager_provider import get_system_job_owner_id
+
+    try:
+        async with session_factory() as db:
+            if await search_mode(db) != "fts5":
+                return
+            conversations = (await db.execute(select(func.count()).select_from(Conversation))).scalar() or 0
+            indexed = (
+                await db.execute(
+                    select(func.count())
+                    .select_from(search_docs_table)
+                    .where(search_docs_table.c.message_id.is_(None))
+                )
+            ).scalar() or 0
+    except Exception as e:
+        logger.warning("Could not check the conversation search index: %s", e)
+        return
+    if indexed >= conversations:
+        return
+    owner_id = await get_system_job_owner_id(session_factory)
+    if owner_id is None:
+        logger.info("No admin user yet; conversation search backfill will run on a later startup")
+        return
+    logger.info("Conversation search index covers %s of %s conversations; queuing backfill", indexed, conversations)
+    await enqueue_conversation_search_backfill(owner_id)
@@ -0,0 +1,338 @@
+"""
+Diagnostics snapshot for the admin diagnostics endpoint.
+
+The endpoint used to spawn ``git rev-parse`` on the event loop, re-read
+``package.json``, query the database and read the whole log file on every
+request, and monitoring polls it. Facts are now gathered in two tiers:
+
+- build facts (commit, app version, Python and key package versions) never
+  change while the process runs and are collected once, off the event loop;
+- runtime facts (database version and migration, database and WAL file
+  sizes, connection pool, job queue depth, plugin service health, log tail)
+  are refreshed every ``DIAGNOSTICS_SAMPLE_INTERVAL_SECONDS`` by a background
+  task into a snapshot the endpoint returns as is.
+
+The per-user plugin summary is cached for one sampling interval per user.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+from sqlalchemy import func, select, text
+from sqlalchemy.engine.url import make_url
+
+from app.core.config import settings
+from app.core.database import db_factory
+
+logger = logging.getLogger(__name__)
+
+_REPORTED_PACKAGES = ("fastapi", "sqlalchemy", "pydantic", "uvicorn", "alembic", "aiosqlite")
+_ACTIVE_JOB_STATES = ("queued", "running", "waiting")
+_LOG_TAIL_LINES = 80
+_LOG_TAIL_BYTES = 64 * 1024
+_HEALTHCHECK_TIMEOUT_SECONDS = 2.0
+
+
+def _get_repo_path() -> Path:
+    """Best-effort resolve of the repo root for git/version lookups."""
+    # services -> app -> backend
+    return Path(__file__).resolve().parents[2]
+
+
+def _get_commit_hash() -> Optional[str]:
+    """Return the current git commit hash if available."""
+    try:
+        result = subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=_get_repo_path(), stderr=subprocess.DEVNULL, timeout=5
+        )
+        return result.decode().strip()
+    except Exception:
+        return None
+
+
+def _get_package_version() -> Optional[str]:
+    """Return version from package.json (shared app version), if present."""
+    try:
+        package_path = _get_repo_path().parent / "package.json"
+        if package_path.exists():
+            return json.loads(package_path.read_text()).get("version")
+    except Exception:
+        return None
+    return None
+
+
+def collect_build_info() -> Dict[str, Any]:
+    """Facts fixed for the life of the process (blocking; run it in a thread)."""
+    packages: Dict[str, Optional[str]] = {}
+    for name in _REPORTED_PACKAGES:
+        try:
+            packages[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            packages[name] = None
+    return {
+        "version": _get_package_version(),
+        "commit": _get_commit_hash(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "packages": packages,
+    }
+
+
+def _sqlite_path() -> Optional[Path]:
+    if settings.DATABASE_TYPE.lower() != "sqlite":
+        return None
+    database = make_url(settings.DATABASE_URL).database
+    if not database or database == ":memory:":
+        return None
+    return Path(database).resolve()
+
+
+def _file_sizes() -> Dict[str, Any]:
+    path = _sqlite_path()
+    if path is None:
+        return {}
+    sizes: Dict[str, Any] = {"path": str(path)}
+    for key, candidate in (("size_bytes", path), ("wal_size_bytes", Path(f"{path}-wal"))):
+        try:
+            sizes[key] = candidate.stat().st_size
+        except OSError:
+            sizes[key] = None
+    return sizes
+
+
+def _read_log_tail(limit: int = _LOG_TAIL_LINES) -> Dict[str, Any]:
+    """Return the last lines of the first log file found, reading only its end."""
+    candidates = [
+        _get_repo_path() / "logs" / "app.log",
+        _get_repo_path() / "backend.log",
+    ]
+
+    for path in candidates:
+        if path.exists():
+            try:
+                with path.open("rb") as handle:
+                    handle.seek(0, os.SEEK_END)
+                    handle.seek(max(0, handle.tell() - _LOG_TAIL_BYTES))
+                    lines = handle.read().decode("utf-8", errors="ignore").splitlines()
+                return {"path": str(path), "lines": lines[-limit:]}
+            except Exception as exc:  # pragma: no cover - defensive
+                return {"path": str(path), "error": str(exc)}
+
+    return {"message": "No log file found", "lines": []}
+
+
+def _pool_stats() -> Dict[str, Any]:
+    engine = db_factory.engine
+    if engine is None:
+        return {}
+    pool = engine.sync_engine.pool
+    stats: Dict[str, Any] = {"class": type(pool).__name__, "status": pool.status()}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    return stats
+
+
+class DiagnosticsSampler:
+    """Keeps the latest diagnostics snapshot, refreshed by a background task."""
+
+    def __init__(self, interval_seconds: Optional[float] = None) -> None:
+        self.interval_seconds = (
+            settings.DIAGNOSTICS_SAMPLE_INTERVAL_SECONDS if interval_seconds is None else interval_seconds
+        )
+        self.build_info: Optional[Dict[str, Any]] = None
+        self.sample_count = 0
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._sampled_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._plugin_summaries: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+    def start(self) -> None:
+        """Start sampling on the running loop (no-op if running or disabled)."""
+        if self.interval_seconds <= 0 or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sample()
+            except Exception as e:
+                logger.warning("Diagnostics sampling failed: %s", e)
+            await asyncio.sleep(self.interval_seconds)
+
+    async def snapshot(self) -> Dict[str, Any]:
+        """Latest snapshot; sampled on demand when there is none yet or no sampler is running."""
+        running = self._task is not None and not self._task.done()
+        max_age = max(self.interval_seconds, 1.0)
+        if self._snapshot is None or (not running and time.monotonic() - self._sampled_at >= max_age):
+            await self.sample()
+        return {**self._snapshot, "age_seconds": round(time.monotonic() - self._sampled_at, 3)}
+
+    async def sample(self) -> Dict[str, Any]:
+        async with self._lock:
+            if self.build_info is None:
+                self.build_info = await asyncio.to_thread(collect_build_info)
+            database, services, files, logs = await asyncio.gather(
+                self._database_facts(),
+                self._plugin_service_health(),
+                asyncio.to_thread(_file_sizes),
+                asyncio.to_thread(_read_log_tail),
+            )
+            database.update(files)
+            database["pool"] = _pool_stats()
+            self._snapshot = {
+                "sampled_at": datetime.now(timezone.utc).isoformat(),
+                "db": database,
+                "plugin_services": services,
+                "logs": logs,
+            }
+            self._sampled_at = time.monotonic()
+            self.sample_count += 1
+            return self._snapshot
+
+    async def _database_facts(self) -> Dict[str, Any]:
+        from app.models.job import Job
+
+        info: Dict[str, Any] = {"type": settings.DATABASE_TYPE}
+        async with db_factory.session_factory() as db:
+            try:
+                query = "select sqlite_version()" if settings.DATABASE_TYPE.lower() == "sqlite" else "select version()"
+                info["version"] = (await db.execute(text(query))).scalar_one_or_none()
+            except Exception as exc:  # pragma: no cover - defensive
+                info["version_error"] = str(exc)
+
+            try:
+                result = await db.execute(
+                    text("select version_num from alembic_version order by version_num desc limit 1")
+                )
+                info["migration_version"] = result.scalar_one_or_none()
+            except Exception as exc:  # pragma: no cover - defensive
+                info["migration_error"] = str(exc)
+
+            try:
+                result = await db.execute(
+                    select(Job.status, func.count()).where(Job.status.in_(_ACTIVE_JOB_STATES)).group_by(Job.status)
+                )
+                depth = {state: 0 for state in _ACTIVE_JOB_STATES}
+                depth.update({status: count for status, count in result.all()})
+                info["job_queue"] = depth
+            except Exception as exc:  # pragma: no cover - defensive
+                info["job_queue_error"] = str(exc)
+        return info
+
+    async def _plugin_service_health(self) -> Dict[str, Any]:
+        from app.models.plugin import PluginServiceRuntime
+
+        summary: Dict[str, Any] = {"count": 0, "by_status": {}, "items": []}
+        try:
+            async with db_factory.session_factory() as db:
+                result = await db.execute(
+                    select(
+                        PluginServiceRuntime.plugin_slug,
+                        PluginServiceRuntime.name,
+                        PluginServiceRuntime.status,
+                        PluginServiceRuntime.healthcheck_url,
+                    )
+                )
+                runtimes = result.all()
+        except Exception as exc:  # pragma: no cover - defensive
+            summary["error"] = str(exc)
+            return summary
+
+        # Services are shared by every user who installed the plugin; probe each URL once.
+        urls = sorted({row.healthcheck_url for row in runtimes if row.healthcheck_url})
+        healthy: Dict[str, bool] = {}
+        if urls:
+            timeout = aiohttp.ClientTimeout(total=_HEALTHCHECK_TIMEOUT_SECONDS)
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                results = await asyncio.gather(*(self._probe(session, url) for url in urls))
+            healthy = dict(zip(urls, results))
+
+        seen = set()
+        for row in runtimes:
+            key = (row.plugin_slug, row.name)
+            if key in seen:
+                continue
+            seen.add(key)
+            summary["by_status"][row.status] = summary["by_status"].get(row.status, 0) + 1
+            summary["items"].append(
+                {
+                    "plugin": row.plugin_slug,
+                    "name": row.name,
+                    "status": row.status,
+                    "healthy": healthy.get(row.healthcheck_url) if row.healthcheck_url else None,
+                }
+            )
+        summary["count"] = len(summary["items"])
+        return summary
+
+    @staticmethod
+    async def _probe(session: aiohttp.ClientSession, url: str) -> bool:
+        try:
+            async with session.get(url) as response:
+                return response.status == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            return False
+
+    async def plugin_summary(self, user_id: str) -> Dict[str, Any]:
+        """Summarize plugins/modules for ``user_id``, cached for one sampling interval."""
+        cached = self._plugin_summaries.get(user_id)
+        max_age = self.interval_seconds if self.interval_seconds > 0 else 0
+        if cached is not None and time.monotonic() - cached[0] < max_age:
+            return cached[1]
+
+        from app.routers.plugins import plugin_manager
+
+        summary: Dict[str, Any] = {"count": 0, "modules": 0, "items": []}
+        try:
+            if not plugin_manager._initialized:
+                await plugin_manager.initialize()
+
+            plugins = await plugin_manager.get_all_plugins_for_designer(user_id=user_id)
+            for plugin_id, plugin_data in plugins.items():
+                modules = plugin_data.get("modules") or []
+                summary["items"].append(
+                    {
+                        "id": plugin_data.get("plugin_slug") or plugin_id,
+                        "version": plugin_data.get("version"),
+                        "module_count": len(modules),
+                        "bundlelocation": plugin_data.get("bundlelocation") or plugin_data.get("bundle_location"),
+                        "enabled": plugin_data.get("enabled", True),
+                    }
+                )
+                summary["modules"] += len(modules)
+
+            summary["count"] = len(summary["items"])
+        except Exception as exc:  # pragma: no cover - defensive
+            summary["error"] = str(exc)
+            return summary
+
+        self._plugin_summaries[user_id] = (time.monotonic(), summary)
+        return summary
+
+
+# Global singleton instance
+diagnostics_sampler = DiagnosticsSampler()
@@ -0,0 +1,349 @@
+"""
+Durable, asynchronous delivery of digest handoffs to a webhook.
+
+Chat completion used to POST each digest handoff inline, so a slow or failing
+webhook held up the user's response. Handoffs are now written to the
+``digest_delivery_outbox`` table in the same transaction as the assistant
+message (``queue_digest_delivery``) and the chat request only enqueues a
+``DIGEST_DELIVERY_DISPATCH_JOB_TYPE`` job.
+
+The dispatch job claims due rows, groups them by endpoint and POSTs them over
+one pooled ``httpx.AsyncClient`` (bounded per endpoint). Retryable failures
+are rescheduled with exponential backoff up to ``DIGEST_DELIVERY_MAX_ATTEMPTS``;
+every outcome, including the webhook's ack id, is written back onto the
+message's ``mcp`` metadata.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.digest_delivery import DigestDeliveryOutbox, DigestDeliveryStatus
+from app.models.message import Message
+
+logger = logging.getLogger(__name__)
+
+DIGEST_DELIVERY_DISPATCH_JOB_TYPE = "ai.digest_delivery.dispatch"
+DIGEST_DELIVERY_MAX_ERROR_CHARS = 1_200
+# Claims older than this belong to a dispatcher that died mid-send.
+DIGEST_DELIVERY_CLAIM_TIMEOUT_SECONDS = 300
+
+_ACK_ID_KEYS = ("ack_id", "ackId", "delivery_id", "deliveryId", "message_id", "messageId", "id")
+_RETRYABLE_HTTP_STATUSES = {408, 425, 429}
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands timezone-aware columns back as naive UTC datetimes.
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _endpoint_key(endpoint: str) -> str:
+    return hashlib.sha256(endpoint.encode("utf-8")).hexdigest()
+
+
+def resolve_delivery_target(send_config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Decide whether a handoff will be sent; returns ``status`` and, when queued, ``target``."""
+    if not isinstance(send_config, dict):
+        return {"status": "skipped_unconfigured"}
+    endpoint = str(send_config.get("endpoint") or "").strip()
+    endpoint_sanitized = send_config.get("endpoint_sanitized")
+    if not send_config.get("enabled"):
+        return {"status": "skipped_disabled", "endpoint": endpoint_sanitized}
+    if not endpoint:
+        return {"status": "skipped_unconfigured_endpoint", "endpoint": endpoint_sanitized}
+
+    headers = send_config.get("headers") if isinstance(send_config.get("headers"), dict) else {}
+    return {
+        "status": "queued",
+        "endpoint": endpoint_sanitized,
+        "target": {
+            "endpoint": endpoint,
+            "headers": {str(k): str(v) for k, v in headers.items() if str(k).strip()},
+            "timeout_seconds": float(send_config.get("timeout_seconds") or 8.0),
+        },
+    }
+
+
+def queue_digest_delivery(
+    db: AsyncSession,
+    *,
+    outbox_id: str,
+    user_id: str,
+    message_id: Optional[str],
+    handoff_payload: Dict[str, Any],
+    target: Dict[str, Any],
+    endpoint_sanitized: Optional[str] = None,
+) -> DigestDeliveryOutbox:
+    """Add an outbox row to ``db``; it is committed with the caller's message."""
+    entry = DigestDeliveryOutbox(
+        id=outbox_id,
+        user_id=user_id,
+        message_id=message_id,
+        conversation_id=handoff_payload.get("conversation_id"),
+        channel=str(handoff_payload.get("channel") or "")[:32],
+        target=target,
+        endpoint_key=_endpoint_key(target["endpoint"]),
+        endpoint_sanitized=endpoint_sanitized,
+        payload=handoff_payload,
+        status=DigestDeliveryStatus.PENDING,
+        attempts=0,
+        max_attempts=max(settings.DIGEST_DELIVERY_MAX_ATTEMPTS, 1),
+        next_attempt_at=_utcnow(),
+    )
+    db.add(entry)
+    return entry
+
+
+async def enqueue_digest_delivery_dispatch(user_id: str, scheduled_for: Optional[datetime] = None) -> None:
+    """Queue a dispatch job for ``user_id``; retries are deduplicated per due second."""
+    from app.core.job_manager_provider import get_job_manager
+
+    idempotency_key = None
+    if scheduled_for is not None:
+        idempotency_key = f"digest-delivery:{user_id}:{int(scheduled_for.timestamp())}"
+    try:
+        job_manager = await get_job_manager()
+        await job_manager.enqueue_job(
+            job_type=DIGEST_DELIVERY_DISPATCH_JOB_TYPE,
+            payload={"user_id": user_id},
+            user_id=user_id,
+            scheduled_for=scheduled_for,
+            idempotency_key=idempotency_key,
+            max_retries=0,
+        )
+    except Exception as e:
+        logger.warning("Could not schedule digest delivery dispatch for %s: %s", user_id, e)
+
+
+def _parse_response(response: httpx.Response) -> Dict[str, Any]:
+    status_code = response.status_code
+    result: Dict[str, Any] = {
+        "status": "sent" if 200 <= status_code < 300 else "http_error",
+        "http_status": status_code,
+    }
+    raw_body = response.text.strip()
+    if not raw_body:
+        return result
+    try:
+        parsed = json.loads(raw_body)
+    except Exception:
+        parsed = None
+    if isinstance(parsed, dict):
+        for key in _ACK_ID_KEYS:
+            value = parsed.get(key)
+            if isinstance(value, str) and value.strip():
+                result["ack_id"] = value.strip()
+                break
+    if result["status"] != "sent":
+        result["error"] = raw_body[:DIGEST_DELIVERY_MAX_ERROR_CHARS]
+    return result
+
+
+def _is_retryable(result: Dict[str, Any]) -> bool:
+    if result["status"] in {"network_error", "error"}:
+        return True
+    http_status = result.get("http_status") or 0
+    return http_status >= 500 or http_status in _RETRYABLE_HTTP_STATUSES
+
+
+def _backoff_seconds(attempts: int) -> float:
+    base = max(settings.DIGEST_DELIVERY_RETRY_BASE_SECONDS, 1.0)
+    delay = min(base * (2 ** max(attempts - 1, 0)), settings.DIGEST_DELIVERY_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+class DigestDeliveryDispatcher:
+    """Sends a user's due outbox rows and records the outcome."""
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None) -> None:
+        self._client = client
+
+    async def _post(self, client: httpx.AsyncClient, entry: DigestDeliveryOutbox) -> Dict[str, Any]:
+        target = entry.target or {}
+        try:
+            response = await client.post(
+                target["endpoint"],
+                content=json.dumps(entry.payload, ensure_ascii=True).encode("utf-8"),
+                headers=target.get("headers") or {},
+                timeout=float(target.get("timeout_seconds") or 8.0),
+            )
+            return _parse_response(response)
+        except httpx.TransportError as exc:
+            return {"status": "network_error", "error": str(exc) or type(exc).__name__}
+        except Exception as exc:
+            return {"status": "error", "error": str(exc)}
+
+    async def _send_endpoint_group(
+        self, client: httpx.AsyncClient, entries: List[DigestDeliveryOutbox]
+    ) -> List[Dict[str, Any]]:
+        semaphore = asyncio.Semaphore(max(settings.DIGEST_DELIVERY_ENDPOINT_CONCURRENCY, 1))
+
+        async def send(entry: DigestDeliveryOutbox) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._post(client, entry)
+
+        return await asyncio.gather(*[send(entry) for entry in entries])
+
+    async def _claim_due(self, session: AsyncSession, user_id: str) -> List[DigestDeliveryOutbox]:
+        now = _utcnow()
+        result = await session.execute(
+            select(DigestDeliveryOutbox.id)
+            .where(
+                DigestDeliveryOutbox.user_id == user_id,
+                DigestDeliveryOutbox.status == DigestDeliveryStatus.PENDING,
+                DigestDeliveryOutbox.next_attempt_at <= now,
+            )
+            .order_by(DigestDeliveryOutbox.next_attempt_at)
+            .limit(max(settings.DIGEST_DELIVERY_BATCH_SIZE, 1))
+        )
+        ids = list(result.scalars().all())
+        if not ids:
+            return []
+
+        # Conditional update so a concurrent dispatcher cannot claim the same rows.
+        await session.execute(
+            update(DigestDeliveryOutbox)
+            .where(
+                DigestDeliveryOutbox.id.in_(ids),
+                DigestDeliveryOutbox.status == DigestDeliveryStatus.PENDING,
+            )
+            .values(status=DigestDeliveryStatus.SENDING, claimed_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        result = await session.execute(
+            select(DigestDeliveryOutbox).where(
+                DigestDeliveryOutbox.id.in_(ids),
+                DigestDeliveryOutbox.status == DigestDeliveryStatus.SENDING,
+                DigestDeliveryOutbox.claimed_at == now,
+            )
+        )
+        return list(result.scalars().all())
+
+    async def _release_stale_claims(self, session: AsyncSession, user_id: str) -> None:
+        cutoff = _utcnow() - timedelta(seconds=DIGEST_DELIVERY_CLAIM_TIMEOUT_SECONDS)
+        await session.execute(
+            update(DigestDeliveryOutbox)
+            .where(
+                DigestDeliveryOutbox.user_id == user_id,
+                DigestDeliveryOutbox.status == DigestDeliveryStatus.SENDING,
+                DigestDeliveryOutbox.claimed_at < cutoff,
+            )
+            .values(status=DigestDeliveryStatus.PENDING, claimed_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+
+    def _apply_result(self, entry: DigestDeliveryOutbox, result: Dict[str, Any]) -> str:
+        now = _utcnow()
+        entry.attempts = (entry.attempts or 0) + 1
+        entry.claimed_at = None
+        entry.last_http_status = result.get("http_status")
+        entry.last_error = result.get("error")
+        if result.get("ack_id"):
+            entry.ack_id = result["ack_id"]
+
+        if result["status"] == "sent":
+            entry.status = DigestDeliveryStatus.SENT
+            entry.sent_at = now
+            return "sent"
+        if _is_retryable(result) and entry.attempts < (entry.max_attempts or 1):
+            entry.status = DigestDeliveryStatus.PENDING
+            entry.next_attempt_at = now + timedelta(seconds=_backoff_seconds(entry.attempts))
+            return "retry_scheduled"
+        entry.status = DigestDeliveryStatus.FAILED
+        return result["status"]
+
+    async def _record_on_message(
+        self,
+        session: AsyncSession,
+        entry: DigestDeliveryOutbox,
+        send_status: str,
+        result: Dict[str, Any],
+    ) -> None:
+        if not entry.message_id:
+            return
+        message = await session.get(Message, entry.message_id)
+        if message is None:
+            return
+
+        fields: Dict[str, Any] = {
+            "send_status": send_status,
+            "send_endpoint": entry.endpoint_sanitized,
+            "send_http_status": result.get("http_status"),
+            "send_ack_id": entry.ack_id,
+            "send_error": result.get("error"),
+            "send_attempts": entry.attempts,
+            "send_next_attempt_at": (
+                _as_utc(entry.next_attempt_at).isoformat() if send_status == "retry_scheduled" else None
+            ),
+        }
+        metadata = dict(message.message_metadata or {})
+        mcp = dict(metadata.get("mcp") or {})
+        handoff = dict(mcp.get("digest_delivery_handoff") or {})
+        for key, value in fields.items():
+            for target, name in ((handoff, f"delivery_{key}"), (mcp, f"digest_delivery_{key}")):
+                if value is None:
+                    target.pop(name, None)
+                else:
+                    target[name] = value
+        mcp["digest_delivery_handoff"] = handoff
+        metadata["mcp"] = mcp
+        # Reassign so the JSON column is flagged dirty.
+        message.message_metadata = metadata
+
+    async def dispatch_user(self, session: AsyncSession, user_id: str) -> Dict[str, Any]:
+        """Send everything due for ``user_id``; returns counts and the next due time."""
+        await self._release_stale_claims(session, user_id)
+
+        counts: Dict[str, int] = defaultdict(int)
+        client = self._client or httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=max(settings.DIGEST_DELIVERY_ENDPOINT_CONCURRENCY, 1))
+        )
+        try:
+            while True:
+                entries = await self._claim_due(session, user_id)
+                if not entries:
+                    break
+                groups: Dict[str, List[DigestDeliveryOutbox]] = defaultdict(list)
+                for entry in entries:
+                    groups[entry.endpoint_key].append(entry)
+                group_results = await asyncio.gather(
+                    *[self._send_endpoint_group(client, group) for group in groups.values()]
+                )
+                for group, results in zip(groups.values(), group_results):
+                    for entry, result in zip(group, results):
+                        send_status = self._apply_result(entry, result)
+                        counts[send_status] += 1
+                        await self._record_on_message(session, entry, send_status, result)
+                await session.commit()
+        finally:
+            if self._client is None:
+                await client.aclose()
+
+        next_due = await session.scalar(
+            select(func.min(DigestDeliveryOutbox.next_attempt_at)).where(
+                DigestDeliveryOutbox.user_id == user_id,
+                DigestDeliveryOutbox.status == DigestDeliveryStatus.PENDING,
+            )
+        )
+        return {
+            "counts": dict(counts),
+            "next_attempt_at": _as_utc(next_due) if next_due is not None else None,
+        }
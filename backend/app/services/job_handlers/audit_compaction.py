@@ -0,0 +1,44 @@
+import logging
+from typing import Any, Dict
+
+from app.core.config import settings
+from app.services.audit_storage import (
+    AUDIT_COMPACTION_JOB_TYPE,
+    compact_audit_logs,
+    enqueue_audit_compaction,
+)
+from app.services.job_manager import BaseJobHandler, JobExecutionContext
+
+
+class AuditCompactionHandler(BaseJobHandler):
+    """Job handler that archives expired audit events and prunes old archives."""
+
+    job_type = AUDIT_COMPACTION_JOB_TYPE
+    display_name = "Audit Log Compaction"
+    description = "Move expired audit events to monthly archives and apply audit retention."
+    required_permissions = ["admin"]
+    logger = logging.getLogger(__name__)
+
+    async def validate_payload(self, payload: Dict[str, Any]) -> None:
+        if not payload.get("user_id"):
+            raise ValueError("user_id is required")
+
+    async def execute(self, context: JobExecutionContext) -> Dict[str, Any]:
+        user_id: str = context.payload["user_id"]
+
+        await context.report_progress(percent=0, stage="compacting", message="Compacting audit log")
+        try:
+            result = await compact_audit_logs(context.session, check_cancel=context.check_for_cancel)
+        finally:
+            # Jobs are not retried, so the next run is queued even when this one fails.
+            interval_hours = settings.AUDIT_COMPACTION_INTERVAL_HOURS
+            if interval_hours > 0:
+                await enqueue_audit_compaction(user_id, delay_seconds=interval_hours * 3600)
+
+        await context.report_progress(
+            percent=100,
+            stage="completed",
+            message=f"Moved {result['moved']} audit events out of the hot table",
+            data=result,
+        )
+        return result
@@ -0,0 +1,49 @@
+import logging
+from typing import Any, Dict
+
+from app.services.conversation_search import (
+    CONVERSATION_SEARCH_BACKFILL_JOB_TYPE,
+    backfill_conversation_search,
+)
+from app.services.job_manager import BaseJobHandler, JobExecutionContext
+
+
+class ConversationSearchBackfillHandler(BaseJobHandler):
+    """Job handler that indexes existing conversation history for search."""
+
+    job_type = CONVERSATION_SEARCH_BACKFILL_JOB_TYPE
+    display_name = "Conversation Search Backfill"
+    description = "Index existing conversations and messages for full-text search in batches."
+    required_permissions = ["admin"]
+    logger = logging.getLogger(__name__)
+
+    async def validate_payload(self, payload: Dict[str, Any]) -> None:
+        if not payload.get("user_id"):
+            raise ValueError("user_id is required")
+
+    async def execute(self, context: JobExecutionContext) -> Dict[str, Any]:
+        await context.report_progress(percent=0, stage="indexing", message="Indexing conversation history")
+
+        async def on_batch(report: Dict[str, Any]) -> None:
+            total = report.get("total") or 0
+            percent = min(99, int(report["conversations"] * 100 / total)) if total else 99
+            await context.report_progress(
+                percent=percent,
+                stage="indexing",
+                message=f"Indexed {report['conversations']} of {total} conversations",
+                data={"last_id": report["last_id"]},
+            )
+
+        result = await backfill_conversation_search(
+            context.session,
+            after_id=context.payload.get("after_id"),
+            check_cancel=context.check_for_cancel,
+            on_batch=on_batch,
+        )
+        message = (
+            "Search index not available; nothing to do"
+            if result.get("skipped")
+            else f"Indexed {result['conversations']} conversations and {result['messages']} messages"
+        )
+        await context.report_progress(percent=100, stage="completed", message=message, data=result)
+        return result
@@ -0,0 +1,45 @@
+import logging
+from typing import Any, Dict
+
+from app.services.digest_delivery import (
+    DIGEST_DELIVERY_DISPATCH_JOB_TYPE,
+    DigestDeliveryDispatcher,
+    enqueue_digest_delivery_dispatch,
+)
+from app.services.job_manager import BaseJobHandler, JobExecutionContext
+
+
+class DigestDeliveryDispatchHandler(BaseJobHandler):
+    """Job handler that drains a user's digest delivery outbox."""
+
+    job_type = DIGEST_DELIVERY_DISPATCH_JOB_TYPE
+    display_name = "Digest Delivery"
+    description = "Send queued digest handoffs to the configured delivery webhook."
+    logger = logging.getLogger(__name__)
+
+    async def validate_payload(self, payload: Dict[str, Any]) -> None:
+        if not payload.get("user_id"):
+            raise ValueError("user_id is required")
+
+    async def execute(self, context: JobExecutionContext) -> Dict[str, Any]:
+        user_id: str = context.payload["user_id"]
+
+        await context.report_progress(percent=0, stage="sending", message="Sending digest handoffs")
+        async with context.session() as session:
+            result = await DigestDeliveryDispatcher().dispatch_user(session, user_id)
+
+        next_attempt_at = result["next_attempt_at"]
+        if next_attempt_at is not None:
+            await enqueue_digest_delivery_dispatch(user_id, scheduled_for=next_attempt_at)
+
+        summary = {
+            "counts": result["counts"],
+            "next_attempt_at": next_attempt_at.isoformat() if next_attempt_at else None,
+        }
+        await context.report_progress(
+            percent=100,
+            stage="completed",
+            message=f"Processed {sum(result['counts'].values())} digest handoffs",
+            data=summary,
+        )
+        return summary
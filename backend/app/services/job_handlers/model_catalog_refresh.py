@@ -0,0 +1,47 @@
+import logging
+from typing import Any, Dict
+
+from app.core.config import settings
+from app.services.job_manager import BaseJobHandler, JobExecutionContext
+from app.services.model_catalog import (
+    MODEL_CATALOG_REFRESH_JOB_TYPE,
+    enqueue_model_catalog_refresh,
+    get_model_catalog_service,
+)
+
+
+class ModelCatalogRefreshHandler(BaseJobHandler):
+    """Job handler that refetches a user's model catalog to keep it warm."""
+
+    job_type = MODEL_CATALOG_REFRESH_JOB_TYPE
+    display_name = "Model Catalog Refresh"
+    description = "Refresh cached model lists from all configured AI providers."
+    logger = logging.getLogger(__name__)
+
+    async def validate_payload(self, payload: Dict[str, Any]) -> None:
+        if not payload.get("user_id"):
+            raise ValueError("user_id is required")
+
+    async def execute(self, context: JobExecutionContext) -> Dict[str, Any]:
+        user_id: str = context.payload["user_id"]
+        service = get_model_catalog_service()
+
+        await context.report_progress(percent=0, stage="refreshing", message="Refreshing model catalog")
+        async with context.session() as session:
+            result = await service.refresh_user(session, user_id)
+
+        # Reschedule only while the user keeps using the model picker.
+        rescheduled = service.is_active(user_id)
+        if rescheduled:
+            service.note_refresh_scheduled(user_id)
+            await enqueue_model_catalog_refresh(
+                user_id, delay_seconds=settings.MODEL_CATALOG_REFRESH_INTERVAL_SECONDS
+            )
+
+        await context.report_progress(
+            percent=100,
+            stage="completed",
+            message=f"Loaded {result['total_models']} models",
+            data=result,
+        )
+        return {**result, "rescheduled": rescheduled}
@@ -1,10 +1,11 @@
 import asyncio
 import logging
 import contextlib
+import weakref
 from contextlib import asynccontextmanager
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple
 
 import sqlalchemy as sa
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -30,23 +31,20 @@ def _log_job_audit_background(
     reason: str = None,
     metadata: dict = None
 ):
-    """Schedule audit log write in background for job lifecycle events."""
-    async def _write():
-        try:
-            from app.core.audit import audit_logger, AuditEventType, EventStatus
-            await audit_logger.log_job_event(
-                event_type=AuditEventType(event_type),
-                job_id=job_id,
-                user_id=user_id,
-                job_type=job_type,
-                status=EventStatus(status),
-                reason=reason,
-                metadata=metadata,
-            )
-        except Exception as e:
-            logger.warning(f"Failed to write job audit log: {e}")
-    
-    asyncio.create_task(_write())
+    """Queue an audit event for a job lifecycle change."""
+    try:
+        from app.core.audit import audit_logger, AuditEventType, EventStatus
+        audit_logger.log_job_event(
+            event_type=AuditEventType(event_type),
+            job_id=job_id,
+            user_id=user_id,
+            job_type=job_type,
+            status=EventStatus(status),
+            reason=reason,
+            metadata=metadata,
+        )
+    except Exception as e:
+        logger.warning(f"Failed to queue job audit log: {e}")
 
 
 class JobCanceledError(Exception):
@@ -73,6 +71,10 @@ class BaseJobHandler:
     default_config: Optional[Dict[str, Any]] = None
     payload_schema: Optional[Dict[str, Any]] = None
     required_permissions: Optional[List[str]] = None
+    # Run beside other jobs instead of holding the worker loop until done.
+    runs_concurrently: bool = False
+    # Requeue (rather than fail) jobs a restart interrupted; the handler must pick up where it stopped.
+    resume_after_restart: bool = False
 
     async def validate_payload(self, payload: Dict[str, Any]) -> None:
         """Validate the payload before job creation."""
@@ -169,6 +171,8 @@ class JobManager:
         self._worker_task: Optional[asyncio.Task] = None
         self._stop_event = asyncio.Event()
         self._active_jobs: Dict[str, JobRuntimeState] = {}
+        self._concurrent_tasks: Set[asyncio.Task] = set()
+        self._update_signals: "weakref.WeakValueDictionary[str, asyncio.Event]" = weakref.WeakValueDictionary()
         self._lock = asyncio.Lock()
 
     @asynccontextmanager
@@ -209,9 +213,13 @@ class JobManager:
                 pass
             finally:
                 self._worker_task = None
+            tasks = list(self._concurrent_tasks)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
 
     async def _recover_stale_jobs(self) -> None:
-        """Mark running jobs from previous sessions as failed so they can be retried."""
+        """Requeue resumable running jobs from previous sessions and fail the rest so they can be retried."""
         now = datetime.now(timezone.utc)
         async with self.session() as session:
             result = await session.execute(
@@ -223,6 +231,14 @@ class JobManager:
 
             logger.warning("Recovering %d stale running jobs", len(stale_jobs))
             for job in stale_jobs:
+                handler = self._handlers.get(job.job_type)
+                if handler is not None and handler.resume_after_restart:
+                    job.status = JobStatus.QUEUED.value
+                    job.message = "Resuming after restart"
+                    job.scheduled_for = now
+                    job.started_at = None
+                    job.updated_at = now
+                    continue
                 job.status = JobStatus.FAILED.value
                 job.error_message = job.error_message or "Job interrupted during restart; please retry"
                 job.completed_at = now
@@ -246,6 +262,9 @@ class JobManager:
         await self._persist_job_type_definition(handler)
         logger.info("Registered job handler %s", handler.job_type)
 
+    def get_handler(self, job_type: str) -> Optional[BaseJobHandler]:
+        return self._handlers.get(job_type)
+
     async def _persist_job_type_definition(self, handler: BaseJobHandler) -> None:
         async with self.session() as session:
             existing = await session.get(JobTypeDefinition, handler.job_type)
@@ -458,6 +477,7 @@ class JobManager:
             if job.status == JobStatus.QUEUED.value:
                 job.mark_canceled("Canceled before execution")
                 await session.commit()
+                self._signal_job_update(job_id)
                 return True
 
             if job.status == JobStatus.RUNNING.value:
@@ -570,6 +590,7 @@ class JobManager:
                     )
                     session.add(event)
                     await session.commit()
+                self._signal_job_update(job_id)
                 return
             except sa.exc.OperationalError as exc:
                 message_text = str(exc).lower()
@@ -584,6 +605,22 @@ class JobManager:
                     attempt=attempt,
                 )
 
+    def job_update_signal(self, job_id: str) -> asyncio.Event:
+        """Event set by the next progress event or status change of ``job_id`` in this process.
+
+        Take it before reading the job's state, so an update landing in between still sets it.
+        """
+        signal = self._update_signals.get(job_id)
+        if signal is None:
+            signal = asyncio.Event()
+            self._update_signals[job_id] = signal
+        return signal
+
+    def _signal_job_update(self, job_id: str) -> None:
+        signal = self._update_signals.pop(job_id, None)
+        if signal is not None:
+            signal.set()
+
     async def get_progress_events(self, job_id: str, since: Optional[int] = None) -> List[JobProgressEvent]:
         """Return job progress events optionally filtered by sequence number."""
         async with self.session() as session:
@@ -605,6 +642,12 @@ class JobManager:
                 if not job:
                     await asyncio.sleep(self._poll_interval)
                     continue
+                handler = self._handlers.get(job.job_type)
+                if handler is not None and handler.runs_concurrently:
+                    task = asyncio.create_task(self._execute_job(job), name=f"job-{job.id}")
+                    self._concurrent_tasks.add(task)
+                    task.add_done_callback(self._concurrent_tasks.discard)
+                    continue
                 await self._execute_job(job)
         except asyncio.CancelledError:
             logger.info("Job worker task cancelled")
@@ -769,6 +812,7 @@ class JobManager:
             job.completed_at = now
             job.updated_at = now
             await session.commit()
+            self._signal_job_update(job_id)
             
             # Audit log for job completion
             _log_job_audit_background(
@@ -790,6 +834,7 @@ class JobManager:
             job.completed_at = now
             job.updated_at = now
             await session.commit()
+            self._signal_job_update(job_id)
             
             # Audit log for job failure
             _log_job_audit_background(
@@ -813,6 +858,7 @@ class JobManager:
             if job.message is None:
                 job.message = "Canceled"
             await session.commit()
+            self._signal_job_update(job_id)
             
             # Audit log for job cancellation
             _log_job_audit_background(
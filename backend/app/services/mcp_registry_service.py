@@ -1,13 +1,15 @@
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import json
 import logging
 import os
 import uuid
+from dataclasses import dataclass
 from datetime import datetime, UTC
 from time import perf_counter
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlparse
 
 import httpx
@@ -17,6 +19,7 @@ from sqlalchemy.orm import joinedload
 
 from app.models.mcp import MCPServerRegistry, MCPToolRegistry
 from app.models.plugin import PluginServiceRuntime
+from app.services.scope_context_cache import invalidate_scope_context_for_tool
 
 try:
     from jsonschema import Draft7Validator
@@ -53,6 +56,17 @@ MUTATING_PREFIXES = (
 )
 
 
+@dataclass(frozen=True)
+class PreparedToolCall:
+    """A validated tool call ready to be POSTed to its MCP server."""
+
+    user_id: str
+    tool_name: str
+    arguments: Dict[str, Any]
+    call_url: str
+    headers: Dict[str, str]
+
+
 def _normalize_user_id(user_id: str) -> str:
     return str(user_id).replace("-", "")
 
@@ -177,6 +191,26 @@ def infer_safety_class(
     return "read_only"
 
 
+def has_read_only_evidence(
+    tool_name: str, tool_schema: Optional[Dict[str, Any]] = None
+) -> bool:
+    """Whether the schema or name positively marks the tool read-only.
+
+    Unlike ``infer_safety_class`` this never falls back to read-only for an
+    unrecognised name.
+    """
+    explicit = _extract_explicit_safety_class(tool_schema)
+    if explicit:
+        return explicit == "read_only"
+
+    lowered = (tool_name or "").strip().lower()
+    return (
+        bool(lowered)
+        and not lowered.startswith(MUTATING_PREFIXES)
+        and lowered.startswith(READ_ONLY_PREFIXES)
+    )
+
+
 def compute_tool_hash(tool_schema: Dict[str, Any]) -> str:
     canonical = json.dumps(tool_schema, sort_keys=True, separators=(",", ":"))
     return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
@@ -623,6 +657,65 @@ class MCPRegistryService:
         request_id: Optional[str] = None,
     ) -> Dict[str, Any]:
         tool = await self.get_enabled_tool(user_id, tool_name)
+        async with httpx.AsyncClient(timeout=self.call_timeout_seconds) as client:
+            return await self._invoke_tool(client, tool, user_id, tool_name, arguments, request_id)
+
+    async def execute_tool_calls(
+        self,
+        user_id: str,
+        calls: List[Tuple[str, Dict[str, Any]]],
+        request_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Execute several tool calls concurrently over one HTTP client.
+
+        Tool rows are looked up first, one at a time, because they share this
+        service's database session; only the HTTP calls overlap. Results are
+        returned in call order with the same shape as ``execute_tool_call``.
+        """
+        tools: Dict[str, Optional[MCPToolRegistry]] = {}
+        for tool_name, _ in calls:
+            if tool_name not in tools:
+                tools[tool_name] = await self.get_enabled_tool(user_id, tool_name)
+
+        async with httpx.AsyncClient(timeout=self.call_timeout_seconds) as client:
+            return list(
+                await asyncio.gather(
+                    *[
+                        self._invoke_tool(client, tools[tool_name], user_id, tool_name, arguments, request_id)
+                        for tool_name, arguments in calls
+                    ]
+                )
+            )
+
+    async def _invoke_tool(
+        self,
+        client: httpx.AsyncClient,
+        tool: Optional[MCPToolRegistry],
+        user_id: str,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        request_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        prepared = self.prepare_tool_call(tool, user_id, tool_name, arguments, request_id=request_id)
+        if isinstance(prepared, dict):
+            return prepared
+        return await self.send_tool_call(client, prepared)
+
+    def prepare_tool_call(
+        self,
+        tool: Optional[MCPToolRegistry],
+        user_id: str,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        request_id: Optional[str] = None,
+    ) -> Union[PreparedToolCall, Dict[str, Any]]:
+        """
+        Validate a call against its tool row and build the request, without I/O.
+
+        Returns an error result dict when the call cannot be made. The prepared
+        call holds no ORM state, so it can be sent from another task.
+        """
         if tool is None:
             return {
                 "ok": False,
@@ -644,12 +737,24 @@ class MCPRegistryService:
                 },
             }
 
-        call_url = build_tool_call_url(tool.server, tool_name)
-        headers = _build_tool_call_headers(user_id, request_id=request_id)
+        return PreparedToolCall(
+            user_id=user_id,
+            tool_name=tool_name,
+            arguments=arguments,
+            call_url=build_tool_call_url(tool.server, tool_name),
+            headers=_build_tool_call_headers(user_id, request_id=request_id),
+        )
+
+    async def send_tool_call(self, client: httpx.AsyncClient, prepared: PreparedToolCall) -> Dict[str, Any]:
+        # Anything not explicitly read-only (e.g. ensure_scope_scaffold) may write
+        # files, so cached scope context is dropped both before and after the call.
+        may_write = not prepared.tool_name.strip().lower().startswith(READ_ONLY_PREFIXES)
+        if may_write:
+            invalidate_scope_context_for_tool(prepared.user_id, prepared.tool_name, prepared.arguments)
+
         started_at = perf_counter()
         try:
-            async with httpx.AsyncClient(timeout=self.call_timeout_seconds) as client:
-                response = await client.post(call_url, json=arguments, headers=headers)
+            response = await client.post(prepared.call_url, json=prepared.arguments, headers=prepared.headers)
 
             elapsed_ms = int((perf_counter() - started_at) * 1000)
             try:
@@ -683,3 +788,6 @@ class MCPRegistryService:
                     "message": str(exc),
                 },
             }
+        finally:
+            if may_write:
+                invalidate_scope_context_for_tool(prepared.user_id, prepared.tool_name, prepared.arguments)
@@ -0,0 +1,471 @@
+"""
+Per-user catalog of models across all configured AI providers.
+
+``GET /ai/providers/all-models`` used to call every provider (and every Ollama
+server) one after another, so the model picker waited for the sum of all
+provider latencies. ``ModelCatalogService`` resolves the user's configured
+sources from settings, fetches their model lists concurrently with a
+per-source timeout, and caches each source's result:
+
+* fresh entries (younger than ``MODEL_CATALOG_TTL_SECONDS``) are served as is;
+* stale entries (up to ``MODEL_CATALOG_STALE_SECONDS``) are served while a
+  single background refresh runs (stale-while-revalidate);
+* failures are cached for ``MODEL_CATALOG_ERROR_TTL_SECONDS`` so an offline
+  server is not retried on every request.
+
+Sources that miss the response deadline keep loading in the background and
+are reported as pending; ``stream_catalog`` yields them as they arrive. A
+``ai.model_catalog.refresh`` job keeps the catalog warm for active users.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.ai_providers.registry import provider_registry
+from app.core.config import settings
+from app.core.encryption import encryption_service, EncryptionError
+from app.models.settings import SettingInstance, SettingScope
+from app.utils.json_parsing import safe_encrypted_json_parse, create_default_ollama_settings
+
+logger = logging.getLogger(__name__)
+
+MODEL_CATALOG_REFRESH_JOB_TYPE = "ai.model_catalog.refresh"
+
+# provider, settings definition id, default server id, server url, display name
+_API_KEY_PROVIDERS: Tuple[Tuple[str, str, str, str, str], ...] = (
+    ("openai", "openai_api_keys_settings", "openai_default_server", "https://api.openai.com/v1", "OpenAI API"),
+    ("openrouter", "openrouter_api_keys_settings", "openrouter_default_server", "https://openrouter.ai/api/v1", "OpenRouter API"),
+    ("claude", "claude_api_keys_settings", "claude_default_server", "https://api.anthropic.com", "Claude API"),
+    ("groq", "groq_api_keys_settings", "groq_default_server", "https://api.groq.com", "Groq API"),
+)
+_OLLAMA_SETTINGS_ID = "ollama_servers_settings"
+PROVIDERS_CHECKED = len(_API_KEY_PROVIDERS) + 1
+
+_ENV_API_KEYS = {
+    "openrouter": "OPENROUTER_API_KEY",
+    "openai": "OPENAI_API_KEY",
+    "claude": "ANTHROPIC_API_KEY",
+    "groq": "GROQ_API_KEY",
+}
+
+
+def _get_env_api_key(provider_name: str) -> Optional[str]:
+    env_var = _ENV_API_KEYS.get(provider_name.lower())
+    return os.getenv(env_var) if env_var else None
+
+
+@dataclass(frozen=True)
+class ModelSource:
+    """One provider endpoint whose models belong in the catalog."""
+
+    provider: str
+    server_id: str
+    server_name: str
+    config: Dict[str, Any] = field(hash=False, compare=False)
+    fingerprint: str = ""
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        return self.provider, self.server_id, self.fingerprint
+
+
+@dataclass
+class CatalogEntry:
+    """Last fetch result for a source."""
+
+    models: List[Dict[str, Any]]
+    fetched_at: float
+    checked_at: float
+    error: Optional[str] = None
+
+
+def _make_source(provider: str, server_id: str, config: Dict[str, Any]) -> ModelSource:
+    # Key the cache on connection details so edited URLs or keys refetch.
+    digest = hashlib.sha256(
+        f"{config.get('server_url') or ''}\x00{config.get('api_key') or ''}".encode("utf-8")
+    ).hexdigest()[:16]
+    return ModelSource(
+        provider=provider,
+        server_id=server_id,
+        server_name=config.get("server_name") or "Unknown Server",
+        config=config,
+        fingerprint=digest,
+    )
+
+
+async def _load_setting_value(db: AsyncSession, settings_id: str, user_id: str) -> Tuple[bool, Any]:
+    """Return ``(found, parsed_value)`` for the user's setting, decrypting if needed."""
+    rows = await SettingInstance.get_all_parameterized(
+        db,
+        definition_id=settings_id,
+        scope=SettingScope.USER.value,
+        user_id=user_id,
+    )
+    if not rows:
+        return False, None
+
+    setting = rows[0]
+    setting_value = setting["value"] if isinstance(setting, dict) else setting.value
+    setting_instance_id = setting["id"] if isinstance(setting, dict) else getattr(setting, "id", "")
+    if isinstance(setting_value, str) and encryption_service.is_encrypted_value(setting_value):
+        try:
+            return True, encryption_service.decrypt_field("settings_instances", "value", setting_value)
+        except EncryptionError as ee:
+            raise ValueError(f"Decryption failed for {settings_id}: {str(ee)}")
+    return True, safe_encrypted_json_parse(
+        setting_value,
+        context=f"all-models settings_id={settings_id}, user_id={user_id}",
+        setting_id=setting_instance_id,
+        definition_id=settings_id,
+    )
+
+
+async def resolve_model_sources(db: AsyncSession, user_id: str) -> Tuple[List[ModelSource], List[str]]:
+    """Build the user's model sources from settings (with env key fallback)."""
+    sources: List[ModelSource] = []
+    errors: List[str] = []
+
+    for provider, settings_id, server_id, server_url, server_name in _API_KEY_PROVIDERS:
+        try:
+            found, value = await _load_setting_value(db, settings_id, user_id)
+        except Exception as e:
+            errors.append(f"Failed to parse settings for {provider}: {str(e)}")
+            found, value = True, None
+
+        api_key = None
+        if isinstance(value, dict):
+            api_key = value.get("api_key") or value.get("apiKey")
+        if not api_key and (not found or value is None):
+            # Env keys only stand in for missing or unreadable settings.
+            api_key = _get_env_api_key(provider)
+        if not api_key:
+            continue
+        sources.append(
+            _make_source(
+                provider,
+                server_id,
+                {"api_key": api_key, "server_url": server_url, "server_name": server_name},
+            )
+        )
+
+    try:
+        found, value = await _load_setting_value(db, _OLLAMA_SETTINGS_ID, user_id)
+    except Exception as e:
+        errors.append(f"Failed to parse settings for ollama: {str(e)}")
+        found, value = True, create_default_ollama_settings()
+
+    servers = value.get("servers") if found and isinstance(value, dict) else None
+    for server in servers or []:
+        if not isinstance(server, dict) or not server.get("id"):
+            continue
+        sources.append(
+            _make_source(
+                "ollama",
+                server["id"],
+                {
+                    "server_url": server.get("serverAddress"),
+                    "api_key": server.get("apiKey", ""),
+                    "server_name": server.get("serverName", "Unknown Server"),
+                },
+            )
+        )
+
+    return sources, errors
+
+
+def _source_error(source: ModelSource, message: str) -> str:
+    if source.provider == "ollama":
+        return f"Failed to load models from ollama server {source.server_id}: {message}"
+    return f"Failed to load models from {source.provider}: {message}"
+
+
+@dataclass
+class CatalogSnapshot:
+    """Catalog state for one request."""
+
+    sources: List[ModelSource]
+    entries: Dict[Tuple[str, str, str], CatalogEntry]
+    pending: Dict[Tuple[str, str, str], "asyncio.Task[CatalogEntry]"]
+    errors: List[str]
+
+    def to_response(self) -> Dict[str, Any]:
+        all_models: List[Dict[str, Any]] = []
+        errors = list(self.errors)
+        successful_providers = 0
+        pending_sources: List[Dict[str, str]] = []
+
+        for source in self.sources:
+            entry = self.entries.get(source.key)
+            if entry is None:
+                pending_sources.append({"provider": source.provider, "server_id": source.server_id})
+                continue
+            if entry.error is not None and not entry.models:
+                errors.append(_source_error(source, entry.error))
+                continue
+            successful_providers += 1
+            all_models.extend(_tag_models(source, entry.models))
+
+        return {
+            "models": all_models,
+            "total_count": len(all_models),
+            "successful_providers": successful_providers,
+            "errors": errors,
+            "pending_providers": pending_sources,
+            "summary": {
+                "total_providers_checked": PROVIDERS_CHECKED,
+                "successful_providers": successful_providers,
+                "failed_providers": len(errors),
+                "pending_providers": len(pending_sources),
+                "total_models": len(all_models),
+            },
+        }
+
+
+def _tag_models(source: ModelSource, models: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    tagged = []
+    for model in models:
+        model_copy = dict(model)
+        model_copy["provider"] = source.provider
+        model_copy["server_id"] = source.server_id
+        model_copy["server_name"] = source.server_name
+        tagged.append(model_copy)
+    return tagged
+
+
+class ModelCatalogService:
+    """Concurrent, cached model listing across a user's providers."""
+
+    def __init__(self) -> None:
+        self._entries: Dict[Tuple[str, str, str], CatalogEntry] = {}
+        self._inflight: Dict[Tuple[str, str, str], "asyncio.Task[CatalogEntry]"] = {}
+        self._last_access: Dict[str, float] = {}
+        self._warm_until: Dict[str, float] = {}
+        self._background: set = set()
+
+    async def _fetch(self, source: ModelSource) -> CatalogEntry:
+        previous = self._entries.get(source.key)
+        try:
+            provider_instance = await provider_registry.get_provider(
+                source.provider, source.server_id, source.config
+            )
+            models = await asyncio.wait_for(
+                provider_instance.get_models(),
+                timeout=settings.MODEL_CATALOG_PROVIDER_TIMEOUT_SECONDS,
+            )
+            now = time.monotonic()
+            entry = CatalogEntry(models=list(models or []), fetched_at=now, checked_at=now)
+            logger.info(
+                "Loaded %d models from %s server %s", len(entry.models), source.provider, source.server_id
+            )
+        except asyncio.TimeoutError:
+            entry = self._failed_entry(previous, "timed out")
+        except Exception as e:
+            entry = self._failed_entry(previous, str(e))
+        if entry.error is not None:
+            logger.warning(
+                "Model listing failed for %s server %s: %s", source.provider, source.server_id, entry.error
+            )
+        # Entries are shared by everyone with the same credentials, so only age evicts them
+        # (e.g. lists for rotated keys), never another source's refresh.
+        cutoff = time.monotonic() - settings.MODEL_CATALOG_STALE_SECONDS
+        for key in [key for key, cached in self._entries.items() if cached.checked_at < cutoff]:
+            self._entries.pop(key, None)
+        self._entries[source.key] = entry
+        return entry
+
+    @staticmethod
+    def _failed_entry(previous: Optional[CatalogEntry], error: str) -> CatalogEntry:
+        # Keep serving the last good list while it is within the stale window.
+        now = time.monotonic()
+        if previous is not None and previous.models:
+            if now - previous.fetched_at <= settings.MODEL_CATALOG_STALE_SECONDS:
+                return CatalogEntry(
+                    models=previous.models, fetched_at=previous.fetched_at, checked_at=now, error=error
+                )
+        return CatalogEntry(models=[], fetched_at=now, checked_at=now, error=error)
+
+    def _start_fetch(self, source: ModelSource) -> "asyncio.Task[CatalogEntry]":
+        task = self._inflight.get(source.key)
+        if task is None or task.done():
+            task = asyncio.create_task(self._fetch(source))
+            self._inflight[source.key] = task
+            task.add_done_callback(lambda done, key=source.key: self._forget_inflight(key, done))
+        return task
+
+    def _forget_inflight(self, key: Tuple[str, str, str], task: "asyncio.Task[CatalogEntry]") -> None:
+        if self._inflight.get(key) is task:
+            self._inflight.pop(key, None)
+
+    def _classify(self, entry: Optional[CatalogEntry]) -> str:
+        if entry is None:
+            return "missing"
+        now = time.monotonic()
+        age = now - entry.fetched_at
+        if entry.error is not None and now - entry.checked_at <= settings.MODEL_CATALOG_ERROR_TTL_SECONDS:
+            # Recently failed: serve what we have rather than retrying on every request.
+            return "fresh"
+        if entry.error is not None and not entry.models:
+            return "missing"
+        if age <= settings.MODEL_CATALOG_TTL_SECONDS and entry.error is None:
+            return "fresh"
+        if age <= settings.MODEL_CATALOG_STALE_SECONDS:
+            return "stale"
+        return "missing"
+
+    async def snapshot(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        wait_seconds: Optional[float] = None,
+        force_refresh: bool = False,
+        touch: bool = True,
+    ) -> CatalogSnapshot:
+        """
+        Return cached entries, fetching missing sources concurrently for up to
+        ``wait_seconds``. Stale sources are refreshed in the background.
+
+        ``touch`` records a user access, which keeps the refresh chain going;
+        the keep-warm job itself passes False so it cannot keep itself alive.
+        """
+        sources, errors = await resolve_model_sources(db, user_id)
+        entries: Dict[Tuple[str, str, str], CatalogEntry] = {}
+        pending: Dict[Tuple[str, str, str], "asyncio.Task[CatalogEntry]"] = {}
+
+        for source in sources:
+            entry = self._entries.get(source.key)
+            state = "missing" if force_refresh else self._classify(entry)
+            if state == "fresh":
+                entries[source.key] = entry
+                continue
+            task = self._start_fetch(source)
+            if state == "stale":
+                entries[source.key] = entry
+            else:
+                pending[source.key] = task
+
+        if pending:
+            timeout = settings.MODEL_CATALOG_RESPONSE_WAIT_SECONDS if wait_seconds is None else wait_seconds
+            await asyncio.wait(list(pending.values()), timeout=max(timeout, 0.0))
+            for key, task in list(pending.items()):
+                if task.done():
+                    entries[key] = task.result()
+                    pending.pop(key)
+
+        if touch:
+            self._last_access[user_id] = time.monotonic()
+        return CatalogSnapshot(sources=sources, entries=entries, pending=pending, errors=errors)
+
+    async def get_catalog(self, db: AsyncSession, user_id: str) -> Dict[str, Any]:
+        snapshot = await self.snapshot(db, user_id)
+        self.schedule_keep_warm(user_id)
+        return snapshot.to_response()
+
+    async def stream_catalog(self, snapshot: CatalogSnapshot) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield ``snapshot`` as a catalog event, then each pending source as it
+        finishes. Needs no database session, so it can run inside a response body.
+        """
+        yield {"type": "catalog", **snapshot.to_response()}
+
+        sources_by_key = {source.key: source for source in snapshot.sources}
+
+        async def _arrival(key, task):
+            # Shielded so a disconnecting client does not cancel the shared fetch.
+            return key, await asyncio.shield(task)
+
+        for finished in asyncio.as_completed(
+            [_arrival(key, task) for key, task in snapshot.pending.items()]
+        ):
+            key, entry = await finished
+            source = sources_by_key[key]
+            if entry.error is not None and not entry.models:
+                yield {
+                    "type": "provider_error",
+                    "provider": source.provider,
+                    "server_id": source.server_id,
+                    "error": _source_error(source, entry.error),
+                }
+            else:
+                yield {
+                    "type": "provider_models",
+                    "provider": source.provider,
+                    "server_id": source.server_id,
+                    "models": _tag_models(source, entry.models),
+                }
+        yield {"type": "done"}
+
+    async def refresh_user(self, db: AsyncSession, user_id: str) -> Dict[str, Any]:
+        """Refetch every source for ``user_id`` and wait for all of them."""
+        snapshot = await self.snapshot(
+            db,
+            user_id,
+            wait_seconds=settings.MODEL_CATALOG_PROVIDER_TIMEOUT_SECONDS + 1.0,
+            force_refresh=True,
+            touch=False,
+        )
+        response = snapshot.to_response()
+        return {
+            "sources": len(snapshot.sources),
+            "successful_providers": response["successful_providers"],
+            "failed_providers": response["summary"]["failed_providers"],
+            "total_models": response["total_count"],
+        }
+
+    def is_active(self, user_id: str) -> bool:
+        last_access = self._last_access.get(user_id)
+        return last_access is not None and time.monotonic() - last_access <= settings.MODEL_CATALOG_WARM_IDLE_SECONDS
+
+    def note_refresh_scheduled(self, user_id: str) -> None:
+        # Two intervals of slack so a lagging job queue does not start a second chain.
+        self._warm_until[user_id] = time.monotonic() + 2 * settings.MODEL_CATALOG_REFRESH_INTERVAL_SECONDS
+
+    def schedule_keep_warm(self, user_id: str) -> None:
+        """Start the refresh job chain for ``user_id`` unless one is already running."""
+        interval = settings.MODEL_CATALOG_REFRESH_INTERVAL_SECONDS
+        if interval <= 0 or self._warm_until.get(user_id, 0.0) > time.monotonic():
+            return
+        self.note_refresh_scheduled(user_id)
+        task = asyncio.create_task(enqueue_model_catalog_refresh(user_id, delay_seconds=interval))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+
+async def enqueue_model_catalog_refresh(user_id: str, delay_seconds: float) -> None:
+    """Queue a refresh job; deduplicated per user and refresh interval."""
+    from app.core.job_manager_provider import get_job_manager
+
+    interval = max(settings.MODEL_CATALOG_REFRESH_INTERVAL_SECONDS, 1)
+    scheduled_for = datetime.now(timezone.utc) + timedelta(seconds=delay_seconds)
+    bucket = int(scheduled_for.timestamp() // interval)
+    try:
+        job_manager = await get_job_manager()
+        await job_manager.enqueue_job(
+            job_type=MODEL_CATALOG_REFRESH_JOB_TYPE,
+            payload={"user_id": user_id},
+            user_id=user_id,
+            scheduled_for=scheduled_for,
+            idempotency_key=f"model-catalog:{user_id}:{bucket}",
+            max_retries=0,
+        )
+    except Exception as e:
+        logger.warning("Could not schedule model catalog refresh for %s: %s", user_id, e)
+
+
+_model_catalog_service: Optional[ModelCatalogService] = None
+
+
+def get_model_catalog_service() -> ModelCatalogService:
+    global _model_catalog_service
+    if _model_catalog_service is None:
+        _model_catalog_service = ModelCatalogService()
+    return _model_catalog_service
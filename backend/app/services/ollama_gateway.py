@@ -0,0 +1,327 @@
+"""
+Shared HTTP access to the Ollama servers users configure.
+
+The Ollama proxy endpoints used to open a new ``httpx.AsyncClient`` (and so a
+new TCP connection) per request. ``OllamaGateway`` keeps one pooled,
+keep-alive client per server base URL instead:
+
+- ``/api/tags`` responses are cached per server and API key for
+  ``OLLAMA_TAGS_CACHE_TTL_SECONDS``, and concurrent fetches of the same list
+  share one request;
+- a background task probes every server used within
+  ``OLLAMA_GATEWAY_IDLE_SECONDS`` each ``OLLAMA_HEALTH_PROBE_INTERVAL_SECONDS``
+  and marks it up or down. Requests to a server that is down fail at once
+  with ``OllamaServerUnavailable`` rather than waiting for a connect timeout.
+  Connection failures and responses seen by ordinary requests update the same
+  state. Fail-fast only applies while the prober runs, since the prober is
+  what marks a server up again;
+- servers idle for longer than ``OLLAMA_GATEWAY_IDLE_SECONDS`` have their
+  client closed.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+from app.utils.ollama import normalize_server_base
+
+logger = logging.getLogger(__name__)
+
+_PROBE_TIMEOUT_SECONDS = 3.0
+
+
+class OllamaServerUnavailable(Exception):
+    """Raised without contacting a server the health prober has marked down."""
+
+    def __init__(self, server_base: str, last_error: Optional[str] = None) -> None:
+        super().__init__(f"Ollama server {server_base} is unreachable")
+        self.server_base = server_base
+        self.last_error = last_error
+
+
+@dataclass
+class _ServerState:
+    client: httpx.AsyncClient
+    last_used: float = field(default_factory=time.monotonic)
+    up: Optional[bool] = None
+    checked_at: Optional[float] = None
+    last_error: Optional[str] = None
+
+
+def ollama_headers(api_key: Optional[str] = None) -> Dict[str, str]:
+    headers = {"Content-Type": "application/json"}
+    if api_key:
+        headers["Authorization"] = f"Bearer {api_key}"
+    return headers
+
+
+class OllamaGateway:
+    """Pooled clients, a tags cache and health state per Ollama server."""
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        tags_ttl_seconds: Optional[float] = None,
+        probe_interval_seconds: Optional[float] = None,
+        idle_seconds: Optional[float] = None,
+    ) -> None:
+        self.max_connections = max(
+            settings.OLLAMA_GATEWAY_MAX_CONNECTIONS if max_connections is None else max_connections, 1
+        )
+        self.tags_ttl_seconds = (
+            settings.OLLAMA_TAGS_CACHE_TTL_SECONDS if tags_ttl_seconds is None else tags_ttl_seconds
+        )
+        self.probe_interval_seconds = (
+            settings.OLLAMA_HEALTH_PROBE_INTERVAL_SECONDS if probe_interval_seconds is None else probe_interval_seconds
+        )
+        self.idle_seconds = settings.OLLAMA_GATEWAY_IDLE_SECONDS if idle_seconds is None else idle_seconds
+        self._servers: Dict[str, _ServerState] = {}
+        self._tags: Dict[Tuple[str, Optional[str]], Tuple[float, List[Dict[str, Any]]]] = {}
+        self._tags_inflight: Dict[Tuple[str, Optional[str]], "asyncio.Task[List[Dict[str, Any]]]"] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    # Lifecycle
+
+    def start(self) -> None:
+        """Start the health prober on the running loop (no-op if running or disabled)."""
+        if self.probe_interval_seconds <= 0 or self.prober_running:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        servers, self._servers = self._servers, {}
+        self._tags.clear()
+        for state in servers.values():
+            await state.client.aclose()
+
+    @property
+    def prober_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.probe_interval_seconds)
+            try:
+                await self._close_idle()
+                await self.probe_all()
+            except Exception as e:
+                logger.warning("Ollama health probing failed: %s", e)
+
+    async def _close_idle(self) -> None:
+        if self.idle_seconds <= 0:
+            return
+        cutoff = time.monotonic() - self.idle_seconds
+        for server_base in [base for base, state in self._servers.items() if state.last_used < cutoff]:
+            state = self._servers.pop(server_base)
+            for key in [key for key in self._tags if key[0] == server_base]:
+                del self._tags[key]
+            await state.client.aclose()
+
+    # Servers and health
+
+    def _state(self, server_base: str) -> _ServerState:
+        state = self._servers.get(server_base)
+        if state is None:
+            state = _ServerState(
+                client=httpx.AsyncClient(
+                    follow_redirects=False,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections,
+                    ),
+                )
+            )
+            self._servers[server_base] = state
+        state.last_used = time.monotonic()
+        return state
+
+    def client(self, server_base: str) -> httpx.AsyncClient:
+        """The pooled client for ``server_base``."""
+        return self._state(normalize_server_base(server_base)).client
+
+    def touch(self, server_base: str) -> None:
+        """Mark ``server_base`` in use; long streams call this so their client is not closed as idle."""
+        state = self._servers.get(server_base)
+        if state is not None:
+            state.last_used = time.monotonic()
+
+    def _mark(self, server_base: str, up: bool, error: Optional[str] = None) -> None:
+        state = self._servers.get(server_base)
+        if state is None:
+            return
+        if state.up is not None and state.up != up:
+            logger.info("Ollama server %s is now %s", server_base, "up" if up else "down")
+        state.up = up
+        state.checked_at = time.monotonic()
+        state.last_error = error
+
+    def _ensure_available(self, server_base: str) -> _ServerState:
+        state = self._state(server_base)
+        if state.up is False and self.prober_running:
+            raise OllamaServerUnavailable(server_base, state.last_error)
+        return state
+
+    def health(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        return {
+            server_base: {
+                "up": state.up,
+                "checked_seconds_ago": round(now - state.checked_at, 1) if state.checked_at is not None else None,
+                "last_error": state.last_error,
+            }
+            for server_base, state in self._servers.items()
+        }
+
+    async def probe(self, server_base: str) -> bool:
+        server_base = normalize_server_base(server_base)
+        # Probing must not count as use, or idle servers would never be closed.
+        state = self._servers.get(server_base) or self._state(server_base)
+        try:
+            response = await state.client.get(f"{server_base}/api/version", timeout=_PROBE_TIMEOUT_SECONDS)
+        except httpx.HTTPError as exc:
+            self._mark(server_base, False, str(exc) or type(exc).__name__)
+            return False
+        # Anything but 200 (a proxy's 502, an auth wall) is not a working Ollama server.
+        if response.status_code != 200:
+            self._mark(server_base, False, f"HTTP {response.status_code} from /api/version")
+            return False
+        self._mark(server_base, True)
+        return True
+
+    async def probe_all(self) -> Dict[str, bool]:
+        servers = list(self._servers)
+        results = await asyncio.gather(*(self.probe(server_base) for server_base in servers))
+        return dict(zip(servers, results))
+
+    # Requests
+
+    async def request(
+        self,
+        server_base: str,
+        method: str,
+        path: str,
+        *,
+        api_key: Optional[str] = None,
+        timeout: float = 30.0,
+        json: Any = None,
+        params: Any = None,
+        fail_fast: bool = True,
+    ) -> httpx.Response:
+        """Send a request on the pooled client, keeping health state current."""
+        return await self._send(
+            server_base, method, path, api_key=api_key, timeout=timeout, json=json, params=params,
+            fail_fast=fail_fast, stream=False,
+        )
+
+    async def open_stream(
+        self,
+        server_base: str,
+        method: str,
+        path: str,
+        *,
+        api_key: Optional[str] = None,
+        timeout: float = 120.0,
+        json: Any = None,
+        params: Any = None,
+    ) -> httpx.Response:
+        """Send a request and return the response with its body unread; the caller closes it."""
+        return await self._send(
+            server_base, method, path, api_key=api_key, timeout=timeout, json=json, params=params,
+            fail_fast=True, stream=True,
+        )
+
+    async def _send(
+        self,
+        server_base: str,
+        method: str,
+        path: str,
+        *,
+        api_key: Optional[str],
+        timeout: float,
+        json: Any,
+        params: Any,
+        fail_fast: bool,
+        stream: bool,
+    ) -> httpx.Response:
+        server_base = normalize_server_base(server_base)
+        state = self._ensure_available(server_base) if fail_fast else self._state(server_base)
+        request = state.client.build_request(
+            method,
+            f"{server_base}/{path.lstrip('/')}",
+            headers=ollama_headers(api_key),
+            json=json,
+            params=params,
+            timeout=timeout,
+        )
+        try:
+            response = await state.client.send(request, stream=stream)
+        except (httpx.ConnectError, httpx.ConnectTimeout) as exc:
+            self._mark(server_base, False, str(exc) or type(exc).__name__)
+            raise
+        self._mark(server_base, True)
+        return response
+
+    # Model list
+
+    async def list_models(
+        self, server_base: str, api_key: Optional[str] = None, fresh: bool = False
+    ) -> List[Dict[str, Any]]:
+        """``/api/tags`` models, cached for the TTL; raises ``httpx.HTTPStatusError`` on non-200."""
+        server_base = normalize_server_base(server_base)
+        key = (server_base, api_key)
+        cached = self._tags.get(key)
+        if not fresh and cached is not None and time.monotonic() - cached[0] < self.tags_ttl_seconds:
+            self._state(server_base)
+            return cached[1]
+
+        task = self._tags_inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_tags(server_base, api_key))
+            self._tags_inflight[key] = task
+            task.add_done_callback(lambda _: self._tags_inflight.pop(key, None))
+        # Shielded so one caller giving up does not cancel the fetch for the others.
+        return await asyncio.shield(task)
+
+    async def _fetch_tags(self, server_base: str, api_key: Optional[str]) -> List[Dict[str, Any]]:
+        response = await self.request(server_base, "GET", "/api/tags", api_key=api_key, timeout=10.0)
+        response.raise_for_status()
+        models = response.json().get("models", [])
+        if self.tags_ttl_seconds > 0:
+            self._tags[(server_base, api_key)] = (time.monotonic(), models)
+        return models
+
+    def invalidate_models(self, server_base: str) -> None:
+        """Drop cached model lists for ``server_base`` after an install or delete."""
+        server_base = normalize_server_base(server_base)
+        for key in [key for key in self._tags if key[0] == server_base]:
+            del self._tags[key]
+
+    async def model_exists(self, server_base: str, model_name: str, api_key: Optional[str] = None) -> bool:
+        models = await self.list_models(server_base, api_key)
+        return any(model.get("name") == model_name for model in models)
+
+    async def relay(self, server_base: str, response: httpx.Response) -> AsyncIterator[bytes]:
+        """Relay an upstream body chunk by chunk, closing the response when done or abandoned."""
+        server_base = normalize_server_base(server_base)
+        try:
+            async for chunk in response.aiter_bytes():
+                self.touch(server_base)
+                yield chunk
+        finally:
+            await response.aclose()
+
+
+# Global singleton instance
+ollama_gateway = OllamaGateway()
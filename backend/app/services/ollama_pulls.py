@@ -0,0 +1,363 @@
+"""
+Shared, resumable Ollama model pulls.
+
+Each install request is a job owned by the requesting user, but the download
+itself happens on the server. ``OllamaPullCoordinator`` therefore runs at most
+one pull per ``(server, model)`` (and API key, so nobody installs through
+another user's credentials), and every ``ollama.install`` job for that model
+attaches to it. The pull publishes its progress, normalized by
+``OllamaPullTracker``, as a versioned latest snapshot. Each attached job waits
+for the next version and records it as its own progress, so a slow subscriber
+skips intermediate snapshots instead of queueing them.
+
+- At most ``OLLAMA_PULL_CONCURRENCY_PER_SERVER`` pulls run against one
+  server; further pulls wait in the ``queued`` stage.
+- Ollama keeps partially downloaded layers, so a pull whose stream breaks is
+  re-issued, up to ``OLLAMA_PULL_MAX_RESUMES`` times, and continues where it
+  stopped. Install jobs interrupted by a restart are requeued by the job
+  manager and resume the same way.
+- A pull is cancelled when the last job attached to it detaches.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple
+
+import httpx
+
+from app.core.config import settings
+from app.services.ollama_gateway import ollama_gateway, ollama_headers
+from app.utils.ollama import normalize_server_base
+from app.utils.ollama_progress import OllamaPullTracker
+
+logger = logging.getLogger(__name__)
+
+_MAX_RESUME_DELAY_SECONDS = 60.0
+
+
+class OllamaPullError(RuntimeError):
+    """Raised when Ollama rejects a pull; these are not retried."""
+
+
+async def _fetch_show(server_base: str, api_key: Optional[str], model_name: str) -> Optional[Dict[str, Any]]:
+    response = await ollama_gateway.request(
+        server_base,
+        "POST",
+        "/api/show",
+        api_key=api_key,
+        timeout=30.0,
+        json={"name": model_name},
+        fail_fast=False,
+    )
+    if response.status_code == 200:
+        payload = response.json() or {}
+        return {
+            "digest": payload.get("digest"),
+            "size": payload.get("size"),
+            "modified_at": payload.get("modified") or payload.get("modified_at"),
+        }
+    if response.status_code in (400, 404):
+        return None
+    response.raise_for_status()
+    return None
+
+
+def find_model_entry(tags_payload: Dict[str, Any], identifiers: Set[str]) -> Optional[Dict[str, Any]]:
+    models = tags_payload.get("models") or []
+    for model in models:
+        tokens: Set[str] = set()
+        for key in ("name", "model", "digest"):
+            value = model.get(key)
+            if value:
+                tokens.add(str(value))
+        aliases = model.get("aliases") or []
+        if isinstance(aliases, list):
+            for alias in aliases:
+                if isinstance(alias, str):
+                    tokens.add(alias)
+                elif isinstance(alias, dict):
+                    for v in alias.values():
+                        if v:
+                            tokens.add(str(v))
+        expanded_tokens = set(tokens)
+        expanded_tokens.update(token.split(":", 1)[0] for token in tokens if ":" in token)
+        if identifiers & expanded_tokens:
+            return model
+    return None
+
+
+async def wait_for_model_registration(
+    server_base: str,
+    api_key: Optional[str],
+    model_name: str,
+    digest: Optional[str],
+) -> Dict[str, Any]:
+    # The server's model list changed; later /models calls must not see the cached one.
+    ollama_gateway.invalidate_models(server_base)
+    canonical = model_name.split(":", 1)[0]
+    identifiers = {model_name, canonical}
+    if digest:
+        identifiers.add(digest)
+    backoff = [0, 1, 1, 2, 3]
+    extended_waits = [5] * 6 + [10] * 6 + [20] * 3
+    for delay in backoff + extended_waits:
+        if delay:
+            await asyncio.sleep(delay)
+        show_entry = await _fetch_show(server_base, api_key, model_name)
+        if show_entry:
+            return show_entry
+        models = await ollama_gateway.list_models(server_base, api_key, fresh=True)
+        entry = find_model_entry({"models": models}, identifiers)
+        if entry:
+            return {
+                "digest": entry.get("digest"),
+                "size": entry.get("size"),
+                "modified_at": entry.get("modified") or entry.get("modified_at"),
+            }
+    raise RuntimeError(f"Model {model_name} not present on Ollama server after install")
+
+
+class OllamaPull:
+    """One pull of a model onto a server, shared by every job attached to it."""
+
+    def __init__(
+        self,
+        server_base: str,
+        model_name: str,
+        api_key: Optional[str],
+        force_reinstall: bool,
+        timeout_seconds: float,
+        max_resumes: int,
+        resume_delay_seconds: float,
+    ) -> None:
+        self.server_base = server_base
+        self.model_name = model_name
+        self.api_key = api_key
+        self.force_reinstall = force_reinstall
+        self.timeout_seconds = timeout_seconds
+        self.max_resumes = max_resumes
+        self.resume_delay_seconds = resume_delay_seconds
+        self.tracker = OllamaPullTracker()
+        self.version = 0
+        self.latest: Dict[str, Any] = {
+            "percent": 0,
+            "stage": "queued",
+            "message": "Waiting to start download",
+            "data": {},
+        }
+        self.resumes = 0
+        self.subscribers = 0
+        self.cancelling = False
+        self.done = False
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Condition()
+
+    async def _notify(self) -> None:
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def _publish(self, percent: Optional[int], stage: str, message: str, data: Dict[str, Any]) -> None:
+        self.latest = {"percent": percent, "stage": stage, "message": message, "data": data}
+        self.version += 1
+        await self._notify()
+
+    async def wait_for_update(self, seen_version: int, timeout: float) -> int:
+        """Wait up to ``timeout`` for a snapshot newer than ``seen_version`` or the end of the pull."""
+        async with self._changed:
+            try:
+                await asyncio.wait_for(
+                    self._changed.wait_for(lambda: self.version != seen_version or self.done), timeout
+                )
+            except asyncio.TimeoutError:
+                pass
+        return self.version
+
+    async def run(self, slot: asyncio.Semaphore) -> None:
+        try:
+            if slot.locked():
+                await self._publish(
+                    0, "queued", "Waiting for other downloads on this server", {"model_name": self.model_name}
+                )
+            async with slot:
+                digest = await self._pull()
+                message = "Download completed, finalizing installation"
+                await self._publish(
+                    99,
+                    "finalizing",
+                    message,
+                    self.tracker.build_progress_payload(percent=99, stage="finalizing", message=message),
+                )
+                self.result = await wait_for_model_registration(
+                    self.server_base, self.api_key, self.model_name, digest
+                )
+        except Exception as exc:
+            logger.warning("Ollama pull of %s from %s failed: %s", self.model_name, self.server_base, exc)
+            self.error = exc
+        finally:
+            self.done = True
+            await self._notify()
+
+    async def _pull(self) -> Optional[str]:
+        """Stream ``/api/pull`` until Ollama reports success, re-issuing it when the stream breaks."""
+        request_body = {
+            "name": self.model_name,
+            "stream": True,
+            "keep_alive": False,
+            "force": self.force_reinstall,
+        }
+        timeout = httpx.Timeout(self.timeout_seconds, connect=30.0)
+        while True:
+            client = ollama_gateway.client(self.server_base)
+            try:
+                async with client.stream(
+                    "POST",
+                    f"{self.server_base}/api/pull",
+                    headers=ollama_headers(self.api_key),
+                    json=request_body,
+                    timeout=timeout,
+                ) as response:
+                    if response.status_code != 200:
+                        raw = await response.aread()
+                        raise OllamaPullError(
+                            raw.decode(errors="ignore") or f"Ollama returned HTTP {response.status_code}"
+                        )
+                    if self.resumes == 0:
+                        await self._publish(
+                            1, "downloading", "Starting download",
+                            {"force_reinstall": self.force_reinstall, "progress_percent": 1},
+                        )
+
+                    async for line in response.aiter_lines():
+                        ollama_gateway.touch(self.server_base)
+                        if not line:
+                            continue
+                        try:
+                            data = json.loads(line)
+                        except json.JSONDecodeError:
+                            logger.debug("Ignoring non-JSON Ollama pull output: %s", line)
+                            continue
+                        if not isinstance(data, dict):
+                            continue
+                        if data.get("error"):
+                            raise OllamaPullError(str(data["error"]))
+
+                        snapshot = self.tracker.process_payload(data)
+                        stage = snapshot.stage or "downloading"
+                        if snapshot.bucket_changed and snapshot.percent is not None:
+                            logger.info("Ollama install progress %s%% [%s]", snapshot.percent, data.get("status"))
+                        await self._publish(snapshot.percent, stage, snapshot.message or stage, snapshot.payload)
+
+                        status_text = str(data.get("status", "")).strip().lower()
+                        if data.get("done") or status_text == "success":
+                            return str(data["digest"]) if data.get("digest") else None
+                interruption = "Ollama closed the pull stream before it finished"
+            except httpx.TransportError as exc:
+                interruption = str(exc) or type(exc).__name__
+
+            self.resumes += 1
+            if self.resumes > self.max_resumes:
+                raise OllamaPullError(f"Download interrupted {self.resumes} times; last error: {interruption}")
+            delay = min(self.resume_delay_seconds * 2 ** (self.resumes - 1), _MAX_RESUME_DELAY_SECONDS)
+            logger.warning(
+                "Ollama pull of %s interrupted (%s); resuming in %.0fs", self.model_name, interruption, delay
+            )
+            message = f"Connection lost; resuming download ({self.resumes}/{self.max_resumes})"
+            await self._publish(
+                self.latest["percent"],
+                "downloading",
+                message,
+                self.tracker.build_progress_payload(
+                    percent=self.latest["percent"], stage="downloading", message=message
+                ),
+            )
+            await asyncio.sleep(delay)
+
+
+class OllamaPullCoordinator:
+    """Runs one pull per server, model and API key, and bounds pulls per server."""
+
+    def __init__(
+        self,
+        concurrency_per_server: Optional[int] = None,
+        max_resumes: Optional[int] = None,
+        resume_delay_seconds: Optional[float] = None,
+    ) -> None:
+        self.concurrency_per_server = max(
+            settings.OLLAMA_PULL_CONCURRENCY_PER_SERVER if concurrency_per_server is None else concurrency_per_server,
+            1,
+        )
+        self.max_resumes = max(settings.OLLAMA_PULL_MAX_RESUMES if max_resumes is None else max_resumes, 0)
+        self.resume_delay_seconds = (
+            settings.OLLAMA_PULL_RESUME_DELAY_SECONDS if resume_delay_seconds is None else resume_delay_seconds
+        )
+        self._pulls: Dict[Tuple[str, str, str], OllamaPull] = {}
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+
+    @staticmethod
+    def _key(server_base: str, model_name: str, api_key: Optional[str]) -> Tuple[str, str, str]:
+        fingerprint = hashlib.sha256(api_key.encode("utf-8")).hexdigest() if api_key else ""
+        return server_base, model_name, fingerprint
+
+    def _slot(self, server_base: str) -> asyncio.Semaphore:
+        slot = self._slots.get(server_base)
+        if slot is None:
+            slot = asyncio.Semaphore(self.concurrency_per_server)
+            self._slots[server_base] = slot
+        return slot
+
+    def get(self, server_url: str, model_name: str, api_key: Optional[str] = None) -> Optional[OllamaPull]:
+        """The running pull of ``model_name`` onto ``server_url``, if any."""
+        pull = self._pulls.get(self._key(normalize_server_base(server_url), model_name, api_key))
+        return pull if pull is not None and not pull.done and not pull.cancelling else None
+
+    @asynccontextmanager
+    async def attach(
+        self,
+        server_url: str,
+        model_name: str,
+        *,
+        api_key: Optional[str] = None,
+        force_reinstall: bool = False,
+        timeout_seconds: float = 1800,
+    ) -> AsyncIterator[OllamaPull]:
+        """Join the running pull of ``model_name``, starting one if there is none."""
+        server_base = normalize_server_base(server_url)
+        key = self._key(server_base, model_name, api_key)
+        pull = self.get(server_base, model_name, api_key)
+        if pull is None:
+            pull = OllamaPull(
+                server_base,
+                model_name,
+                api_key,
+                force_reinstall,
+                timeout_seconds,
+                self.max_resumes,
+                self.resume_delay_seconds,
+            )
+            self._pulls[key] = pull
+            pull.task = asyncio.get_running_loop().create_task(pull.run(self._slot(server_base)))
+            pull.task.add_done_callback(lambda _: self._forget(key, pull))
+        elif force_reinstall and not pull.force_reinstall:
+            logger.info("Joining the running pull of %s; force_reinstall does not apply to it", model_name)
+
+        pull.subscribers += 1
+        try:
+            yield pull
+        finally:
+            pull.subscribers -= 1
+            if pull.subscribers == 0 and not pull.done:
+                pull.cancelling = True
+                pull.task.cancel()
+
+    def _forget(self, key: Tuple[str, str, str], pull: OllamaPull) -> None:
+        if self._pulls.get(key) is pull:
+            del self._pulls[key]
+
+
+# Global singleton instance
+ollama_pulls = OllamaPullCoordinator()
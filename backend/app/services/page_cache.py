@@ -0,0 +1,220 @@
+"""
+Read cache for page detail responses.
+
+``GET /pages/{page_id}`` and ``GET /pages/route/{route}`` are hit on every
+navigation by the page renderer. Entries hold the pre-serialized
+``PageDetailResponse`` bytes plus the fields needed for access checks, keyed by
+page id with a route -> id index. Page writes call ``invalidate_page_cache``.
+
+Each entry carries a weak ETag built from ``updated_at``. SQLite timestamps
+have one-second resolution, so a short body checksum is appended to keep two
+edits within the same second distinguishable.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.page import Page
+from app.schemas.page import PageDetailResponse
+
+
+def normalize_page_id(page_id) -> str:
+    return str(page_id).replace("-", "")
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    """Serialized page detail and the metadata used for access checks."""
+
+    page_id: str
+    route: str
+    creator_id: str
+    is_published: bool
+    body: bytes
+    etag: str
+    updated_at: Optional[datetime]
+    stored_at: float
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite hands back naive timestamps; they are written as UTC.
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=timezone.utc)
+
+
+def build_page_detail(page: Page) -> PageDetailResponse:
+    return PageDetailResponse(
+        id=page.id,
+        name=page.name,
+        route=page.route,
+        parent_route=page.parent_route,
+        parent_type=page.parent_type,
+        content=page.content,
+        content_backup=page.content_backup,
+        creator_id=page.creator_id,
+        is_published=page.is_published,
+        created_at=page.created_at,
+        updated_at=page.updated_at,
+        publish_date=page.publish_date,
+        backup_date=page.backup_date,
+        description=page.description,
+        icon=page.icon,
+        navigation_route_id=page.navigation_route_id
+    )
+
+
+class PageReadCache:
+    """Size-bounded LRU of serialized page detail responses."""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self._max_entries = max_entries or settings.PAGE_CACHE_MAX_ENTRIES
+        self._ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.PAGE_CACHE_TTL_SECONDS
+        self._entries: "OrderedDict[str, CachedPage]" = OrderedDict()
+        self._routes: Dict[str, str] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        """Write counter; capture before a DB read and pass it to ``store``."""
+        return self._generation
+
+    def _is_fresh(self, entry: CachedPage) -> bool:
+        return self._ttl_seconds <= 0 or time.monotonic() - entry.stored_at <= self._ttl_seconds
+
+    def _lookup(self, key: str) -> Optional[CachedPage]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if not self._is_fresh(entry):
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    async def _matches_row(self, db: AsyncSession, entry: CachedPage) -> bool:
+        stmt = select(Page.updated_at, Page.route, Page.creator_id, Page.is_published).where(
+            Page.id == entry.page_id
+        )
+        row = (await db.execute(stmt)).first()
+        return row is not None and (
+            _as_utc(row.updated_at) == _as_utc(entry.updated_at)
+            and row.route == entry.route
+            and normalize_page_id(row.creator_id) == entry.creator_id
+            and bool(row.is_published) == entry.is_published
+        )
+
+    async def get_by_id(self, db: AsyncSession, page_id) -> Optional[CachedPage]:
+        """Cached entry for ``page_id`` if it still matches the database row."""
+        key = normalize_page_id(page_id)
+        entry = self._lookup(key)
+        if entry is None:
+            return None
+        if not await self._matches_row(db, entry):
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    self._drop(key)
+            return None
+        return entry
+
+    async def get_by_route(self, db: AsyncSession, route: str) -> Optional[CachedPage]:
+        with self._lock:
+            page_id = self._routes.get(route)
+        if page_id is None:
+            return None
+        entry = await self.get_by_id(db, page_id)
+        if entry is None or entry.route != route:
+            return None
+        return entry
+
+    def store(self, page: Page, generation: int, index_route: bool = False) -> CachedPage:
+        """
+        Serialize ``page`` and cache it; ``index_route`` records route -> id.
+
+        Nothing is cached if a write happened after ``generation`` was taken,
+        so a read that raced with an update cannot re-insert stale content,
+        nor while ``updated_at`` is still within the current second.
+        """
+        body = build_page_detail(page).model_dump_json().encode("utf-8")
+        updated = page.updated_at.isoformat() if page.updated_at else "0"
+        entry = CachedPage(
+            page_id=normalize_page_id(page.id),
+            route=page.route,
+            creator_id=normalize_page_id(page.creator_id),
+            is_published=bool(page.is_published),
+            body=body,
+            etag=f'W/"{updated}-{zlib.crc32(body):08x}"',
+            updated_at=page.updated_at,
+            stored_at=time.monotonic(),
+        )
+        updated_at = _as_utc(page.updated_at)
+        if updated_at is not None and datetime.now(timezone.utc) - updated_at < timedelta(seconds=1):
+            return entry
+        with self._lock:
+            if generation != self._generation:
+                return entry
+            self._entries[entry.page_id] = entry
+            self._entries.move_to_end(entry.page_id)
+            if index_route:
+                self._routes[entry.route] = entry.page_id
+            while len(self._entries) > self._max_entries:
+                evicted_id, _ = self._entries.popitem(last=False)
+                self._drop_routes_for(evicted_id)
+        return entry
+
+    def _drop_routes_for(self, page_id: str) -> None:
+        for route in [route for route, cached_id in self._routes.items() if cached_id == page_id]:
+            self._routes.pop(route, None)
+
+    def _drop(self, page_id: str) -> None:
+        self._entries.pop(page_id, None)
+        self._drop_routes_for(page_id)
+
+    def invalidate(self, page_id=None, route: Optional[str] = None) -> None:
+        """Drop one page (by id and/or route), or everything when called bare."""
+        with self._lock:
+            self._generation += 1
+            if page_id is None and route is None:
+                self._entries.clear()
+                self._routes.clear()
+                return
+            if page_id is not None:
+                self._drop(normalize_page_id(page_id))
+            if route is not None:
+                cached_id = self._routes.pop(route, None)
+                if cached_id is not None:
+                    self._drop(cached_id)
+
+
+def page_cache_response(request: Request, entry: CachedPage) -> Response:
+    """Serve cached bytes, answering a matching ``If-None-Match`` with 304."""
+    headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    candidates = [tag.strip() for tag in if_none_match.split(",") if tag.strip()]
+    # Weak comparison: strip W/ prefixes on both sides.
+    if entry.etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in candidates]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+page_read_cache = PageReadCache()
+
+
+def invalidate_page_cache(page_id=None, route: Optional[str] = None) -> None:
+    """Drop cached page responses after a page write."""
+    page_read_cache.invalidate(page_id=page_id, route=route)
@@ -14,6 +14,7 @@ from app.models.persona import Persona
 from app.schemas.persona import PersonaCreate, PersonaUpdate, ModelSettings
 from app.core.database import get_db
 from app.core.auth_context import AuthContext
+from app.services.tag_index import persona_tag_index
 
 logger = logging.getLogger(__name__)
 
@@ -132,9 +133,12 @@ class PersonaService:
                 )
             
             if tags:
-                # Filter by tags (JSON contains any of the specified tags)
-                for tag in tags:
-                    query = query.where(Persona.tags.like(f'%"{tag}"%'))
+                # Filter by tags (persona carries every specified tag)
+                if await persona_tag_index.available(db):
+                    query = query.where(*persona_tag_index.having_all(Persona.id, tags))
+                else:
+                    for tag in tags:
+                        query = query.where(Persona.tags.like(f'%"{tag}"%'))
             
             if is_active is not None:
                 query = query.where(Persona.is_active == is_active)
@@ -223,6 +227,9 @@ class PersonaService:
     ) -> List[str]:
         """Get all unique tags used by user's personas."""
         try:
+            if await persona_tag_index.available(db):
+                return await persona_tag_index.distinct_tags(db, user_id)
+
             query = select(Persona.tags).where(
                 Persona.user_id == user_id,
                 Persona.tags.isnot(None)
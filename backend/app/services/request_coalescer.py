@@ -0,0 +1,204 @@
+"""
+In-flight deduplication for the generate and chat endpoints.
+
+The frontend retries ``/ai/providers/chat`` and ``/generate`` on network
+hiccups, and every retry used to start another provider call. Requests are
+now keyed by the client's ``Idempotency-Key`` header or, without one, by a
+hash of the request body, scoped to the endpoint and user:
+
+- a request whose key is already running joins it. A streamed response is
+  produced once by a background task into a buffer, and every subscriber
+  (the original client included) reads that buffer from the start, so a
+  retry sees the whole stream and a client disconnect does not stop the
+  provider call;
+- a completed response for an ``Idempotency-Key`` is kept for
+  ``REQUEST_REPLAY_TTL_SECONDS`` and replayed to later retries. Hash-keyed
+  requests only coalesce while in flight, so re-sending the same message
+  later still gets a new answer;
+- failed requests (an exception, or a stream that emitted an error event)
+  are never replayed. A request cancelled before it produced a response
+  (its client went away) is dropped, and anyone waiting on it runs the
+  request again instead of inheriting the cancellation.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_STATUS_HEADER = "Idempotency-Status"
+
+# Error events from the providers and the chat stream serialize as {"error": true, ...}
+_STREAM_ERROR_MARKER = '"error": true'
+
+
+def request_key(endpoint: str, payload: BaseModel, idempotency_key: Optional[str]) -> str:
+    """Key for ``payload``: the client's idempotency key or a hash of the body."""
+    user_id = str(getattr(payload, "user_id", None) or "current").replace("-", "")
+    if idempotency_key and idempotency_key.strip():
+        return f"{endpoint}:{user_id}:key:{idempotency_key.strip()[:200]}"
+    body = json.dumps(payload.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+    return f"{endpoint}:{user_id}:body:{hashlib.sha256(body.encode('utf-8')).hexdigest()}"
+
+
+class _InFlightRequest:
+    def __init__(self, key: str, replayable: bool) -> None:
+        self.key = key
+        self.replayable = replayable
+        self.ready: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self.error: Optional[Exception] = None
+        self.value: Any = None
+        self.is_stream = False
+        self.status_code = 200
+        self.media_type: Optional[str] = None
+        self.headers: Dict[str, str] = {}
+        self.chunks: List[Any] = []
+        self.done = False
+        self.failed = False
+        self.cancelled = False
+        self.finished_at: Optional[float] = None
+        self._changed = asyncio.Event()
+        self._producer: Optional["asyncio.Task[None]"] = None
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def _finish(self) -> None:
+        self.done = True
+        self.finished_at = time.monotonic()
+        self._notify()
+
+    async def _produce(self, body_iterator: AsyncIterator[Any], on_finished: Callable[["_InFlightRequest"], None]) -> None:
+        try:
+            async for chunk in body_iterator:
+                if not chunk:
+                    continue
+                if _STREAM_ERROR_MARKER in (chunk if isinstance(chunk, str) else chunk.decode("utf-8", "ignore")):
+                    self.failed = True
+                self.chunks.append(chunk)
+                self._notify()
+        except Exception as exc:
+            self.failed = True
+            logger.warning("coalesced_stream_failed key=%s error=%s", self.key, exc)
+            self.chunks.append(f"data: {json.dumps({'error': True, 'message': str(exc)})}\n\n")
+            self.chunks.append("data: [DONE]\n\n")
+        finally:
+            self._finish()
+            on_finished(self)
+
+    def start_stream(self, response: StreamingResponse, on_finished: Callable[["_InFlightRequest"], None]) -> None:
+        self.is_stream = True
+        self.status_code = response.status_code
+        self.media_type = response.media_type
+        self.headers = {
+            name: value for name, value in response.headers.items() if name.lower() != "content-length"
+        }
+        self._producer = asyncio.ensure_future(self._produce(response.body_iterator, on_finished))
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        index = 0
+        while True:
+            changed = self._changed
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self.done:
+                return
+            await changed.wait()
+
+    def response(self, status: str) -> Any:
+        if not self.is_stream:
+            return self.value
+        headers = {**self.headers, IDEMPOTENCY_STATUS_HEADER: status}
+        return StreamingResponse(
+            self.subscribe(),
+            status_code=self.status_code,
+            media_type=self.media_type,
+            headers=headers,
+        )
+
+
+class RequestCoalescer:
+    """Registry of in-flight and recently completed requests."""
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, _InFlightRequest] = {}
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        expired = [
+            key
+            for key, entry in self._entries.items()
+            if entry.done and (entry.finished_at or now) + settings.REQUEST_REPLAY_TTL_SECONDS <= now
+        ]
+        for key in expired:
+            self._entries.pop(key, None)
+
+    def _release(self, entry: _InFlightRequest) -> None:
+        if not entry.replayable or entry.failed or settings.REQUEST_REPLAY_TTL_SECONDS <= 0:
+            if self._entries.get(entry.key) is entry:
+                self._entries.pop(entry.key, None)
+
+    def in_flight_count(self) -> int:
+        return sum(1 for entry in self._entries.values() if not entry.done)
+
+    async def run(self, key: str, handler: Callable[[], Awaitable[Any]], *, replayable: bool) -> Any:
+        """Run ``handler`` for ``key`` once; concurrent and replayable repeats share its response."""
+        if not settings.REQUEST_COALESCING_ENABLED:
+            return await handler()
+
+        self._prune()
+        existing = self._entries.get(key)
+        if existing is not None:
+            await asyncio.shield(existing.ready)
+            if existing.cancelled:
+                return await self.run(key, handler, replayable=replayable)
+            if existing.error is not None:
+                raise existing.error
+            logger.info("coalesced_request_joined key=%s done=%s", key, existing.done)
+            return existing.response("replayed" if existing.done else "joined")
+
+        entry = _InFlightRequest(key, replayable)
+        self._entries[key] = entry
+        try:
+            result = await handler()
+        except asyncio.CancelledError:
+            entry.cancelled = True
+            entry.failed = True
+            entry._finish()
+            self._release(entry)
+            entry.ready.set_result(None)
+            raise
+        except Exception as exc:
+            entry.error = exc
+            entry.failed = True
+            entry._finish()
+            self._release(entry)
+            entry.ready.set_result(None)
+            raise
+
+        if isinstance(result, StreamingResponse):
+            entry.start_stream(result, self._release)
+            entry.ready.set_result(None)
+            return entry.response("new")
+
+        entry.value = result
+        entry._finish()
+        self._release(entry)
+        entry.ready.set_result(None)
+        return result
+
+
+request_coalescer = RequestCoalescer()
@@ -0,0 +1,140 @@
+"""
+Short-lived cache of per-user scope context used by chat orchestration.
+
+Before every chat turn the orchestration context checks that the scope's
+required files exist (one ``read_file_metadata`` MCP call each) and, on life
+pages, reads the onboarding state. Those answers rarely change between turns,
+so they are cached per ``(user, path)`` for ``SCOPE_CONTEXT_CACHE_TTL_SECONDS``.
+
+``MCPRegistryService`` calls ``invalidate_scope_context_for_tool`` around every
+tool call that may write, dropping cached paths the call touches (or all of
+the user's paths when its arguments name none). A per-user generation counter
+keeps a lookup that raced with a write from caching the pre-write answer.
+"""
+
+from __future__ import annotations
+
+import copy
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+
+
+def _normalize_user_id(user_id: Any) -> str:
+    return str(user_id).replace("-", "")
+
+
+def normalize_scope_path(path: str) -> str:
+    normalized = str(path or "").strip().replace("\\", "/")
+    normalized = re.sub(r"^(?:\./)+", "", normalized)
+    return normalized.strip("/").lower()
+
+
+def _iter_argument_paths(arguments: Any) -> Iterable[str]:
+    if isinstance(arguments, str):
+        if arguments.strip():
+            yield arguments
+    elif isinstance(arguments, dict):
+        for value in arguments.values():
+            if isinstance(value, (str, list, tuple)):
+                yield from _iter_argument_paths(value)
+    elif isinstance(arguments, (list, tuple)):
+        for value in arguments:
+            if isinstance(value, str):
+                yield from _iter_argument_paths(value)
+
+
+class ScopeContextCache:
+    """TTL cache of scope file existence and onboarding state per user."""
+
+    def __init__(self, ttl_seconds: Optional[float] = None) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._files: Dict[Tuple[str, str], Tuple[bool, float]] = {}
+        self._onboarding: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ttl_seconds(self) -> float:
+        if self._ttl_seconds is not None:
+            return self._ttl_seconds
+        return settings.SCOPE_CONTEXT_CACHE_TTL_SECONDS
+
+    def _is_fresh(self, stored_at: float) -> bool:
+        return time.monotonic() - stored_at <= self.ttl_seconds
+
+    def generation(self, user_id: Any) -> int:
+        """Capture before issuing lookups and pass to the ``store_*`` calls."""
+        with self._lock:
+            return self._generations.get(_normalize_user_id(user_id), 0)
+
+    def get_file_exists(self, user_id: Any, path: str) -> Optional[bool]:
+        if self.ttl_seconds <= 0:
+            return None
+        key = (_normalize_user_id(user_id), normalize_scope_path(path))
+        with self._lock:
+            cached = self._files.get(key)
+            if cached is None:
+                return None
+            exists, stored_at = cached
+            if not self._is_fresh(stored_at):
+                self._files.pop(key, None)
+                return None
+            return exists
+
+    def store_file_exists(self, user_id: Any, path: str, exists: bool, generation: int) -> None:
+        user_key = _normalize_user_id(user_id)
+        with self._lock:
+            if self._generations.get(user_key, 0) != generation:
+                return
+            self._files[(user_key, normalize_scope_path(path))] = (bool(exists), time.monotonic())
+
+    def get_onboarding_state(self, user_id: Any) -> Optional[Dict[str, Any]]:
+        if self.ttl_seconds <= 0:
+            return None
+        user_key = _normalize_user_id(user_id)
+        with self._lock:
+            cached = self._onboarding.get(user_key)
+            if cached is None:
+                return None
+            state, stored_at = cached
+            if not self._is_fresh(stored_at):
+                self._onboarding.pop(user_key, None)
+                return None
+            return copy.deepcopy(state)
+
+    def store_onboarding_state(self, user_id: Any, state: Dict[str, Any], generation: int) -> None:
+        user_key = _normalize_user_id(user_id)
+        with self._lock:
+            if self._generations.get(user_key, 0) != generation:
+                return
+            self._onboarding[user_key] = (copy.deepcopy(state), time.monotonic())
+
+    def invalidate(self, user_id: Any, paths: Optional[List[str]] = None) -> None:
+        """Drop ``paths`` (and anything below them) for a user, or all of the user's entries."""
+        user_key = _normalize_user_id(user_id)
+        normalized = [normalize_scope_path(path) for path in paths or []]
+        normalized = [path for path in normalized if path]
+        with self._lock:
+            self._generations[user_key] = self._generations.get(user_key, 0) + 1
+            self._onboarding.pop(user_key, None)
+            for key in list(self._files):
+                if key[0] != user_key:
+                    continue
+                cached_path = key[1]
+                if not normalized or any(
+                    cached_path == path or cached_path.startswith(f"{path}/") for path in normalized
+                ):
+                    self._files.pop(key, None)
+
+
+scope_context_cache = ScopeContextCache()
+
+
+def invalidate_scope_context_for_tool(user_id: Any, tool_name: str, arguments: Any) -> None:
+    """Invalidate cached scope context touched by a (possibly) writing tool call."""
+    paths = [path for path in _iter_argument_paths(arguments) if "/" in path or "." in path]
+    scope_context_cache.invalidate(user_id, paths or None)
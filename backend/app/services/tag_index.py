@@ -0,0 +1,128 @@
+"""
+Indexed tag lookups shared by the persona and conversation listings.
+
+A ``TagIndex`` describes an association table between owners (personas,
+conversations) and tag values, and answers the questions both UIs ask in SQL:
+
+- which owners carry all of the given tags (``EXISTS`` conditions);
+- which tags a user has (``SELECT DISTINCT``);
+- the tags of a page of owners (one query instead of one per owner).
+
+Persona tags live in ``persona_tags``, kept in sync with ``personas.tags`` by
+the triggers of migration ``f2c8a4d6e9b1`` on SQLite. Where those objects are
+missing, ``persona_tag_index.available()`` is False and callers use the JSON
+column instead. Conversation tags are the ``conversation_tags`` and ``tags``
+tables and are always available.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import column, exists, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.tag import ConversationTag, Tag
+
+logger = logging.getLogger(__name__)
+
+persona_tags_table = table(
+    "persona_tags",
+    column("persona_id"),
+    column("user_id"),
+    column("tag"),
+)
+
+
+class TagIndex:
+    """Owner/tag association answered with indexed SQL lookups."""
+
+    def __init__(
+        self,
+        name: str,
+        source: Any,
+        owner_column: Any,
+        user_column: Any,
+        tag_column: Any,
+        load: Any = None,
+        sqlite_objects: Sequence[str] = (),
+    ) -> None:
+        self.name = name
+        self.source = source
+        self.owner_column = owner_column
+        self.user_column = user_column
+        self.tag_column = tag_column
+        self.load = load if load is not None else tag_column
+        self.sqlite_objects = tuple(sqlite_objects)
+        # Per-process detection result; migrations run before the app starts serving.
+        self._available: Optional[bool] = None
+
+    async def available(self, db: AsyncSession) -> bool:
+        if not self.sqlite_objects:
+            return True
+        if self._available is None:
+            dialect = db.bind.dialect.name if db.bind is not None else "sqlite"
+            if dialect != "sqlite":
+                self._available = False
+            else:
+                placeholders = ", ".join(f":name_{index}" for index in range(len(self.sqlite_objects)))
+                result = await db.execute(
+                    text(f"SELECT COUNT(*) FROM sqlite_master WHERE name IN ({placeholders})"),
+                    {f"name_{index}": name for index, name in enumerate(self.sqlite_objects)},
+                )
+                self._available = result.scalar() == len(self.sqlite_objects)
+            if not self._available:
+                logger.warning(f"Tag index '{self.name}' missing; falling back to unindexed tag filters")
+        return self._available
+
+    def having_all(self, owner_id: Any, tags: Sequence[str]) -> List[Any]:
+        """Conditions matching owners (by ``owner_id`` column) that carry every tag."""
+        return [
+            exists().select_from(self.source).where(self.owner_column == owner_id, self.tag_column == tag)
+            for tag in dict.fromkeys(tags)
+        ]
+
+    async def distinct_tags(self, db: AsyncSession, user_id: str) -> List[str]:
+        result = await db.execute(
+            select(self.tag_column)
+            .select_from(self.source)
+            .where(self.user_column == user_id)
+            .distinct()
+            .order_by(self.tag_column)
+        )
+        return [row[0] for row in result.all()]
+
+    async def tags_by_owner(self, db: AsyncSession, owner_ids: Sequence[str]) -> Dict[str, List[Any]]:
+        """Tags of each owner in ``owner_ids``; owners without tags map to an empty list."""
+        tags: Dict[str, List[Any]] = {owner_id: [] for owner_id in owner_ids}
+        if not tags:
+            return tags
+        result = await db.execute(
+            select(self.owner_column, self.load)
+            .select_from(self.source)
+            .where(self.owner_column.in_(list(tags)))
+            .order_by(self.owner_column, self.tag_column)
+        )
+        for owner_id, tag in result.all():
+            tags[owner_id].append(tag)
+        return tags
+
+
+persona_tag_index = TagIndex(
+    "persona_tags",
+    source=persona_tags_table,
+    owner_column=persona_tags_table.c.persona_id,
+    user_column=persona_tags_table.c.user_id,
+    tag_column=persona_tags_table.c.tag,
+    sqlite_objects=("persona_tags", "persona_tags_ai"),
+)
+
+conversation_tag_index = TagIndex(
+    "conversation_tags",
+    source=ConversationTag.__table__.join(Tag.__table__, Tag.id == ConversationTag.tag_id),
+    owner_column=ConversationTag.conversation_id,
+    user_column=Tag.user_id,
+    tag_column=Tag.name,
+    load=Tag,
+)
@@ -0,0 +1,165 @@
+"""
+Concurrent execution of read-only MCP tool calls within one tool pass.
+
+When a model asks for several tools in one turn, the chat tool loops used to
+run them strictly one after another. ``ToolPassScheduler`` lets the loop hand
+off read-only calls as it reaches them, once they have passed the same guard,
+context and approval checks as any other call; they start immediately and run
+concurrently, bounded by a per-user semaphore. Only tools with positive
+read-only evidence (an explicit hint in the schema, or a read-only name prefix)
+are deferred: ``infer_safety_class`` falls back to ``read_only`` for names it
+does not recognise, and those tools may well write.
+
+Before anything else is processed (a mutating call, a denied tool, the end of
+the pass) the loop calls ``drain``, which waits for the deferred calls and
+returns them in the model's original order. Mutating calls therefore still run
+one at a time, after every earlier call has finished. The scheduler also
+records per-tool latency and per-pass wall time for ``mcp_tooling_metadata``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.models.mcp import MCPToolRegistry
+from app.services.mcp_registry_service import MCPRegistryService, has_read_only_evidence
+
+logger = logging.getLogger(__name__)
+
+# Task tools are gated on earlier list_tasks results, so they are never deferred.
+_ORDER_SENSITIVE_TOOLS = {"create_task", "update_task", "complete_task"}
+
+_user_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def _user_semaphore(user_id: str) -> asyncio.Semaphore:
+    key = str(user_id).replace("-", "")
+    semaphore = _user_semaphores.get(key)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max(settings.MCP_READ_ONLY_TOOL_CONCURRENCY, 1))
+        _user_semaphores[key] = semaphore
+    return semaphore
+
+
+@dataclass
+class DeferredToolCall:
+    """A read-only call started by the scheduler and its eventual result."""
+
+    tool_call_id: str
+    tool_name: str
+    arguments: Dict[str, Any]
+    synthetic_reason: Optional[str]
+    task: "asyncio.Future[Dict[str, Any]]"
+    execution: Optional[Dict[str, Any]] = None
+
+
+class ToolPassScheduler:
+    """Runs one pass's read-only tool calls concurrently, preserving order."""
+
+    def __init__(self, runtime_service: MCPRegistryService, user_id: str, pass_index: int) -> None:
+        self._runtime_service = runtime_service
+        self._user_id = user_id
+        self._pass_index = pass_index
+        self._enabled = settings.MCP_READ_ONLY_TOOL_CONCURRENCY > 1
+        self._pending: List[DeferredToolCall] = []
+        self._client: Optional[httpx.AsyncClient] = None
+        self._started_at = time.perf_counter()
+        self._tools: List[Dict[str, Any]] = []
+        self._max_in_flight = 0
+
+    def can_defer(self, tool_name: str, tool_record: Optional[MCPToolRegistry]) -> bool:
+        return (
+            self._enabled
+            and tool_record is not None
+            and str(tool_record.safety_class or "").strip().lower() == "read_only"
+            and tool_name not in _ORDER_SENSITIVE_TOOLS
+            and has_read_only_evidence(tool_name, tool_record.schema_json)
+        )
+
+    async def _send(self, prepared) -> Dict[str, Any]:
+        async with _user_semaphore(self._user_id):
+            if self._client is None:
+                self._client = httpx.AsyncClient(timeout=self._runtime_service.call_timeout_seconds)
+            return await self._runtime_service.send_tool_call(self._client, prepared)
+
+    def defer(
+        self,
+        *,
+        tool_call_id: str,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        synthetic_reason: Optional[str],
+        tool_record: MCPToolRegistry,
+    ) -> None:
+        """Start a read-only call now; its result is returned by ``drain``."""
+        prepared = self._runtime_service.prepare_tool_call(tool_record, self._user_id, tool_name, arguments)
+        if isinstance(prepared, dict):
+            task: "asyncio.Future[Dict[str, Any]]" = asyncio.get_running_loop().create_future()
+            task.set_result(prepared)
+        else:
+            task = asyncio.ensure_future(self._send(prepared))
+        self._pending.append(
+            DeferredToolCall(
+                tool_call_id=tool_call_id,
+                tool_name=tool_name,
+                arguments=arguments,
+                synthetic_reason=synthetic_reason,
+                task=task,
+            )
+        )
+        self._max_in_flight = max(self._max_in_flight, sum(1 for item in self._pending if not item.task.done()))
+
+    async def drain(self) -> List[DeferredToolCall]:
+        """Wait for every deferred call and return them in submission order."""
+        if not self._pending:
+            return []
+        pending, self._pending = self._pending, []
+        executions = await asyncio.gather(*[item.task for item in pending], return_exceptions=True)
+        for item, execution in zip(pending, executions):
+            if isinstance(execution, BaseException):
+                execution = {
+                    "ok": False,
+                    "error": {"code": "TOOL_EXECUTION_ERROR", "message": str(execution)},
+                }
+            item.execution = execution
+            self._record(item.tool_name, execution, concurrent=len(pending) > 1)
+        return pending
+
+    def record_serial(self, tool_name: str, execution: Dict[str, Any]) -> None:
+        self._record(tool_name, execution, concurrent=False)
+
+    def _record(self, tool_name: str, execution: Dict[str, Any], *, concurrent: bool) -> None:
+        self._tools.append(
+            {
+                "name": tool_name,
+                "ok": bool(execution.get("ok")),
+                "latency_ms": execution.get("latency_ms"),
+                "concurrent": concurrent,
+            }
+        )
+
+    async def close(self) -> Optional[Dict[str, Any]]:
+        """Cancel anything left, release the HTTP client and return pass timings."""
+        for item in self._pending:
+            item.task.cancel()
+        self._pending = []
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if not self._tools:
+            return None
+        return {
+            "pass": self._pass_index,
+            "wall_ms": int((time.perf_counter() - self._started_at) * 1000),
+            "tool_count": len(self._tools),
+            "concurrent_count": sum(1 for tool in self._tools if tool["concurrent"]),
+            "max_in_flight": self._max_in_flight,
+            "tools": self._tools,
+        }
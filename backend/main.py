@@ -11,7 +11,7 @@ from structlog.stdlib import BoundLogger
 from pathlib import Path
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from fastapi import FastAPI, Request, Response
+from fastapi import Depends, FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
@@ -30,8 +30,18 @@ from app.core.init_db import init_db
 from app.models import UserRole
 from app.core.database import db_factory, get_db
 from app.core.job_manager_provider import initialize_job_manager, shutdown_job_manager
+from app.core.hot_path_logging import start_hot_path_logging, stop_hot_path_logging
+from app.core.request_timing import render_metrics, warn_if_metrics_per_worker
+from app.core.auth_deps import require_admin
+from app.core.auth_context import AuthContext
+from app.core.audit import audit_writer
+from app.services.audit_storage import schedule_audit_compaction_on_startup
+from app.services.conversation_search import schedule_conversation_search_backfill_on_startup
+from app.services.diagnostics import diagnostics_sampler
+from app.services.ollama_gateway import ollama_gateway
 from app.plugins.service_installler.start_stop_plugin_services import start_plugin_services_from_settings_on_startup, stop_all_plugin_services_on_shutdown
 from app.plugins.route_loader import get_plugin_loader
+from app.plugins.endpoint_executor import shutdown_plugin_endpoint_executor
 from app.middleware.request_size import RequestSizeMiddleware
 from app.middleware.request_id import RequestIdMiddleware
 
@@ -135,9 +145,15 @@ _enforce_encryption_key()
 async def lifespan(app: FastAPI):
     """Lifespan context manager for the FastAPI application."""
     try:
+        start_hot_path_logging()
+        warn_if_metrics_per_worker()
+
         # Initialize the database (without recreating tables)
         await init_db()
         logger.info("✅ Database initialized successfully")
+        audit_writer.start()
+        diagnostics_sampler.start()
+        ollama_gateway.start()
 
         # Create default roles if they don't exist
         async with db_factory.session_factory() as session:
@@ -161,6 +177,8 @@ async def lifespan(app: FastAPI):
             logger.info("✅ Default roles created successfully")
 
             await initialize_job_manager()
+            await schedule_audit_compaction_on_startup(db_factory.session_factory)
+            await schedule_conversation_search_backfill_on_startup(db_factory.session_factory)
             # Start plugin services
             await start_plugin_services_from_settings_on_startup()
 
@@ -178,11 +196,17 @@ async def lifespan(app: FastAPI):
         raise
     finally:
         await stop_all_plugin_services_on_shutdown()
+        shutdown_plugin_endpoint_executor()
         await shutdown_job_manager()
+        await ollama_gateway.stop()
+        await diagnostics_sampler.stop()
+        # Flush buffered audit events before the engine goes away
+        await audit_writer.stop()
         # Cleanup (if needed)
         if not settings.USE_JSON_STORAGE and db_factory.engine:
             await db_factory.engine.dispose()
             logger.info("✅ Database connection closed")
+        stop_hot_path_logging()
 
 # Initialize FastAPI app with lifespan
 app = FastAPI(
@@ -321,6 +345,14 @@ async def validation_exception_handler(request, exc):
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(auth: AuthContext = Depends(require_admin)):
+    # Admin-only: the registry includes every exported metric, e.g. cache labels naming tables and fields.
+    if not settings.CHAT_METRICS_ENABLED:
+        return JSONResponse(status_code=404, content={"detail": "Not Found"})
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
@@ -0,0 +1,145 @@
+"""add module search index
+
+Adds a full-text index over module name/display_name/description and a
+normalized ``module_tags`` table so the plugin manager listing can filter,
+rank, count and paginate in SQL.
+
+On SQLite the index is an FTS5 virtual table; both it and ``module_tags`` are
+kept in sync with ``module`` by triggers, so every writer (repository,
+lifecycle managers, raw SQL) is covered. On PostgreSQL only a GIN index over
+the equivalent ``to_tsvector`` expression is created; tag filtering there
+stays on the JSON column.
+
+Revision ID: 4c8e2f1a9b3d
+Revises: 2cb3f0bb9d9d
+Create Date: 2026-10-18 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4c8e2f1a9b3d"
+down_revision: Union[str, None] = "2cb3f0bb9d9d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_TAGS_FROM_NEW = """
+    INSERT OR IGNORE INTO module_tags (module_id, plugin_id, user_id, tag)
+    SELECT NEW.id, NEW.plugin_id, NEW.user_id, TRIM(value)
+    FROM json_each(
+        CASE WHEN json_valid(NEW.tags) AND json_type(NEW.tags) = 'array' THEN NEW.tags ELSE '[]' END
+    )
+    WHERE type = 'text' AND TRIM(value) <> '';
+"""
+
+_SEARCH_FROM_NEW = """
+    INSERT INTO module_search (module_id, plugin_id, user_id, name, display_name, description)
+    VALUES (NEW.id, NEW.plugin_id, NEW.user_id, NEW.name, NEW.display_name, NEW.description);
+"""
+
+_DELETE_OLD = """
+    DELETE FROM module_search WHERE module_id = OLD.id AND plugin_id = OLD.plugin_id;
+    DELETE FROM module_tags WHERE module_id = OLD.id AND plugin_id = OLD.plugin_id;
+"""
+
+_POSTGRES_TSVECTOR = (
+    "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(display_name, '') "
+    "|| ' ' || coalesce(description, ''))"
+)
+
+
+def _table_exists(name: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return name in inspector.get_table_names()
+
+
+def _index_exists(table_name: str, index_name: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    indexes = inspector.get_indexes(table_name) if table_name in inspector.get_table_names() else []
+    return any(index.get("name") == index_name for index in indexes)
+
+
+def _upgrade_sqlite() -> None:
+    if not _table_exists("module_tags"):
+        op.create_table(
+            "module_tags",
+            sa.Column("module_id", sa.String(length=32), nullable=False),
+            sa.Column("plugin_id", sa.String(length=32), nullable=False),
+            sa.Column("user_id", sa.String(length=32), nullable=False),
+            sa.Column("tag", sa.String(), nullable=False),
+            sa.PrimaryKeyConstraint("module_id", "plugin_id", "tag"),
+        )
+    if not _index_exists("module_tags", "ix_module_tags_user_tag"):
+        op.create_index("ix_module_tags_user_tag", "module_tags", ["user_id", "tag"], unique=False)
+
+    op.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS module_search USING fts5(
+            module_id UNINDEXED,
+            plugin_id UNINDEXED,
+            user_id UNINDEXED,
+            name,
+            display_name,
+            description,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+        """
+    )
+
+    op.execute(f"CREATE TRIGGER IF NOT EXISTS module_search_ai AFTER INSERT ON module BEGIN {_SEARCH_FROM_NEW} {_TAGS_FROM_NEW} END")
+    op.execute(f"CREATE TRIGGER IF NOT EXISTS module_search_ad AFTER DELETE ON module BEGIN {_DELETE_OLD} END")
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS module_search_au AFTER UPDATE ON module BEGIN "
+        f"{_DELETE_OLD} {_SEARCH_FROM_NEW} {_TAGS_FROM_NEW} END"
+    )
+
+    # Backfill from existing rows.
+    op.execute("DELETE FROM module_search")
+    op.execute(
+        """
+        INSERT INTO module_search (module_id, plugin_id, user_id, name, display_name, description)
+        SELECT id, plugin_id, user_id, name, display_name, description FROM module
+        """
+    )
+    op.execute(
+        """
+        INSERT OR IGNORE INTO module_tags (module_id, plugin_id, user_id, tag)
+        SELECT module.id, module.plugin_id, module.user_id, TRIM(tag_values.value)
+        FROM module, json_each(
+            CASE WHEN json_valid(module.tags) AND json_type(module.tags) = 'array' THEN module.tags ELSE '[]' END
+        ) AS tag_values
+        WHERE tag_values.type = 'text' AND TRIM(tag_values.value) <> ''
+        """
+    )
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        _upgrade_sqlite()
+    elif dialect == "postgresql":
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_module_search_tsv ON module USING gin ({_POSTGRES_TSVECTOR})"
+        )
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS module_search_au")
+        op.execute("DROP TRIGGER IF EXISTS module_search_ad")
+        op.execute("DROP TRIGGER IF EXISTS module_search_ai")
+        op.execute("DROP TABLE IF EXISTS module_search")
+    elif dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_module_search_tsv")
+
+    if _table_exists("module_tags"):
+        if _index_exists("module_tags", "ix_module_tags_user_tag"):
+            op.drop_index("ix_module_tags_user_tag", table_name="module_tags")
+        op.drop_table("module_tags")
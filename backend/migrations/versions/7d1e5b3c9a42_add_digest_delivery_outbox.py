@@ -0,0 +1,61 @@
+"""add digest delivery outbox
+
+Adds ``digest_delivery_outbox``, the durable queue of digest handoffs that
+the digest delivery dispatch job POSTs to the configured webhook. Rows are
+inserted alongside the assistant message, so chat requests no longer wait on
+the webhook.
+
+Revision ID: 7d1e5b3c9a42
+Revises: 4c8e2f1a9b3d
+Create Date: 2026-10-18 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7d1e5b3c9a42"
+down_revision: Union[str, None] = "4c8e2f1a9b3d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "digest_delivery_outbox",
+        sa.Column("id", sa.String(32), primary_key=True),
+        sa.Column("user_id", sa.String(32), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("message_id", sa.String(36), sa.ForeignKey("messages.id", ondelete="CASCADE"), nullable=True),
+        sa.Column("conversation_id", sa.String(36), nullable=True),
+        sa.Column("channel", sa.String(32), nullable=False),
+        sa.Column("target", sa.Text(), nullable=False),
+        sa.Column("endpoint_key", sa.String(64), nullable=False),
+        sa.Column("endpoint_sanitized", sa.Text(), nullable=True),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("max_attempts", sa.Integer(), nullable=False, server_default="6"),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("claimed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("sent_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_http_status", sa.Integer(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("ack_id", sa.String(255), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index(
+        "idx_digest_delivery_outbox_due",
+        "digest_delivery_outbox",
+        ["user_id", "status", "next_attempt_at"],
+    )
+    op.create_index("idx_digest_delivery_outbox_message", "digest_delivery_outbox", ["message_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_digest_delivery_outbox_message", table_name="digest_delivery_outbox")
+    op.drop_index("idx_digest_delivery_outbox_due", table_name="digest_delivery_outbox")
+    op.drop_table("digest_delivery_outbox")
@@ -0,0 +1,52 @@
+"""add message context tokens and conversation summary
+
+Stores an estimated prompt token count on every message and a rolling
+summary of out-of-window turns on each conversation, so chat completion can
+select the newest messages that fit the model's budget in one indexed query.
+
+Revision ID: 9b4f2c6e1d07
+Revises: 7d1e5b3c9a42
+Create Date: 2026-10-18 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9b4f2c6e1d07"
+down_revision: Union[str, None] = "7d1e5b3c9a42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("messages") as batch_op:
+        batch_op.add_column(sa.Column("context_tokens", sa.Integer(), nullable=True))
+    with op.batch_alter_table("conversations") as batch_op:
+        batch_op.add_column(sa.Column("context_summary", sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column("context_summary_count", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("context_summary_through", sa.DateTime(timezone=True), nullable=True))
+
+    # Same ~4 characters per token estimate the application writes.
+    op.execute(
+        "UPDATE messages SET context_tokens = "
+        "CASE WHEN message IS NULL OR LENGTH(message) = 0 THEN 0 ELSE (LENGTH(message) + 3) / 4 END"
+    )
+    op.create_index(
+        "idx_messages_conversation_created",
+        "messages",
+        ["conversation_id", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_messages_conversation_created", table_name="messages")
+    with op.batch_alter_table("conversations") as batch_op:
+        batch_op.drop_column("context_summary_through")
+        batch_op.drop_column("context_summary_count")
+        batch_op.drop_column("context_summary")
+    with op.batch_alter_table("messages") as batch_op:
+        batch_op.drop_column("context_tokens")
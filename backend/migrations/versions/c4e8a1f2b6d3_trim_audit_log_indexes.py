@@ -0,0 +1,45 @@
+"""trim audit log indexes
+
+Replaces the seven audit_logs indexes with the four the audit query API and
+the compaction job use: every index is maintained on each insert, and audit
+writes are the hottest insert path under attack. idx_audit_request_id stays
+for the request_id filter.
+
+Revision ID: c4e8a1f2b6d3
+Revises: 9b4f2c6e1d07
+Create Date: 2026-10-18 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c4e8a1f2b6d3"
+down_revision: Union[str, None] = "9b4f2c6e1d07"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_DROPPED_INDEXES = (
+    ("idx_audit_event_type", ["event_type"]),
+    ("idx_audit_actor", ["actor_type", "actor_id"]),
+    ("idx_audit_timestamp", ["timestamp"]),
+    ("idx_audit_resource", ["resource_type", "resource_id"]),
+    ("idx_audit_status", ["status"]),
+)
+
+
+def upgrade() -> None:
+    for name, _ in _DROPPED_INDEXES:
+        op.drop_index(name, table_name="audit_logs")
+    op.create_index("idx_audit_time_id", "audit_logs", ["timestamp", "id"])
+    op.create_index("idx_audit_actor_time", "audit_logs", ["actor_id", "timestamp"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_audit_actor_time", table_name="audit_logs")
+    op.drop_index("idx_audit_time_id", table_name="audit_logs")
+    for name, columns in _DROPPED_INDEXES:
+        op.create_index(name, "audit_logs", columns)
@@ -0,0 +1,40 @@
+"""normalize settings instance scope
+
+Rows written with raw SQL stored the scope value ('user') while the ORM stores
+the enum name ('USER'), and some rows used '' instead of NULL for user_id and
+page_id. Lookups therefore had to use LOWER(scope) and "IS NULL OR = ''",
+which no index can serve. This rewrites every row into the ORM's form and adds
+the composite index the settings lookups filter on.
+
+Revision ID: d7a3e9c1f5b2
+Revises: c4e8a1f2b6d3
+Create Date: 2026-10-18 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d7a3e9c1f5b2"
+down_revision: Union[str, None] = "c4e8a1f2b6d3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Enum names are the upper-cased values (user -> USER, user_page -> USER_PAGE)
+    op.execute("UPDATE settings_instances SET scope = UPPER(scope) WHERE scope <> UPPER(scope)")
+    op.execute("UPDATE settings_instances SET user_id = NULL WHERE user_id = ''")
+    op.execute("UPDATE settings_instances SET page_id = NULL WHERE page_id = ''")
+    op.create_index(
+        "idx_settings_instances_lookup",
+        "settings_instances",
+        ["user_id", "definition_id", "scope", "page_id"],
+    )
+
+
+def downgrade() -> None:
+    # The normalized values are read correctly by older code, so only the index is removed.
+    op.drop_index("idx_settings_instances_lookup", table_name="settings_instances")
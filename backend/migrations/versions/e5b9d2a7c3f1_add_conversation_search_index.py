@@ -0,0 +1,139 @@
+"""add conversation search index
+
+Adds a full-text index over conversation titles and message bodies for
+``GET /conversations/search``.
+
+On SQLite the index is an FTS5 table, ``conversation_search``, whose rowids
+point into ``conversation_search_docs``. That table maps each rowid to its
+conversation, message and owning user. A conversation title is a document
+with a NULL ``message_id``. Triggers keep both tables in step with
+``conversations`` and ``messages``, inside the writing transaction. The docs
+table makes those triggers rowid lookups rather than scans of the FTS table,
+and lets a search filter by user through an ordinary index.
+
+Existing history is not indexed here; the ``system.conversation_search_backfill``
+job does it in batches after startup. On PostgreSQL only GIN indexes over the
+equivalent ``to_tsvector`` expressions are created.
+
+Revision ID: e5b9d2a7c3f1
+Revises: d7a3e9c1f5b2
+Create Date: 2026-10-18 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e5b9d2a7c3f1"
+down_revision: Union[str, None] = "d7a3e9c1f5b2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_TRIGGERS = {
+    "conversation_search_message_ai": """
+        AFTER INSERT ON messages BEGIN
+            INSERT INTO conversation_search_docs (conversation_id, message_id, user_id, created_at)
+            SELECT NEW.conversation_id, NEW.id, user_id, NEW.created_at FROM conversations WHERE id = NEW.conversation_id;
+            INSERT INTO conversation_search (rowid, title, body)
+            SELECT id, '', NEW.message FROM conversation_search_docs WHERE message_id = NEW.id;
+        END
+    """,
+    "conversation_search_message_au": """
+        AFTER UPDATE OF message ON messages BEGIN
+            UPDATE conversation_search SET body = NEW.message
+            WHERE rowid IN (SELECT id FROM conversation_search_docs WHERE message_id = NEW.id);
+        END
+    """,
+    "conversation_search_message_ad": """
+        AFTER DELETE ON messages BEGIN
+            DELETE FROM conversation_search
+            WHERE rowid IN (SELECT id FROM conversation_search_docs WHERE message_id = OLD.id);
+            DELETE FROM conversation_search_docs WHERE message_id = OLD.id;
+        END
+    """,
+    "conversation_search_conversation_ai": """
+        AFTER INSERT ON conversations BEGIN
+            INSERT INTO conversation_search_docs (conversation_id, message_id, user_id, created_at)
+            VALUES (NEW.id, NULL, NEW.user_id, NEW.created_at);
+            INSERT INTO conversation_search (rowid, title, body)
+            VALUES (last_insert_rowid(), coalesce(NEW.title, ''), '');
+        END
+    """,
+    "conversation_search_conversation_au": """
+        AFTER UPDATE OF title ON conversations BEGIN
+            UPDATE conversation_search SET title = coalesce(NEW.title, '')
+            WHERE rowid IN (
+                SELECT id FROM conversation_search_docs WHERE conversation_id = NEW.id AND message_id IS NULL
+            );
+        END
+    """,
+    "conversation_search_conversation_owner_au": """
+        AFTER UPDATE OF user_id ON conversations WHEN OLD.user_id IS NOT NEW.user_id BEGIN
+            UPDATE conversation_search_docs SET user_id = NEW.user_id WHERE conversation_id = NEW.id;
+        END
+    """,
+    "conversation_search_conversation_ad": """
+        AFTER DELETE ON conversations BEGIN
+            DELETE FROM conversation_search
+            WHERE rowid IN (SELECT id FROM conversation_search_docs WHERE conversation_id = OLD.id);
+            DELETE FROM conversation_search_docs WHERE conversation_id = OLD.id;
+        END
+    """,
+}
+
+_POSTGRES_INDEXES = {
+    "ix_messages_search_tsv": "messages USING gin (to_tsvector('simple', coalesce(message, '')))",
+    "ix_conversations_search_tsv": "conversations USING gin (to_tsvector('simple', coalesce(title, '')))",
+}
+
+
+def _upgrade_sqlite() -> None:
+    op.create_table(
+        "conversation_search_docs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("conversation_id", sa.String(), nullable=False),
+        sa.Column("message_id", sa.String(length=32), nullable=True),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_conversation_search_docs_message", "conversation_search_docs", ["message_id"])
+    op.create_index("ix_conversation_search_docs_conversation", "conversation_search_docs", ["conversation_id"])
+    op.create_index("ix_conversation_search_docs_user", "conversation_search_docs", ["user_id"])
+
+    op.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS conversation_search USING fts5(
+            title,
+            body,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+        """
+    )
+    for name, body in _TRIGGERS.items():
+        op.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        _upgrade_sqlite()
+    elif dialect == "postgresql":
+        for name, definition in _POSTGRES_INDEXES.items():
+            op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for name in _TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+        op.execute("DROP TABLE IF EXISTS conversation_search")
+        op.drop_table("conversation_search_docs")
+    elif dialect == "postgresql":
+        for name in _POSTGRES_INDEXES:
+            op.execute(f"DROP INDEX IF EXISTS {name}")
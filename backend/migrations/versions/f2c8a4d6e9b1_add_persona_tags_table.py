@@ -0,0 +1,113 @@
+"""add persona tags table
+
+Adds a normalized ``persona_tags`` table so persona listings filter by tag
+with an indexed lookup and the tag cloud is a ``SELECT DISTINCT``, instead of
+``LIKE`` over the JSON ``personas.tags`` column and parsing it in Python.
+
+On SQLite ``persona_tags`` is kept in sync with ``personas.tags`` by
+triggers, so every writer is covered, and it is backfilled here. On
+PostgreSQL persona tag filtering stays on the JSON column, as module tags do.
+
+Also indexes ``conversation_tags`` by tag and ``tags`` by user and name, the
+lookups of the conversation tag filter and tag lists.
+
+Revision ID: f2c8a4d6e9b1
+Revises: e5b9d2a7c3f1
+Create Date: 2026-10-18 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f2c8a4d6e9b1"
+down_revision: Union[str, None] = "e5b9d2a7c3f1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_TAGS_FROM_NEW = """
+    INSERT OR IGNORE INTO persona_tags (persona_id, user_id, tag)
+    SELECT NEW.id, NEW.user_id, TRIM(value)
+    FROM json_each(
+        CASE WHEN json_valid(NEW.tags) AND json_type(NEW.tags) = 'array' THEN NEW.tags ELSE '[]' END
+    )
+    WHERE type = 'text' AND TRIM(value) <> '';
+"""
+
+_DELETE_OLD = """
+    DELETE FROM persona_tags WHERE persona_id = OLD.id;
+"""
+
+
+def _table_exists(name: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return name in inspector.get_table_names()
+
+
+def _index_exists(table_name: str, index_name: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    indexes = inspector.get_indexes(table_name) if table_name in inspector.get_table_names() else []
+    return any(index.get("name") == index_name for index in indexes)
+
+
+def _upgrade_sqlite() -> None:
+    if not _table_exists("persona_tags"):
+        op.create_table(
+            "persona_tags",
+            sa.Column("persona_id", sa.String(length=32), nullable=False),
+            sa.Column("user_id", sa.String(length=32), nullable=False),
+            sa.Column("tag", sa.String(), nullable=False),
+            sa.PrimaryKeyConstraint("persona_id", "tag"),
+        )
+    if not _index_exists("persona_tags", "ix_persona_tags_user_tag"):
+        op.create_index("ix_persona_tags_user_tag", "persona_tags", ["user_id", "tag"], unique=False)
+
+    op.execute(f"CREATE TRIGGER IF NOT EXISTS persona_tags_ai AFTER INSERT ON personas BEGIN {_TAGS_FROM_NEW} END")
+    op.execute(f"CREATE TRIGGER IF NOT EXISTS persona_tags_ad AFTER DELETE ON personas BEGIN {_DELETE_OLD} END")
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS persona_tags_au AFTER UPDATE OF tags, user_id ON personas BEGIN "
+        f"{_DELETE_OLD} {_TAGS_FROM_NEW} END"
+    )
+
+    # Backfill from existing rows.
+    op.execute("DELETE FROM persona_tags")
+    op.execute(
+        """
+        INSERT OR IGNORE INTO persona_tags (persona_id, user_id, tag)
+        SELECT personas.id, personas.user_id, TRIM(tag_values.value)
+        FROM personas, json_each(
+            CASE WHEN json_valid(personas.tags) AND json_type(personas.tags) = 'array' THEN personas.tags ELSE '[]' END
+        ) AS tag_values
+        WHERE tag_values.type = 'text' AND TRIM(tag_values.value) <> ''
+        """
+    )
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        _upgrade_sqlite()
+
+    if not _index_exists("conversation_tags", "ix_conversation_tags_tag"):
+        op.create_index("ix_conversation_tags_tag", "conversation_tags", ["tag_id", "conversation_id"], unique=False)
+    if not _index_exists("tags", "ix_tags_user_name"):
+        op.create_index("ix_tags_user_name", "tags", ["user_id", "name"], unique=False)
+
+
+def downgrade() -> None:
+    if _index_exists("tags", "ix_tags_user_name"):
+        op.drop_index("ix_tags_user_name", table_name="tags")
+    if _index_exists("conversation_tags", "ix_conversation_tags_tag"):
+        op.drop_index("ix_conversation_tags_tag", table_name="conversation_tags")
+
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS persona_tags_au")
+        op.execute("DROP TRIGGER IF EXISTS persona_tags_ad")
+        op.execute("DROP TRIGGER IF EXISTS persona_tags_ai")
+        if _table_exists("persona_tags"):
+            if _index_exists("persona_tags", "ix_persona_tags_user_tag"):
+                op.drop_index("ix_persona_tags_user_tag", table_name="persona_tags")
+            op.drop_table("persona_tags")
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the chat routing intent analysis.
+
+Runs the routing decisions a chat turn makes about the latest user message
+over a representative corpus, once through the helpers as they were before
+``app/services/chat_intent.py`` (copied below: each one re-normalizes the
+message and runs its own uncompiled patterns) and once through the cached
+``analyze_message``. Both must agree on every decision before anything is
+timed.
+
+Usage: python scripts/benchmark_chat_intent.py [--rounds N]
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.chat_intent import analyze_message  # noqa: E402
+
+CORPUS = [
+    "Mark T-12 as done",
+    "Please update the task due date to next friday and set priority to p1",
+    "Create a task to call the bank tomorrow #finance tags: banking, urgent",
+    "Do not update anything, just show my open tasks",
+    "Which tasks are due this week?",
+    "task: renew passport by 2026-11-01",
+    "Let's start the onboarding interview for my health page",
+    "skip this question",
+    "continue where we left off",
+    "Create a new project page for Garage Cleanup with a budget section",
+    "Capture this: decided to move the launch to month end",
+    "What should I cook tonight? Something quick with chicken and rice.",
+    "Summarize the meeting transcript and log this decision for the team",
+    "Can you help me rewrite this paragraph so it sounds more confident " * 4,
+    "I finished reading the chapter, what is next in my study plan?",
+    "Remember this: Alex prefers calls after 3pm on weekdays",
+]
+
+# Pre-change helpers, as they were in app/api/v1/endpoints/ai_providers.py.
+
+_LEGACY_CREATE_MARKERS = (
+    "create a task",
+    "create task",
+    "new task",
+    "add a task",
+    "add task",
+    "make a task",
+    "open a task",
+    "log a task",
+    "track a task",
+)
+
+
+def legacy_onboarding_kickoff(message_text):
+    normalized = message_text.strip().lower()
+    if not normalized:
+        return False
+    has_onboarding_context = "onboarding" in normalized or "interview" in normalized
+    has_start_intent = any(
+        token in normalized
+        for token in ("start", "begin", "kickoff", "kick off", "let us start", "lets start")
+    )
+    return has_onboarding_context and has_start_intent
+
+
+def legacy_onboarding_skip(message_text):
+    normalized = " ".join(message_text.strip().lower().split())
+    if not normalized:
+        return False
+    skip_markers = ("skip", "skip this", "pass", "move on", "next question", "not now", "later")
+    return any(marker in normalized for marker in skip_markers)
+
+
+def legacy_onboarding_resume(message_text):
+    normalized = " ".join(message_text.strip().lower().split())
+    if not normalized:
+        return False
+    resume_markers = ("resume", "continue", "pick up", "where we left off")
+    has_onboarding_context = "onboarding" in normalized or "interview" in normalized
+    return any(marker in normalized for marker in resume_markers) and (
+        has_onboarding_context or len(normalized.split()) <= 3
+    )
+
+
+def legacy_task_mutation_kind(message_text):
+    normalized = " ".join(message_text.strip().lower().split())
+    if not normalized:
+        return None
+    if not re.search(r"\b(task|tasks|todo|to-do|t-\d{1,6})\b", normalized):
+        return None
+    negated_mutation_patterns = (
+        r"\b(?:do\s+not|don't|dont|without)\s+(?:create|add|open|make|edit|modify|update|change|complete|close|finish|resolve|mark)\b",
+        r"\blookup\s+only\b",
+        r"\bread[\s-]?only\b",
+        r"\bno\s+changes?\b",
+    )
+    if any(re.search(pattern, normalized) for pattern in negated_mutation_patterns):
+        return None
+    if any(marker in normalized for marker in _LEGACY_CREATE_MARKERS):
+        return None
+    completion_patterns = (
+        r"\bcomplete(d|ing)?\b",
+        r"\bmark\b.{0,32}\b(done|complete|completed)\b",
+        r"\bdone\b",
+        r"\bfinish(ed|ing)?\b",
+        r"\bclose(d|ing)?\b",
+        r"\bresolve(d|ing)?\b",
+    )
+    if any(re.search(pattern, normalized) for pattern in completion_patterns):
+        return "complete"
+    edit_patterns = (
+        r"\b(edit|update|modify|change|adjust|rename|reschedule)\b",
+        r"\bassign(?:ed)?\b",
+        r"\bset\b.{0,32}\b(?:due|owner|assignee|priority|status|tags?|scope|project)\b",
+        r"\bmove\b.{0,32}\b(?:due|owner|assignee|priority|status|tags?|scope|project|to\s+p[0-3])\b",
+    )
+    if any(re.search(pattern, normalized) for pattern in edit_patterns):
+        return "edit"
+    return None
+
+
+def legacy_task_lookup(message_text):
+    normalized = " ".join(message_text.strip().lower().split())
+    if not normalized:
+        return False
+    if not re.search(r"\b(task|tasks|todo|to-do|t-\d{1,6})\b", normalized):
+        return False
+    if legacy_task_mutation_kind(normalized) in {"complete", "edit"}:
+        return False
+    if any(marker in normalized for marker in _LEGACY_CREATE_MARKERS):
+        return False
+    if normalized.endswith("?"):
+        return True
+    lookup_markers = (
+        "check", "show", "list", "find", "lookup", "look up", "search", "existing", "open task",
+        "open tasks", "already", "match", "matches", "read-only", "read only", "lookup only",
+    )
+    return any(marker in normalized for marker in lookup_markers)
+
+
+def legacy_new_task(message_text):
+    normalized = " ".join(message_text.strip().lower().split())
+    if not normalized:
+        return False
+    if not re.search(r"\b(task|tasks|todo|to-do)\b", normalized):
+        return False
+    if legacy_task_mutation_kind(normalized) in {"complete", "edit"}:
+        return False
+    if "task:" in normalized or normalized.startswith("todo:"):
+        return True
+    return any(marker in normalized for marker in _LEGACY_CREATE_MARKERS)
+
+
+def legacy_priority(message_text):
+    lowered = " ".join(message_text.strip().lower().split())
+    if not lowered:
+        return None
+    if re.search(r"\b(p0|critical|blocker)\b", lowered):
+        return "p0"
+    if re.search(r"\b(p1|urgent|highest priority|high priority)\b", lowered):
+        return "p1"
+    if re.search(r"\b(p2|medium priority|normal priority)\b", lowered):
+        return "p2"
+    if re.search(r"\b(p3|low priority)\b", lowered):
+        return "p3"
+    return None
+
+
+def legacy_capture_tags(message_text):
+    tags = []
+    seen = set()
+    for hash_tag in re.findall(r"#([a-z0-9][a-z0-9_-]{1,30})", message_text, flags=re.IGNORECASE):
+        normalized = hash_tag.strip().lower()
+        if normalized and normalized not in seen:
+            seen.add(normalized)
+            tags.append(normalized)
+    labeled_match = re.search(r"\btags?\s*:\s*([^\n\r;.]*)", message_text, flags=re.IGNORECASE)
+    if labeled_match:
+        raw_value = str(labeled_match.group(1) or "").strip()
+        if raw_value:
+            stop_match = re.search(
+                r"\b(?:due|by|priority|owner|assign(?:ed)?|scope|project)\b", raw_value, flags=re.IGNORECASE
+            )
+            if stop_match:
+                raw_value = raw_value[: stop_match.start()].strip(" ,")
+        if "," in raw_value:
+            raw_tokens = [token.strip() for token in raw_value.split(",")]
+        else:
+            raw_tokens = re.split(r"\s+", raw_value)
+        for token in raw_tokens:
+            normalized = token.strip().lower().strip("#")
+            if len(normalized) < 2:
+                continue
+            if not re.fullmatch(r"[a-z0-9][a-z0-9_-]{1,30}", normalized):
+                continue
+            if normalized in seen:
+                continue
+            seen.add(normalized)
+            tags.append(normalized)
+    return tags
+
+
+def legacy_new_page_request(message_text):
+    normalized = " ".join(message_text.strip().split())
+    if not normalized:
+        return None
+    verb_pattern = r"(?:create|add|start|open|make|build|spin up|set up|setup)"
+    typed_match = re.search(
+        rf"\b{verb_pattern}\s+(?:a\s+)?(?:new\s+)?(life|project)\s+"
+        r"(?:page|area|scope|workspace|folder)?(?:\s+(?:for|about|called|named))?\s+(.+)$",
+        normalized,
+        flags=re.IGNORECASE,
+    )
+    untyped_match = re.search(
+        rf"\b{verb_pattern}\s+(?:a\s+)?new\s+(?:page|area|scope|workspace|folder)"
+        r"(?:\s+(?:for|about|called|named))?\s+(.+)$",
+        normalized,
+        flags=re.IGNORECASE,
+    )
+    if not typed_match and not untyped_match:
+        return None
+    if typed_match:
+        return str(typed_match.group(1) or "").strip().lower(), str(typed_match.group(2) or "").strip()
+    return "", str(untyped_match.group(1) or "").strip()
+
+
+# Routing decision -> pre-change helper
+DECISIONS = {
+    "task_mutation_kind": legacy_task_mutation_kind,
+    "is_task_lookup": legacy_task_lookup,
+    "is_new_task": legacy_new_task,
+    "is_onboarding_kickoff": legacy_onboarding_kickoff,
+    "is_onboarding_skip": legacy_onboarding_skip,
+    "is_onboarding_resume": legacy_onboarding_resume,
+    "priority": legacy_priority,
+    "capture_tags": legacy_capture_tags,
+    "new_page_request": legacy_new_page_request,
+}
+
+
+def check_equivalent():
+    for text in CORPUS:
+        for decision, legacy in DECISIONS.items():
+            expected, actual = legacy(text), getattr(analyze_message(text), decision)
+            if expected != actual:
+                raise SystemExit(f"{decision} differs for {text!r}: legacy={expected!r} new={actual!r}")
+
+
+def run_legacy(rounds):
+    for _ in range(rounds):
+        for text in CORPUS:
+            for legacy in DECISIONS.values():
+                legacy(text)
+
+
+def run_cached(rounds):
+    for _ in range(rounds):
+        analyze_message.cache_clear()  # one fresh analysis per message per round, like a new turn
+        for text in CORPUS:
+            for decision in DECISIONS:
+                getattr(analyze_message(text), decision)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    check_equivalent()
+    turns = args.rounds * len(CORPUS)
+    for label, runner in (("legacy", run_legacy), ("cached", run_cached)):
+        started = time.perf_counter()
+        runner(args.rounds)
+        elapsed = time.perf_counter() - started
+        print(f"{label:>9}: {elapsed * 1e6 / turns:8.1f} us/turn ({turns} turns, {len(DECISIONS)} decisions each)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark chat turn persistence on SQLite at a fixed concurrency.
+
+Each worker runs chat turns against its own conversation on a temporary WAL
+database (same PRAGMAs as the app, without foreign keys so no users/personas
+rows are needed). Three write patterns are compared:
+
+- ``per-step``: the previous behaviour of a streaming turn, one commit for the
+  conversation update (page binding / persona), one for the approval state and
+  one for the user and assistant messages;
+- ``streaming``: ChatTurnWriter for a streaming turn, one commit before the
+  stream and one with the reply;
+- ``single``: ChatTurnWriter for a non-streaming turn, one commit.
+
+Usage: python scripts/benchmark_chat_persistence.py [--concurrency N] [--turns N]
+"""
+
+import argparse
+import asyncio
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import NullPool  # noqa: E402
+
+from app.models.conversation import Conversation  # noqa: E402
+from app.models.message import Message  # noqa: E402
+from app.services.chat_persistence import ChatTurnWriter  # noqa: E402
+
+REPLY = "Here is a reply of a typical length. " * 20
+
+
+def _user_message(conversation_id: str, turn: int) -> Message:
+    return Message(
+        id=str(uuid.uuid4()),
+        conversation_id=conversation_id,
+        sender="user",
+        message=f"Question number {turn} about my project",
+        message_metadata={"role": "user"},
+    )
+
+
+async def per_step_turn(session_factory, conversation_id: str, turn: int) -> None:
+    async with session_factory() as db:
+        conversation = await db.get(Conversation, conversation_id)
+        conversation.page_id = f"page{turn % 3}"
+        await db.commit()
+        conversation.context_summary_count = turn
+        await db.commit()
+        db.add(_user_message(conversation_id, turn))
+        db.add(Message(id=str(uuid.uuid4()), conversation_id=conversation_id, sender="llm", message=REPLY))
+        await db.commit()
+
+
+async def writer_turn(session_factory, conversation_id: str, turn: int, streaming: bool) -> None:
+    async with session_factory() as db:
+        writer = ChatTurnWriter(db, checkpoint_interval_seconds=0)
+        conversation = await db.get(Conversation, conversation_id)
+        writer.bind_conversation(conversation)
+        conversation.page_id = f"page{turn % 3}"
+        conversation.context_summary_count = turn
+        writer.add(_user_message(conversation_id, turn))
+        if streaming:
+            await writer.commit()
+        writer.stage_assistant_message(message_id=str(uuid.uuid4()), content=REPLY, metadata={"model": "bench"})
+        await writer.commit()
+
+
+async def run(pattern: str, concurrency: int, turns: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp}/bench.db",
+            poolclass=NullPool,
+            connect_args={"check_same_thread": False, "timeout": 30},
+        )
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def set_sqlite_pragma(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute("PRAGMA busy_timeout=5000")
+            cursor.close()
+
+        async with engine.begin() as conn:
+            await conn.run_sync(
+                lambda sync_conn: Conversation.metadata.create_all(
+                    sync_conn, tables=[Conversation.__table__, Message.__table__]
+                )
+            )
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+
+        conversation_ids = [uuid.uuid4().hex for _ in range(concurrency)]
+        async with session_factory() as db:
+            for conversation_id in conversation_ids:
+                db.add(Conversation(id=conversation_id, user_id="bench", title="Benchmark"))
+            await db.commit()
+
+        async def worker(conversation_id: str) -> None:
+            for turn in range(turns):
+                if pattern == "per-step":
+                    await per_step_turn(session_factory, conversation_id, turn)
+                else:
+                    await writer_turn(session_factory, conversation_id, turn, streaming=pattern == "streaming")
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker(conversation_id) for conversation_id in conversation_ids])
+        elapsed = time.perf_counter() - started
+        await engine.dispose()
+        return elapsed
+
+
+async def main_async(concurrency: int, turns: int) -> None:
+    total = concurrency * turns
+    for pattern in ("per-step", "streaming", "single"):
+        try:
+            elapsed = await run(pattern, concurrency, turns)
+        except sqlite3.OperationalError as exc:
+            print(f"{pattern:>9}: failed ({exc})")
+            continue
+        print(f"{pattern:>9}: {total / elapsed:8.1f} turns/s ({total} turns, concurrency {concurrency})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--turns", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.concurrency, args.turns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the chat/provider hot-path logging.
+
+Replays the diagnostic output of one chat turn (request summary, per-message
+lines and a dump of the message list) three ways: ``print()`` to a
+line-buffered stream (what the endpoint used to do), the hot-path logger at
+its default level (debug events dropped), and the hot-path logger with the
+request traced (every event rendered on the queue listener thread). Times are
+measured on the calling thread, which is what a request pays; output goes to
+``os.devnull``.
+
+Usage: python scripts/benchmark_hot_path_logging.py [--rounds N]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+MESSAGES = [
+    {"role": "system", "content": "You are a helpful assistant. " * 20},
+    *[
+        {"role": "user" if index % 2 == 0 else "assistant", "content": f"Turn {index}: " + "lorem ipsum " * 40}
+        for index in range(20)
+    ],
+]
+
+
+def run_print(rounds, stream):
+    for _ in range(rounds):
+        print("🎯 CHAT COMPLETION ENDPOINT CALLED", file=stream)
+        for field in ("provider", "settings_id", "server_id", "model", "user_id", "stream"):
+            print(f"📊 {field}: value", file=stream)
+        print(f"Current messages: {MESSAGES}", file=stream)
+        for i, msg in enumerate(MESSAGES):
+            print(f"    Message {i+1}: role={msg['role']}, content={msg['content'][:50]}...", file=stream)
+        print(f"Starting streaming with model: llama3", file=stream)
+
+
+def run_hot_path(rounds, log):
+    for _ in range(rounds):
+        log.info(
+            "Chat completion endpoint called",
+            provider="ollama",
+            settings_id="settings",
+            server_id="server",
+            model="llama3",
+            user_id="user",
+            stream=True,
+        )
+        log.debug("Received %s current messages", len(MESSAGES), messages=lambda: MESSAGES)
+        for i, msg in enumerate(MESSAGES):
+            log.debug("Message %s: role=%s", i + 1, msg["role"], content=lambda: msg["content"][:50])
+        log.debug("Starting streaming with model: %s", "llama3")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    devnull = open(os.devnull, "w", buffering=1)
+    # The hot-path handlers write to stderr; create them after redirecting it.
+    sys.stderr = devnull
+
+    from app.core import hot_path_logging
+
+    log = hot_path_logging.get_hot_path_logger("chat")
+    hot_path_logging.start_hot_path_logging()
+
+    results = []
+    started = time.perf_counter()
+    run_print(args.rounds, devnull)
+    results.append(("print", time.perf_counter() - started))
+
+    hot_path_logging.begin_request_trace(None)
+    started = time.perf_counter()
+    run_hot_path(args.rounds, log)
+    results.append(("untraced", time.perf_counter() - started))
+
+    hot_path_logging._trace_active.set(True)
+    started = time.perf_counter()
+    run_hot_path(args.rounds, log)
+    results.append(("traced", time.perf_counter() - started))
+
+    started = time.perf_counter()
+    hot_path_logging.stop_hot_path_logging()
+    drain = time.perf_counter() - started
+
+    sys.stderr = sys.__stderr__
+    for label, elapsed in results:
+        print(f"{label:>9}: {elapsed * 1e6 / args.rounds:8.1f} us/turn on the request thread ({args.rounds} turns)")
+    print(f"{'drain':>9}: {drain * 1e3:8.1f} ms to flush the traced queue at shutdown")
+
+
+if __name__ == "__main__":
+    main()
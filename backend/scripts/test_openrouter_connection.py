@@ -165,39 +165,6 @@ async def fetch_setting_instances(user_id: Optional[str]) -> List[Dict[str, Any]
                     }
                 )
 
-        if not collected:
-            LOGGER.debug(
-                "Parameterized lookup returned no rows; attempting legacy SQL for user_id=%s",
-                user_id,
-            )
-            try:
-                legacy_rows = await SettingInstance.get_all(
-                    session,
-                    definition_id=DEFAULT_SETTINGS_ID,
-                    scope=SettingScope.USER.value,
-                    user_id=user_id,
-                )
-                if legacy_rows:
-                    for row in legacy_rows:
-                        if isinstance(row, dict):
-                            collected.append(row)
-                        else:
-                            collected.append(
-                                {
-                                    "id": getattr(row, "id", ""),
-                                    "value": getattr(row, "value", None),
-                                    "user_id": getattr(row, "user_id", None),
-                                    "scope": getattr(row, "scope", None),
-                                }
-                            )
-            except OperationalError as exc:
-                LOGGER.warning(
-                    "settings_instances table not available (legacy lookup). Did you run migrations? %s",
-                    exc,
-                )
-            except Exception as exc:  # noqa: BLE001
-                LOGGER.error("Error during legacy settings lookup: %s", exc)
-
     if not collected:
         LOGGER.warning("No OpenRouter settings found for user_id=%s", user_id or "(any)")
 
@@ -0,0 +1,49 @@
+import pytest
+
+from app.core.audit.models import ActorType, AuditEvent, AuditEventType, EventStatus
+from app.core.audit.writer import AuditWriter
+
+
+class _Sink:
+    def __init__(self, name, failures=0):
+        self.name = name
+        self.failures = failures
+        self.written = []
+
+    async def write_batch(self, events):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("database is locked")
+        self.written.extend(events)
+
+    async def close(self):
+        pass
+
+
+def _event():
+    return AuditEvent(
+        event_type=AuditEventType.AUDIT_EVENTS_DROPPED,
+        actor_type=ActorType.SYSTEM,
+        status=EventStatus.SUCCESS,
+    )
+
+
+@pytest.mark.asyncio
+async def test_failed_sink_is_retried_once():
+    sink = _Sink("db", failures=1)
+    writer = AuditWriter(sinks=[sink])
+    await writer._write([_event(), _event()])
+    assert len(sink.written) == 2
+    assert writer.stats()["written"] == 2 and writer.stats()["dropped"] == 0
+
+
+@pytest.mark.asyncio
+async def test_batch_no_sink_accepted_counts_as_dropped():
+    healthy, broken = _Sink("ndjson"), _Sink("db", failures=10)
+    writer = AuditWriter(sinks=[broken, healthy])
+    await writer._write([_event()])
+    assert writer.stats() == {"queued": 0, "written": 1, "dropped": 0, "failed": 1}
+
+    writer = AuditWriter(sinks=[_Sink("db", failures=10)])
+    await writer._write([_event(), _event()])
+    assert writer.stats() == {"queued": 0, "written": 0, "dropped": 2, "failed": 2}
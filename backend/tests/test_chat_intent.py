@@ -0,0 +1,45 @@
+import pytest
+
+from app.services.chat_intent import MessageFeatures, analyze_message
+
+
+@pytest.mark.parametrize(
+    "text, mutation, lookup, new_task",
+    [
+        ("Mark T-12 as done", "complete", False, False),
+        ("Please update the task due date to Friday", "edit", False, False),
+        ("Create a task to call the bank", None, False, True),
+        ("Do not update anything, just show my open tasks", None, True, False),
+        ("Which tasks are due this week?", None, True, False),
+        ("task: renew passport", None, False, True),
+        ("What should I cook tonight?", None, False, False),
+    ],
+)
+def test_task_intents(text, mutation, lookup, new_task):
+    features = analyze_message(text)
+    assert features.task_mutation_kind == mutation
+    assert features.is_task_lookup is lookup
+    assert features.is_new_task is new_task
+
+
+def test_onboarding_priority_tags_and_new_page():
+    assert MessageFeatures("Let's start the onboarding interview").is_onboarding_kickoff
+    assert MessageFeatures("skip this one").is_onboarding_skip
+    assert MessageFeatures("continue").is_onboarding_resume
+    assert not MessageFeatures("continue writing my essay about dogs please").is_onboarding_resume
+    assert MessageFeatures("This is urgent, fix it").priority == "p1"
+
+    features = MessageFeatures("Add task #Home #errands tags: garden, Weekly due friday")
+    assert features.capture_tags == ["home", "errands", "garden", "weekly"]
+
+    assert MessageFeatures("Create a new project page for Garage Cleanup").mentions_new_page
+    assert MessageFeatures("Create a new project page for Garage Cleanup").new_page_request == (
+        "project",
+        "Garage Cleanup",
+    )
+    assert MessageFeatures("set up a new workspace called  Side Hustle").new_page_request == ("", "Side Hustle")
+    assert not MessageFeatures("How do pages work?").mentions_new_page
+
+
+def test_analyze_message_is_cached():
+    assert analyze_message("show my tasks") is analyze_message("show my tasks")
@@ -0,0 +1,185 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import text, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base
+from app.models.conversation import Conversation
+from app.models.job import Job, JobStatus
+from app.models.message import Message
+from app.services import conversation_search
+from app.services.conversation_search import (
+    ConversationSearchService,
+    backfill_conversation_search,
+    enqueue_conversation_search_backfill,
+)
+from app.services.job_handlers.conversation_search_backfill import ConversationSearchBackfillHandler
+from app.services.job_manager import JobManager
+
+_MIGRATION = Path(__file__).resolve().parents[1] / "migrations" / "versions" / "e5b9d2a7c3f1_add_conversation_search_index.py"
+
+
+def _create_search_index(connection) -> None:
+    spec = importlib.util.spec_from_file_location("conversation_search_migration", _MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with Operations.context(MigrationContext.configure(connection)):
+        migration.upgrade()
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path, monkeypatch):
+    monkeypatch.setattr(conversation_search, "_sqlite_index_available", None)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'search.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_create_search_index)
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def _add_conversation(db, user_id, title, *messages):
+    conversation = Conversation(user_id=user_id, title=title)
+    db.add(conversation)
+    await db.flush()
+    for body in messages:
+        db.add(Message(conversation_id=conversation.id, sender="user", message=body))
+    await db.commit()
+    return conversation
+
+
+async def _search(db, user_id, query, **kwargs):
+    return await ConversationSearchService(db).search(user_id, query, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_triggers_keep_index_in_step(session_factory):
+    async with session_factory() as db:
+        assert await conversation_search.search_mode(db) == "fts5"
+        conversation = await _add_conversation(db, "user1", "Garden plans", "Plant the tomatoes in May")
+
+        hits, _ = await _search(db, "user1", "tomatoes")
+        assert [hit["conversation_id"] for hit in hits] == [conversation.id]
+        assert (await _search(db, "user1", "garden"))[0][0]["message_id"] is None
+
+        message = (await db.execute(Message.__table__.select())).first()
+        await db.execute(Message.__table__.update().values(message="Plant the peppers in May"))
+        await db.execute(Conversation.__table__.update().values(title="Vegetable plans"))
+        await db.commit()
+        assert (await _search(db, "user1", "tomatoes"))[0] == []
+        assert (await _search(db, "user1", "peppers"))[0][0]["message_id"] == message.id
+        assert (await _search(db, "user1", "garden"))[0] == []
+
+        await db.execute(Conversation.__table__.delete())
+        await db.execute(Message.__table__.delete())
+        await db.commit()
+        assert (await _search(db, "user1", "peppers"))[0] == []
+        assert (await db.execute(text("SELECT COUNT(*) FROM conversation_search"))).scalar() == 0
+
+
+@pytest.mark.asyncio
+async def test_search_only_returns_own_conversations(session_factory):
+    async with session_factory() as db:
+        mine = await _add_conversation(db, "user1", "Notes", "the quarterly budget review")
+        await _add_conversation(db, "user2", "Notes", "budget for the offsite")
+
+        hits, _ = await _search(db, "user1", "budget")
+        assert [hit["conversation_id"] for hit in hits] == [mine.id]
+        assert (await _search(db, "user1", "offsite"))[0] == []
+        assert (await _search(db, "user3", "budget"))[0] == []
+
+
+@pytest.mark.asyncio
+async def test_cursor_pages_through_every_hit_once(session_factory):
+    async with session_factory() as db:
+        await _add_conversation(db, "user1", "Travel", *[f"packing list item {i}" for i in range(5)])
+        await _add_conversation(db, "user1", "Packing", "nothing else")
+
+        keys, cursor, pages = [], None, 0
+        while True:
+            hits, cursor = await _search(db, "user1", "packing", limit=2, cursor=cursor)
+            pages += 1
+            keys.extend(hit["message_id"] or hit["conversation_id"] for hit in hits)
+            ranks = [hit["rank"] for hit in hits]
+            assert ranks == sorted(ranks)
+            if cursor is None:
+                break
+
+        assert pages == 3
+        assert len(keys) == 6 and len(set(keys)) == 6
+        with pytest.raises(conversation_search.InvalidSearchCursor):
+            await _search(db, "user1", "packing", cursor="not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_snippets_are_escaped_around_marks(session_factory):
+    async with session_factory() as db:
+        await _add_conversation(db, "user1", "Markup", "<script>alert('x')</script> & the needle here")
+
+        hits, _ = await _search(db, "user1", "needle")
+        snippet = hits[0]["snippet"]
+        assert "<mark>needle</mark>" in snippet
+        assert "&lt;script&gt;" in snippet and "&amp;" in snippet
+        assert "<script>" not in snippet
+
+
+@pytest.mark.asyncio
+async def test_backfill_indexes_history_from_cursor(session_factory):
+    async with session_factory() as db:
+        first = await _add_conversation(db, "user1", "Alpha", "orchid care")
+        second = await _add_conversation(db, "user1", "Beta", "orchid repotting")
+        await db.execute(text("DELETE FROM conversation_search"))
+        await db.execute(text("DELETE FROM conversation_search_docs"))
+        await db.commit()
+
+    earlier, later = sorted([first.id, second.id])
+    report = await backfill_conversation_search(session_factory, after_id=earlier, batch_size=1)
+    assert report["conversations"] == 1 and report["last_id"] == later
+
+    async with session_factory() as db:
+        hits, _ = await _search(db, "user1", "orchid")
+        assert [hit["conversation_id"] for hit in hits] == [later]
+
+
+@pytest.mark.asyncio
+async def test_backfill_is_enqueued_once_resumes_after_failure_and_reruns_after_completion(session_factory, monkeypatch):
+    from app.core import job_manager_provider
+
+    manager = JobManager(session_factory)
+    await manager.register_handler(ConversationSearchBackfillHandler())
+
+    async def _get_job_manager():
+        return manager
+
+    monkeypatch.setattr(job_manager_provider, "get_job_manager", _get_job_manager)
+
+    job_id = await enqueue_conversation_search_backfill("user1")
+    assert await enqueue_conversation_search_backfill("user1") == job_id
+
+    await manager.record_progress_event(job_id=job_id, event_type="progress", data={"last_id": "abc"})
+    async with manager.session() as session:
+        await session.execute(update(Job).where(Job.id == job_id).values(status=JobStatus.FAILED.value))
+        await session.commit()
+
+    assert await enqueue_conversation_search_backfill("user1") == job_id
+    requeued = await manager.get_job(job_id)
+    assert requeued.status == JobStatus.QUEUED.value
+    assert requeued.payload == {"user_id": "user1", "after_id": "abc"}
+
+    async with manager.session() as session:
+        await session.execute(update(Job).where(Job.id == job_id).values(status=JobStatus.COMPLETED.value))
+        await session.commit()
+
+    # Conversations restored after a completed pass need a new backfill, from the start.
+    rerun_id = await enqueue_conversation_search_backfill("user1")
+    assert rerun_id != job_id
+    rerun = await manager.get_job(rerun_id)
+    assert rerun.status == JobStatus.QUEUED.value
+    assert rerun.payload == {"user_id": "user1"}
+    assert await enqueue_conversation_search_backfill("user1") == rerun_id
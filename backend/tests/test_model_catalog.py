@@ -0,0 +1,68 @@
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.core.config import settings
+from app.services import model_catalog
+from app.services.job_handlers import model_catalog_refresh
+from app.services.job_handlers.model_catalog_refresh import ModelCatalogRefreshHandler
+from app.services.model_catalog import ModelCatalogService
+
+USER_ID = "user1"
+
+
+class _Context:
+    def __init__(self, user_id):
+        self.payload = {"user_id": user_id}
+
+    @asynccontextmanager
+    async def session(self):
+        yield None
+
+    async def report_progress(self, **kwargs):
+        pass
+
+
+@pytest.fixture
+def service(monkeypatch):
+    async def _no_sources(db, user_id):
+        return [], []
+
+    service = ModelCatalogService()
+    monkeypatch.setattr(model_catalog, "resolve_model_sources", _no_sources)
+    monkeypatch.setattr(model_catalog_refresh, "get_model_catalog_service", lambda: service)
+    monkeypatch.setattr(service, "schedule_keep_warm", lambda user_id: None)
+    return service
+
+
+@pytest.fixture
+def scheduled(monkeypatch):
+    calls = []
+
+    async def _enqueue(user_id, delay_seconds):
+        calls.append(user_id)
+
+    monkeypatch.setattr(model_catalog_refresh, "enqueue_model_catalog_refresh", _enqueue)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_refresh_does_not_count_as_user_access(service, scheduled):
+    await service.refresh_user(None, USER_ID)
+    assert not service.is_active(USER_ID)
+
+
+@pytest.mark.asyncio
+async def test_keep_warm_chain_stops_after_idle_period(service, scheduled):
+    handler = ModelCatalogRefreshHandler()
+    await service.get_catalog(None, USER_ID)
+
+    assert (await handler.execute(_Context(USER_ID)))["rescheduled"]
+    assert scheduled == [USER_ID]
+
+    # No user access for longer than the idle window: the chain must end even though
+    # the job itself just refreshed the catalog.
+    service._last_access[USER_ID] -= settings.MODEL_CATALOG_WARM_IDLE_SECONDS + 1
+    assert not (await handler.execute(_Context(USER_ID)))["rescheduled"]
+    assert not (await handler.execute(_Context(USER_ID)))["rescheduled"]
+    assert scheduled == [USER_ID]
@@ -0,0 +1,27 @@
+import httpx
+import pytest
+
+from app.services.ollama_gateway import OllamaGateway
+
+SERVER = "http://ollama.test:11434"
+
+
+@pytest.mark.asyncio
+async def test_probe_marks_server_up_only_on_200():
+    statuses = [200, 502, 200]
+
+    async def handler(request):
+        return httpx.Response(statuses.pop(0), json={"version": "0.5.0"})
+
+    gateway = OllamaGateway()
+    gateway._state(SERVER).client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    assert await gateway.probe(SERVER) is True
+    assert gateway._servers[SERVER].up is True
+
+    assert await gateway.probe(SERVER) is False
+    assert gateway._servers[SERVER].up is False
+    assert "502" in gateway._servers[SERVER].last_error
+
+    assert await gateway.probe(SERVER) is True
+    assert gateway._servers[SERVER].up is True and gateway._servers[SERVER].last_error is None
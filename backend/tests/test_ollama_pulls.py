@@ -0,0 +1,154 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base
+from app.models.job import Job, JobStatus
+from app.services import ollama_pulls
+from app.services.job_handlers.ollama_install import OllamaInstallHandler
+from app.services.job_manager import JobManager, SleepJobHandler
+from app.services.ollama_pulls import OllamaPullCoordinator, OllamaPullError
+
+SERVER = "http://ollama.test:11434"
+
+
+@pytest.fixture
+def registered(monkeypatch):
+    async def _registered(server_base, api_key, model_name, digest):
+        return {"digest": digest, "size": 1, "modified_at": None}
+
+    monkeypatch.setattr(ollama_pulls, "wait_for_model_registration", _registered)
+
+
+def _stream_client(monkeypatch, responses):
+    """Serve /api/pull from ``responses``: an exception to raise or a list of NDJSON lines."""
+    calls = []
+
+    async def handler(request):
+        calls.append(json.loads(request.content))
+        outcome = responses[min(len(calls), len(responses)) - 1]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(200, content="".join(json.dumps(line) + "\n" for line in outcome))
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(ollama_pulls.ollama_gateway, "client", lambda server_base: client)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_concurrent_attaches_share_one_pull(monkeypatch, registered):
+    release = asyncio.Event()
+    started = []
+
+    async def _pull(self):
+        started.append(self.model_name)
+        await release.wait()
+        return "sha256:abc"
+
+    monkeypatch.setattr(ollama_pulls.OllamaPull, "_pull", _pull)
+    coordinator = OllamaPullCoordinator()
+
+    async with coordinator.attach(SERVER, "llama3:8b") as first:
+        async with coordinator.attach(SERVER + "/", "llama3:8b") as second:
+            assert first is second
+            assert first.subscribers == 2
+            # A different API key never joins someone else's pull.
+            async with coordinator.attach(SERVER, "llama3:8b", api_key="other") as third:
+                assert third is not first
+                release.set()
+                await asyncio.gather(first.task, third.task)
+
+    assert started == ["llama3:8b", "llama3:8b"]
+    assert first.result == {"digest": "sha256:abc", "size": 1, "modified_at": None}
+    assert coordinator.get(SERVER, "llama3:8b") is None
+
+
+@pytest.mark.asyncio
+async def test_pull_is_cancelled_when_last_subscriber_detaches(monkeypatch, registered):
+    async def _pull(self):
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(ollama_pulls.OllamaPull, "_pull", _pull)
+    coordinator = OllamaPullCoordinator()
+
+    async with coordinator.attach(SERVER, "mistral") as pull:
+        async with coordinator.attach(SERVER, "mistral"):
+            pass
+        await asyncio.sleep(0)
+        assert not pull.cancelling and not pull.task.done()
+
+    assert pull.cancelling
+    with pytest.raises(asyncio.CancelledError):
+        await pull.task
+    assert pull.done and pull.result is None
+    assert coordinator.get(SERVER, "mistral") is None
+
+
+@pytest.mark.asyncio
+async def test_interrupted_pull_resumes(monkeypatch, registered):
+    calls = _stream_client(
+        monkeypatch,
+        [
+            httpx.ReadError("connection reset"),
+            [
+                {"status": "pulling abc", "digest": "sha256:abc", "total": 10, "completed": 10},
+                {"status": "success"},
+            ],
+        ],
+    )
+    coordinator = OllamaPullCoordinator(max_resumes=2, resume_delay_seconds=0)
+
+    async with coordinator.attach(SERVER, "phi3") as pull:
+        await pull.task
+
+    assert len(calls) == 2
+    assert pull.resumes == 1
+    assert pull.error is None and pull.result is not None
+    assert pull.tracker.build_progress_payload(percent=None, stage=None, message=None)["completed_bytes"] == 10
+
+
+@pytest.mark.asyncio
+async def test_pull_fails_after_resume_limit(monkeypatch, registered):
+    calls = _stream_client(monkeypatch, [httpx.ReadError("connection reset")])
+    coordinator = OllamaPullCoordinator(max_resumes=2, resume_delay_seconds=0)
+
+    async with coordinator.attach(SERVER, "phi3") as pull:
+        await pull.task
+
+    assert len(calls) == 3
+    assert isinstance(pull.error, OllamaPullError)
+    assert pull.result is None
+
+
+@pytest.mark.asyncio
+async def test_recover_stale_jobs_requeues_resumable_jobs(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    manager = JobManager(sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+    await manager.register_handler(OllamaInstallHandler())
+    await manager.register_handler(SleepJobHandler())
+
+    install, _ = await manager.enqueue_job(
+        job_type="ollama.install", payload={"model_name": "phi3", "server_url": SERVER}, user_id="user-1"
+    )
+    sleep, _ = await manager.enqueue_job(job_type="system.sleep", payload={"seconds": 1}, user_id="user-1")
+    async with manager.session() as session:
+        await session.execute(
+            update(Job).where(Job.id.in_([install.id, sleep.id])).values(status=JobStatus.RUNNING.value)
+        )
+        await session.commit()
+
+    await manager._recover_stale_jobs()
+
+    resumed = await manager.get_job(install.id)
+    assert resumed.status == JobStatus.QUEUED.value
+    assert resumed.message == "Resuming after restart"
+    assert (await manager.get_job(sleep.id)).status == JobStatus.FAILED.value
+    await engine.dispose()
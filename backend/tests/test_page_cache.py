@@ -0,0 +1,55 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base
+from app.models.page import Page
+from app.services.page_cache import PageReadCache
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pages.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def _add_page(db, updated_at):
+    page = Page(name="Home", route="home", content={}, creator_id=uuid.uuid4().hex, updated_at=updated_at)
+    db.add(page)
+    await db.commit()
+    return page
+
+
+@pytest.mark.asyncio
+async def test_hit_is_dropped_when_another_worker_updates_the_row(session_factory):
+    cache = PageReadCache(max_entries=8, ttl_seconds=300)
+    async with session_factory() as db:
+        page = await _add_page(db, datetime.now(timezone.utc) - timedelta(minutes=5))
+        cache.store(page, cache.generation, index_route=True)
+        assert (await cache.get_by_id(db, page.id)).route == "home"
+        assert (await cache.get_by_route(db, "home")).page_id == page.id
+
+        # A write handled by another worker never reaches this cache's invalidate().
+        await db.execute(
+            update(Page).where(Page.id == page.id).values(name="Start", updated_at=datetime.now(timezone.utc))
+        )
+        await db.commit()
+        assert await cache.get_by_id(db, page.id) is None
+        assert await cache.get_by_route(db, "home") is None
+
+
+@pytest.mark.asyncio
+async def test_pages_written_within_the_last_second_are_not_cached(session_factory):
+    cache = PageReadCache(max_entries=8, ttl_seconds=300)
+    async with session_factory() as db:
+        page = await _add_page(db, datetime.now(timezone.utc))
+        cache.store(page, cache.generation)
+        assert await cache.get_by_id(db, page.id) is None
@@ -0,0 +1,78 @@
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base
+from app.models.plugin import Plugin
+from app.plugins.asset_server import PluginAssetServer, ResolvedAsset
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'plugins.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+def _candidates(root: Path):
+    return lambda plugin, path: [root / plugin.plugin_slug / f"v{plugin.version}" / path]
+
+
+@pytest.mark.asyncio
+async def test_lookup_follows_changes_made_by_another_worker(session_factory, tmp_path):
+    for version in ("1.0.0", "1.1.0"):
+        (tmp_path / "demo" / f"v{version}").mkdir(parents=True)
+        (tmp_path / "demo" / f"v{version}" / "remoteEntry.js").write_text(f"// {version}")
+
+    server = PluginAssetServer(lookup_ttl_seconds=300)
+    async with session_factory() as db:
+        db.add(Plugin(id="p1", plugin_slug="demo", name="Demo", description="", version="1.0.0", user_id="u1"))
+        await db.commit()
+
+        plugin = await server.lookup_plugin(db, "demo", user_id="u1")
+        asset = await server.resolve(plugin, "private", "remoteEntry.js", _candidates(tmp_path))
+        assert asset.path.endswith("v1.0.0/remoteEntry.js")
+
+        # Updated and then removed elsewhere: this server's invalidate() is never called.
+        await db.execute(update(Plugin).where(Plugin.id == "p1").values(version="1.1.0"))
+        await db.commit()
+        plugin = await server.lookup_plugin(db, "demo", user_id="u1")
+        assert plugin.version == "1.1.0"
+        asset = await server.resolve(plugin, "private", "remoteEntry.js", _candidates(tmp_path))
+        assert asset.path.endswith("v1.1.0/remoteEntry.js")
+
+        await db.execute(delete(Plugin).where(Plugin.id == "p1"))
+        await db.commit()
+        assert await server.lookup_plugin(db, "demo", user_id="u1") is None
+
+
+def test_if_range_uses_the_etag_that_is_sent(tmp_path):
+    bundle = tmp_path / "remoteEntry.js"
+    bundle.write_bytes(b"0123456789")
+    stat_result = bundle.stat()
+    asset = ResolvedAsset(path=str(bundle), mtime_ns=stat_result.st_mtime_ns, size=stat_result.st_size, etag='"abc123"')
+    server = PluginAssetServer()
+
+    app = FastAPI()
+
+    @app.get("/asset")
+    async def _asset(request: Request):
+        return server.build_response(request, asset, public=False)
+
+    client = TestClient(app)
+    etag = client.get("/asset").headers["etag"]
+    assert etag == '"abc123"'
+
+    response = client.get("/asset", headers={"Range": "bytes=0-3", "If-Range": etag})
+    assert response.status_code == 206 and response.content == b"0123"
+
+    response = client.get("/asset", headers={"Range": "bytes=0-3", "If-Range": '"stale"'})
+    assert response.status_code == 200 and response.content == b"0123456789"
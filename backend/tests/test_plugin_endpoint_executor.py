@@ -0,0 +1,50 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.plugins.endpoint_executor import (
+    PluginEndpointBusyError,
+    PluginEndpointExecutor,
+    PluginEndpointTimeoutError,
+)
+
+
+@pytest.mark.asyncio
+async def test_sync_handler_runs_off_event_loop():
+    executor = PluginEndpointExecutor(max_workers=2, max_concurrency_per_plugin=2, timeout_seconds=5)
+    loop_thread = threading.get_ident()
+
+    def handler(value):
+        return {"value": value, "thread": threading.get_ident()}
+
+    result = await executor.run("demo", handler, 42)
+
+    assert result["value"] == 42
+    assert result["thread"] != loop_thread
+    usage = executor.get_usage("demo")["plugins"]["demo"]
+    assert usage["calls"] == 1
+    assert usage["errors"] == 0
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_timeout_and_busy_slot_are_reported():
+    executor = PluginEndpointExecutor(max_workers=2, max_concurrency_per_plugin=1, timeout_seconds=0.1)
+
+    def slow_handler(_):
+        time.sleep(0.4)
+
+    with pytest.raises(PluginEndpointTimeoutError):
+        await executor.run("slow", slow_handler, None)
+
+    # The timed-out thread still holds the plugin's only slot.
+    with pytest.raises(PluginEndpointBusyError):
+        await executor.run("slow", slow_handler, None)
+
+    await asyncio.sleep(0.4)
+    usage = executor.get_usage()["plugins"]["slow"]
+    assert usage["timeouts"] == 1
+    assert usage["rejected"] == 1
+    executor.shutdown()